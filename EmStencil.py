@@ -25,6 +25,8 @@ from PySide6.QtWidgets import QApplication
 from emstencil import Database as emDB
 from emstencil import MainWindow as emMain
 from emstencil import LOGGER
+from emstencil.maintenance import run_exit_maintenance
+from emstencil.usage import USAGE_RECORDER
 
 
 def main() -> None:
@@ -66,10 +68,14 @@ def main() -> None:
 def onExit() -> None:
   """On exit clean up fuction."""
   try:
-    # Close the database conneciton.
+    # Write template uses still buffered since the last timed flush, then close the connection.
     db = emDB.TemplateDB()
+    USAGE_RECORDER.flush(db)
     db.close()
 
+    # Refresh planner statistics and give back free pages if deletes left a lot behind.
+    run_exit_maintenance(emDB.DATABASE_FILE)
+
   except Exception as e:
     # Exit, printing any error that happens on exit.
     LOGGER.error(f'ERROR on exit: {e}')
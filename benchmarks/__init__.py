@@ -0,0 +1,13 @@
+"""
+ Program: Standalone performance benchmarks for EmStencil.
+    Name: Andrew Dixon            File: __init__.py
+    Date: 19 Oct 2026
+   Notes: Run from the project root, e.g. `python -m benchmarks.bench_template_memory`.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
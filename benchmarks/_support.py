@@ -0,0 +1,89 @@
+"""
+ Program: Shared helpers for the benchmark scripts.
+    Name: Andrew Dixon            File: _support.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import emstencil.Database as databaseModule
+from emstencil.Database import TemplateDB
+
+SCHEMA_PATH = Path(__file__).resolve().parents[1] / 'emstencil' / 'templates.sql'
+
+
+@contextmanager
+def scratch_template_db() -> Iterator[TemplateDB]:
+  """Fresh TemplateDB on a throwaway file; the singleton is reset before and after."""
+  with tempfile.TemporaryDirectory() as tmpDir:
+    dbPath = Path(tmpDir) / 'templates.db'
+
+    with sqlite3.connect(dbPath) as setupDB:
+      setupDB.executescript(SCHEMA_PATH.read_text(encoding='utf-8'))
+
+    originalPath = databaseModule.DATABASE_FILE
+    TemplateDB._instance = None
+    databaseModule.DATABASE_FILE = dbPath
+
+    try:
+      db = TemplateDB()
+      yield db
+      db.close()
+
+    finally:
+      TemplateDB._instance = None
+      databaseModule.DATABASE_FILE = originalPath
+
+
+def seed_templates(
+  db: TemplateDB, count: int, tagCount: int = 25, tagsPerTemplate: int = 3
+) -> None:
+  """Bulk-insert `count` templates with a small shared taxonomy, bypassing the per-row DAO."""
+  conn = db.getConnection()
+
+  with conn:
+    conn.executemany(
+      'insert into tags (tag) values (?);',
+      [(f'tag-{index:03d}',) for index in range(tagCount)],
+    )
+    conn.executemany(
+      'insert into templates (title, content) values (?, ?);',
+      [
+        (
+          f'Template {index:06d}',
+          f'<p>Hello ${{Name}}, ticket ${{Ticket}} is {index % 7} days old.</p><p>^{{Shot}}</p>',
+        )
+        for index in range(count)
+      ],
+    )
+    conn.executemany(
+      'insert into templateTags (tmplt_uid, tag_uid) values (?, ?);',
+      [
+        (templateRowID, (templateRowID + offset) % tagCount + 1)
+        for templateRowID in range(1, count + 1)
+        for offset in range(tagsPerTemplate)
+      ],
+    )
+
+
+@contextmanager
+def stopwatch(label: str) -> Iterator[None]:
+  """Print wall time for the enclosed block."""
+  started = time.perf_counter()
+  yield
+  print(f'{label}: {time.perf_counter() - started:.3f}s')
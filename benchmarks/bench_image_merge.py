@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+"""
+ Program: Merge cost for large HTML bodies with many ^{} image slots (legacy vs single pass).
+    Name: Andrew Dixon            File: bench_image_merge.py
+    Date: 19 Oct 2026
+   Notes: python -m benchmarks.bench_image_merge [--megabytes 5] [--slots 50]
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import html
+import re
+import time
+
+from emstencil.Dataclasses import EmailTemplate
+
+_SRC_EQ_DOUBLE = re.compile(r'src\s*=\s*"\s*$', re.IGNORECASE)
+_SRC_EQ_SINGLE = re.compile(r"src\s*=\s*'\s*$", re.IGNORECASE)
+
+
+def legacyMerge(body: str, fields: dict[str, str]) -> str:
+  """The previous per-field merge: one compiled pattern and a prefix lookbehind per match."""
+  for key, raw in fields.items():
+    val = str(raw).strip()
+    safe_url = html.escape(val, quote=True)
+    full_img = f'<img src="{safe_url}" alt="{html.escape(key, quote=True)}" />'
+    pat = re.compile(r'\^\{' + re.escape(key) + r'\}')
+    chunks: list[str] = []
+    pos = 0
+
+    for m in pat.finditer(body):
+      chunks.append(body[pos : m.start()])
+      prefix = body[: m.start()]
+      if _SRC_EQ_DOUBLE.search(prefix) or _SRC_EQ_SINGLE.search(prefix):
+        chunks.append(safe_url)
+      else:
+        chunks.append(full_img)
+      pos = m.end()
+
+    chunks.append(body[pos:])
+    body = ''.join(chunks)
+
+  return body
+
+
+def buildBody(megabytes: float, slots: int) -> tuple[str, dict[str, str]]:
+  """HTML body of roughly `megabytes` with `slots` image fields spread through it."""
+  filler = '<p>' + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 8 + '</p>\n'
+  perSlot = max(1, int(megabytes * 2**20 / slots / len(filler)))
+  parts: list[str] = []
+
+  for index in range(slots):
+    parts.append(filler * perSlot)
+    parts.append(f'<p>^{{Shot{index}}}</p>' if index % 2 else f'<img src="^{{Shot{index}}}" />')
+
+  payload = 'data:image/png;base64,' + base64.b64encode(b'\x89PNG' + bytes(3000)).decode('ascii')
+
+  return ''.join(parts), {f'Shot{index}': payload for index in range(slots)}
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--megabytes', type=float, default=5.0)
+  parser.add_argument('--slots', type=int, default=50)
+  parser.add_argument('--repeat', type=int, default=3)
+  args = parser.parse_args()
+
+  body, fields = buildBody(args.megabytes, args.slots)
+  template = EmailTemplate('Bench', body)
+  template.setFields(fields)
+  print(f'body {len(body) / 2**20:.1f} MiB, {args.slots} image slots')
+
+  timings: dict[str, float] = {}
+  for label, merge in (
+    ('legacy per-field', lambda: legacyMerge(template.content, template.fields)),
+    ('single pass', lambda: template.replacedText),
+  ):
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+      merged = merge()
+    timings[label] = (time.perf_counter() - started) / args.repeat
+    print(f'  {label:<17} {timings[label] * 1000:9.1f} ms  ({len(merged) / 2**20:.1f} MiB out)')
+
+  assert legacyMerge(template.content, template.fields) == template.replacedText
+  print(f'  speedup           {timings["legacy per-field"] / timings["single pass"]:9.1f}x')
+
+
+if __name__ == '__main__':
+  main()
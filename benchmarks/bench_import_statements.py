@@ -0,0 +1,78 @@
+#! /usr/bin/env python3
+"""
+ Program: SQL statements per import row, by query, for a first import and a re-import.
+    Name: Andrew Dixon            File: bench_import_statements.py
+    Date: 19 Oct 2026
+   Notes: python -m benchmarks.bench_import_statements [--rows 2000] [--tags 3]
+          Counts come from TemplateDB.queryStats: calls are round trips from Python, executions
+          are statements SQLite ran (an executemany is one call, many executions).
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from emstencil.Database import TemplateDB
+from emstencil.ImportTemplates import convertSpreadsheet
+from emstencil.spreadsheet import EXPORT_HEADERS
+from ._support import scratch_template_db
+
+
+def buildWorkbook(path: Path, rows: int, tagsPerRow: int, revision: int) -> None:
+  """Workbook of `rows` templates; each revision shifts content and one tag per row."""
+  wb = Workbook(write_only=True)
+  ws = wb.create_sheet()
+  ws.append(list(EXPORT_HEADERS))
+
+  for index in range(rows):
+    tags = [f'team-{(index + offset) % 40}' for offset in range(tagsPerRow - 1)]
+    tags.append(f'rev-{(index + revision) % 10}')
+    ws.append([f'Template {index:06d}', f'<p>Hello ${{Name}} (rev {revision})</p>', ','.join(tags)])
+
+  wb.save(path)
+
+
+def report(label: str, db: TemplateDB, rows: int, seconds: float) -> None:
+  stats = db.queryStats
+  print(
+    f'{label}: {seconds:.2f}s, {stats.total_calls / rows:.2f} calls and '
+    f'{stats.total_executions / rows:.2f} statements per row'
+  )
+
+  for name, calls in stats.calls.most_common():
+    print(
+      f'  {name:>28}: {calls / rows:6.2f} calls, {stats.executions[name] / rows:6.2f} statements'
+    )
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--rows', type=int, default=2_000)
+  parser.add_argument('--tags', type=int, default=3, help='tags per template')
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as tmpDir, scratch_template_db() as db:
+    for revision, label in enumerate(('first import', 're-import')):
+      path = Path(tmpDir) / f'import-{revision}.xlsx'
+      buildWorkbook(path, args.rows, args.tags, revision)
+
+      db.queryStats.reset()
+      started = time.perf_counter()
+      convertSpreadsheet(str(path), db, workers=0)
+      report(label, db, args.rows, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,87 @@
+#! /usr/bin/env python3
+"""
+ Program: Workbook read time for import: openpyxl reader vs the streaming multi-process reader.
+    Name: Andrew Dixon            File: bench_parallel_import.py
+    Date: 19 Oct 2026
+   Notes: python -m benchmarks.bench_parallel_import [--rows 100000] [--workers 1 2 4 8]
+          Rows are checked for equality against the openpyxl reader on every run.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from emstencil.parallel_import import read_template_rows_parallel
+from emstencil.spreadsheet import EXPORT_HEADERS, read_template_rows
+
+
+def buildWorkbook(path: Path, rows: int) -> None:
+  """Write-only workbook of `rows` HTML templates with a few tags each."""
+  wb = Workbook(write_only=True)
+  ws = wb.create_sheet()
+  ws.append(list(EXPORT_HEADERS))
+
+  for index in range(rows):
+    ws.append(
+      [
+        f'Template {index:07d}',
+        f'<p>Hello ${{Name}},</p><p>Ticket ${{Ticket}} ({index}) is now {index % 5} days old.</p>'
+        f'<p>^{{Shot}}</p><p>Regards, ${{Agent Name}}</p>',
+        f'Team {index % 40}, Region {index % 7} ,priority-{index % 3}',
+      ]
+    )
+
+  wb.save(path)
+
+
+def timed(label: str, read, baseline: float | None = None) -> tuple[float, list]:
+  started = time.perf_counter()
+  rows = read()
+  elapsed = time.perf_counter() - started
+  speedup = f' ({baseline / elapsed:.2f}x)' if baseline else ''
+  print(f'{label:>22}: {elapsed:.2f}s{speedup}')
+
+  return elapsed, rows
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--rows', type=int, default=100_000)
+  parser.add_argument(
+    '--workers', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count() or 1})
+  )
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as tmpDir:
+    path = Path(tmpDir) / 'import.xlsx'
+    buildWorkbook(path, args.rows)
+    print(
+      f'{args.rows} rows, {path.stat().st_size / 2**20:.1f} MiB workbook, {os.cpu_count()} CPU(s)'
+    )
+
+    baseline, expected = timed('openpyxl reader', lambda: read_template_rows(str(path)))
+
+    for workers in args.workers:
+      _, rows = timed(
+        f'streaming, {workers} proc',
+        lambda: read_template_rows_parallel(str(path), workers),
+        baseline,
+      )
+      assert rows == expected, f'{workers} worker(s) produced different rows'
+
+
+if __name__ == '__main__':
+  main()
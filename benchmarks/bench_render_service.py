@@ -0,0 +1,159 @@
+#! /usr/bin/env python3
+"""
+ Program: Load test for the local HTTP render service (single and batch renders, keep-alive clients).
+    Name: Andrew Dixon            File: bench_render_service.py
+    Date: 19 Oct 2026
+   Notes: python -m benchmarks.bench_render_service [--templates 2000] [--connections 32]
+            [--requests 200] [--batch 50] [--url http://127.0.0.1:8765]
+          Without --url a scratch database is seeded and the service is started in-process.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+import emstencil.Database as databaseModule
+from emstencil.render_service import TemplateCache, start_render_server
+
+from ._support import scratch_template_db, seed_templates
+
+
+def start_in_thread() -> tuple[str, int]:
+  """Run the service on its own event loop thread against the current scratch database."""
+  ready = threading.Event()
+  address: list[tuple[str, int]] = []
+
+  def serve() -> None:
+    async def main() -> None:
+      server = await start_render_server(
+        TemplateCache(databaseModule.DATABASE_FILE), '127.0.0.1', 0
+      )
+      address.append(server.sockets[0].getsockname()[:2])
+      ready.set()
+      await server.serve_forever()
+
+    asyncio.run(main())
+
+  threading.Thread(target=serve, daemon=True).start()
+  ready.wait()
+
+  return address[0]
+
+
+async def client(
+  host: str, port: int, requests: list[tuple[str, bytes]], latencies: list[float]
+) -> int:
+  """One keep-alive connection sending `requests` back to back; returns count of non-200s."""
+  reader, writer = await asyncio.open_connection(host, port)
+  failures = 0
+
+  for path, body in requests:
+    started = time.perf_counter()
+    writer.write(
+      f'POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+      f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1')
+      + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = int(head.split(b'Content-Length: ')[1].split(b'\r\n', 1)[0])
+    await reader.readexactly(length)
+    latencies.append(time.perf_counter() - started)
+    failures += not head.startswith(b'HTTP/1.1 200')
+
+  writer.close()
+
+  return failures
+
+
+def build_requests(
+  titles: list[str], perConnection: int, offset: int, batch: int
+) -> list[tuple[str, bytes]]:
+  requests: list[tuple[str, bytes]] = []
+
+  for index in range(perConnection):
+    if batch > 1:
+      items = [
+        {'title': titles[(offset + index * batch + n) % len(titles)], 'fields': _fields(index + n)}
+        for n in range(batch)
+      ]
+      requests.append(('/render-batch', json.dumps({'requests': items}).encode()))
+
+    else:
+      title = titles[(offset + index) % len(titles)]
+      requests.append((f'/render/{quote(title)}', json.dumps({'fields': _fields(index)}).encode()))
+
+  return requests
+
+
+def _fields(index: int) -> dict[str, str]:
+  return {
+    'Name': f'customer {index}',
+    'Ticket': f'INC{index:07d}',
+    'Shot': 'https://example.com/shot.png',
+  }
+
+
+async def run_load(
+  host: str, port: int, titles: list[str], args: argparse.Namespace, batch: int
+) -> None:
+  latencies: list[float] = []
+  workloads = [
+    build_requests(titles, args.requests, n * 997, batch) for n in range(args.connections)
+  ]
+  started = time.perf_counter()
+  failures = sum(await asyncio.gather(*(client(host, port, work, latencies) for work in workloads)))
+  elapsed = time.perf_counter() - started
+
+  renders = len(latencies) * batch
+  latencies.sort()
+  label = f'batch of {batch}' if batch > 1 else 'single'
+  print(
+    f'{label:>12}: {renders} renders in {elapsed:.2f}s = {renders / elapsed:,.0f} renders/s '
+    f'({len(latencies) / elapsed:,.0f} req/s); latency p50 {statistics.median(latencies) * 1000:.2f} ms, '
+    f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms; failures {failures}'
+  )
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--templates', type=int, default=2000)
+  parser.add_argument('--connections', type=int, default=32)
+  parser.add_argument('--requests', type=int, default=200, help='Requests per connection.')
+  parser.add_argument('--batch', type=int, default=50, help='Renders per /render-batch request.')
+  parser.add_argument('--url', help='Target an already running service instead of a scratch one.')
+  args = parser.parse_args()
+
+  titles = [f'Template {index:06d}' for index in range(args.templates)]
+
+  def runAll(host: str, port: int) -> None:
+    asyncio.run(run_load(host, port, titles, args, 1))
+    asyncio.run(run_load(host, port, titles, args, args.batch))
+
+  if args.url:
+    target = urlsplit(args.url)
+    runAll(target.hostname or '127.0.0.1', target.port or 80)
+    return
+
+  with scratch_template_db() as db:
+    seed_templates(db, args.templates)
+    host, port = start_in_thread()
+    print(f'{args.templates} templates, {args.connections} connections x {args.requests} requests')
+    runAll(host, port)
+
+
+if __name__ == '__main__':
+  main()
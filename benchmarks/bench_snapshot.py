@@ -0,0 +1,112 @@
+#! /usr/bin/env python3
+"""
+ Program: Snapshot cost and how long writers wait while one runs (stepped vs single-step backup).
+    Name: Andrew Dixon            File: bench_snapshot.py
+    Date: 19 Oct 2026
+   Notes: python -m benchmarks.bench_snapshot [--mib 64 256] [--write-interval 0.5]
+          A snapshot runs on a worker thread while the main thread saves one template every
+          --write-interval seconds, the way the GUI keeps working during File > Take Snapshot.
+          "stepped" is create_snapshot as shipped; "one step" copies the whole file under one read
+          lock, which is what sqlite3's backup() does by default.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import threading
+import time
+
+import emstencil.Database as databaseModule
+import emstencil.snapshots as snapshotsModule
+from emstencil.Database import TemplateDB
+from ._support import scratch_template_db
+
+WORDS = 'ticket customer order refund status update account invoice delivery thanks'.split()
+
+
+def fillDatabase(db: TemplateDB, mib: int) -> None:
+  """Templates of ~4 KiB of word soup until the file reaches `mib` MiB."""
+  rng = random.Random(mib)
+  rows = mib * 256
+
+  with db.getConnection() as conn:
+    conn.executemany(
+      'insert into templates (title, content) values (?, ?);',
+      ((f'Template {index:07d}', ' '.join(rng.choices(WORDS, k=600))) for index in range(rows)),
+    )
+
+
+def timeSnapshot(
+  db: TemplateDB, pagesPerStep: int, writeInterval: float
+) -> tuple[float, int, list[float], int]:
+  """Seconds for the snapshot, its size, each write's latency, and writes that hit 'locked'."""
+  snapshotsModule.BACKUP_PAGES_PER_STEP = pagesPerStep
+  result: list = []
+  worker = threading.Thread(
+    target=lambda: result.append(snapshotsModule.create_snapshot(databaseModule.DATABASE_FILE))
+  )
+  latencies: list[float] = []
+  locked = 0
+  rowID = 0
+  started = time.perf_counter()
+  worker.start()
+
+  while worker.is_alive():
+    rowID += 1
+    writeStarted = time.perf_counter()
+
+    try:
+      db.UpdateTemplateContents([(rowID, f'edited {rowID}')])
+
+    except sqlite3.OperationalError:
+      locked += 1
+
+    latencies.append(time.perf_counter() - writeStarted)
+    time.sleep(writeInterval)
+
+  worker.join()
+  elapsed = time.perf_counter() - started
+  snapshot = result[0]
+  size = snapshot.fileBytes
+  snapshot.path.unlink()
+
+  return elapsed, size, latencies, locked
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--mib', type=int, nargs='+', default=[64, 256])
+  parser.add_argument('--write-interval', type=float, default=0.5)
+  args = parser.parse_args()
+  stepped = snapshotsModule.BACKUP_PAGES_PER_STEP
+
+  print(
+    f'{"db MiB":>7} {"backup":>9} {"seconds":>8} {"gz MiB":>7} {"writes":>7} {"max wait":>9} {"locked":>7}'
+  )
+
+  for mib in args.mib:
+    with scratch_template_db() as db:
+      fillDatabase(db, mib)
+      dbMiB = databaseModule.DATABASE_FILE.stat().st_size / 2**20
+
+      for label, pages in (('stepped', stepped), ('one step', -1)):
+        elapsed, size, latencies, locked = timeSnapshot(db, pages, args.write_interval)
+        print(
+          f'{dbMiB:>7.0f} {label:>9} {elapsed:>8.2f} {size / 2**20:>7.1f} {len(latencies):>7} '
+          f'{max(latencies) * 1000:>6.0f} ms {locked:>7}'
+        )
+
+  snapshotsModule.BACKUP_PAGES_PER_STEP = stepped
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,90 @@
+#! /usr/bin/env python3
+"""
+ Program: Per-save cost of orphan tag cleanup as the library grows (targeted vs full sweep).
+    Name: Andrew Dixon            File: bench_tag_cleanup.py
+    Date: 19 Oct 2026
+   Notes: python -m benchmarks.bench_tag_cleanup [--sizes 1000 10000 50000] [--saves 200]
+          Each save retags one template, so every save unlinks a tag. "targeted" is the save as
+          TemplateDB runs it; the sweep columns time one full-table cleanup statement, which every
+          save used to run.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from emstencil import queries
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import MetadataTag
+from ._support import scratch_template_db, seed_templates
+
+# The statement every save ran before cleanup was scoped to the tags it unlinked.
+LEGACY_SWEEP = 'delete from tags where uid not in (select distinct tag_uid from templateTags);'
+
+
+def timeSaves(db: TemplateDB, templateCount: int, tagCount: int, saves: int) -> float:
+  """Milliseconds per UpdateTemplate that swaps one of the template's tags for another."""
+  rng = random.Random(templateCount)
+  templates = db.FetchTemplatesByRowID(rng.sample(range(1, templateCount + 1), saves))
+  started = time.perf_counter()
+
+  for template in templates:
+    tags = [str(tag) for tag in template.metadata][1:]
+    # Same names as seed_templates, so most retags link an existing tag.
+    tags.append(f'tag-{rng.randrange(tagCount):03d}')
+    template.metadata = [MetadataTag(tag) for tag in tags]
+    db.UpdateTemplate(template)
+
+  return (time.perf_counter() - started) * 1000 / len(templates)
+
+
+def timeStatement(db: TemplateDB, sql: str, repeat: int = 5) -> float:
+  """Best-of-`repeat` milliseconds for one cleanup statement (rolled back, so nothing changes)."""
+  connection = db.getConnection()
+  best = float('inf')
+
+  for _ in range(repeat):
+    started = time.perf_counter()
+    connection.execute(sql)
+    best = min(best, time.perf_counter() - started)
+    connection.rollback()
+
+  return best * 1000
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 50_000])
+  parser.add_argument('--saves', type=int, default=200)
+  args = parser.parse_args()
+
+  header = f'{"templates":>10} {"tags":>6} {"targeted save":>14}'
+  print(f'{header} {"not in sweep":>13} {"not exists sweep":>17}')
+
+  for size in args.sizes:
+    # The taxonomy grows with the library, as it does in practice.
+    tagCount = max(25, size // 20)
+
+    with scratch_template_db() as db:
+      seed_templates(db, size, tagCount=tagCount)
+      db.getConnection().execute('analyze;')
+      db.getConnection().commit()
+
+      perSave = timeSaves(db, size, tagCount, min(args.saves, size))
+      legacy = timeStatement(db, LEGACY_SWEEP)
+      sweep = timeStatement(db, queries.DELETE_EMPTY_TAGS.sql)
+
+    print(f'{size:>10} {tagCount:>6} {perSave:>11.3f} ms {legacy:>10.3f} ms {sweep:>14.3f} ms')
+
+
+if __name__ == '__main__':
+  main()
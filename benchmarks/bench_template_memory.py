@@ -0,0 +1,88 @@
+#! /usr/bin/env python3
+"""
+ Program: Retained memory of loaded template libraries (per-template vs interned representations).
+    Name: Andrew Dixon            File: bench_template_memory.py
+    Date: 19 Oct 2026
+   Notes: python -m benchmarks.bench_template_memory [--sizes 10000 100000]
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Callable
+
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate
+from ._support import scratch_template_db, seed_templates
+
+
+def loadPerTemplate(db: TemplateDB) -> list[EmailTemplate]:
+  """Pre-interning layout: fresh tag objects and a private field-kind dict for every template."""
+  templates = db.FetchAllTemplates()
+
+  for template in templates:
+    db.FetchMetadataForTemplate(template)
+    template.field_kinds = dict(template.field_kinds)
+
+  return templates
+
+
+def loadInterned(db: TemplateDB) -> list[EmailTemplate]:
+  """Bulk load with tags from the tag pool and shared field specs."""
+  return db.FetchAllTemplates(withMetadata=True)
+
+
+def loadListRows(db: TemplateDB) -> list:
+  """Read-only list rows: title plus shared tags, no content or field dictionaries."""
+  return list(db.IterateTemplateListRows())
+
+
+def measure(loader: Callable[[TemplateDB], list], db: TemplateDB) -> tuple[int, int]:
+  """Return (retained bytes, peak bytes) while the loaded list is alive."""
+  gc.collect()
+  tracemalloc.start()
+  loaded = loader(db)
+  retained, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del loaded
+
+  return retained, peak
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+  args = parser.parse_args()
+
+  loaders = [
+    ('per-template tags', loadPerTemplate),
+    ('interned tags', loadInterned),
+    ('list rows', loadListRows),
+  ]
+
+  for size in args.sizes:
+    with scratch_template_db() as db:
+      seed_templates(db, size)
+      print(f'\n{size:,} templates')
+
+      baseline = None
+      for label, loader in loaders:
+        retained, peak = measure(loader, db)
+        baseline = baseline or retained
+        print(
+          f'  {label:<18} retained {retained / 2**20:8.1f} MiB'
+          f'  peak {peak / 2**20:8.1f} MiB  ({retained / baseline:5.1%} of per-template)'
+        )
+
+
+if __name__ == '__main__':
+  main()
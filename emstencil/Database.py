@@ -14,19 +14,42 @@
 
 from __future__ import annotations
 
+import json
+import logging
 import sqlite3
+import time
+from collections import namedtuple
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
 from emstencil import Dataclasses as emClasses
 from emstencil import DATABASE_FILE
+from emstencil import queries
 from .Dataclasses import State, EmailTemplate
-from .Exceptions import AccessNullRowID
+from .Exceptions import AccessNullRowID, TagAlreadyExists, TagNotFound
+from .Logging import elapsed_ms, log_event
 from typing import Self, Sequence
 
 
+def _utf8Length(text: str) -> int:
+  return len(text.encode('utf-8', 'surrogatepass'))
+
+
 class TemplateDB:
   """Data layer class for handling translation of data to and from the database."""
 
   _instance: Self | None = None
 
+  # Columns callers may project when iterating templates; uid is always included for paging.
+  TEMPLATE_COLUMNS: tuple[str, ...] = queries.TEMPLATE_COLUMNS
+
+  # Default number of rows fetched per keyset page by the Iterate* generators.
+  PAGE_SIZE: int = 500
+
+  # Default number of templates FetchRecentTemplates returns.
+  RECENT_LIMIT: int = 20
+
   def __new__(db, *args, **kwargs) -> Self:
     """Generate new instance if one doesn't exist, return the existing one if it does."""
     if not db._instance:
@@ -36,7 +59,28 @@ class TemplateDB:
 
   def __init__(self):
     """New instance of database connection."""
-    self.DB: sqlite3.Connection = sqlite3.connect(DATABASE_FILE)
+    # File this instance writes; snapshots and backups must copy this one.
+    self.databaseFile: Path = Path(DATABASE_FILE)
+
+    # All SQL comes from the queries registry, so the statement cache is sized to hold all of it.
+    self.DB: sqlite3.Connection = sqlite3.connect(
+      self.databaseFile, cached_statements=queries.STATEMENT_CACHE_SIZE
+    )
+    # Shared tag objects for bulk loads; one MetadataTag per tag row however many templates use it.
+    self.tagPool: emClasses.TagPool = emClasses.TagPool()
+
+    # Savepoint nesting level for Transaction(); 0 means no block is open.
+    self._transactionDepth: int = 0
+
+    # Tag uids unlinked inside the open transaction, checked for orphans once before it commits.
+    self._unlinkedTagRowIDs: set[int] = set()
+
+    # Writes in the open transaction by event name: [calls, rows, bytes, seconds]. Logged as one
+    # db.* event per name when the outermost transaction commits, not one per call.
+    self._writeTally: dict[str, list] = {}
+
+    # Statements sent through _Execute/_ExecuteMany, by query name.
+    self.queryStats: queries.QueryStats = queries.QueryStats()
 
     # Be sure to enable foreign keys on database
     self.DB.execute('pragma foreign_keys = ON')
@@ -49,15 +93,53 @@ class TemplateDB:
     """Close the database connection."""
     self.DB.close()
 
-  def FetchAllTemplates(self) -> list[emClasses.EmailTemplate]:
-    """Return all templates from the DB."""
-    cursor: sqlite3.Cursor = self.DB.cursor()
-    cursor.execute(
-      """
-        Select title, content, uid
-        from templates;
-      """
-    )
+  @contextmanager
+  def Transaction(self) -> Iterator[sqlite3.Connection]:
+    """
+    Group writes so they commit together or not at all.
+      - Every write method runs in one of these, so wrapping many calls gives a single commit.
+      - Blocks nest as savepoints; an inner block that raises rolls back only its own changes.
+    """
+    savepoint = f'tx{self._transactionDepth}'
+    started = time.perf_counter()
+    self.DB.execute(f'savepoint {savepoint};')
+    self._transactionDepth += 1
+
+    # Per-transaction state as it stood at the savepoint, put back if this block rolls back.
+    unlinkedTagRowIDs = set(self._unlinkedTagRowIDs)
+    writeTally = {event: list(tally) for event, tally in self._writeTally.items()}
+
+    try:
+      yield self.DB
+
+      if self._transactionDepth == 1:
+        self._RemoveUnlinkedTags()
+
+    except BaseException:
+      self.DB.execute(f'rollback to {savepoint};')
+      self._unlinkedTagRowIDs = unlinkedTagRowIDs
+      self._writeTally = writeTally
+
+      raise
+
+    finally:
+      self._transactionDepth -= 1
+      self.DB.execute(f'release {savepoint};')
+
+    # Releasing the outer savepoint commits, unless an implicit transaction was already open.
+    if not self._transactionDepth and self.DB.in_transaction:
+      self.DB.commit()
+
+    if not self._transactionDepth:
+      self._LogWrites(started)
+
+  def FetchAllTemplates(self, withMetadata: bool = False) -> list[emClasses.EmailTemplate]:
+    """Return all templates from the DB, optionally with their metadata tags in the same pass."""
+    if withMetadata:
+      cursor = self._Execute(queries.FETCH_ALL_TEMPLATES_WITH_TAGS)
+      return [self._BuildTemplateWithTags(*row) for row in cursor]
+
+    cursor: sqlite3.Cursor = self._Execute(queries.FETCH_ALL_TEMPLATES)
 
     # Build template objects for query results.
     tmplts: list[EmailTemplate] = []
@@ -71,34 +153,53 @@ class TemplateDB:
 
   def FetchAllTemplatesForExport(self) -> list[tuple[str, str, str]]:
     """Return (title, content, tags_csv) for every template, sorted by title (case-insensitive)."""
+    return list(self.IterateTemplatesForExport())
+
+  def IterateTemplates(
+    self,
+    columns: Sequence[str] | None = None,
+    pageSize: int | None = None,
+  ) -> Iterator[tuple]:
+    """
+    Yield template rows in uid order, reading one keyset page (where uid > ? limit ?) at a time.
+    Rows are named tuples of the projected columns with uid first; pass e.g. ('title',) to skip
+    pulling content for callers that only need titles.
+    """
+    rowType = _TemplateRowType(self._ProjectTemplateColumns(columns))
+
+    for page in self._IterateKeysetPages(queries.template_page(rowType._fields), pageSize):
+      yield from map(rowType._make, page)
+
+  def IterateTemplateListRows(self, pageSize: int | None = None) -> Iterator[emClasses.TemplateListRow]:
+    """Yield read-only (rowID, title, tags) rows for list views without loading template content."""
+    for page in self._IterateKeysetPages(queries.TEMPLATE_LIST_PAGE, pageSize):
+      for templateRowID, title, tagsJson in page:
+        yield emClasses.TemplateListRow(templateRowID, title, self._SharedTagsFromJson(tagsJson))
+
+  def IterateMetadataTags(self, pageSize: int | None = None) -> Iterator[tuple[int, str]]:
+    """Yield (uid, tag) for every tag in uid order, one keyset page at a time."""
+    for page in self._IterateKeysetPages(queries.TAG_PAGE, pageSize):
+      yield from page
+
+  def IterateTemplatesForExport(self, pageSize: int | None = None) -> Iterator[tuple[str, str, str]]:
+    """Yield (title, content, tags_csv) sorted by title (case-insensitive), one page at a time."""
+    pageSize = self._CheckPageSize(pageSize)
+
+    # The empty title with uid 0 sorts before every stored row, so it seeds the first page.
     cursor: sqlite3.Cursor = self.DB.cursor()
-    cursor.execute(
-      """
-        select uid, title, content
-        from templates
-        order by title collate nocase;
-      """
-    )
-    templates = cursor.fetchall()
-
-    cursor.execute(
-      """
-        select tt.tmplt_uid, ta.tag
-        from templateTags tt
-        inner join tags ta on ta.uid = tt.tag_uid;
-      """
-    )
+    lastTitle: str = ''
+    lastRowID: int = 0
 
-    tags_by_template: dict[int, list[str]] = {}
-    for tmplt_uid, tag in cursor:
-      tags_by_template.setdefault(tmplt_uid, []).append(tag)
+    while True:
+      page = self._Execute(queries.EXPORT_PAGE, [lastTitle, lastRowID, pageSize], cursor).fetchall()
 
-    result: list[tuple[str, str, str]] = []
-    for uid, title, content in templates:
-      tags = sorted(tags_by_template.get(uid, []))
-      result.append((title, content, ','.join(tags)))
+      for _uid, title, content, tagsCSV in page:
+        yield (title, content, tagsCSV or '')
 
-    return result
+      if len(page) < pageSize:
+        return
+
+      lastRowID, lastTitle = page[-1][0], page[-1][1]
 
   def FetchMetadataForTemplate(self, tmplt: emClasses.EmailTemplate) -> emClasses.EmailTemplate:
     """Get all metadata tags associated with template."""
@@ -106,65 +207,62 @@ class TemplateDB:
     if tmplt.rowID is None or tmplt.rowID == 0:
       raise AccessNullRowID()
 
-    # Run query to get tags associated with the given template.
-    cursor: sqlite3.Cursor = self.DB.cursor()
-    cursor.execute(
-      """
-        select tgRowID, tag
-        from vw_Templates_Tags
-        where tmpRowID = ?;
-      """,
-      [tmplt.rowID],
-    )
+    # Run query to get tags associated with the given template, in tag order.
+    cursor = self._Execute(queries.FETCH_TAGS_FOR_TEMPLATE, [tmplt.rowID])
 
     # Build objects for the tags and append them to the template object.
-    tmplt.metadata = []
-    for row in cursor:
-      wkTag = emClasses.MetadataTag(row[1])
-      wkTag.rowID= row[0]
-      wkTag.assocRowID = tmplt.rowID
-      wkTag.state = State.EXISTING
-      tmplt.metadata.append(wkTag)
+    tmplt.metadata = [self._BuildMetadataTag(row[0], row[1], tmplt.rowID) for row in cursor]
 
     return tmplt
 
   def FetchTemplatesForTag(self, srchTag: str) -> list[emClasses.EmailTemplate]:
-    """Return all templates from the DB for a given meta tag."""
-    cursor: sqlite3.Cursor = self.DB.cursor()
-    cursor.execute(
-      """
-        Select title, content, tmpRowID
-        from vw_Templates_Tags
-        where tag = ?;
-      """,
-      [srchTag],
-    )
+    """Return all templates from the DB for a given meta tag, with their metadata tags attached."""
+    cursor = self._Execute(queries.FETCH_TEMPLATES_FOR_TAG, [srchTag])
 
     # Build the template objects from the query results.
-    tmplts = []
-    for row in cursor:
-      tmplt = emClasses.EmailTemplate(row[0], row[1])
-      tmplt.rowID = row[2]
-      tmplt.state = State.EXISTING
-      tmplts.append(tmplt)
+    return [self._BuildTemplateWithTags(*row) for row in cursor]
 
-    return tmplts
+  def FetchTemplatesByRowID(self, rowIDs: Iterable[int]) -> list[emClasses.EmailTemplate]:
+    """Return the templates (with tags) for the given row IDs that still exist, in uid order."""
+    cursor = self._Execute(queries.FETCH_TEMPLATES_BY_ROWID, [json.dumps(sorted(set(rowIDs)))])
+
+    return [self._BuildTemplateWithTags(*row) for row in cursor]
+
+  def FetchRecentTemplates(self, limit: int | None = None) -> list[emClasses.EmailTemplate]:
+    """Return the most used templates (with tags), ranked by uses weighted toward recent ones."""
+    cursor = self._Execute(queries.FETCH_RECENT_TEMPLATES, [limit or self.RECENT_LIMIT])
+
+    return [self._BuildTemplateWithTags(*row) for row in cursor]
+
+  def FetchMetadataTagsByName(self, tags: Iterable[str]) -> list[emClasses.MetadataTag]:
+    """Return the given tags that exist in the DB, in uid order; one indexed lookup per name."""
+    cursor = self._Execute(queries.FETCH_TAGS_BY_NAME, [json.dumps(sorted(set(tags)))])
+
+    return [self._BuildMetadataTag(tagRowID, tag, 0) for tagRowID, tag in cursor]
+
+  def FetchTagStatistics(self, tags: Iterable[str] | None = None) -> list[emClasses.TagStatistics]:
+    """
+    Usage counts per tag, most used first (ties by name); only the named tags when `tags` is given.
+      - Read from tagStats, which triggers keep current, so no templateTags aggregate runs here.
+    """
+    if tags is None:
+      cursor = self._Execute(queries.FETCH_TAG_STATISTICS)
+
+    else:
+      cursor = self._Execute(queries.FETCH_TAG_STATISTICS_BY_NAME, [json.dumps(sorted(set(tags)))])
+
+    return [
+      emClasses.TagStatistics(self._BuildMetadataTag(tagRowID, tag, 0), templateCount, lastUsed)
+      for tagRowID, tag, templateCount, lastUsed in cursor
+    ]
 
   def FetchAllMetadataTags(self) -> list[emClasses.MetadataTag]:
     """Return all metadata tags associated with template."""
-    cursor = self.DB.cursor()
-    cursor.execute(
-      """
-        select tag, uid
-        from tags;
-      """
-    )
-
     # Build the meta data tag objects to be passed back out.
     tags = []
-    for row in cursor:
-      tag = emClasses.MetadataTag(row[0])
-      tag.rowID = row[1]
+    for rowID, tagValue in self.IterateMetadataTags():
+      tag = emClasses.MetadataTag(tagValue)
+      tag.rowID = rowID
       tag.state = State.EXISTING
       tags.append(tag)
 
@@ -172,116 +270,343 @@ class TemplateDB:
 
   def AddTemplate(self, template: emClasses.EmailTemplate) -> None:
     """Add template to the database from the template object."""
-    with self.DB:
-      cursor = self.DB.cursor()
-      cursor.execute(
-        """
-          insert into templates (title, content)
-          values (?, ?);
-        """,
-        [template.title, template.content],
-      )
+    started = time.perf_counter()
+
+    with self.Transaction():
+      cursor = self._Execute(queries.INSERT_TEMPLATE, [template.title, template.content])
 
       newRowID = cursor.lastrowid
       if newRowID is None:
         raise RuntimeError('Failed to resolve new template row ID after insert.')
 
       template.rowID = newRowID
-      self._SyncTemplateTagsForRowID(template.rowID, template.metadata, cursor)
+      template.metadata = self._SyncTemplateTagsForRowID(template.rowID, template.metadata, cursor)
       template.state = State.EXISTING
+      self._TallyWrite('add_template', started, 1, _utf8Length(template.content))
 
   def DeleteTemplate(self, template: emClasses.EmailTemplate) -> None:
-    """Look for and delete the specified template from the database."""
-    templateRowID = self._ResolveTemplateRowID(template)
-
-    with self.DB:
-      cursor = self.DB.cursor()
-      # Remove all of the tags associated to this specific template.
-      cursor.execute(
-        """
-          delete from templateTags
-          where tmplt_uid = ?;
-        """,
-        [templateRowID],
-      )
-
-      # Remove the specific template from the database.
-      cursor.execute(
-        """
-          delete from templates
-          where uid = ?;
-        """,
-        [templateRowID],
-      )
-
-      # Clean up the tags table in case this was the only template utilizing the given tag.
-      self.RemoveEmptyTags(cursor)
+    """Look for and delete the specified template from the database; marks it DELETED."""
+    started = time.perf_counter()
+
+    with self.Transaction():
+      # Unlink, then remove the template, found by rowID or else by title.
+      cursor = self._Execute(queries.DELETE_LINKS_FOR_TEMPLATE, [template.rowID, template.title])
+      self._unlinkedTagRowIDs.update(row[0] for row in cursor)
+      cursor = self._Execute(queries.DELETE_TEMPLATE, [template.rowID, template.title], cursor)
+      self._ResolveTemplateRowID(template, cursor)
+      template.state = State.DELETED
+      self._TallyWrite('delete_template', started, 1)
 
     return
 
   def UpdateTemplate(self, template: emClasses.EmailTemplate) -> None:
     """Update the template passed in the database. This will update all fields."""
-    templateRowID = self._ResolveTemplateRowID(template)
+    started = time.perf_counter()
 
-    with self.DB:
-      cursor = self.DB.cursor()
-      cursor.execute(
-        """
-          update templates
-          set title = ?, content = ?
-          where uid = ?;
-        """,
-        [template.title, template.content, templateRowID],
+    with self.Transaction():
+      # Found by rowID, or by title when the template has none yet.
+      cursor = self._Execute(
+        queries.UPDATE_TEMPLATE, [template.title, template.content, template.rowID]
       )
+      templateRowID = self._ResolveTemplateRowID(template, cursor)
 
-      self._SyncTemplateTagsForRowID(templateRowID, template.metadata, cursor)
-      template.rowID = templateRowID
+      template.metadata = self._SyncTemplateTagsForRowID(templateRowID, template.metadata, cursor)
       template.state= State.EXISTING
+      self._TallyWrite('update_template', started, 1, _utf8Length(template.content))
 
   def UpsertTemplateByTitle(self, template: emClasses.EmailTemplate) -> None:
     """Add or update template and metadata by title."""
-    row: tuple[int, str, str] | None = self._FetchTemplateRowByTitle(template.title)
+    started = time.perf_counter()
 
-    if row is None:
-      self.AddTemplate(template)
-      return
+    with self.Transaction():
+      # One statement inserts a new title or rewrites the existing row, returning its uid.
+      cursor = self._Execute(queries.UPSERT_TEMPLATE, [template.title, template.content])
+      uidRow: tuple[int] | None = cursor.fetchone()
 
-    template.rowID = row[0]
-    self.UpdateTemplate(template)
+      # Unchanged content is not rewritten and returns no uid; the title still finds the row.
+      if uidRow is None:
+        uidRow = self._Execute(queries.TEMPLATE_UID_BY_TITLE, [template.title], cursor).fetchone()
 
-  def RemoveEmptyTags(self, cursor: sqlite3.Cursor | None = None) -> None:
-    """Remove any tags that have no associated templates with them."""
-    if cursor is None:
+      template.rowID = templateRowID = uidRow[0]
+
+      template.metadata = self._SyncTemplateTagsForRowID(templateRowID, template.metadata, cursor)
+      template.state = State.EXISTING
+      self._TallyWrite('upsert_template', started, 1, _utf8Length(template.content))
+
+  def UpdateTemplateContents(self, contents: Iterable[tuple[int, str]]) -> int:
+    """Rewrite content only for (template uid, content) pairs in one transaction; tags are untouched."""
+    started = time.perf_counter()
+    contents = list(contents)
+
+    with self.Transaction():
+      cursor = self._ExecuteMany(queries.UPDATE_TEMPLATE_CONTENT, contents)
+      byteCount = sum(_utf8Length(content) for _, content in contents)
+      self._TallyWrite('update_template_contents', started, cursor.rowcount, byteCount)
+
+    return cursor.rowcount
+
+  def RecordTemplateUsage(self, uses: Iterable[tuple[int, int, int, str]]) -> int:
+    """
+    Add (template uid, selects, copies, last used) to the usage totals in one transaction; returns
+    how many templates were updated. Uses of templates that no longer exist are dropped.
+    """
+    started = time.perf_counter()
+
+    with self.Transaction():
+      cursor = self._ExecuteMany(queries.UPSERT_TEMPLATE_USAGE, uses)
+      self._TallyWrite('record_template_usage', started, cursor.rowcount)
+
+    return cursor.rowcount
+
+  def RenameTag(self, tag: str, newTag: str) -> int:
+    """Rename a tag on every template carrying it; returns how many templates carry it."""
+    newName = self._CheckTagName(newTag)
+    started = time.perf_counter()
+
+    with self.Transaction():
       cursor = self.DB.cursor()
+      tagRowID = self._RequireTagRowIDs([tag], cursor)[0]
+      templateRowIDs = self._TemplateRowIDsForTags([tagRowID], cursor)
 
-    cursor.execute(
-      """
-        delete from tags
-        where uid not in
-          (select distinct tag_uid from templateTags);
-      """
-    )
+      if newName == self._CheckTagName(tag):
+        return len(templateRowIDs)
 
-    if self.DB.in_transaction:
-      return
+      if self._Execute(queries.FETCH_TAGS_BY_NAME, [json.dumps([newName])], cursor).fetchone():
+        raise TagAlreadyExists(newName)
+
+      self._Execute(queries.RENAME_TAG, [tagRowID, newName], cursor)
+      self._TallyWrite('rename_tag', started, len(templateRowIDs))
+
+    return len(templateRowIDs)
+
+  def MergeTags(self, tags: Iterable[str], intoTag: str) -> int:
+    """
+    Fold `tags` into `intoTag` (created if needed) and delete them; returns the templates retagged.
+      - The statement count does not grow with the templates: read the carriers, link the target
+        to all of them at once, delete the merged tags (their links cascade).
+    """
+    targetName = self._CheckTagName(intoTag)
+    started = time.perf_counter()
+
+    with self.Transaction():
+      cursor = self.DB.cursor()
+      sourceRowIDs = self._RequireTagRowIDs(tags, cursor)
+      targetRowID = self._GetOrCreateTagRowID(targetName, cursor)
+      sourceRowIDs = [tagRowID for tagRowID in sourceRowIDs if tagRowID != targetRowID]
+
+      if not sourceRowIDs:
+        return 0
+
+      templateRowIDs = self._TemplateRowIDsForTags(sourceRowIDs, cursor)
+      self._Execute(
+        queries.LINK_TAG_TO_TEMPLATES, [json.dumps(templateRowIDs), targetRowID], cursor
+      )
+      self._Execute(queries.DELETE_TAGS_BY_UID, [json.dumps(sourceRowIDs)], cursor)
+      self._TallyWrite('merge_tags', started, len(templateRowIDs))
+
+    return len(templateRowIDs)
+
+  def AssignTagToTemplates(self, tag: str, templateRowIDs: Iterable[int]) -> int:
+    """Add `tag` (created if needed) to the given templates; returns how many gained it."""
+    tagName = self._CheckTagName(tag)
+    started = time.perf_counter()
+
+    with self.Transaction():
+      cursor = self.DB.cursor()
+      tagRowID = self._GetOrCreateTagRowID(tagName, cursor)
+      templateRowIDsJson = json.dumps(sorted(set(templateRowIDs)))
+      linked = self._Execute(
+        queries.LINK_TAG_TO_TEMPLATES, [templateRowIDsJson, tagRowID], cursor
+      ).rowcount
+
+      # None of the templates exist: don't leave a freshly created tag behind.
+      if not linked:
+        self._unlinkedTagRowIDs.add(tagRowID)
+
+      self._TallyWrite('assign_tag', started, linked)
+
+    return linked
+
+  def RemoveTagFromTemplates(self, tag: str, templateRowIDs: Iterable[int]) -> int:
+    """Take `tag` off the given templates; returns how many lost it. An unused tag is deleted."""
+    started = time.perf_counter()
+
+    with self.Transaction():
+      cursor = self.DB.cursor()
+      tagRowID = self._RequireTagRowIDs([tag], cursor)[0]
+      templateRowIDsJson = json.dumps(sorted(set(templateRowIDs)))
+      unlinked = self._Execute(
+        queries.UNLINK_TAG_FROM_TEMPLATES, [templateRowIDsJson, tagRowID], cursor
+      ).rowcount
+      self._unlinkedTagRowIDs.add(tagRowID)
+      self._TallyWrite('remove_tag', started, unlinked)
+
+    return unlinked
+
+  def RemoveEmptyTags(self, cursor: sqlite3.Cursor | None = None) -> int:
+    """
+    Remove every tag that has no associated templates; returns how many were removed.
+      - A full sweep for maintenance. Writes clean up only the tags they unlinked, when their
+        transaction ends.
+    """
+    started = time.perf_counter()
+    removed = self._Execute(queries.DELETE_EMPTY_TAGS, cursor=cursor).rowcount
+    self._TallyWrite('remove_empty_tags', started, removed)
+
+    if self._transactionDepth:
+      return removed
 
     self.DB.commit()
+    self._LogWrites(started)
+
+    return removed
+
+  def _TallyWrite(self, event: str, started: float, rows: int, byteCount: int = 0) -> None:
+    """Add one write method call (timed from `started`) to the open transaction's tally."""
+    tally = self._writeTally.setdefault(event, [0, 0, 0, 0.0])
+    tally[0] += 1
+    tally[1] += rows
+    tally[2] += byteCount
+    tally[3] += time.perf_counter() - started
+
+  def _LogWrites(self, started: float) -> None:
+    """
+    Log the tallied writes once their transaction (begun at `started`) has committed.
+      - duration_ms is the time spent in the write methods; transaction_ms adds the commit.
+    """
+    if not self._writeTally:
+      return
 
-    return
+    transactionMs = elapsed_ms(started)
+
+    for event, (calls, rows, byteCount, seconds) in self._writeTally.items():
+      log_event(
+        f'db.{event}',
+        logging.DEBUG,
+        duration_ms=round(seconds * 1000, 3),
+        transaction_ms=transactionMs,
+        calls=calls,
+        rows=rows,
+        bytes=byteCount,
+      )
+
+    self._writeTally.clear()
+
+  def _RemoveUnlinkedTags(self) -> None:
+    """Delete the tags unlinked in this transaction that no template carries any more."""
+    if not self._unlinkedTagRowIDs:
+      return
 
-  def _ResolveTemplateRowID(self, template: emClasses.EmailTemplate) -> int:
-    """Return row ID from template object or by title."""
-    if template.rowID:
-      return template.rowID
+    tagRowIDs = sorted(self._unlinkedTagRowIDs)
+    self._unlinkedTagRowIDs.clear()
+    self._Execute(queries.DELETE_UNLINKED_TAGS, [json.dumps(tagRowIDs)])
 
-    row: tuple[int, str, str] | None = self._FetchTemplateRowByTitle(template.title)
-    if row is None or row[0] == 0:
+  def _ResolveTemplateRowID(self, template: emClasses.EmailTemplate, cursor: sqlite3.Cursor) -> int:
+    """Record the uid a `... returning uid` write reported on the template; none means no match."""
+    row: tuple[int] | None = cursor.fetchone()
+    if row is None:
       raise AccessNullRowID()
 
     template.rowID = row[0]
 
     return template.rowID
 
+  def _ProjectTemplateColumns(self, columns: Sequence[str] | None) -> tuple[str, ...]:
+    """Validate a template column projection, returning it with uid first and no duplicates."""
+    if columns is None:
+      return ('uid', 'title', 'content')
+
+    unknown = [column for column in columns if column not in self.TEMPLATE_COLUMNS]
+    if unknown:
+      raise ValueError(f'Unknown template column(s) for projection: {", ".join(unknown)}')
+
+    return tuple(dict.fromkeys(('uid', *columns)))
+
+  def _CheckPageSize(self, pageSize: int | None) -> int:
+    """Return the page size to use for keyset iteration, defaulting to PAGE_SIZE."""
+    if pageSize is None:
+      return self.PAGE_SIZE
+
+    if pageSize <= 0:
+      raise ValueError('pageSize must be a positive integer.')
+
+    return pageSize
+
+  def _Execute(
+    self, query: queries.Query, params: Sequence = (), cursor: sqlite3.Cursor | None = None
+  ) -> sqlite3.Cursor:
+    """Run one registered statement (on `cursor` when given) and count it."""
+    if cursor is None:
+      cursor = self.DB.cursor()
+
+    self.queryStats.record(query)
+
+    return cursor.execute(query.sql, params)
+
+  def _ExecuteMany(
+    self, query: queries.Query, paramSets: Iterable[Sequence], cursor: sqlite3.Cursor | None = None
+  ) -> sqlite3.Cursor:
+    """Run a registered statement once per parameter set in a single call and count it."""
+    if cursor is None:
+      cursor = self.DB.cursor()
+
+    executions: int = 0
+
+    def countedParams() -> Iterator[Sequence]:
+      nonlocal executions
+      for params in paramSets:
+        executions += 1
+        yield params
+
+    cursor.executemany(query.sql, countedParams())
+    self.queryStats.record(query, executions)
+
+    return cursor
+
+  def _IterateKeysetPages(self, query: queries.Query, pageSize: int | None) -> Iterator[list[tuple]]:
+    """Run a `where uid > ? ... limit ?` query page by page, keyed on the first column."""
+    pageSize = self._CheckPageSize(pageSize)
+    cursor: sqlite3.Cursor = self.DB.cursor()
+    lastRowID: int = 0
+
+    while True:
+      page = self._Execute(query, [lastRowID, pageSize], cursor).fetchall()
+
+      if page:
+        yield page
+
+      if len(page) < pageSize:
+        return
+
+      lastRowID = page[-1][0]
+
+  def _BuildMetadataTag(self, tagRowID: int, tag: str, templateRowID: int) -> emClasses.MetadataTag:
+    """Build an existing metadata tag object for a row read from the database."""
+    wkTag = emClasses.MetadataTag(tag)
+    wkTag.rowID = tagRowID
+    wkTag.assocRowID = templateRowID
+    wkTag.state = State.EXISTING
+
+    return wkTag
+
+  def _BuildTemplateWithTags(
+    self, title: str, content: str, templateRowID: int, tagsJson: str | None
+  ) -> emClasses.EmailTemplate:
+    """Build an existing template object from a row carrying its aggregated tags (interned)."""
+    tmplt = emClasses.EmailTemplate(title, content)
+    tmplt.rowID = templateRowID
+    tmplt.state = State.EXISTING
+    tmplt.metadata = list(self._SharedTagsFromJson(tagsJson))
+
+    return tmplt
+
+  def _SharedTagsFromJson(self, tagsJson: str | None) -> tuple[emClasses.MetadataTag, ...]:
+    """Resolve a [[tag uid, tag], ...] JSON aggregate to shared tags from the tag pool."""
+    if not tagsJson or tagsJson == '[]':
+      return ()
+
+    return tuple(self.tagPool.get(tagRowID, tag) for tagRowID, tag in json.loads(tagsJson))
+
   def _NormalizeTagList(self, tags: Sequence[emClasses.MetadataTag | str] | None) -> list[str]:
     """Normalize tags to trimmed lower-case unique list preserving order."""
     if tags is None:
@@ -300,93 +625,84 @@ class TemplateDB:
 
     return normalized
 
-  def _FetchTemplateRowByTitle(self, title: str) -> tuple[int, str, str] | None:
-    """Fetch template row by title."""
-    cursor: sqlite3.Cursor = self.DB.cursor()
-    cursor.execute(
-      """
-        select uid, title, content
-        from templates
-        where title = ?;
-      """,
-      [title],
-    )
+  def _CheckTagName(self, tag: str) -> str:
+    """Normalize a tag name for the bulk tag operations; rejects empty names and 'all'."""
+    tagName: str = tag.strip().lower()
 
-    row = cursor.fetchone()
+    if not tagName or tagName == 'all':
+      raise ValueError(f'"{tag}" cannot be used as a tag name.')
 
-    return row
+    return tagName
 
-  def _GetOrCreateTagRowID(self, tag: str, cursor: sqlite3.Cursor) -> int:
-    """Fetch existing tag row ID or create a new row."""
-    cursor.execute(
-      """
-        select uid
-        from tags
-        where tag = ?;
-      """,
-      [tag],
-    )
-    row = cursor.fetchone()
+  def _RequireTagRowIDs(self, tags: Iterable[str], cursor: sqlite3.Cursor) -> list[int]:
+    """Row IDs for the given tags in the order named; TagNotFound names the first missing one."""
+    tagNames: list[str] = self._NormalizeTagList(list(tags))
+    if not tagNames:
+      raise ValueError('No tag given.')
 
-    if row:
-      return row[0]
+    cursor = self._Execute(queries.FETCH_TAGS_BY_NAME, [json.dumps(tagNames)], cursor)
+    found = {tag: tagRowID for tagRowID, tag in cursor}
 
-    cursor.execute(
-      """
-        insert into tags (tag)
-        values (?);
-      """,
-      [tag],
-    )
+    for tag in tagNames:
+      if tag not in found:
+        raise TagNotFound(tag)
 
-    newTagRowID = cursor.lastrowid
-    if newTagRowID is None:
+    return [found[tag] for tag in tagNames]
+
+  def _TemplateRowIDsForTags(self, tagRowIDs: Sequence[int], cursor: sqlite3.Cursor) -> list[int]:
+    """Row IDs of the templates carrying any of the given tags, in uid order."""
+    cursor = self._Execute(queries.FETCH_TEMPLATE_UIDS_FOR_TAGS, [json.dumps(tagRowIDs)], cursor)
+
+    return [row[0] for row in cursor]
+
+  def _GetOrCreateTagRowID(self, tag: str, cursor: sqlite3.Cursor) -> int:
+    """Fetch existing tag row ID or create a new row."""
+    row: tuple[int] | None = self._Execute(queries.UPSERT_TAG, [tag], cursor).fetchone()
+    if row is None:
       raise RuntimeError(f'Failed to resolve row ID for tag "{tag}" after insert.')
 
-    return newTagRowID
+    return row[0]
 
   def _SyncTemplateTagsForRowID(
     self,
     templateRowID: int,
     templateTags: Sequence[emClasses.MetadataTag | str] | None,
     cursor: sqlite3.Cursor,
-  ) -> None:
-    """Sync template tag links to exactly match the provided tag list."""
+  ) -> list[emClasses.MetadataTag]:
+    """Sync template tag links to exactly match the provided tag list; returns the stored tags."""
     desiredTags: list[str] = self._NormalizeTagList(templateTags)
 
-    cursor.execute(
-      """
-        select tg.uid, tg.tag
-        from tags tg
-        inner join templateTags tmtg on tmtg.tag_uid = tg.uid
-        where tmtg.tmplt_uid = ?;
-      """,
-      [templateRowID],
-    )
-
-    existing = cursor.fetchall()
+    existing = self._Execute(queries.FETCH_TAGS_FOR_TEMPLATE, [templateRowID], cursor).fetchall()
     existingTags = {row[1]: row[0] for row in existing}
 
+    # Resolve tag rows first, then send each kind of link change as one executemany.
+    linkedTags = {
+      tag: existingTags[tag] if tag in existingTags else self._GetOrCreateTagRowID(tag, cursor)
+      for tag in desiredTags
+    }
+    newLinks = [
+      (templateRowID, tagRowID) for tag, tagRowID in linkedTags.items() if tag not in existingTags
+    ]
     desiredTagSet: set[str] = set(desiredTags)
-    existingTagSet: set[str] = set(existingTags.keys())
-
-    for tag in desiredTagSet - existingTagSet:
-      tagRowID = self._GetOrCreateTagRowID(tag, cursor)
-      cursor.execute(
-        """
-          insert into templateTags (tmplt_uid, tag_uid)
-          values (?, ?);
-        """,
-        [templateRowID, tagRowID],
-      )
+    staleLinks = [
+      (templateRowID, tagRowID) for tag, tagRowID in existingTags.items() if tag not in desiredTagSet
+    ]
+
+    if newLinks:
+      self._ExecuteMany(queries.INSERT_TEMPLATE_TAG, newLinks, cursor)
+
+    if staleLinks:
+      self._ExecuteMany(queries.DELETE_TEMPLATE_TAG, staleLinks, cursor)
+      self._unlinkedTagRowIDs.update(tagRowID for _, tagRowID in staleLinks)
+
+    # Same shape and (tag uid) order as FetchMetadataForTemplate.
+    return [
+      self._BuildMetadataTag(tagRowID, tag, templateRowID)
+      for tag, tagRowID in sorted(linkedTags.items(), key=lambda item: item[1])
+    ]
 
-    for tag in existingTagSet - desiredTagSet:
-      cursor.execute(
-        """
-          delete from templateTags
-          where tmplt_uid = ? and tag_uid = ?;
-        """,
-        [templateRowID, existingTags[tag]],
-      )
 
-    self.RemoveEmptyTags(cursor)
+@cache
+def _TemplateRowType(columns: tuple[str, ...]) -> type:
+  """Named tuple type for a template column projection, shared by every row of that shape."""
+  return namedtuple('TemplateRow', columns)
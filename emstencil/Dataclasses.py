@@ -14,10 +14,17 @@
 
 from __future__ import annotations
 
+import hashlib
 import html
 import re
+import sys
+import threading
+from collections import OrderedDict
 from enum import Enum
 from dataclasses import dataclass, field
+from collections.abc import Iterator, Mapping
+from typing import NamedTuple
+from weakref import WeakValueDictionary
 from .content_html import export_content_as_html, is_html_content
 from .Exceptions import (
   TemplateFieldKindConflict,
@@ -60,32 +67,204 @@ def _parse_placeholder_specs(content: str) -> tuple[list[str], dict[str, str]]:
   return order, kinds
 
 
-_SRC_EQ_DOUBLE = re.compile(r'src\s*=\s*"\s*$', re.IGNORECASE)
-_SRC_EQ_SINGLE = re.compile(r"src\s*=\s*'\s*$", re.IGNORECASE)
+class FieldSpec(Mapping):
+  """
+  # Shared, read-only placeholder layout for a template body.
+    - Maps each placeholder key to 'text' or 'image' and keeps first-seen key order in `order`.
+    - Templates with identical placeholder sets share one instance through intern_field_spec().
+  """
+
+  __slots__ = ('order', '_kinds', '__weakref__')
+
+  def __init__(self, order: tuple[str, ...], kinds: dict[str, str]) -> None:
+    self.order: tuple[str, ...] = order
+    self._kinds: dict[str, str] = kinds
+
+  def __getitem__(self, key: str) -> str:
+    return self._kinds[key]
+
+  def __iter__(self) -> Iterator[str]:
+    return iter(self.order)
+
+  def __len__(self) -> int:
+    return len(self.order)
+
+  def __repr__(self) -> str:
+    return f'FieldSpec({self._kinds!r})'
+
+
+# Live field specs keyed by their (key, kind) pairs; entries drop out once no template uses them.
+_FIELD_SPECS: WeakValueDictionary[tuple[tuple[str, str], ...], FieldSpec] = WeakValueDictionary()
+
+
+def intern_field_spec(order: list[str], kinds: dict[str, str]) -> FieldSpec:
+  """Return the shared FieldSpec for this placeholder layout, creating it on first use."""
+  specKey = tuple((key, kinds[key]) for key in order)
+  spec = _FIELD_SPECS.get(specKey)
+
+  if spec is None:
+    spec = FieldSpec(tuple(order), kinds)
+    _FIELD_SPECS[specKey] = spec
+
+  return spec
+
+
+def parse_field_spec(content: str) -> tuple[str, FieldSpec]:
+  """
+  Uncached parse of a raw body into (normalized content, field spec); raises
+  TemplateFieldKindConflict. For one-off bodies (e.g. editor drafts) that should not fill the cache.
+  """
+  normalized = content
+  if _content_has_image_placeholder(content) and not is_html_content(content):
+    normalized = export_content_as_html(content)
+
+  return normalized, intern_field_spec(*_parse_placeholder_specs(normalized))
+
+
+class PlaceholderCacheInfo(NamedTuple):
+  """Hit/miss statistics for the placeholder parse cache."""
+
+  hits: int
+  misses: int
+  maxsize: int
+  currsize: int
+
+
+class PlaceholderSpecCache:
+  """
+  # Bounded LRU of parsed template bodies.
+    - Maps a digest of the raw body to (normalized content, shared FieldSpec), so rebuilding
+      templates for an unchanged library skips the HTML wrap check and placeholder regex.
+    - Most bodies normalize to themselves; those entries keep only the spec and hand the
+      caller's body back. Rewritten bodies are kept, and count toward maxbytes.
+    - Bodies with conflicting placeholders are never cached; they raise on every parse.
+  """
 
+  def __init__(self, maxsize: int = 4096, maxbytes: int = 8 * 2**20) -> None:
+    self.maxsize: int = maxsize
+    self.maxbytes: int = maxbytes
+    self.hits: int = 0
+    self.misses: int = 0
+    # Memory held by the normalized bodies kept in entries.
+    self.bytes: int = 0
+    self._entries: OrderedDict[bytes, tuple[str | None, FieldSpec]] = OrderedDict()
+    self._lock = threading.Lock()
 
-def _html_merge_caret_image_field(body: str, key: str, raw) -> str:
-  """Bare ^{key} → <img src=...>; inside src=\"^{key}\" → URL only so tags stay valid."""
-  val = str(raw).strip()
-  safe_url = html.escape(val, quote=True)
-  alt = html.escape(key, quote=True)
-  full_img = f'<img src="{safe_url}" alt="{alt}" />'
-  pat = re.compile(r'\^\{' + re.escape(key) + r'\}')
+  def lookup(self, content: str) -> tuple[str, FieldSpec]:
+    """Return (normalized content, field spec) for a raw template body."""
+    digest = hashlib.blake2b(content.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    with self._lock:
+      entry = self._entries.get(digest)
+      if entry is not None:
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        normalized, spec = entry
+        return (content if normalized is None else normalized), spec
+
+      self.misses += 1
+
+    normalized, spec = parse_field_spec(content)
+    kept = None if normalized is content else normalized
+
+    with self._lock:
+      replaced = self._entries.pop(digest, None)
+      if replaced is not None:
+        self.bytes -= _kept_bytes(replaced[0])
+
+      self._entries[digest] = (kept, spec)
+      self.bytes += _kept_bytes(kept)
+      while len(self._entries) > self.maxsize or self.bytes > self.maxbytes:
+        evicted, _ = self._entries.popitem(last=False)[1]
+        self.bytes -= _kept_bytes(evicted)
+
+    return normalized, spec
+
+  def info(self) -> PlaceholderCacheInfo:
+    """Current hit/miss statistics."""
+    with self._lock:
+      return PlaceholderCacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+  def clear(self) -> None:
+    """Drop all cached entries and reset statistics."""
+    with self._lock:
+      self._entries.clear()
+      self.bytes = 0
+      self.hits = 0
+      self.misses = 0
+
+
+def _kept_bytes(normalized: str | None) -> int:
+  return 0 if normalized is None else sys.getsizeof(normalized)
+
+
+# Process-wide parse cache used by EmailTemplate.__post_init__.
+PLACEHOLDER_CACHE = PlaceholderSpecCache()
+
+
+def placeholder_cache_info() -> PlaceholderCacheInfo:
+  """Hit/miss statistics for template body parsing."""
+  return PLACEHOLDER_CACHE.info()
+
+
+# src=" or src=' immediately before a placeholder: the placeholder is an attribute value, not markup.
+_SRC_ATTR_TAIL_RE = re.compile(r"""src\s*=\s*["']\s*$""", re.IGNORECASE)
+# How far back from a placeholder the attribute context is checked; bounds the scan per match.
+_SRC_CONTEXT_WINDOW = 256
+
+
+def _is_image_url(value: str) -> bool:
+  """True for values merged as real images (data URLs or http/https links)."""
+  return value.startswith(('data:image/', 'http://', 'https://'))
+
+
+def _merge_placeholders(
+  content: str, fields: Mapping, kinds: Mapping[str, str], as_html: bool
+) -> str:
+  """
+  Substitute every ${text} and ^{image} placeholder in one pass over the body.
+    - HTML bodies escape text values; plain bodies take them verbatim.
+    - Image URLs become <img src=... alt=key />, or just the escaped URL when the placeholder is
+      already inside a src="..." attribute, so existing tags stay valid.
+    - Placeholders without a value (None) or outside the field set are left as written.
+  Values are never rescanned, so a value containing placeholder syntax is inserted literally.
+  """
   chunks: list[str] = []
   pos = 0
-  for m in pat.finditer(body):
-    chunks.append(body[pos : m.start()])
-    prefix = body[: m.start()]
-    if _SRC_EQ_DOUBLE.search(prefix) or _SRC_EQ_SINGLE.search(prefix):
-      chunks.append(safe_url)
-    else:
-      chunks.append(full_img)
+
+  for m in _PLACEHOLDER_RE.finditer(content):
+    text_key, image_key = m.group(1), m.group(2)
+    key, kind = (text_key, 'text') if text_key is not None else (image_key, 'image')
+    raw = fields.get(key)
+
+    if raw is None or kinds.get(key) != kind:
+      continue
+
+    chunks.append(content[pos : m.start()])
     pos = m.end()
-  chunks.append(body[pos:])
+
+    if as_html and kind == 'image' and _is_image_url(str(raw).strip()):
+      safe_url = html.escape(str(raw).strip(), quote=True)
+      window_start = max(m.start() - _SRC_CONTEXT_WINDOW, 0)
+
+      if _SRC_ATTR_TAIL_RE.search(content, window_start, m.start()):
+        chunks.append(safe_url)
+
+      else:
+        chunks.append(f'<img src="{safe_url}" alt="{html.escape(key, quote=True)}" />')
+
+    elif as_html:
+      chunks.append(html.escape(str(raw), quote=False))
+
+    else:
+      chunks.append(str(raw))
+
+  chunks.append(content[pos:])
+
   return ''.join(chunks)
 
 
-@dataclass(slots=True, order=True)
+@dataclass(slots=True, order=True, weakref_slot=True)
 class MetadataTag:
   """
   # Metadata Tag to associate with the template
@@ -113,6 +292,76 @@ class MetadataTag:
     return self.tag
 
 
+class TagPool:
+  """
+  # Interned metadata tags for bulk template loads.
+    - Hands out one shared MetadataTag per tag rowID so a tag used by thousands of templates is
+      stored once. Shared tags carry no per-template assocRowID (it stays 0) and must be treated
+      as read-only; build a fresh MetadataTag when a template needs its own.
+    - Tags are held weakly and disappear once no loaded template references them.
+  """
+
+  __slots__ = ('_tags',)
+
+  def __init__(self) -> None:
+    self._tags: WeakValueDictionary[int, MetadataTag] = WeakValueDictionary()
+
+  def __len__(self) -> int:
+    return len(self._tags)
+
+  def get(self, rowID: int, tag: str) -> MetadataTag:
+    """Return the shared tag for rowID, refreshing its text if the tag was renamed."""
+    shared = self._tags.get(rowID)
+
+    if shared is None:
+      shared = MetadataTag(tag)
+      shared.rowID = rowID
+      shared.state = State.EXISTING
+      self._tags[rowID] = shared
+
+    elif shared.tag != tag.lower():
+      shared.tag = tag.lower()
+
+    return shared
+
+
+@dataclass(slots=True, frozen=True)
+class TemplateListRow:
+  """
+  # Lightweight, read-only template entry for list views.
+    - rowID :: RowID for the template in the table.
+    - title :: Template title; also the string representation.
+    - tags :: Shared (interned) metadata tags attached to the template.
+  Carries no content or field dictionaries; load the EmailTemplate when one is actually opened.
+  """
+
+  rowID: int
+  title: str
+  tags: tuple[MetadataTag, ...] = ()
+
+  def __str__(self) -> str:
+    """User friendly string representation. (user)"""
+    return self.title
+
+
+@dataclass(slots=True, frozen=True)
+class TagStatistics:
+  """
+  # Usage of one metadata tag, read from the materialized tagStats table.
+    - tag :: The tag itself (rowID set); also the string representation.
+    - templateCount :: Number of templates carrying the tag.
+    - lastUsed :: When the tag was last added to a template (UTC, 'YYYY-MM-DD HH:MM:SS'), or None.
+  """
+
+  tag: MetadataTag
+  templateCount: int
+  lastUsed: str | None = None
+
+  def __str__(self) -> str:
+    """User friendly string representation. (user)"""
+    return str(self.tag)
+
+
 @dataclass(slots=True)
 class EmailTemplate:
   """
@@ -124,7 +373,8 @@ class EmailTemplate:
     - content :: The content of the email; placeholders are ${field} (text) or ^{field} (image).
     - fields :: Calculated dictionary of the fields. Store data to replace for each field as the
                 value for the dict.
-    - field_kinds :: Maps each field key to 'text' or 'image' (from placeholder syntax).
+    - field_kinds :: Read-only map of each field key to 'text' or 'image' (from placeholder syntax).
+                     A FieldSpec shared between templates with the same placeholder layout.
     - metadata :: List of either values or Metadata objects for content tags of the email
         - Using the Metadata object allows for tracking of metadata row ID's in their respective tables.
     - rowID :: RowID for this template in the table. Not set as part of init,
@@ -148,18 +398,18 @@ class EmailTemplate:
   title: str
   content: str
   fields: dict = field(default_factory=dict, init=False, repr=False)
-  field_kinds: dict[str, str] = field(default_factory=dict, init=False, repr=False)
+  field_kinds: FieldSpec = field(
+    default_factory=lambda: intern_field_spec([], {}), init=False, repr=False
+  )
   metadata: list[MetadataTag] = field(default_factory=list, repr=False)
   rowID: int = field(init=False, default=0)
   state: State = field(init=False, default=State.ADDED)
 
   def __post_init__(self) -> None:
     """Post initilization build internal requirements for template object."""
-    if _content_has_image_placeholder(self.content) and not is_html_content(self.content):
-      self.content = export_content_as_html(self.content)
-    order, kinds = _parse_placeholder_specs(self.content)
-    self.field_kinds = kinds
-    self.fields = {k: None for k in order}
+    # Parsing is memoized by body digest; identical bodies also share the normalized string.
+    self.content, self.field_kinds = PLACEHOLDER_CACHE.lookup(self.content)
+    self.fields = dict.fromkeys(self.field_kinds.order)
 
   def __str__(self) -> str:
     """User friendly string representation. (user)"""
@@ -168,28 +418,12 @@ class EmailTemplate:
   @property
   def replacedText(self) -> str:
     """Return modified text based on values from the internal dictionary."""
-    value = self.content
-    merge_as_html = is_html_content(self.content)
-
-    for key in self.fields:
-      fld_val = self.fields[key]
-
-      if merge_as_html and self.field_kinds.get(key) == 'image' and fld_val is not None:
-        v = str(fld_val).strip()
-
-        if v.startswith('data:image/') or v.startswith('http://') or v.startswith('https://'):
-          value = _html_merge_caret_image_field(value, key, fld_val)
-          continue
-
-      delim = r'\$\{' if self.field_kinds.get(key) == 'text' else r'\^\{'
-      rEx = delim + re.escape(key) + r'\}'
-      rExMatch = re.findall(rEx, self.content)
-      replacement = html.escape(str(fld_val), quote=False) if merge_as_html else fld_val
-
-      for fld in rExMatch:
-        value = value.replace(fld, replacement)
-
-    return value
+    return _merge_placeholders(
+      self.content,
+      self.fields,
+      self.field_kinds,
+      is_html_content(self.content),
+    )
 
   @property
   def fieldsSet(self) -> bool:
@@ -203,33 +437,54 @@ class EmailTemplate:
 
   def setFields(self, values: dict) -> None:
     """Update dictionary fields from external dictionary. (Preferred update method)"""
+    self._normalizeFieldValues(values, self.fields)
+
+  def renderFields(self, values: Mapping, as_html: bool | None = None) -> str:
+    """
+    Merge `values` into the content without touching self.fields.
+      - Same validation and case matching as setFields, so one cached template can serve
+        concurrent renders; pass as_html when the caller has already classified the body.
+    """
+    if as_html is None:
+      as_html = is_html_content(self.content)
+
+    return _merge_placeholders(
+      self.content,
+      self._normalizeFieldValues(values, {}),
+      self.field_kinds,
+      as_html,
+    )
+
+  def _normalizeFieldValues(self, values: Mapping, normalized: dict) -> dict:
+    """Validate keys/values against the template fields and write case-matched values into `normalized`."""
     # Verify that all keys exist in both dictionaries
     if len(list(set(self.fields).symmetric_difference(values))) != 0:
       raise TemplateKeyValueMismatch(source=values, dest=self.fields)
 
-    else:
-      # Add values, ensuring we add ALL values to the dictionary.
-      # Field dialog supplies plain text; match case to placeholder spelling even for HTML bodies.
-      for key in values:
-        if values[key] is not None:
-          raw = values[key]
-          if self.field_kinds.get(key) == 'image':
-            self.fields[key] = raw
-          elif key.islower():
-            self.fields[key] = raw.lower()
-
-          elif key.isupper():
-            self.fields[key] = raw.upper()
-
-          elif key.istitle():
-            self.fields[key] = raw.title()
-
-          else:
-            self.fields[key] = raw
-
-        # Throw exception for NULL values for keys.
+    # Add values, ensuring we add ALL values to the dictionary.
+    # Field dialog supplies plain text; match case to placeholder spelling even for HTML bodies.
+    for key in values:
+      if values[key] is not None:
+        raw = values[key]
+        if self.field_kinds.get(key) == 'image':
+          normalized[key] = raw
+        elif key.islower():
+          normalized[key] = raw.lower()
+
+        elif key.isupper():
+          normalized[key] = raw.upper()
+
+        elif key.istitle():
+          normalized[key] = raw.title()
+
         else:
-          raise TemplateKeyValueNull(key)
+          normalized[key] = raw
+
+      # Throw exception for NULL values for keys.
+      else:
+        raise TemplateKeyValueNull(key)
+
+    return normalized
 
   def clearFields(self) -> None:
     """Reset all values in the field dictionary back to None"""
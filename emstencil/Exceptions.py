@@ -83,3 +83,52 @@ class InvalidImportFileType(Exception):
   def __init__(self, *args: object) -> None:
     self.message = 'Corrupted or invalid file selected for import!'
     super().__init__(self.message)
+
+
+class ImportValidationFailed(ValueError):
+  """
+  ## Exception for an import file that failed pre-import validation.
+    - Nothing was written; `report` (an import_validation.ImportReport) lists every problem found.
+  """
+
+  def __init__(self, report) -> None:
+    self.report = report
+    self.message = report.summary()
+    super().__init__(self.message)
+
+
+class TagNotFound(LookupError):
+  """
+  ## Exception for a tag operation naming a tag that is not in the database.
+    - Raised by the bulk tag operations (rename, merge, remove) before anything is written.
+  """
+
+  def __init__(self, tag: str) -> None:
+    self.tag = tag
+    self.message = f'Tag "{tag}" does not exist.'
+    super().__init__(self.message)
+
+
+class TagAlreadyExists(ValueError):
+  """
+  ## Exception for renaming a tag onto a name another tag already uses.
+    - Nothing is written; merge the two tags instead.
+  """
+
+  def __init__(self, tag: str) -> None:
+    self.tag = tag
+    self.message = f'Tag "{tag}" already exists; merge the tags instead of renaming.'
+    super().__init__(self.message)
+
+
+class InvalidSnapshot(Exception):
+  """
+  ## Exception for a snapshot that cannot be restored.
+    - The file is not a compressed snapshot or does not hold a healthy SQLite database. The live
+      database is left untouched.
+  """
+
+  def __init__(self, path, reason: str) -> None:
+    self.path = path
+    self.message = f'Snapshot {path} cannot be restored: {reason}'
+    super().__init__(self.message)
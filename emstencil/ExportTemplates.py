@@ -17,7 +17,7 @@ from __future__ import annotations
 from pathlib import Path
 from PySide6.QtWidgets import QFileDialog, QMessageBox
 from .Database import TemplateDB
-from .Logging import LOGGER
+from .Logging import LOGGER, timed_event
 from .spreadsheet import write_templates_workbook
 
 
@@ -55,10 +55,11 @@ def exportTemplates(parent) -> bool:
       return False
 
   db = TemplateDB()
-  rows = db.FetchAllTemplatesForExport()
 
   try:
-    write_templates_workbook(path, rows)
+    with timed_event('export') as event:
+      written = write_templates_workbook(path, db.IterateTemplatesForExport())
+      event.update(rows=written, bytes=p.stat().st_size)
 
   except OSError as e:
     LOGGER.error(f'Export failed: {e}')
@@ -66,7 +67,7 @@ def exportTemplates(parent) -> bool:
 
     return False
 
-  LOGGER.info(f'Exported {len(rows)} template(s) to {path}')
+  LOGGER.info(f'Exported {written} template(s) to {path}')
   QMessageBox.information(parent, 'Export', 'Export completed.')
 
   return True
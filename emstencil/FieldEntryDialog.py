@@ -14,11 +14,10 @@
 
 from __future__ import annotations
 
-import base64
-import binascii
 from collections.abc import Callable
+from functools import cache
 
-from PySide6.QtCore import QBuffer, QByteArray, QIODevice, Qt
+from PySide6.QtCore import QThreadPool, Qt
 from PySide6.QtGui import (
   QContextMenuEvent,
   QFontMetrics,
@@ -36,39 +35,74 @@ from PySide6.QtWidgets import (
   QLineEdit,
   QMenu,
   QPushButton,
+  QScrollArea,
   QVBoxLayout,
   QWidget,
   QMainWindow,
 )
 from .Dataclasses import EmailTemplate
 from .Exceptions import TemplateKeyValueNull
+from .images import (
+  DEFAULT_IMAGE_POLICY,
+  LOSSLESS_IMAGE_POLICY,
+  THUMBNAIL_CACHE,
+  EncodedImage,
+  EncodeImageTask,
+  ImageEncodePolicy,
+  ThumbnailTask,
+  data_url_digest,
+  encode_image,
+)
 
 
-def qimage_to_png_data_url(img: QImage) -> str:
-  """PNG data URL for clipboard images; empty string if encoding fails."""
-  if img.isNull():
-    return ''
+# Rows built per batch as the field form scrolls; also the count built when it opens.
+FIELD_BATCH_SIZE = 30
+
+# Rows the field form shows before it scrolls.
+VISIBLE_FIELD_ROWS = 15
+
+
+def line_edit_metrics() -> QFontMetrics:
+  """Font metrics of the application's QLineEdit font, without building a throwaway widget."""
+  font = QApplication.font('QLineEdit')
+  key = font.key()
+  metrics = _METRICS_BY_FONT.get(key)
+
+  if metrics is None:
+    metrics = _METRICS_BY_FONT[key] = QFontMetrics(font)
+    _em_width_for_font.cache_clear()
+
+  return metrics
+
+
+def em_width(chars: int) -> int:
+  """Pixel width of `chars` 'M' characters in the line edit font (cached per width)."""
+  return _em_width_for_font(QApplication.font('QLineEdit').key(), chars)
+
+
+@cache
+def _em_width_for_font(fontKey: str, chars: int) -> int:
+  return line_edit_metrics().horizontalAdvance('M' * chars)
+
 
-  blob = QByteArray()
-  buf = QBuffer(blob)
-  buf.open(QIODevice.OpenModeFlag.WriteOnly)
+_METRICS_BY_FONT: dict[str, QFontMetrics] = {}
 
-  if not img.save(buf, 'PNG'):
-    return ''
 
-  encoded = base64.b64encode(blob.data()).decode('ascii')
+def qimage_to_png_data_url(img: QImage) -> str:
+  """PNG data URL for clipboard images (no downscaling); empty string if encoding fails."""
+  encoded = encode_image(img, LOSSLESS_IMAGE_POLICY)
 
-  return f'data:image/png;base64,{encoded}'
+  return encoded.data_url if encoded is not None else ''
 
 
 class ImagePasteLineEdit(QLineEdit):
-  """Pastes images via callback (no giant data URL in the field); text paste stays on the line."""
+  """Pastes images via callback as a QImage (encoding is the owner's job); text paste stays on the line."""
 
   def __init__(
     self,
     parent: QWidget | None = None,
     *,
-    on_image_pasted: Callable[[str], None] | None = None,
+    on_image_pasted: Callable[[QImage], None] | None = None,
   ) -> None:
 
     super().__init__(parent)
@@ -112,58 +146,45 @@ class ImagePasteLineEdit(QLineEdit):
 
       img = pm.toImage()
 
+    if self._on_image_pasted is not None:
+      self._on_image_pasted(img)
+      return True
+
     url = qimage_to_png_data_url(img)
 
     if not url:
       return False
 
-    if self._on_image_pasted is not None:
-      self._on_image_pasted(url)
-      return True
-
     self.setText(url)
 
     return True
 
 
-def _pixmap_from_data_url(url: str) -> QPixmap | None:
-  """Decode data:image/* URL to a pixmap, or None."""
-  u = url.strip()
-
-  if not u.startswith('data:image/'):
-    return None
-
-  try:
-    comma = u.index(',')
-    raw = base64.b64decode(u[comma + 1 :])
-
-  except (ValueError, binascii.Error):
-    return None
-
-  img = QImage.fromData(raw)
-
-  if img.isNull():
-    return None
-
-  return QPixmap.fromImage(img).scaled(
-    72,
-    72,
-    Qt.AspectRatioMode.KeepAspectRatio,
-    Qt.TransformationMode.SmoothTransformation,
-  )
-
-
 class ImageFieldRow(QWidget):
-  """Thumbnail + line edit; pasted image kept off-widget so the field does not show base64."""
+  """
+  Thumbnail + line edit; pasted image kept off-widget so the field does not show base64.
+    - Encoding and thumbnail decoding run on the global QThreadPool; results carry a serial so
+      a slow worker never overwrites a newer paste or edit.
+  """
 
-  def __init__(self, min_line_width: int, initial: str, parent: QWidget | None = None) -> None:
+  def __init__(
+    self,
+    min_line_width: int,
+    initial: str,
+    parent: QWidget | None = None,
+    *,
+    policy: ImageEncodePolicy = DEFAULT_IMAGE_POLICY,
+  ) -> None:
     super().__init__(parent)
+    self._policy = policy
     self._pasted_data_url: str | None = None
+    self._pending_image: QImage | None = None
+    self._serial = 0
     self._thumb = QLabel()
     self._thumb.setFixedSize(72, 72)
     self._thumb.setAlignment(Qt.AlignmentFlag.AlignCenter)
     self._thumb.setFrameShape(QFrame.Shape.StyledPanel)
-    self._line = ImagePasteLineEdit(self, on_image_pasted=self._store_pasted_image)
+    self._line = ImagePasteLineEdit(self, on_image_pasted=self._store_pasted_qimage)
     self._line.setMinimumWidth(min_line_width)
 
     if initial.strip().startswith('data:image/'):
@@ -186,64 +207,152 @@ class ImageFieldRow(QWidget):
     if typed.strip():
       return typed
 
+    if self._pending_image is not None:
+      # Submitted before the worker finished: encode now and drop the worker's late result.
+      self._next_serial()
+      self._apply_encoded(encode_image(self._pending_image, self._policy))
+
     return self._pasted_data_url or ''
 
+  def set_field_text(self, text: str) -> None:
+    """Reset the row to `text`, as if it had been built with it; a pending paste is dropped."""
+    if text.strip().startswith('data:image/'):
+      self._store_pasted_image(text)
+
+    else:
+      self._next_serial()
+      self._pending_image = None
+      self._pasted_data_url = None
+      self._line.setText(text)
+      self._update_placeholder()
+      self._sync_thumb()
+
+  def is_busy(self) -> bool:
+    return self._pending_image is not None
+
+  def _next_serial(self) -> int:
+    self._serial += 1
+
+    return self._serial
+
+  def _store_pasted_qimage(self, img: QImage) -> None:
+    """Clipboard paste: keep the decoded image and encode it under the policy off-thread."""
+    serial = self._next_serial()
+    self._pending_image = img
+    self._pasted_data_url = None
+    self._clear_line()
+    self._thumb.clear()
+    self._thumb.setText('…')
+    task = EncodeImageTask(serial, img, self._policy)
+    task.signals.finished.connect(self._on_encode_finished)
+    QThreadPool.globalInstance().start(task)
+
   def _store_pasted_image(self, url: str) -> None:
+    """Store an already-encoded data URL as the pasted image."""
+    self._next_serial()
+    self._pending_image = None
     self._pasted_data_url = url
+    self._clear_line()
+    self._sync_thumb()
+
+  def _clear_line(self) -> None:
     self._line.blockSignals(True)
     self._line.clear()
     self._line.blockSignals(False)
     self._update_placeholder()
-    self._sync_thumb()
+
+  def _on_encode_finished(self, serial: int, encoded: EncodedImage | None) -> None:
+    if serial == self._serial:
+      self._apply_encoded(encoded)
+
+  def _apply_encoded(self, encoded: EncodedImage | None) -> None:
+    self._pending_image = None
+
+    if encoded is None:
+      self._thumb.clear()
+      self._thumb.setText('?')
+      return
+
+    self._pasted_data_url = encoded.data_url
+
+    if not self._line.text().strip():
+      self._thumb.setPixmap(QPixmap.fromImage(encoded.thumbnail))
 
   def _on_line_text_changed(self, text: str) -> None:
     if text.strip():
       self._pasted_data_url = None
+      self._pending_image = None
 
     self._update_placeholder()
     self._sync_thumb()
 
   def _update_placeholder(self) -> None:
-    if self._pasted_data_url and not self._line.text().strip():
+    if (self._pasted_data_url or self._pending_image is not None) and not self._line.text().strip():
       self._line.setPlaceholderText('Type here to replace pasted image with URL or text')
 
     else:
       self._line.setPlaceholderText('Paste image (Ctrl+V) or type a URL / placeholder text')
 
   def _sync_thumb(self) -> None:
+    serial = self._next_serial()
     self._thumb.clear()
     typed = self._line.text().strip()
 
     if typed.startswith('data:image/'):
-      pix = _pixmap_from_data_url(self._line.text())
+      self._request_thumbnail(serial, typed)
+      return
+
+    if typed:
+      return
 
-      if pix is None:
-        self._thumb.setText('?')
+    if self._pasted_data_url:
+      self._request_thumbnail(serial, self._pasted_data_url)
 
-      else:
-        self._thumb.setPixmap(pix)
+  def _request_thumbnail(self, serial: int, url: str) -> None:
+    """Show a cached thumbnail immediately; otherwise decode it on the thread pool."""
+    thumb = THUMBNAIL_CACHE.get(data_url_digest(url))
 
+    if thumb is not None:
+      self._thumb.setPixmap(QPixmap.fromImage(thumb))
       return
 
-    if typed:
+    task = ThumbnailTask(serial, url)
+    task.signals.finished.connect(self._on_thumbnail_finished)
+    QThreadPool.globalInstance().start(task)
+
+  def _on_thumbnail_finished(self, serial: int, thumb: QImage | None) -> None:
+    if serial != self._serial:
       return
 
-    if self._pasted_data_url:
-      pix = _pixmap_from_data_url(self._pasted_data_url)
+    if thumb is None:
+      self._thumb.setText('?' if self._line.text().strip() else '')
 
-      if pix is not None:
-        self._thumb.setPixmap(pix)
+    else:
+      self._thumb.setPixmap(QPixmap.fromImage(thumb))
 
 
 class FieldEntryDialog(QDialog):
-  """Build dialog to get data for the fields in the field dictionary."""
+  """
+  Build dialog to get data for the fields in the field dictionary.
+    - Rows live in a scroll area and are built FIELD_BATCH_SIZE at a time as they scroll into
+      view, so a template with hundreds of fields opens at the cost of one screenful.
+    - The selector keeps the dialog for the selected template and reopens it with loadValues().
+  """
 
-  def __init__(self, template: EmailTemplate, parent=None):
+  def __init__(
+    self,
+    template: EmailTemplate,
+    parent=None,
+    *,
+    imagePolicy: ImageEncodePolicy = DEFAULT_IMAGE_POLICY,
+  ):
     super().__init__()
     self.setWindowTitle('Fields available for template')
     self.parent: QMainWindow | None = parent
     self.template: EmailTemplate = template
     self.dictionary: dict[str, str | int | None] = self.template.fields
+    self._imagePolicy = imagePolicy
+    self._keys: list[str] = list(self.dictionary)
     self.layout: QVBoxLayout = QVBoxLayout()
     self.setLayout(self.layout)
 
@@ -268,60 +377,125 @@ class FieldEntryDialog(QDialog):
       120,
     )
 
-    metrics = QFontMetrics(QLineEdit().font())
-    minLengthForKeys = metrics.horizontalAdvance('M' * keyLength)
-    minLengthForData = metrics.horizontalAdvance('M' * valueLength)
+    self._minLengthForKeys = em_width(keyLength)
+    self._minLengthForData = em_width(valueLength)
 
     self._value_widgets_by_key: dict[str, QLineEdit | ImageFieldRow] = {}
 
-    # Build the dialog on the fly for the keys in the database.
-    for key, value in self.dictionary.items():
-      # Create a local layout to add to the form.
-      fieldGroup = QHBoxLayout()
-      # Put field text in a label for prompting the user and set it's size.
-      label = QLabel(key)
-      label.setAlignment(Qt.AlignmentFlag.AlignRight)
-      label.setFixedWidth(minLengthForKeys)
+    # Rows go in a scrollable container; only the first batch is built up front.
+    self._rows = QWidget()
+    self._rowsLayout = QVBoxLayout(self._rows)
+    self._rowsLayout.setAlignment(Qt.AlignmentFlag.AlignTop)
+    self.scrollArea = QScrollArea()
+    self.scrollArea.setWidgetResizable(True)
+    self.scrollArea.setFrameShape(QFrame.Shape.NoFrame)
+    self.scrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+    self.scrollArea.setWidget(self._rows)
+    visibleRows = min(len(self._keys), VISIBLE_FIELD_ROWS)
+    self.scrollArea.setMinimumHeight(visibleRows * (line_edit_metrics().height() + 18))
+    self.layout.addWidget(self.scrollArea)
+
+    scrollBar = self.scrollArea.verticalScrollBar()
+    scrollBar.valueChanged.connect(self._fillViewport)
+    scrollBar.rangeChanged.connect(self._fillViewport)
+    self.loadMoreFields()
+
+    # Connect tthe accept/submit button for the dialog form.
+    button = QPushButton('Submit')
+    button.setDefault(True)
+    button.clicked.connect(self.submit)
+    button.clicked.connect(self.close)
+    self.layout.addWidget(button)
+
+  @property
+  def builtFieldCount(self) -> int:
+    return len(self._value_widgets_by_key)
+
+  def loadMoreFields(self) -> None:
+    """Build the next FIELD_BATCH_SIZE rows (label plus input) at the end of the form."""
+    start = len(self._value_widgets_by_key)
+
+    for key in self._keys[start : start + FIELD_BATCH_SIZE]:
+      self._rowsLayout.addLayout(self._buildFieldRow(key, self.dictionary.get(key)))
+
+  def _buildFieldRow(self, key: str, value: str | int | None) -> QHBoxLayout:
+    """One label + input row; the input is registered under `key` for submit()."""
+    # Create a local layout to add to the form.
+    fieldGroup = QHBoxLayout()
+    # Put field text in a label for prompting the user and set it's size.
+    label = QLabel(key)
+    label.setAlignment(Qt.AlignmentFlag.AlignRight)
+    label.setFixedWidth(self._minLengthForKeys)
+
+    if self.template.field_kinds.get(key) == 'image':
+      initial = str(value) if value else ''
 
-      if self.template.field_kinds.get(key) == 'image':
-        initial = str(value) if value else ''
+      input_widget: QLineEdit | ImageFieldRow = ImageFieldRow(
+        self._minLengthForData, initial, parent=self, policy=self._imagePolicy
+      )
 
-        input_widget: QLineEdit | ImageFieldRow = ImageFieldRow(
-          minLengthForData, initial, parent=self
-        )
+    else:
+      txt_input = QLineEdit()
+      txt_input.setMinimumWidth(self._minLengthForData)
+
+      if value:
+        txt_input.setText(str(value))
 
       else:
-        txt_input = QLineEdit()
-        txt_input.setMinimumWidth(minLengthForData)
+        txt_input.setText('')
 
-        if value:
-          txt_input.setText(str(value))
+      input_widget = txt_input
 
-        else:
-          txt_input.setText('')
+    self._value_widgets_by_key[key] = input_widget
 
-        input_widget = txt_input
+    # Group the label and the field together.
+    fieldGroup.addWidget(label)
+    fieldGroup.addWidget(input_widget)
 
-      self._value_widgets_by_key[key] = input_widget
+    return fieldGroup
 
-      # Group the label and the field together.
-      fieldGroup.addWidget(label)
-      fieldGroup.addWidget(input_widget)
+  def _fillViewport(self) -> None:
+    """Build another batch whenever the view is within a screen of the last built row."""
+    if self.builtFieldCount >= len(self._keys):
+      return
 
-      # Add the label and field group to the form.
-      self.layout.addLayout(fieldGroup)
+    scrollBar = self.scrollArea.verticalScrollBar()
 
-    # Connect tthe accept/submit button for the dialog form.
-    button = QPushButton('Submit')
-    button.setDefault(True)
-    button.clicked.connect(self.submit)
-    button.clicked.connect(self.close)
-    self.layout.addWidget(button)
+    if scrollBar.maximum() - scrollBar.value() <= self.scrollArea.viewport().height():
+      self.loadMoreFields()
+
+  def showsTemplate(self, template: EmailTemplate) -> bool:
+    """True when this dialog was built for `template` and its fields have not changed since."""
+    return template is self.template and list(template.fields) == self._keys
+
+  def loadValues(self) -> None:
+    """Refresh the built rows from the template before the dialog is shown again."""
+    # clearFields() replaces the template's dictionary, so pick up the current one.
+    self.dictionary = self.template.fields
+
+    for key, widget in self._value_widgets_by_key.items():
+      value = self.dictionary.get(key)
+      text = str(value) if value else ''
+
+      if isinstance(widget, ImageFieldRow):
+        widget.set_field_text(text)
+
+      elif widget.text() != text:
+        widget.setText(text)
 
   def submit(self) -> None:
     """Submit button for form, gather information and pass it back to the main form."""
-    for key, w in self._value_widgets_by_key.items():
-      if isinstance(w, ImageFieldRow):
+    self.dictionary = self.template.fields
+
+    for key in self._keys:
+      w = self._value_widgets_by_key.get(key)
+
+      if w is None:
+        # Never scrolled into view: submit what an untouched row would have shown.
+        value = self.dictionary.get(key)
+        self.dictionary[key] = str(value) if value else ''
+
+      elif isinstance(w, ImageFieldRow):
         self.dictionary[key] = w.field_text()
 
       else:
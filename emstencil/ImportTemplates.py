@@ -14,31 +14,70 @@
 
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass, field
+from pathlib import Path
 from PySide6.QtWidgets import QMessageBox
 from .Database import TemplateDB
 from .Dataclasses import EmailTemplate, MetadataTag
+from .Exceptions import ImportValidationFailed
+from .import_validation import is_blank_row, validate_import_rows
 from .SelectFile import FileSelectionDialog
-from .Logging import LOGGER
-from .spreadsheet import read_template_rows
+from .Logging import LOGGER, elapsed_ms, timed_event
+from .parallel_import import read_import_rows
+from .snapshots import create_snapshot
 
+# Validation report written next to the database for imports started from the application.
+IMPORT_REPORT_NAME = 'import-report.json'
 
-def importTemplates(parent) -> bool:
-  """importTemplates - Function wrapper to be called from within the application template import."""
-  # Be sure to drag in the global data paths.
-  from emstencil import DATA_DIR, DATABASE_FILE
-
-  success = False
 
+def selectImportFile(parent) -> str | None:
+  """Ask for the workbook to import; None when the user cancels."""
   dialog = FileSelectionDialog(parent)
   if dialog.exec():  # User pressed OK
-    file_path = dialog.selected_file
-    success = appConvertSpreadsheet(file_path, DATA_DIR, DATABASE_FILE)
-    LOGGER.info('Template import completed...')
+    return dialog.selected_file
+
+  QMessageBox.information(parent, 'Canceled', 'No file selected.')
+  LOGGER.info('Template import canceled...')
+
+  return None
+
+
+def prepareImport(parent, file_path: str) -> list[XlatedRow] | None:
+  """
+  Read and validate a workbook from within the application; None when validation rejected it.
+    - Nothing is written. MainWindow snapshots the database on the thread pool next, then calls
+      importTemplates with these rows, so a rejected workbook never costs a snapshot.
+  """
+  # Be sure to drag in the global data paths.
+  from emstencil import DATA_DIR
+
+  LOGGER.info(f'Selected file: {file_path}')
+
+  try:
+    with timed_event('import.read') as event:
+      return readImportWorkbook(file_path, reportPath=DATA_DIR / IMPORT_REPORT_NAME, event=event)
 
-  else:
-    QMessageBox.information(parent, 'Canceled', 'No file selected.')
-    LOGGER.info('Template import canceled...')
+  except ImportValidationFailed as e:
+    QMessageBox.warning(
+      parent,
+      'Import failed',
+      f'{e.report.summary(limit=10)}\n\nFull report: {DATA_DIR / IMPORT_REPORT_NAME}',
+    )
+    LOGGER.info('Template import rejected by validation...')
+
+  return None
+
+
+def importTemplates(templateRows: list[XlatedRow]) -> bool:
+  """
+  importTemplates - Write rows from prepareImport within the application template import.
+    - The caller takes the pre-import snapshot first.
+  """
+  with timed_event('import.write') as event:
+    success = writeImportRows(templateRows, TemplateDB(), event)
+
+  LOGGER.info('Template import completed...')
 
   return success
 
@@ -50,7 +89,7 @@ def appConvertSpreadsheet(xls_path, datadir, database) -> bool:
   LOGGER.info(f'Global database path is: {database}')
   db = TemplateDB()
 
-  return convertSpreadsheet(xls_path, db)
+  return convertSpreadsheet(xls_path, db, reportPath=Path(datadir) / IMPORT_REPORT_NAME)
 
 
 # Define a class on the fly to assign the data to to make accessing it easier.
@@ -82,42 +121,86 @@ class XlatedRow:
     return f'{self.title}'
 
 
-def convertSpreadsheet(xlsx_path: str, db: TemplateDB | None = None) -> bool:
-  """Read the first worksheet of an .xlsx file and upsert rows into the database."""
+def convertSpreadsheet(
+  xlsx_path: str,
+  db: TemplateDB | None = None,
+  workers: int | None = None,
+  reportPath: Path | None = None,
+  snapshot: bool = True,
+) -> bool:
+  """
+  Read the first worksheet of an .xlsx file and upsert rows into the database.
+    - Every row is validated first; any problem raises ImportValidationFailed before a write.
+    - All rows are written in one transaction, so an import lands completely or not at all.
+    - workers selects the reader and validation processes (0 = single process, None = by size).
+    - reportPath, when given, receives the validation report as JSON.
+    - snapshot takes a 'pre-import' snapshot of db's file once validation passes, so the
+      templates the import overwrites can be restored.
+    - Logs an 'import' event: file bytes, rows read and written, and the time of each phase.
+  """
   if db is None:
     db = TemplateDB()
 
-  templateRows: list[XlatedRow] = []
-  seenTitles: set[str] = set()
-  duplicateTitles: set[str] = set()
+  with timed_event('import') as event:
+    templateRows = readImportWorkbook(xlsx_path, workers, reportPath, event)
 
+    if snapshot and templateRows:
+      started = time.perf_counter()
+      create_snapshot(db.databaseFile, reason='pre-import')
+      event['snapshot_ms'] = elapsed_ms(started)
+
+    return writeImportRows(templateRows, db, event)
+
+
+def readImportWorkbook(
+  xlsx_path: str,
+  workers: int | None = None,
+  reportPath: Path | None = None,
+  event: dict | None = None,
+) -> list[XlatedRow]:
+  """
+  Read and validate the first worksheet; raises ImportValidationFailed, having written nothing.
+    - event, when given, receives bytes, rows_read, read_ms and validate_ms.
+  """
+  event = {} if event is None else event
   LOGGER.info('Reading spreadsheet (first sheet, row 1 skipped as header)...')
-  raw_rows = read_template_rows(xlsx_path)
+  started = time.perf_counter()
+  raw_rows = read_import_rows(xlsx_path, workers)
+  event.update(bytes=Path(xlsx_path).stat().st_size, rows_read=len(raw_rows))
+  event['read_ms'] = elapsed_ms(started)
 
-  for title, content, tag_parts in raw_rows:
-    row = XlatedRow(title=title, content=content, tags=tag_parts)
+  started = time.perf_counter()
+  report = validate_import_rows(raw_rows, str(xlsx_path), 1 if workers == 0 else workers)
+  event['validate_ms'] = elapsed_ms(started)
+  if reportPath is not None:
+    report.write(reportPath)
 
-    if row.title in seenTitles:
-      duplicateTitles.add(row.title)
+  if not report.ok:
+    LOGGER.error(report.summary())
+    raise ImportValidationFailed(report)
 
-    else:
-      seenTitles.add(row.title)
-    templateRows.append(row)
+  templateRows: list[XlatedRow] = [XlatedRow(*row) for row in raw_rows if not is_blank_row(row)]
 
   # Log how many rows were in the spreadsheet.
   LOGGER.info(f'{len(templateRows)} templates loaded from spreadsheet.')
 
-  if duplicateTitles:
-    duplicateList = ', '.join(sorted(duplicateTitles))
-    errorMsg = f'Duplicate template titles found in import file: {duplicateList}'
-    LOGGER.error(errorMsg)
-    raise ValueError(errorMsg)
+  return templateRows
+
 
-  for importedRow in templateRows:
-    template = EmailTemplate(importedRow.title, importedRow.content)
-    template.metadata: list[MetadataTag] = [MetadataTag(tag) for tag in importedRow.tags if tag]
-    db.UpsertTemplateByTitle(template)
+def writeImportRows(
+  templateRows: list[XlatedRow], db: TemplateDB, event: dict | None = None
+) -> bool:
+  """Upsert validated rows in one transaction; event, when given, receives write_ms and rows."""
+  event = {} if event is None else event
+  started = time.perf_counter()
+  with db.Transaction():
+    for importedRow in templateRows:
+      template = EmailTemplate(importedRow.title, importedRow.content)
+      template.metadata: list[MetadataTag] = [MetadataTag(tag) for tag in importedRow.tags if tag]
+      db.UpsertTemplateByTitle(template)
 
+  event['write_ms'] = elapsed_ms(started)
   LOGGER.info(f'Number of templates added: {len(templateRows)}')
+  event['rows'] = len(templateRows)
 
   return len(templateRows) > 0
@@ -3,7 +3,9 @@
  Program: Setup and present a unified debug/error logging object
     Name: Andrew Dixon            File: Logviewer.py
     Date: 30 Nov 2025
-   Notes:
+   Notes: 19 Oct 2026 - Shown through a LogIndex (log_index.py): the file is memory-mapped and
+          indexed on the thread pool, and the list view only asks for the lines it draws. Level
+          and regex filters also run on the pool, against the map.
 
    Copyright (c) 2023-2026 Andrew Dixon
 
@@ -15,37 +17,290 @@
 
 from __future__ import annotations
 
+import re
+from array import array
 from pathlib import Path
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QTextEdit, QPushButton
+from PySide6.QtCore import (
+  QAbstractListModel,
+  QModelIndex,
+  QObject,
+  QRunnable,
+  Qt,
+  QThreadPool,
+  Signal,
+)
+from PySide6.QtGui import QFontDatabase
+from PySide6.QtWidgets import (
+  QCheckBox,
+  QComboBox,
+  QDialog,
+  QHBoxLayout,
+  QLabel,
+  QLineEdit,
+  QListView,
+  QPushButton,
+  QVBoxLayout,
+)
+from .log_index import LEVELS, LogIndex, compile_search
 from .Logging import LOGGER
 
 
+class LogLineModel(QAbstractListModel):
+  """
+  Rows of a LogIndex, decoded on demand.
+    - `rows` is None for every indexed line, or the line numbers a filter kept.
+  """
+
+  def __init__(self, parent: QObject | None = None) -> None:
+    super().__init__(parent)
+    self.logIndex: LogIndex | None = None
+    self.rows: array | None = None
+
+  def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+    if parent.isValid() or self.logIndex is None:
+      return 0
+
+    return self.logIndex.lineCount if self.rows is None else len(self.rows)
+
+  def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> str | None:
+    if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+      return None
+
+    row = index.row()
+
+    return self.logIndex.line(row if self.rows is None else self.rows[row])
+
+  def setLogIndex(self, logIndex: LogIndex | None) -> None:
+    self.beginResetModel()
+    self.logIndex = logIndex
+    self.rows = None
+    self.endResetModel()
+
+  def appendLines(self, offsets: array, levels: bytearray) -> None:
+    """Add a batch from the indexer; only visible as rows while no filter is applied."""
+    first = self.logIndex.lineCount
+
+    if self.rows is None:
+      self.beginInsertRows(QModelIndex(), first, first + len(offsets) - 1)
+
+    self.logIndex.extend(offsets, levels)
+
+    if self.rows is None:
+      self.endInsertRows()
+
+  def setRows(self, rows: array | None) -> None:
+    self.beginResetModel()
+    self.rows = rows
+    self.endResetModel()
+
+
+class LogViewerSignals(QObject):
+  """Queued back to the GUI thread: batch(serial, (offsets, levels)) and finished(serial, result)."""
+
+  batch = Signal(int, object)
+  finished = Signal(int, object)
+
+
+class LogIndexTask(QRunnable):
+  """Index a LogIndex in batches off the GUI thread; the GUI thread extends the index with each."""
+
+  def __init__(self, serial: int, logIndex: LogIndex) -> None:
+    super().__init__()
+    self.serial = serial
+    self.logIndex = logIndex
+    self.signals = LogViewerSignals()
+
+  def run(self) -> None:
+    try:
+      for batch in self.logIndex.scan_lines():
+        self.signals.batch.emit(self.serial, batch)
+
+    except ValueError:
+      # The viewer closed the map under us.
+      pass
+
+    self.signals.finished.emit(self.serial, None)
+
+
+class LogFilterTask(QRunnable):
+  """Run LogIndex.matching_lines off the GUI thread and emit the kept line numbers."""
+
+  def __init__(
+    self, serial: int, logIndex: LogIndex, minLevel: int, pattern: re.Pattern[bytes] | None
+  ) -> None:
+    super().__init__()
+    self.serial = serial
+    self.logIndex = logIndex
+    self.minLevel = minLevel
+    self.pattern = pattern
+    self.signals = LogViewerSignals()
+
+  def run(self) -> None:
+    try:
+      rows = self.logIndex.matching_lines(self.minLevel, self.pattern)
+
+    except ValueError:
+      rows = None
+
+    self.signals.finished.emit(self.serial, rows)
+
+
 class LogViewer(QDialog):
+  # Level filter choices: label, lowest level code shown.
+  LEVEL_CHOICES = (
+    ('All levels', 0),
+    ('INFO and above', LEVELS[b'INFO']),
+    ('WARNING and above', LEVELS[b'WARNING']),
+    ('ERROR and above', LEVELS[b'ERROR']),
+  )
+
   def __init__(self, log_path: Path, parent=None):
     super().__init__(parent)
     self.setWindowTitle('Application Run Log')
     self.resize(900, 600)
+    self.log_path = Path(log_path)
+    self.logIndex: LogIndex | None = None
+    self.pool = QThreadPool.globalInstance()
+    # Bumped on reload and on every filter change; results for an older serial are dropped.
+    self.indexSerial = 0
+    self.filterSerial = 0
 
     layout = QVBoxLayout(self)
 
-    # QTextEdit for displaying log content (read-only)
-    self.text_area = QTextEdit()
-    self.text_area.setReadOnly(True)
-    layout.addWidget(self.text_area)
+    # Filters: level, regex search, case sensitivity
+    filters = QHBoxLayout()
+    self.levelComboBox = QComboBox()
+    for label, level in self.LEVEL_CHOICES:
+      self.levelComboBox.addItem(label, level)
+    self.levelComboBox.currentIndexChanged.connect(self.applyFilter)
+    filters.addWidget(self.levelComboBox)
+
+    self.searchEdit = QLineEdit()
+    self.searchEdit.setPlaceholderText('Search (regular expression), Enter to apply')
+    self.searchEdit.setClearButtonEnabled(True)
+    self.searchEdit.returnPressed.connect(self.applyFilter)
+    filters.addWidget(self.searchEdit, stretch=1)
+
+    self.matchCaseCheckBox = QCheckBox('Match case')
+    self.matchCaseCheckBox.toggled.connect(self.applyFilter)
+    filters.addWidget(self.matchCaseCheckBox)
+    layout.addLayout(filters)
+
+    # Virtualized list: only the rows on screen are decoded and drawn.
+    self.model = LogLineModel(self)
+    self.lineView = QListView()
+    self.lineView.setModel(self.model)
+    self.lineView.setUniformItemSizes(True)
+    self.lineView.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+    layout.addWidget(self.lineView)
+
+    buttons = QHBoxLayout()
+    self.statusLabel = QLabel()
+    buttons.addWidget(self.statusLabel, stretch=1)
+
+    reload_btn = QPushButton('Reload')
+    reload_btn.clicked.connect(self.loadLog)
+    buttons.addWidget(reload_btn)
 
     # Close button (optional)
     close_btn = QPushButton('Close')
     close_btn.clicked.connect(self.close)
-    layout.addWidget(close_btn)
+    buttons.addWidget(close_btn)
+    layout.addLayout(buttons)
+
+    self.finished.connect(self.closeLog)
     LOGGER.info('LogViewer init completed.')
 
-    # Load the log file content
+    self.loadLog()
+
+  def loadLog(self) -> None:
+    """(Re)map the log file and index it in the background."""
+    self.closeLog()
+    self.indexSerial += 1
+
     try:
-      with log_path.open('r', encoding='utf-8') as f:
-        self.text_area.setPlainText(f.read())
+      self.logIndex = LogIndex(self.log_path)
 
     except FileNotFoundError:
-      self.text_area.setPlainText('Log file not found.')
+      self.statusLabel.setText('Log file not found.')
+      return
+
+    except (OSError, ValueError) as e:
+      self.statusLabel.setText(f'Error loading log file: {e}')
+      return
+
+    self.model.setLogIndex(self.logIndex)
+    self.statusLabel.setText('Indexing log…')
+    task = LogIndexTask(self.indexSerial, self.logIndex)
+    task.signals.batch.connect(self.indexBatch)
+    task.signals.finished.connect(self.indexFinished)
+    self.pool.start(task)
+
+  def closeLog(self) -> None:
+    # Pending results carry the old serials and are dropped.
+    self.indexSerial += 1
+    self.filterSerial += 1
+    self.model.setLogIndex(None)
+
+    if self.logIndex is not None:
+      self.logIndex.close()
+      self.logIndex = None
+
+  def indexBatch(self, serial: int, batch: tuple[array, bytearray]) -> None:
+    if serial != self.indexSerial:
+      return
+
+    self.model.appendLines(*batch)
+    percent = 100 * self.logIndex.offsets[-1] // max(self.logIndex.size, 1)
+    self.statusLabel.setText(f'Indexing log… {percent}%')
+
+  def indexFinished(self, serial: int, _result: object) -> None:
+    if serial != self.indexSerial:
+      return
+
+    self.logIndex.complete = True
+    self.applyFilter()
+
+  def applyFilter(self) -> None:
+    """Filter on the chosen level and search; waits for indexing to finish."""
+    self.filterSerial += 1
+
+    if self.logIndex is None or not self.logIndex.complete:
+      return
+
+    minLevel = self.levelComboBox.currentData()
+    text = self.searchEdit.text()
+
+    try:
+      pattern = compile_search(text, not self.matchCaseCheckBox.isChecked()) if text else None
+
+    except re.error as e:
+      self.statusLabel.setText(f'Invalid search: {e}')
+      return
+
+    if pattern is None and not minLevel:
+      self.model.setRows(None)
+      self._showCount()
+      return
+
+    self.statusLabel.setText('Searching…')
+    task = LogFilterTask(self.filterSerial, self.logIndex, minLevel, pattern)
+    task.signals.finished.connect(self.filterFinished)
+    self.pool.start(task)
+
+  def filterFinished(self, serial: int, rows: array | None) -> None:
+    if serial != self.filterSerial or rows is None:
+      return
+
+    self.model.setRows(rows)
+    self._showCount()
+
+  def _showCount(self) -> None:
+    total = self.logIndex.lineCount
+    shown = self.model.rowCount()
+
+    if shown == total:
+      self.statusLabel.setText(f'{total:,} lines')
 
-    except Exception as e:
-      self.text_area.setPlainText(f'Error loading log file:\n{e}')
+    else:
+      self.statusLabel.setText(f'{shown:,} of {total:,} lines')
@@ -3,7 +3,9 @@
  Program: Setup and present a unified debug/error logging object
     Name: Andrew Dixon            File: Logging.py
     Date: 27 Nov 2025
-   Notes:
+   Notes: 19 Oct 2026 - Timed operations log structured events (log_event/timed_event). With
+          EMSTENCIL_LOG_FORMAT=json (or `cli --log-format json`) the run log is written as JSON
+          lines carrying the event fields, for `cli analyze-logs` and log aggregation.
 
    Copyright (c) 2023-2026 Andrew Dixon
 
@@ -15,16 +17,64 @@
 
 from __future__ import annotations
 
+import json
 import logging
+import multiprocessing
+import os
+import socket
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from emstencil import LOG_PATH
 
+# Line layout of the plain text log; LogViewer's index parses it.
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# 'text' or 'json' for the run log file; the console always gets text.
+LOG_FORMAT = os.environ.get('EMSTENCIL_LOG_FORMAT', 'text').lower()
+
+
+class JsonLinesFormatter(logging.Formatter):
+  """
+  One JSON object per record: ts (UTC), level, host, message, then the event fields if any.
+    - ts and level always come first, so the log viewer can find the level without parsing.
+  """
+
+  def __init__(self) -> None:
+    super().__init__()
+    self.host = socket.gethostname()
+
+  def format(self, record: logging.LogRecord) -> str:
+    entry = {
+      'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+      'level': record.levelname,
+      'host': self.host,
+      'message': record.getMessage(),
+    }
+    event = getattr(record, 'event', None)
+
+    if event is not None:
+      entry['event'] = event
+      for name, value in record.fields.items():
+        entry.setdefault(name, value)
+
+    if record.exc_info:
+      entry['exc'] = self.formatException(record.exc_info)
+
+    return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# Worker processes (import pools) import the package too; they must not truncate the parent's log.
+_WORKER_PROCESS = multiprocessing.parent_process() is not None
 
 # Configure logging
 logging.basicConfig(
   level=logging.DEBUG,  # Capture all levels
-  format='%(asctime)s - %(levelname)s - %(message)s',
+  format=TEXT_FORMAT,
   handlers=[
-    logging.FileHandler(LOG_PATH, mode='w'),  # Overwrite each run
+    # Overwrite each run; workers append, and only open the file if they log.
+    logging.FileHandler(LOG_PATH, mode='a' if _WORKER_PROCESS else 'w', delay=_WORKER_PROCESS),
     logging.StreamHandler(),  # Defaults to stderr; we'll filter below
   ],
 )
@@ -36,3 +86,63 @@ LOGGER = logging.getLogger('')
 # for handler in LOGGER.handlers:
 #     if isinstance(handler, logging.StreamHandler):
 #         handler.setLevel(logging.ERROR)
+
+
+def set_log_format(name: str) -> None:
+  """Switch the log file handlers to 'text' or 'json' lines."""
+  if name not in ('text', 'json'):
+    raise ValueError(f'Unknown log format: {name!r}')
+
+  formatter = JsonLinesFormatter() if name == 'json' else logging.Formatter(TEXT_FORMAT)
+
+  for handler in LOGGER.handlers:
+    if isinstance(handler, logging.FileHandler):
+      handler.setFormatter(formatter)
+
+
+def log_event(event: str, level: int = logging.INFO, _stacklevel: int = 2, **fields) -> None:
+  """Log `event` with its fields: as `event key=value ...` in text, as separate keys in JSON."""
+  if not LOGGER.isEnabledFor(level):
+    return
+
+  text = ' '.join(f'{name}={value}' for name, value in fields.items())
+  LOGGER.log(
+    level,
+    f'{event} {text}'.rstrip(),
+    extra={'event': event, 'fields': fields},
+    stacklevel=_stacklevel,
+  )
+
+
+def elapsed_ms(started: float) -> float:
+  """Milliseconds since `started` (a time.perf_counter() reading), to the microsecond."""
+  return round((time.perf_counter() - started) * 1000, 3)
+
+
+@contextmanager
+def timed_event(event: str, level: int = logging.INFO, **fields) -> Iterator[dict]:
+  """
+  Time the block and log `event` when it ends, with duration_ms, ok and `fields`.
+    - The block may add counts (rows, bytes, ...) to the yielded dict.
+    - An exception is logged at ERROR with ok=false and its type, then re-raised.
+  """
+  started = time.perf_counter()
+  # Attribute the record to the with-block: log_event <- here <- contextlib's __exit__ <- caller.
+  stacklevel = 4
+
+  try:
+    yield fields
+
+  except BaseException as e:
+    duration = elapsed_ms(started)
+    error = type(e).__name__
+    log_event(
+      event, logging.ERROR, stacklevel, duration_ms=duration, ok=False, error=error, **fields
+    )
+    raise
+
+  log_event(event, level, stacklevel, duration_ms=elapsed_ms(started), ok=True, **fields)
+
+
+if LOG_FORMAT == 'json':
+  set_log_format('json')
@@ -17,15 +17,33 @@
 
 from __future__ import annotations
 
+from PySide6.QtCore import QThreadPool, QTimer
 from PySide6.QtGui import QAction
-from PySide6.QtWidgets import QMainWindow, QMenu, QMessageBox
+from PySide6.QtWidgets import QInputDialog, QMainWindow, QMenu, QMessageBox
+from . import Database
+from .change_tracker import TemplateChangeTracker
 from .Dataclasses import EmailTemplate
 from .ExportTemplates import exportTemplates
-from .ImportTemplates import importTemplates
+from .ImportTemplates import XlatedRow, importTemplates, prepareImport, selectImportFile
 from .TemplateLoader import loadTemplateSelector
 from .TemplateEditorDialog import TemplateEditorDialog
-from .Logging import LOGGER
+from .TagManagerDialog import TagManagerDialog
+from .Logging import LOGGER, timed_event
 from .LogViewer import LogViewer
+from .maintenance import MaintenanceResult, run_maintenance
+from .snapshots import (
+  Snapshot,
+  SnapshotTask,
+  create_snapshot,
+  list_snapshots,
+  restore_snapshot,
+  snapshot_dir_for,
+)
+from .usage import USAGE_FLUSH_INTERVAL_MS, USAGE_RECORDER
+
+
+# How often the main window asks the change tracker for template commits (one pragma when idle).
+TEMPLATE_POLL_INTERVAL_MS = 1000
 
 
 class EmStencil(QMainWindow):
@@ -45,14 +63,26 @@ class EmStencil(QMainWindow):
     menuFile = QMenu('File', self)
 
     # Import template menu item
-    fileImport = QAction('Import Template...', self)
-    fileImport.triggered.connect(self.importTemplate)
-    menuFile.addAction(fileImport)
+    self.fileImport = QAction('Import Template...', self)
+    self.fileImport.triggered.connect(self.importTemplate)
+    menuFile.addAction(self.fileImport)
 
     fileExport = QAction('Export Templates...', self)
     fileExport.triggered.connect(self.exportTemplateSpreadsheet)
     menuFile.addAction(fileExport)
 
+    self.fileMaintenance = QAction('Database Maintenance...', self)
+    self.fileMaintenance.triggered.connect(self.databaseMaintenance)
+    menuFile.addAction(self.fileMaintenance)
+
+    self.fileSnapshot = QAction('Take Snapshot', self)
+    self.fileSnapshot.triggered.connect(self.takeSnapshot)
+    menuFile.addAction(self.fileSnapshot)
+
+    self.fileRestore = QAction('Restore Snapshot...', self)
+    self.fileRestore.triggered.connect(self.restoreSnapshot)
+    menuFile.addAction(self.fileRestore)
+
     # Exit application menu item.
     fileExit = QAction('Exit', self)
     fileExit.triggered.connect(self.closeWindow)
@@ -73,6 +103,10 @@ class EmStencil(QMainWindow):
     editSelectedTemplate.triggered.connect(self.editSelectedTemplate)
     menuEdit.addAction(editSelectedTemplate)
 
+    editTags = QAction('Manage Tags...', self)
+    editTags.triggered.connect(self.manageTags)
+    menuEdit.addAction(editTags)
+
     self.menubar.addMenu(menuEdit)
 
     # Define the help menu actions and add it to the menu bar.
@@ -90,32 +124,208 @@ class EmStencil(QMainWindow):
 
     # Create instance of application widget and add to main window.
     # selectionForm = TemplateSelector(templateList, metaTags, parent=self)
+    # The tracker baseline is taken first so nothing committed during the load is missed.
+    self.changeTracker = TemplateChangeTracker()
     self.setCentralWidget(loadTemplateSelector(self))
+
+    # Pick up edits from this window, the CLI, or another instance without a full reload.
+    self.changeTimer = QTimer(self)
+    self.changeTimer.setInterval(TEMPLATE_POLL_INTERVAL_MS)
+    self.changeTimer.timeout.connect(self.pollTemplateChanges)
+    self.changeTimer.start()
+
+    # Selects and copies are buffered by the selector; write them in one batch now and then.
+    self.usageTimer = QTimer(self)
+    self.usageTimer.setInterval(USAGE_FLUSH_INTERVAL_MS)
+    self.usageTimer.timeout.connect(USAGE_RECORDER.flush)
+    self.usageTimer.start()
+
+    # Validated workbook rows waiting for their pre-import snapshot to finish.
+    self._pendingImport: list[XlatedRow] | None = None
     LOGGER.info('MainWindow initialized successfully.')
 
   def importTemplate(self) -> None:
-    if importTemplates(self):
-      self.reloadTemplateSelector()
+    """Pick and validate a workbook, snapshot the database on the thread pool, then write it."""
+    filePath = selectImportFile(self)
+    if filePath is None:
+      return
+
+    # Rejected and empty workbooks stop here, before a snapshot pushes a good one out.
+    templateRows = prepareImport(self, filePath)
+    if not templateRows:
+      return
+
+    self._pendingImport = templateRows
+    databaseFile = Database.TemplateDB().databaseFile
+    self._startSnapshotTask(
+      lambda progress: create_snapshot(databaseFile, reason='pre-import', progress=progress),
+      self.importSnapshotFinished,
+    )
+
+  def importSnapshotFinished(self, result: Snapshot | Exception) -> None:
+    self._endSnapshotTask()
+    templateRows, self._pendingImport = self._pendingImport, None
+
+    if isinstance(result, Exception):
+      LOGGER.error(f'Pre-import snapshot failed: {result}')
+      answer = QMessageBox.question(
+        self, 'Import Template', f'Snapshot failed: {result}\n\nImport without a snapshot?'
+      )
+      if answer != QMessageBox.StandardButton.Yes:
+        return
+
+    if importTemplates(templateRows):
+      self.pollTemplateChanges()
 
   def exportTemplateSpreadsheet(self) -> None:
     exportTemplates(self)
 
+  def pollTemplateChanges(self) -> None:
+    """Apply committed template changes to the selector in place."""
+    changes = self.changeTracker.poll()
+    currentWidget = self.centralWidget()
+
+    if changes and hasattr(currentWidget, 'applyTemplateChanges'):
+      currentWidget.applyTemplateChanges(changes)
+
+  def patchTemplateSelector(self, tmplt: EmailTemplate | None) -> None:
+    """Show a template saved or deleted in this window without reloading the selector."""
+    currentWidget = self.centralWidget()
+
+    if tmplt is None or not hasattr(currentWidget, 'patchTemplate'):
+      self.pollTemplateChanges()
+      return
+
+    currentWidget.patchTemplate(tmplt)
+    # The selector already shows this write; keep the tracker from reporting it again.
+    self.changeTracker.acknowledge(tmplt.rowID)
+
+  def databaseMaintenance(self) -> None:
+    """Run a full maintenance pass on the thread pool and show the report when it finishes."""
+    databaseFile = Database.TemplateDB().databaseFile
+    self._startSnapshotTask(
+      lambda progress: run_maintenance(databaseFile), self.maintenanceFinished
+    )
+    self.statusBar().showMessage('Running database maintenance...')
+
+  def maintenanceFinished(self, result: MaintenanceResult | Exception) -> None:
+    self._endSnapshotTask()
+
+    if isinstance(result, Exception):
+      LOGGER.error(f'Database maintenance failed: {result}')
+      QMessageBox.warning(self, 'Database Maintenance', f'Maintenance failed: {result}')
+      return
+
+    icon = QMessageBox.Icon.Information if result.ok else QMessageBox.Icon.Warning
+    report = QMessageBox(icon, 'Database Maintenance', result.summary(), parent=self)
+    report.exec()
+
+  def takeSnapshot(self) -> None:
+    """Snapshot the database on the thread pool; the window stays usable meanwhile."""
+    databaseFile = Database.TemplateDB().databaseFile
+    self._startSnapshotTask(
+      lambda progress: create_snapshot(databaseFile, progress=progress), self.snapshotFinished
+    )
+
+  def snapshotFinished(self, result: Snapshot | Exception) -> None:
+    self._endSnapshotTask()
+
+    if isinstance(result, Exception):
+      LOGGER.error(f'Snapshot failed: {result}')
+      QMessageBox.warning(self, 'Take Snapshot', f'Snapshot failed: {result}')
+      return
+
+    self.statusBar().showMessage(f'Snapshot saved: {result.path.name}', 10_000)
+
+  def restoreSnapshot(self) -> None:
+    """Pick a snapshot and restore it; the current database is snapshotted first."""
+    databaseFile = Database.TemplateDB().databaseFile
+    snapshots = list_snapshots(snapshot_dir_for(databaseFile))
+
+    if not snapshots:
+      QMessageBox.information(self, 'Restore Snapshot', 'There are no snapshots to restore.')
+      return
+
+    labels = [str(snapshot) for snapshot in snapshots]
+    label, ok = QInputDialog.getItem(
+      self, 'Restore Snapshot', 'Replace the templates with the snapshot from:', labels, 0, False
+    )
+    if not ok:
+      return
+
+    snapshot = snapshots[labels.index(label)]
+    # Write buffered uses first so they are kept in the pre-restore snapshot.
+    USAGE_RECORDER.flush()
+    # The restore holds the write lock; nothing here may read or write until it finishes.
+    self.changeTimer.stop()
+    self.usageTimer.stop()
+    self.centralWidget().setEnabled(False)
+    self.menubar.setEnabled(False)
+    self._startSnapshotTask(
+      lambda progress: restore_snapshot(snapshot, databaseFile, progress=progress),
+      self.restoreFinished,
+    )
+
+  def restoreFinished(self, result: Snapshot | Exception | None) -> None:
+    self._endSnapshotTask()
+    self.menubar.setEnabled(True)
+    self.changeTimer.start()
+    self.usageTimer.start()
+
+    if isinstance(result, Exception):
+      self.centralWidget().setEnabled(True)
+      LOGGER.error(f'Snapshot restore failed: {result}')
+      QMessageBox.warning(self, 'Restore Snapshot', f'Restore failed: {result}')
+      return
+
+    self.reloadTemplateSelector()
+    saved = f' The previous templates were saved as {result.path.name}.' if result else ''
+    self.statusBar().showMessage(f'Snapshot restored.{saved}', 10_000)
+
+  def _startSnapshotTask(self, operation, finished) -> None:
+    # One snapshot, restore, import or maintenance pass at a time.
+    self.fileSnapshot.setEnabled(False)
+    self.fileRestore.setEnabled(False)
+    self.fileImport.setEnabled(False)
+    self.fileMaintenance.setEnabled(False)
+    task = SnapshotTask(operation)
+    task.signals.progress.connect(self._showSnapshotProgress)
+    task.signals.finished.connect(finished)
+    QThreadPool.globalInstance().start(task)
+
+  def _endSnapshotTask(self) -> None:
+    self.fileSnapshot.setEnabled(True)
+    self.fileRestore.setEnabled(True)
+    self.fileImport.setEnabled(True)
+    self.fileMaintenance.setEnabled(True)
+    self.statusBar().clearMessage()
+
+  def _showSnapshotProgress(self, phase: str, done: int, total: int) -> None:
+    percent = done * 100 // total if total else 100
+    self.statusBar().showMessage(f'Snapshot: {phase} {percent}%')
+
   def reloadTemplateSelector(self) -> None:
     """Reload the central template selector widget."""
-    # Remove old widget
-    old_widget = self.takeCentralWidget()
-    if old_widget:
-      old_widget.deleteLater()
-      LOGGER.info('Releasing old central widget.')
+    with timed_event('reload_selector') as event:
+      self.changeTracker.resync()
+
+      # Remove old widget
+      old_widget = self.takeCentralWidget()
+      if old_widget:
+        old_widget.deleteLater()
+        LOGGER.info('Releasing old central widget.')
+
+      selector = loadTemplateSelector(self)
+      self.setCentralWidget(selector)
+      event['rows'] = len(selector.templateList)
 
-    self.setCentralWidget(loadTemplateSelector(self))
     LOGGER.info('New template selector loaded successfully.')
 
   def newTemplate(self) -> None:
     """Open editor in new-template mode."""
     editor = TemplateEditorDialog(parent=self)
     if editor.exec():
-      self.reloadTemplateSelector()
+      self.patchTemplateSelector(editor.affectedTemplate)
 
   def editSelectedTemplate(self) -> None:
     """Open editor in edit mode for the selected template."""
@@ -135,7 +345,15 @@ class EmStencil(QMainWindow):
 
     editor = TemplateEditorDialog(template=selectedTemplate, parent=self)
     if editor.exec():
-      self.reloadTemplateSelector()
+      self.patchTemplateSelector(editor.affectedTemplate)
+
+  def manageTags(self) -> None:
+    """Open the tag manager; retagged templates reach the selector through the change tracker."""
+    manager = TagManagerDialog(parent=self)
+    manager.exec()
+
+    if manager.changed:
+      self.pollTemplateChanges()
 
   def showRunlog(self) -> None:
     """
@@ -168,4 +386,6 @@ class EmStencil(QMainWindow):
   def closeWindow(self) -> None:
     """Close the window."""
     # TODO: Figure out why this is not visible in parent/child relationship with widget.
+    self.changeTimer.stop()
+    self.usageTimer.stop()
     self.close()
@@ -17,6 +17,7 @@ from __future__ import annotations
 import base64
 import binascii
 import re
+from collections.abc import Callable, Collection, Mapping, Sequence
 
 from PySide6.QtCore import Qt, QMimeData
 from PySide6.QtGui import QClipboard, QFontMetrics, QImage, QKeySequence, QResizeEvent, QShortcut
@@ -29,11 +30,19 @@ from PySide6.QtWidgets import (
   QMainWindow,
 )
 from PySide6.QtWidgets import QPushButton, QTextEdit, QComboBox
+from .change_tracker import TemplateChange
 from .content_html import clipboard_plain_text_from_merged_html, is_html_content
 from .Database import TemplateDB
 from .FieldEntryDialog import FieldEntryDialog
-from .Dataclasses import EmailTemplate, MetadataTag
+from .Dataclasses import EmailTemplate, MetadataTag, State
 from .Logging import LOGGER
+from .usage import USAGE_RECORDER, UsageRecorder
+
+# Hand-built filter entry listing the most used templates; like 'all' it has no tag row (rowID 0).
+RECENT_TAG = 'recent'
+
+# Ctrl+1 .. Ctrl+N pick the Nth template of the 'recent' filter.
+QUICK_PICK_COUNT = 9
 
 
 class TemplateSelector(QWidget):
@@ -43,14 +52,26 @@ class TemplateSelector(QWidget):
   _SRC_ATTR_RE = re.compile(r'''src\s*=\s*(["'])(.*?)\1''', re.IGNORECASE | re.DOTALL)
   _DIM_ATTR_RE = re.compile(r'''\s(?:width|height)\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+)''', re.IGNORECASE)
 
-  def __init__(self, templateList: list, metaTags: list, parent=None) -> None:
+  def __init__(
+    self,
+    templateList: list,
+    metaTags: list,
+    parent=None,
+    tagCounts: Mapping[str, int] | None = None,
+  ) -> None:
     super(TemplateSelector, self).__init__()
     # Work fields and local variables for the main application.
     self.templateList: list[EmailTemplate] = templateList
     self.metaTags: list[MetadataTag] = metaTags
+    # Templates per tag, shown next to each tag in the filter.
+    self.tagCounts: dict[str, int] = dict(tagCounts or {})
     self.clipboard: QClipboard = QApplication.clipboard()
     self.db = TemplateDB()
     self.parent: QMainWindow | None = parent
+    # The field dialog is kept and reopened while the same template stays selected.
+    self.editScreen: FieldEntryDialog | None = None
+    # Selects and copies are counted here and written in batches by the main window.
+    self.usage: UsageRecorder = USAGE_RECORDER
 
     # Set basics for main application window.
     self.setWindowTitle('EmStencil - Templated email builder')
@@ -64,6 +85,11 @@ class TemplateSelector(QWidget):
     self.copyTemplateText.activated.connect(self.copyCLicked)
     self.selectShortcut = QShortcut(QKeySequence('Return'), self)
     self.selectShortcut.activated.connect(self.selectClicked)
+    self.quickPickShortcuts: list[QShortcut] = []
+    for position in range(1, QUICK_PICK_COUNT + 1):
+      shortcut = QShortcut(QKeySequence(f'Ctrl+{position}'), self)
+      shortcut.activated.connect(lambda position=position: self.pickRecentTemplate(position))
+      self.quickPickShortcuts.append(shortcut)
 
     # Add the template filter list boxes to the form.
     self.templateSelectionGroup = self.buildTemplateSelectGroup()
@@ -100,7 +126,7 @@ class TemplateSelector(QWidget):
     comboBoxGroup.addWidget(self.templateComboBox)
 
     # Build the meta tag list combo box and add it to the combo box group.
-    self.metaTagComboBox: QComboBox = self.buildComboBoxData(self.metaTags)
+    self.metaTagComboBox: QComboBox = self.buildComboBoxData(self.metaTags, self._tagLabel)
     self.metaTagComboBox.activated.connect(self.metaTagComboBoxSelected)
     comboBoxGroup.addWidget(self.metaTagComboBox)
 
@@ -122,7 +148,7 @@ class TemplateSelector(QWidget):
     self.layout.addLayout(self.templateSelectionGroup)
     LOGGER.info('Template selection group added to main layout.')
 
-  def buildComboBoxData(self, items: list) -> QComboBox:
+  def buildComboBoxData(self, items: list, label: Callable[[object], str] = str) -> QComboBox:
     """Build a combo box widget from a list of EmailTemplate/MetadataTag objects."""
     comboBox = QComboBox()
 
@@ -131,12 +157,12 @@ class TemplateSelector(QWidget):
     minWidth: int = 60
 
     for item in items:
-      stringWidth: int = fontMetrics.horizontalAdvance(str(item) + ' ' * 3)
+      stringWidth: int = fontMetrics.horizontalAdvance(label(item) + ' ' * 3)
 
       if stringWidth > minWidth:
         minWidth: int = stringWidth
 
-      comboBox.addItem(str(item), item)
+      comboBox.addItem(label(item), item)
 
     comboBoxWidth = int(minWidth * 1.35) + 28
     comboBox.setMinimumWidth(comboBoxWidth)
@@ -264,17 +290,21 @@ class TemplateSelector(QWidget):
     """Handling the UI update from the metatag combo box selection changing."""
     selectedMetadataTag = self.metaTagComboBox.currentData()
     # Since "all" doesn't exist in the DB, check if the "all" we added by hand is selected.
-    if selectedMetadataTag == MetadataTag('all') and self.metaTagComboBox.count() > 1:
-      self.templateList = self.db.FetchAllTemplates()
+    if selectedMetadataTag == MetadataTag('all'):
+      self.templateList = self.db.FetchAllTemplates(withMetadata=True)
+
+    elif self._isRecentTag(selectedMetadataTag):
+      # Write what is buffered first so the uses since the last flush count.
+      self.usage.flush(self.db)
+      self.templateList = self.db.FetchRecentTemplates()
 
-    # Otherwise filter based on the selected tag as long as it si not all
-    elif selectedMetadataTag != MetadataTag('all'):
+    # Otherwise filter based on the selected tag.
+    else:
       self.templateList = self.db.FetchTemplatesForTag(str(selectedMetadataTag))
-      self.templateList = list(map(self.db.FetchMetadataForTemplate, self.templateList))
 
-    else:  # ALL is the only one in the list, means the DB or that table is empty, redraw and exit.
-      self.repaint()
-      return
+    # Nothing stored (or nothing used yet); show the stand-in instead of an empty list.
+    if not self.templateList:
+      self.templateList.append(self.emptyListTemplate())
 
     # Clear the combo box and rebuild it with what we grabbed.
     self.templateComboBox.clear()
@@ -285,6 +315,18 @@ class TemplateSelector(QWidget):
     self._previewTemplateBody(cur, cur.content)
     self.repaint()
 
+  def pickRecentTemplate(self, position: int) -> None:
+    """Switch to the 'recent' filter and select its `position`th (1-based) template."""
+    index = next(i for i, tag in enumerate(self.metaTags) if self._isRecentTag(tag))
+    self.metaTagComboBox.setCurrentIndex(index)
+    self.metaTagComboBoxSelected()
+
+    if position > len(self.templateList):
+      return
+
+    self.templateComboBox.setCurrentIndex(position - 1)
+    self.templateComboBoxSelected()
+
   def sendUserInfoMessage(self, msg: str) -> None:
     """Send informaiotnal messege to the user."""
     userMessage = QMessageBox()
@@ -321,8 +363,17 @@ class TemplateSelector(QWidget):
   def selectClicked(self) -> None:
     """Process the current selection, show the update window for the fields."""
     selectedEmailTemplate = self.templateComboBox.currentData()
+    self.usage.record_select(selectedEmailTemplate.rowID)
     if len(selectedEmailTemplate.fields) > 0:
-      self.editScreen = FieldEntryDialog(selectedEmailTemplate, parent=self)
+      if self.editScreen is not None and self.editScreen.showsTemplate(selectedEmailTemplate):
+        self.editScreen.loadValues()
+
+      else:
+        if self.editScreen is not None:
+          self.editScreen.deleteLater()
+
+        self.editScreen = FieldEntryDialog(selectedEmailTemplate, parent=self)
+
       LOGGER.info('Displaying field entry dialog...')
       self.editScreen.show()
 
@@ -347,11 +398,203 @@ class TemplateSelector(QWidget):
         selectedEmailTemplate,
         selectedEmailTemplate.replacedText,
       )
+      self.usage.record_copy(selectedEmailTemplate.rowID)
 
     else:
       LOGGER.info('All values must be entered for template to be copied to clipboard...')
       self.sendUserInfoMessage('You must enter values for all fields in the template.')
 
+  @staticmethod
+  def emptyListTemplate() -> EmailTemplate:
+    """Stand-in shown when no templates are loaded (rowID 0, never persisted)."""
+    tag = MetadataTag('None')
+    return EmailTemplate('--Empty List--', 'No templates loaded', [tag])
+
+  def patchTemplate(self, tmplt: EmailTemplate) -> None:
+    """
+    Insert, update, or remove one template in place after it was saved or deleted in this window.
+      - State DELETED removes the entry; otherwise it replaces the entry with the same rowID or is
+        added (when it matches the current tag filter).
+      - Only the old and new tags of this template are looked up to update the tag filter, so the
+        database work does not grow with the library.
+    """
+    previous = next((loaded for loaded in self.templateList if loaded.rowID == tmplt.rowID), None)
+    touchedTags = {str(tag) for tag in tmplt.metadata}
+
+    if previous is not None:
+      touchedTags.update(str(tag) for tag in previous.metadata)
+
+    if tmplt.state == State.DELETED:
+      change = TemplateChange(State.DELETED, tmplt.rowID, None)
+
+    else:
+      change = TemplateChange(State.UPDATED if previous else State.ADDED, tmplt.rowID, tmplt)
+
+    self.applyTemplateChanges([change], touchedTags)
+
+  def applyTemplateChanges(
+    self, changes: Sequence[TemplateChange], touchedTags: Collection[str] | None = None
+  ) -> None:
+    """
+    Apply change tracker events to the loaded list and combo boxes in place.
+      - Updated templates keep entered field values for keys that still exist with the same kind.
+      - Templates are added/removed according to the current tag filter; selection is kept. The
+        'recent' filter only updates and drops the templates it already lists.
+      - touchedTags limits the tag filter refresh to those tags; None re-reads every tag.
+    """
+    if not changes:
+      return
+
+    selected: EmailTemplate | None = self.templateComboBox.currentData()
+    selectedRowID = selected.rowID if selected is not None else None
+    filterTag = self.metaTagComboBox.currentData()
+    showAll = filterTag is None or str(filterTag) == 'all'
+    showRecent = self._isRecentTag(filterTag)
+    positions = {tmplt.rowID: index for index, tmplt in enumerate(self.templateList)}
+    removals: set[int] = set()
+    additions: list[EmailTemplate] = []
+    selectedChanged = False
+
+    for change in changes:
+      index = positions.get(change.rowID)
+      tmplt = change.template
+      if showRecent:
+        visible = tmplt is not None and index is not None
+
+      else:
+        visible = tmplt is not None and (
+          showAll or str(filterTag) in {str(tag) for tag in tmplt.metadata}
+        )
+
+      if change.rowID == selectedRowID:
+        selectedChanged = True
+
+      if index is None:
+        if change.state != State.DELETED and visible:
+          additions.append(tmplt)
+        continue
+
+      if not visible:
+        removals.add(index)
+        continue
+
+      self._carryOverFieldValues(self.templateList[index], tmplt)
+      self.templateList[index] = tmplt
+      self.templateComboBox.setItemText(index, str(tmplt))
+      self.templateComboBox.setItemData(index, tmplt)
+
+    # The stand-in row goes away as soon as there is something real to show.
+    if additions:
+      removals.update(index for index, tmplt in enumerate(self.templateList) if tmplt.rowID == 0)
+
+    for index in sorted(removals, reverse=True):
+      del self.templateList[index]
+      self.templateComboBox.removeItem(index)
+
+    for tmplt in additions:
+      self.templateList.append(tmplt)
+      self.templateComboBox.addItem(str(tmplt), tmplt)
+
+    if not self.templateList:
+      placeholder = self.emptyListTemplate()
+      self.templateList.append(placeholder)
+      self.templateComboBox.addItem(str(placeholder), placeholder)
+
+    self._refreshMetaTagComboBox(touchedTags)
+    self._restoreSelection(selectedRowID, selectedChanged)
+    LOGGER.info(
+      f'Applied {len(changes)} template change(s): {len(additions)} added, {len(removals)} removed.'
+    )
+
+  def _carryOverFieldValues(self, old: EmailTemplate, new: EmailTemplate) -> None:
+    """Keep values the user already entered for fields the updated template still has."""
+    for key in new.fields:
+      if key in old.fields and old.field_kinds.get(key) == new.field_kinds.get(key):
+        new.fields[key] = old.fields[key]
+
+  def _refreshMetaTagComboBox(self, touchedTags: Collection[str] | None = None) -> None:
+    """
+    Sync the tag filter (most used first, with counts) with the database, leaving it untouched
+    when nothing differs.
+      - touchedTags given: only those tags' statistics are looked up; new ones are added, ones that
+        no longer exist are dropped, and the list is re-sorted.
+      - Otherwise every tag's statistics are re-read, O(tags) from the tagStats table.
+    """
+    pseudoTagCount = self._pseudoTagCount()
+    tagRows = range(pseudoTagCount, self.metaTagComboBox.count())
+    currentTags = [self.metaTagComboBox.itemData(i) for i in tagRows]
+    currentLabels = [self.metaTagComboBox.itemText(i) for i in tagRows]
+
+    if touchedTags is None:
+      statistics = self.db.FetchTagStatistics()
+      self.tagCounts = {str(stat): stat.templateCount for stat in statistics}
+      tags = [stat.tag for stat in statistics]
+
+    else:
+      stored = {str(stat): stat for stat in self.db.FetchTagStatistics(touchedTags)}
+
+      for name in touchedTags:
+        self.tagCounts.pop(name, None)
+
+      self.tagCounts.update((name, stat.templateCount) for name, stat in stored.items())
+      current = {str(tag) for tag in currentTags}
+      tags = [tag for tag in currentTags if str(tag) not in touchedTags or str(tag) in stored]
+      tags.extend(stat.tag for name, stat in stored.items() if name not in current)
+      tags.sort(key=lambda tag: (-self.tagCounts.get(str(tag), 0), str(tag)))
+
+    if currentLabels == [self._tagLabel(tag) for tag in tags]:
+      return
+
+    selectedTag = self.metaTagComboBox.currentData()
+    selectedKey = (str(selectedTag), selectedTag.rowID)
+    self.metaTags = [*self.metaTags[:pseudoTagCount], *tags]
+    self.metaTagComboBox.clear()
+
+    for tag in self.metaTags:
+      self.metaTagComboBox.addItem(self._tagLabel(tag), tag)
+
+    # Matched on the row ID too, so a stored tag named 'recent' is not taken for the filter.
+    index = next(
+      (i for i, tag in enumerate(self.metaTags) if (str(tag), tag.rowID) == selectedKey), None
+    )
+
+    if index is not None:
+      self.metaTagComboBox.setCurrentIndex(index)
+
+    else:
+      # The filtered tag no longer exists; fall back to showing everything.
+      self.metaTagComboBox.setCurrentIndex(0)
+      self.metaTagComboBoxSelected()
+
+  def _pseudoTagCount(self) -> int:
+    """Number of hand-built entries ('all', 'recent') leading the tag filter; they have no row ID."""
+    return next((i for i, tag in enumerate(self.metaTags) if tag.rowID), len(self.metaTags))
+
+  def _isRecentTag(self, tag: MetadataTag | None) -> bool:
+    return tag is not None and not tag.rowID and str(tag) == RECENT_TAG
+
+  def _tagLabel(self, tag: MetadataTag) -> str:
+    """Tag filter entry: the tag and how many templates carry it ('all' has no count)."""
+    if not tag.rowID:
+      return str(tag)
+
+    count = self.tagCounts.get(str(tag))
+
+    return str(tag) if count is None else f'{tag} ({count})'
+
+  def _restoreSelection(self, rowID: int | None, refreshPreview: bool) -> None:
+    index = next((i for i, tmplt in enumerate(self.templateList) if tmplt.rowID == rowID), None)
+
+    if index is None:
+      index, refreshPreview = 0, True
+
+    if index != self.templateComboBox.currentIndex():
+      self.templateComboBox.setCurrentIndex(index)
+      refreshPreview = True
+
+    if refreshPreview:
+      self.updateTextArea(self.templateComboBox.currentData())
+
   def getSelectedTemplate(self) -> EmailTemplate | None:
     """Return selected template object from the combo box."""
     return self.templateComboBox.currentData()
@@ -0,0 +1,239 @@
+"""
+ Program: Dialog for renaming, merging, assigning and removing metadata tags in bulk.
+    Name: Andrew Dixon            File: TagManagerDialog.py
+    Date: 19 Oct 2026
+   Notes: Every button is one TemplateDB call, so a change to thousands of templates is a single
+          transaction. The main window picks the retagged templates up through the change tracker.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+  QAbstractItemView,
+  QDialog,
+  QHBoxLayout,
+  QInputDialog,
+  QLabel,
+  QListWidget,
+  QListWidgetItem,
+  QMessageBox,
+  QPushButton,
+  QVBoxLayout,
+)
+
+from .Database import TemplateDB
+from .Exceptions import TagAlreadyExists, TagNotFound
+from .Logging import LOGGER
+
+
+class TagManagerDialog(QDialog):
+  """Dialog listing tags and templates, with bulk tag operations on the selections."""
+
+  def __init__(self, parent=None) -> None:
+    super(TagManagerDialog, self).__init__(parent)
+    self.db = TemplateDB()
+    # Set once any operation wrote to the database, so the caller knows to refresh.
+    self.changed = False
+
+    self.SetupUI()
+    self.ConnectSignals()
+    self.LoadValues()
+
+  def SetupUI(self) -> None:
+    """Build dialog controls."""
+    self.setWindowTitle('Manage Tags')
+    self.setMinimumWidth(640)
+    self.setMinimumHeight(420)
+
+    layout = QVBoxLayout()
+    self.setLayout(layout)
+
+    listsLayout = QHBoxLayout()
+    layout.addLayout(listsLayout)
+
+    tagsLayout = QVBoxLayout()
+    tagsLayout.addWidget(QLabel('Tags'))
+    self.tagList = QListWidget()
+    self.tagList.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+    tagsLayout.addWidget(self.tagList)
+    listsLayout.addLayout(tagsLayout)
+
+    templatesLayout = QVBoxLayout()
+    templatesLayout.addWidget(QLabel('Templates'))
+    self.templateList = QListWidget()
+    self.templateList.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+    templatesLayout.addWidget(self.templateList)
+    listsLayout.addLayout(templatesLayout, stretch=2)
+
+    self.statusLabel = QLabel()
+    self.statusLabel.setWordWrap(True)
+    layout.addWidget(self.statusLabel)
+
+    buttonLayout = QHBoxLayout()
+    buttonLayout.setAlignment(Qt.AlignmentFlag.AlignRight)
+    layout.addLayout(buttonLayout)
+
+    self.renameButton = QPushButton('Rename...')
+    self.mergeButton = QPushButton('Merge...')
+    self.assignButton = QPushButton('Add Tag to Templates...')
+    self.removeButton = QPushButton('Remove Tag from Templates')
+    self.closeButton = QPushButton('Close')
+
+    for button in (
+      self.renameButton,
+      self.mergeButton,
+      self.assignButton,
+      self.removeButton,
+      self.closeButton,
+    ):
+      buttonLayout.addWidget(button)
+
+  def ConnectSignals(self) -> None:
+    """Connect button event handlers."""
+    self.renameButton.clicked.connect(self.RenameClicked)
+    self.mergeButton.clicked.connect(self.MergeClicked)
+    self.assignButton.clicked.connect(self.AssignClicked)
+    self.removeButton.clicked.connect(self.RemoveClicked)
+    self.closeButton.clicked.connect(self.accept)
+
+  def LoadValues(self) -> None:
+    """(Re)load the tag and template lists, keeping the template selection."""
+    selectedRowIDs = set(self.SelectedTemplateRowIDs())
+
+    self.tagList.clear()
+    self.tagList.addItems([tag for _, tag in self.db.IterateMetadataTags()])
+
+    self.templateList.clear()
+    for row in self.db.IterateTemplateListRows():
+      tags = ', '.join(str(tag) for tag in row.tags)
+      item = QListWidgetItem(f'{row.title}  [{tags}]' if tags else row.title)
+      item.setData(Qt.ItemDataRole.UserRole, row.rowID)
+      self.templateList.addItem(item)
+      item.setSelected(row.rowID in selectedRowIDs)
+
+  def SelectedTags(self) -> list[str]:
+    return [item.text() for item in self.tagList.selectedItems()]
+
+  def SelectedTemplateRowIDs(self) -> list[int]:
+    return [item.data(Qt.ItemDataRole.UserRole) for item in self.templateList.selectedItems()]
+
+  def RenameSelectedTag(self, newTag: str) -> int | None:
+    """Rename the (single) selected tag; returns the number of templates carrying it."""
+    tags = self.SelectedTags()
+    if len(tags) != 1:
+      self.statusLabel.setText('Select one tag to rename.')
+      return None
+
+    return self._Apply(
+      lambda: self.db.RenameTag(tags[0], newTag),
+      lambda count: f'Renamed {tags[0]} to {newTag} on {count} template(s).',
+    )
+
+  def MergeSelectedTags(self, intoTag: str) -> int | None:
+    """Merge the selected tags into `intoTag`; returns the number of templates retagged."""
+    tags = self.SelectedTags()
+    if not tags:
+      self.statusLabel.setText('Select the tags to merge.')
+      return None
+
+    return self._Apply(
+      lambda: self.db.MergeTags(tags, intoTag),
+      lambda count: f'Merged {", ".join(tags)} into {intoTag} on {count} template(s).',
+    )
+
+  def AssignTag(self, tag: str) -> int | None:
+    """Add `tag` to the selected templates; returns how many gained it."""
+    rowIDs = self.SelectedTemplateRowIDs()
+    if not rowIDs:
+      self.statusLabel.setText('Select the templates to tag.')
+      return None
+
+    return self._Apply(
+      lambda: self.db.AssignTagToTemplates(tag, rowIDs),
+      lambda count: f'Added {tag} to {count} of {len(rowIDs)} template(s).',
+    )
+
+  def RemoveSelectedTag(self) -> int | None:
+    """Take the selected tags off the selected templates; returns how many links were removed."""
+    tags = self.SelectedTags()
+    rowIDs = self.SelectedTemplateRowIDs()
+    if not tags or not rowIDs:
+      self.statusLabel.setText('Select the tags and the templates to remove them from.')
+      return None
+
+    def removeAll() -> int:
+      with self.db.Transaction():
+        return sum(self.db.RemoveTagFromTemplates(tag, rowIDs) for tag in tags)
+
+    return self._Apply(
+      removeAll,
+      lambda count: f'Removed {", ".join(tags)} from {len(rowIDs)} template(s) ({count} links).',
+    )
+
+  def RenameClicked(self) -> None:
+    tags = self.SelectedTags()
+    if len(tags) != 1:
+      self.statusLabel.setText('Select one tag to rename.')
+      return
+
+    newTag, ok = QInputDialog.getText(self, 'Rename Tag', f'New name for {tags[0]}:', text=tags[0])
+    if ok:
+      self.RenameSelectedTag(newTag)
+
+  def MergeClicked(self) -> None:
+    tags = self.SelectedTags()
+    if not tags:
+      self.statusLabel.setText('Select the tags to merge.')
+      return
+
+    intoTag, ok = QInputDialog.getText(
+      self, 'Merge Tags', f'Merge {", ".join(tags)} into:', text=tags[0]
+    )
+    if ok:
+      self.MergeSelectedTags(intoTag)
+
+  def AssignClicked(self) -> None:
+    if not self.SelectedTemplateRowIDs():
+      self.statusLabel.setText('Select the templates to tag.')
+      return
+
+    selected = self.SelectedTags()
+    tag, ok = QInputDialog.getText(
+      self, 'Add Tag', 'Tag to add:', text=selected[0] if selected else ''
+    )
+    if ok:
+      self.AssignTag(tag)
+
+  def RemoveClicked(self) -> None:
+    self.RemoveSelectedTag()
+
+  def _Apply(self, operation: Callable[[], int], describe: Callable[[int], str]) -> int | None:
+    """Run one database operation, report it, and reload the lists; errors go to a warning box."""
+    try:
+      count = operation()
+
+    except (TagNotFound, TagAlreadyExists) as e:
+      QMessageBox.warning(self, 'Manage Tags', e.message)
+      return None
+
+    except ValueError as e:
+      QMessageBox.warning(self, 'Manage Tags', str(e))
+      return None
+
+    summary = describe(count)
+    LOGGER.info(summary)
+    self.statusLabel.setText(summary)
+    self.changed = True
+    self.LoadValues()
+
+    return count
@@ -14,26 +14,56 @@
 
 from __future__ import annotations
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QThreadPool, QTimer, Qt
 from PySide6.QtGui import QCloseEvent, QKeySequence, QShortcut
 from PySide6.QtWidgets import QDialog, QLabel, QLineEdit, QTextEdit, QPushButton
 from PySide6.QtWidgets import QHBoxLayout, QVBoxLayout, QMessageBox
-from .content_html import is_html_content, rich_text_editor_html_should_persist_as_html
+from .content_html import is_html_content
 from .Database import TemplateDB
 from .Dataclasses import EmailTemplate, MetadataTag
+from .embedded_images import (
+  DEFAULT_IMAGE_BUDGET,
+  ImageBudget,
+  compact_embedded_images,
+  format_weight,
+)
+from .Exceptions import TemplateFieldKindConflict
+from .Logging import LOGGER
+from .template_analysis import (
+  EditorSnapshot,
+  TemplateAnalysis,
+  TemplateAnalysisTask,
+  persisted_body,
+)
+
+# Quiet time after the last keystroke before the body is snapshotted and analyzed.
+ANALYSIS_DEBOUNCE_MS = 300
 
 
 class TemplateEditorDialog(QDialog):
   """Dialog for creating, editing, and deleting templates."""
 
-  def __init__(self, template: EmailTemplate | None = None, parent=None) -> None:
+  def __init__(
+    self,
+    template: EmailTemplate | None = None,
+    parent=None,
+    *,
+    imageBudget: ImageBudget = DEFAULT_IMAGE_BUDGET,
+  ) -> None:
     super(TemplateEditorDialog, self).__init__(parent)
     self.db = TemplateDB()
+    self.imageBudget = imageBudget
     self.template = template
     self.isEditMode = template is not None
     self.hasUnsavedChanges = False
     self.loadingValues = False
     self._persistBodyAsHtml = False
+    # Template saved or deleted by this dialog, for callers to patch their views after exec().
+    self.affectedTemplate: EmailTemplate | None = None
+    # Bumped on every body edit; snapshots and analyses are only reused for the same serial.
+    self._bodySerial = 0
+    self._snapshot: EditorSnapshot | None = None
+    self.analysis: TemplateAnalysis | None = None
 
     self.SetupUI()
     self.ConnectSignals()
@@ -65,6 +95,15 @@ class TemplateEditorDialog(QDialog):
     layout.addWidget(templateLabel)
     layout.addWidget(self.templateField)
 
+    # Live placeholder list, conflicts, and body/image size from the background analysis.
+    self.analysisLabel = QLabel()
+    self.analysisLabel.setWordWrap(True)
+    layout.addWidget(self.analysisLabel)
+
+    self.analysisTimer = QTimer(self)
+    self.analysisTimer.setSingleShot(True)
+    self.analysisTimer.setInterval(ANALYSIS_DEBOUNCE_MS)
+
     buttonLayout = QHBoxLayout()
     buttonLayout.setAlignment(Qt.AlignmentFlag.AlignRight)
     layout.addLayout(buttonLayout)
@@ -85,6 +124,8 @@ class TemplateEditorDialog(QDialog):
     self.titleField.textChanged.connect(self.FieldChanged)
     self.tagsField.textChanged.connect(self.FieldChanged)
     self.templateField.textChanged.connect(self.FieldChanged)
+    self.templateField.textChanged.connect(self.BodyChanged)
+    self.analysisTimer.timeout.connect(self.StartAnalysis)
 
     self.saveButton.clicked.connect(self.SaveClicked)
     self.cancelButton.clicked.connect(self.CancelClicked)
@@ -115,6 +156,7 @@ class TemplateEditorDialog(QDialog):
       self.templateField.clear()
     self.loadingValues = False
     self.hasUnsavedChanges = False
+    self.StartAnalysis()
 
   def FieldChanged(self) -> None:
     """Track unsaved changes."""
@@ -123,20 +165,46 @@ class TemplateEditorDialog(QDialog):
 
     self.hasUnsavedChanges = True
 
+  def BodyChanged(self) -> None:
+    """Per keystroke: invalidate the snapshot and restart the debounce; no serialization here."""
+    self._bodySerial += 1
+    self.analysisTimer.start()
+
+  def BodySnapshot(self) -> EditorSnapshot:
+    """toHtml()/toPlainText() of the body, taken at most once per edit."""
+    if self._snapshot is None or self._snapshot.serial != self._bodySerial:
+      self._snapshot = EditorSnapshot(
+        self._bodySerial, self.templateField.toHtml(), self.templateField.toPlainText()
+      )
+
+    return self._snapshot
+
+  def StartAnalysis(self) -> None:
+    """Analyze the current body on the thread pool; the result arrives in AnalysisFinished."""
+    self.analysisTimer.stop()
+    task = TemplateAnalysisTask(self.BodySnapshot(), self._persistBodyAsHtml)
+    task.signals.finished.connect(self.AnalysisFinished)
+    QThreadPool.globalInstance().start(task)
+
+  def AnalysisFinished(self, analysis: TemplateAnalysis) -> None:
+    """Show the analysis unless the body changed again while it ran."""
+    if analysis.serial != self._bodySerial:
+      return
+
+    self.analysis = analysis
+    self.analysisLabel.setText(analysis.summary())
+    self.analysisLabel.setStyleSheet('color: #b00020;' if analysis.conflict else '')
+
   def BuildTemplateFromFields(self) -> EmailTemplate:
     """Create template object from dialog fields."""
     title = self.titleField.text()
 
-    if self._persistBodyAsHtml:
-      content = self.templateField.toHtml()
+    # Reuse the analyzed body when it is current; otherwise serialize once from the snapshot.
+    if self.analysis is not None and self.analysis.serial == self._bodySerial:
+      content = self.analysis.content
 
     else:
-      html_snapshot = self.templateField.toHtml()
-      content = (
-        html_snapshot
-        if rich_text_editor_html_should_persist_as_html(html_snapshot)
-        else self.templateField.toPlainText()
-      )
+      content, _ = persisted_body(self.BodySnapshot(), self._persistBodyAsHtml)
 
     tags = self.tagsField.text().split(',')
     metadata = [MetadataTag(tag) for tag in tags if tag != '']
@@ -149,22 +217,48 @@ class TemplateEditorDialog(QDialog):
 
     return template
 
-  def SaveClicked(self) -> None:
-    """Save template through the data layer."""
-    template = self.BuildTemplateFromFields()
+  def ApplyImageBudget(self, template: EmailTemplate) -> None:
+    """Re-encode oversized inline images before the body is persisted."""
+    result = compact_embedded_images(template.content, self.imageBudget)
+
+    if not result.before.count:
+      return
+
+    if result.changed:
+      template.content = result.content
+
+    LOGGER.info(
+      f'Template {template.title!r} images: {format_weight(result.before)} -> '
+      f'{format_weight(result.after)} ({result.recompressed} recompressed)'
+    )
+
+  def SaveClicked(self) -> EmailTemplate | None:
+    """Save template through the data layer and return it as stored; None if it can't be saved."""
+    try:
+      template = self.BuildTemplateFromFields()
+
+    except TemplateFieldKindConflict as e:
+      LOGGER.warning(f'Template not saved: {e.message}')
+      QMessageBox.warning(self, 'Placeholder Conflict', e.message)
+      return None
+
+    self.ApplyImageBudget(template)
     if self.isEditMode:
       self.db.UpdateTemplate(template)
 
     else:
       self.db.AddTemplate(template)
 
+    self.affectedTemplate = template
     self.hasUnsavedChanges = False
     self.accept()
 
-  def DeleteClicked(self) -> None:
-    """Delete template after confirmation."""
+    return template
+
+  def DeleteClicked(self) -> EmailTemplate | None:
+    """Delete template after confirmation; returns it (state DELETED), or None if not deleted."""
     if not self.isEditMode or self.template is None:
-      return
+      return None
 
     userChoice = QMessageBox.question(
       self,
@@ -176,9 +270,14 @@ class TemplateEditorDialog(QDialog):
 
     if userChoice == QMessageBox.StandardButton.Yes:
       self.db.DeleteTemplate(self.template)
+      self.affectedTemplate = self.template
       self.hasUnsavedChanges = False
       self.accept()
 
+      return self.template
+
+    return None
+
   def CancelClicked(self) -> None:
     """Handle explicit cancel action."""
     self.reject()
@@ -17,28 +17,32 @@ from __future__ import annotations
 
 from emstencil import Database as emDB
 from emstencil import Dataclasses as emClasses
-from .SelectionForm import TemplateSelector
-from .Logging import LOGGER
+from .SelectionForm import RECENT_TAG, TemplateSelector
+from .Logging import LOGGER, timed_event
 
 
 def loadTemplateSelector(parent=None) -> TemplateSelector:
-  db = emDB.TemplateDB()
-  templateList = db.FetchAllTemplates()
-  templateList = list(map(db.FetchMetadataForTemplate, templateList))
-  LOGGER.info(f'Loaded {len(templateList)} templates from database.')
-
-  metaTags = [emClasses.MetadataTag('all')]
-  metaTags[0].rowID = 0
-  metaTags[0].assocRowID = 0
-  metaTags = metaTags + db.FetchAllMetadataTags()
-  LOGGER.info(f'Loaded {len(metaTags) - 1} metadata tags.')
-
-  if not templateList:
-    LOGGER.info('No templates in databse, loading empty lists...')
-    tag = emClasses.MetadataTag('None')
-    template = emClasses.EmailTemplate('--Empty List--', 'No templates loaded', [tag])
-    templateList.append(template)
-
-  LOGGER.info('Loading template selector form.')
-
-  return TemplateSelector(templateList, metaTags, parent=parent)
+  with timed_event('load_selector') as event:
+    db = emDB.TemplateDB()
+    templateList = db.FetchAllTemplates(withMetadata=True)
+    LOGGER.info(f'Loaded {len(templateList)} templates from database.')
+
+    metaTags = [emClasses.MetadataTag('all'), emClasses.MetadataTag(RECENT_TAG)]
+    for pseudoTag in metaTags:
+      pseudoTag.rowID = 0
+      pseudoTag.assocRowID = 0
+    # Most used tags first; counts come from the materialized tagStats table.
+    tagStatistics = db.FetchTagStatistics()
+    metaTags = metaTags + [stat.tag for stat in tagStatistics]
+    tagCounts = {str(stat): stat.templateCount for stat in tagStatistics}
+    LOGGER.info(f'Loaded {len(tagStatistics)} metadata tags.')
+
+    event.update(rows=len(templateList), tags=len(tagStatistics))
+
+    if not templateList:
+      LOGGER.info('No templates in databse, loading empty lists...')
+      templateList.append(TemplateSelector.emptyListTemplate())
+
+    LOGGER.info('Loading template selector form.')
+
+    return TemplateSelector(templateList, metaTags, parent=parent, tagCounts=tagCounts)
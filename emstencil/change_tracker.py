@@ -0,0 +1,182 @@
+"""
+ Program: Fine-grained template change detection (PRAGMA data_version + templateChanges log).
+    Name: Andrew Dixon            File: change_tracker.py
+    Date: 19 Oct 2026
+   Notes: Triggers bump templates.revision on every visible change and append to templateChanges.
+          The tracker polls on its own connection, so writes from this process (TemplateDB) and
+          from other processes (CLI, another window, the render service's neighbours) all count.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import NamedTuple
+
+from . import Database
+from .Database import TemplateDB
+from .Dataclasses import EmailTemplate, State
+from .initialize import CHANGE_LOG_RESYNC_UID
+from .Logging import LOGGER
+
+# Rows kept in templateChanges when a tracker starts; a tracker further behind than this resyncs
+# by comparing revisions, which is still O(templates) integers rather than a full object reload.
+CHANGE_LOG_RETENTION = 10_000
+
+
+class TemplateChange(NamedTuple):
+  """One template-level event; template is None for deletions."""
+
+  state: State
+  rowID: int
+  template: EmailTemplate | None
+
+
+class TemplateChangeTracker:
+  """
+  Turn database commits into ADDED / UPDATED / DELETED events.
+    - poll() costs one pragma when nothing changed.
+    - Otherwise it reads the log past the last seen seq, keeps the newest revision per template,
+      and loads only those rows whose revision differs from the one already delivered.
+  """
+
+  def __init__(self, db: TemplateDB | None = None, databaseFile: Path | None = None) -> None:
+    self.db = db if db is not None else TemplateDB()
+    self.connection = sqlite3.connect(databaseFile or Database.DATABASE_FILE)
+    self.dataVersion: int | None = None
+    self.lastSeq = 0
+    self.revisions: dict[int, int] = {}
+    self._prune()
+    self.resync()
+
+  def close(self) -> None:
+    self.connection.close()
+
+  def resync(self) -> None:
+    """Adopt the current database state as the baseline without emitting events."""
+    self.dataVersion = self._dataVersion()
+    self.lastSeq = self._maxSeq()
+    self.revisions = dict(self.connection.execute('select uid, revision from templates;'))
+
+  def acknowledge(self, rowID: int) -> None:
+    """Treat the template's current revision as delivered, e.g. after the caller applied it."""
+    row = self.connection.execute(
+      'select revision from templates where uid = ?;', [rowID]
+    ).fetchone()
+
+    if row is None:
+      self.revisions.pop(rowID, None)
+
+    else:
+      self.revisions[rowID] = row[0]
+
+  def poll(self) -> list[TemplateChange]:
+    """Events for everything committed since the previous poll (empty when nothing changed)."""
+    version = self._dataVersion()
+    if version == self.dataVersion:
+      return []
+
+    self.dataVersion = version
+    minSeq, maxSeq = self.connection.execute(
+      'select min(seq), coalesce(max(seq), 0) from templateChanges;'
+    ).fetchone()
+
+    if maxSeq == self.lastSeq:
+      return []
+
+    # A restore replaced the database: seq went backwards, or the restore's marker is in range.
+    # Revisions in the restored file may repeat ones already delivered, so every row is reloaded.
+    replaced = maxSeq < self.lastSeq or self._resyncMarked()
+
+    if replaced or minSeq > self.lastSeq + 1:
+      # Log was pruned past our cursor (or restarted); diff every row instead.
+      latest: dict[int, int | None] = {uid: None for uid in self.revisions}
+      latest.update(self.connection.execute('select uid, revision from templates;'))
+
+    else:
+      # Newest entry per template wins; intermediate revisions inside one poll collapse.
+      latest = dict(
+        self.connection.execute(
+          """
+            select tmplt_uid, revision
+            from templateChanges
+            where seq > ?
+            order by seq;
+          """,
+          [self.lastSeq],
+        )
+      )
+
+    self.lastSeq = maxSeq
+
+    return self._changesFor(latest, reloadAll=replaced)
+
+  def _changesFor(
+    self, latest: dict[int, int | None], reloadAll: bool = False
+  ) -> list[TemplateChange]:
+    changes: list[TemplateChange] = []
+    toLoad: list[int] = []
+
+    for rowID, revision in latest.items():
+      if revision is None:
+        if self.revisions.pop(rowID, None) is not None:
+          changes.append(TemplateChange(State.DELETED, rowID, None))
+
+      elif reloadAll or self.revisions.get(rowID) != revision:
+        toLoad.append(rowID)
+
+    loaded = (
+      {tmplt.rowID: tmplt for tmplt in self.db.FetchTemplatesByRowID(toLoad)} if toLoad else {}
+    )
+
+    for rowID in toLoad:
+      tmplt = loaded.get(rowID)
+
+      # Logged as changed but gone by the time we read it: deleted in a later commit.
+      if tmplt is None:
+        if self.revisions.pop(rowID, None) is not None:
+          changes.append(TemplateChange(State.DELETED, rowID, None))
+        continue
+
+      state = State.UPDATED if rowID in self.revisions else State.ADDED
+      self.revisions[rowID] = latest[rowID]
+      changes.append(TemplateChange(state, rowID, tmplt))
+
+    if changes:
+      LOGGER.info(f'Detected {len(changes)} template change(s).')
+
+    return changes
+
+  def _dataVersion(self) -> int:
+    return self.connection.execute('pragma data_version').fetchone()[0]
+
+  def _resyncMarked(self) -> bool:
+    return (
+      self.connection.execute(
+        'select 1 from templateChanges where seq > ? and tmplt_uid = ? limit 1;',
+        [self.lastSeq, CHANGE_LOG_RESYNC_UID],
+      ).fetchone()
+      is not None
+    )
+
+  def _maxSeq(self) -> int:
+    return self.connection.execute('select coalesce(max(seq), 0) from templateChanges;').fetchone()[
+      0
+    ]
+
+  def _prune(self) -> None:
+    with self.connection:
+      self.connection.execute(
+        """
+          delete from templateChanges
+          where seq <= (select max(seq) from templateChanges) - ?;
+        """,
+        [CHANGE_LOG_RETENTION],
+      )
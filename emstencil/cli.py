@@ -0,0 +1,490 @@
+#! /usr/bin/env python3
+"""
+ Program: Command line maintenance entry point for the template database.
+    Name: Andrew Dixon            File: cli.py
+    Date: 19 Oct 2026
+   Notes: python -m emstencil.cli <command> [options]; runs without a GUI.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from collections.abc import Sequence
+from contextlib import closing
+from pathlib import Path
+
+from . import Database
+from .Database import TemplateDB
+from .embedded_images import (
+  DEFAULT_IMAGE_BUDGET,
+  ImageBudget,
+  ImageWeight,
+  compact_embedded_images,
+  format_weight,
+)
+from .Exceptions import (
+  ImportValidationFailed,
+  InvalidImportFileType,
+  InvalidSnapshot,
+  TagAlreadyExists,
+  TagNotFound,
+)
+from .ImportTemplates import convertSpreadsheet
+from .initialize import is_initilized, upgradeDatabase
+from .log_analysis import analyze_logs, format_timings
+from .Logging import LOGGER, set_log_format
+from .maintenance import run_maintenance, size_report
+from .render_service import DEFAULT_HOST, DEFAULT_PORT, run_render_service
+from .snapshots import (
+  SNAPSHOT_RETENTION,
+  create_snapshot,
+  list_snapshots,
+  restore_snapshot,
+  snapshot_dir_for,
+)
+
+# Changed bodies are written back in batches so a large library never holds every rewrite in memory.
+_WRITE_BATCH = 50
+
+
+def resolve_database_path(path: Path | None) -> Path:
+  """Application database (created/upgraded as on startup), or `path` (must exist, upgraded)."""
+  if path is None:
+    if not is_initilized():
+      raise SystemExit('Database initialization failed. Please check the logs.')
+
+    return Database.DATABASE_FILE
+
+  if not path.is_file():
+    raise SystemExit(f'Database file not found: {path}')
+
+  upgradeDatabase(path)
+
+  return path
+
+
+def open_database(path: Path | None) -> TemplateDB:
+  """TemplateDB on the application database, or on `path` when given."""
+  Database.DATABASE_FILE = resolve_database_path(path)
+
+  return TemplateDB()
+
+
+def cmd_compact_images(args: argparse.Namespace) -> int:
+  """Apply the embedded image budget to every stored template and report per-template weight."""
+  budget = ImageBudget(
+    max_width=args.max_width,
+    max_height=args.max_height,
+    max_bytes=args.max_kib * 1024,
+    formats=tuple(args.formats),
+    quality=args.quality,
+  )
+  db = open_database(args.database)
+  totalBefore = ImageWeight()
+  totalAfter = ImageWeight()
+  pending: list[tuple[int, str]] = []
+  changedTemplates = 0
+
+  for row in db.IterateTemplates(('title', 'content')):
+    result = compact_embedded_images(row.content, budget)
+
+    if not result.before.count:
+      continue
+
+    totalBefore += result.before
+    totalAfter += result.after
+    status = f'{result.recompressed} recompressed' if result.changed else 'within budget'
+    print(
+      f'{row.title}: {format_weight(result.before)} -> {format_weight(result.after)} ({status})'
+    )
+
+    if not result.changed:
+      continue
+
+    changedTemplates += 1
+
+    # A dry run only counts; nothing is kept for writing.
+    if args.dry_run:
+      continue
+
+    pending.append((row.uid, result.content))
+
+    if len(pending) >= _WRITE_BATCH:
+      db.UpdateTemplateContents(pending)
+      pending.clear()
+
+  if pending:
+    db.UpdateTemplateContents(pending)
+
+  verb = 'would change' if args.dry_run else 'changed'
+  summary = (
+    f'compact-images: {verb} {changedTemplates} template(s); '
+    f'{format_weight(totalBefore)} -> {format_weight(totalAfter)}'
+  )
+  print(summary)
+  LOGGER.info(summary)
+  db.close()
+
+  return 0
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+  """Validate, then upsert every template from a workbook in one transaction."""
+  db = open_database(args.database)
+
+  try:
+    imported = convertSpreadsheet(
+      str(args.workbook), db, args.workers, args.report, snapshot=not args.no_snapshot
+    )
+
+  except (InvalidImportFileType, ImportValidationFailed) as e:
+    raise SystemExit(f'import: {e.message}') from None
+
+  finally:
+    db.close()
+
+  print(
+    f'import: {"templates imported from" if imported else "no template rows in"} {args.workbook}'
+  )
+
+  return 0
+
+
+def cmd_maintenance(args: argparse.Namespace) -> int:
+  """Size report, integrity check, tag sweep, ANALYZE and vacuum; exit status 1 on corruption."""
+  databaseFile = resolve_database_path(args.database)
+
+  if args.report_only:
+    with closing(sqlite3.connect(databaseFile)) as connection:
+      print('\n'.join(size_report(connection).lines()))
+
+    return 0
+
+  result = run_maintenance(
+    databaseFile,
+    vacuumMode=args.vacuum,
+    checkIntegrity=not args.no_check,
+    analyze=not args.no_analyze,
+    sweepTags=not args.no_tag_sweep,
+  )
+  print(result.summary())
+
+  return 0 if result.ok else 1
+
+
+def _template_row_ids(db: TemplateDB, titles: Sequence[str], withTags: Sequence[str]) -> list[int]:
+  """Row IDs for templates named by title and for every template carrying one of `withTags`."""
+  rowIDs: set[int] = set()
+
+  if titles:
+    wanted = set(titles)
+    byTitle = {row.title: row.uid for row in db.IterateTemplates(('title',)) if row.title in wanted}
+    missing = wanted - byTitle.keys()
+
+    if missing:
+      raise SystemExit(f'tags: no template titled {", ".join(sorted(missing))}')
+
+    rowIDs.update(byTitle.values())
+
+  for tag in withTags:
+    rowIDs.update(tmplt.rowID for tmplt in db.FetchTemplatesForTag(tag.strip().lower()))
+
+  return sorted(rowIDs)
+
+
+def cmd_tags(args: argparse.Namespace) -> int:
+  """List, rename, merge, assign or remove tags; each change runs as one transaction."""
+  db = open_database(args.database)
+
+  try:
+    if args.action == 'list':
+      for stat in db.FetchTagStatistics():
+        print(f'{stat.templateCount:>6}  {stat}')
+
+      return 0
+
+    if args.action == 'rename':
+      count = db.RenameTag(args.tag, args.new_tag)
+      summary = f'renamed {args.tag} to {args.new_tag} on {count} template(s)'
+
+    elif args.action == 'merge':
+      count = db.MergeTags(args.tags, args.into)
+      summary = f'merged {", ".join(args.tags)} into {args.into} on {count} template(s)'
+
+    else:
+      rowIDs = _template_row_ids(db, args.template, args.with_tag)
+
+      if not rowIDs:
+        raise SystemExit('tags: name templates with --template or --with-tag')
+
+      if args.action == 'assign':
+        count = db.AssignTagToTemplates(args.tag, rowIDs)
+        summary = f'added {args.tag} to {count} of {len(rowIDs)} template(s)'
+
+      else:
+        count = db.RemoveTagFromTemplates(args.tag, rowIDs)
+        summary = f'removed {args.tag} from {count} of {len(rowIDs)} template(s)'
+
+  except (TagNotFound, TagAlreadyExists) as e:
+    raise SystemExit(f'tags: {e.message}') from None
+
+  except ValueError as e:
+    raise SystemExit(f'tags: {e}') from None
+
+  finally:
+    db.close()
+
+  print(f'tags: {summary}')
+  LOGGER.info(f'tags: {summary}')
+
+  return 0
+
+
+def cmd_snapshot(args: argparse.Namespace) -> int:
+  """Take, list or restore compressed snapshots of the database."""
+  databaseFile = resolve_database_path(args.database)
+  snapshotDir = args.dir or snapshot_dir_for(databaseFile)
+
+  if args.action == 'list':
+    for snapshot in list_snapshots(snapshotDir):
+      print(f'{snapshot.fileBytes:>14,}  {snapshot}  {snapshot.path.name}')
+
+    return 0
+
+  if args.action == 'create':
+    try:
+      snapshot = create_snapshot(databaseFile, snapshotDir, args.reason, args.keep)
+
+    except ValueError as e:
+      raise SystemExit(f'snapshot: {e}') from None
+
+    print(f'snapshot: saved {snapshot.path} ({snapshot.fileBytes:,} bytes)')
+
+    return 0
+
+  # A bare name is looked up in the snapshot folder.
+  source = args.snapshot if args.snapshot.parent != Path('.') else snapshotDir / args.snapshot
+
+  try:
+    current = restore_snapshot(
+      source, databaseFile, snapshotDir, keepCurrent=not args.no_keep_current
+    )
+
+  except InvalidSnapshot as e:
+    raise SystemExit(f'snapshot: {e.message}') from None
+
+  print(f'snapshot: restored {databaseFile} from {source}')
+
+  if current is not None:
+    print(f'snapshot: previous state saved as {current.path}')
+
+  return 0
+
+
+def cmd_analyze_logs(args: argparse.Namespace) -> int:
+  """Timing percentiles per event from JSON-lines logs."""
+  analysis = analyze_logs(args.paths, args.event, args.by_host)
+
+  if args.json:
+    print(json.dumps([timing.as_dict() for timing in analysis.timings], indent=2))
+
+  elif analysis.timings:
+    print(format_timings(analysis.timings))
+
+  print(
+    f'analyze-logs: {len(analysis.timings)} event group(s) from {analysis.files} file(s), '
+    f'{analysis.lines} line(s), {analysis.skipped} without timings',
+    file=sys.stderr,
+  )
+
+  return 0 if analysis.timings else 1
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+  """Run the local HTTP render service until interrupted."""
+  run_render_service(resolve_database_path(args.database), args.host, args.port)
+
+  return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+  parser = argparse.ArgumentParser(prog='emstencil', description='EmStencil database tools.')
+  parser.add_argument(
+    '--database',
+    '-d',
+    type=Path,
+    default=None,
+    help='Database file to operate on (defaults to the application database).',
+  )
+  parser.add_argument(
+    '--log-format',
+    choices=('text', 'json'),
+    default=None,
+    help='Run log layout (defaults to EMSTENCIL_LOG_FORMAT, else text).',
+  )
+  commands = parser.add_subparsers(dest='command', required=True)
+
+  compact = commands.add_parser(
+    'compact-images',
+    help='Downsample/re-encode inline images that exceed the size budget.',
+  )
+  compact.add_argument('--max-width', type=int, default=DEFAULT_IMAGE_BUDGET.max_width)
+  compact.add_argument('--max-height', type=int, default=DEFAULT_IMAGE_BUDGET.max_height)
+  compact.add_argument(
+    '--max-kib',
+    type=int,
+    default=DEFAULT_IMAGE_BUDGET.max_bytes // 1024,
+    help='Largest decoded size allowed per image, in KiB.',
+  )
+  compact.add_argument(
+    '--formats',
+    nargs='+',
+    type=str.upper,
+    choices=('PNG', 'JPEG', 'WEBP'),
+    default=list(DEFAULT_IMAGE_BUDGET.formats),
+    help='Candidate encodings; the smallest result is kept.',
+  )
+  compact.add_argument('--quality', type=int, default=DEFAULT_IMAGE_BUDGET.quality)
+  compact.add_argument(
+    '--dry-run',
+    action='store_true',
+    help='Report image weight and what would change without writing.',
+  )
+  compact.set_defaults(handler=cmd_compact_images)
+
+  importWorkbook = commands.add_parser(
+    'import',
+    help='Import templates from an .xlsx workbook (same format as File > Import Template).',
+  )
+  importWorkbook.add_argument('workbook', type=Path)
+  importWorkbook.add_argument(
+    '--workers',
+    type=int,
+    default=None,
+    help='Reader processes: 0 = single-process reader, default = decide by workbook size.',
+  )
+  importWorkbook.add_argument(
+    '--report',
+    type=Path,
+    default=None,
+    help='Write the validation report (JSON) to this file, whether or not the import goes ahead.',
+  )
+  importWorkbook.add_argument(
+    '--no-snapshot',
+    action='store_true',
+    help='Skip the pre-import snapshot of the database.',
+  )
+  importWorkbook.set_defaults(handler=cmd_import)
+
+  maintenance = commands.add_parser(
+    'maintenance',
+    help='Size report, integrity and foreign key checks, ANALYZE/optimize, and vacuum.',
+  )
+  maintenance.add_argument(
+    '--vacuum',
+    choices=('none', 'incremental', 'full'),
+    default='incremental',
+    help='incremental frees the freelist in place (the first run switches the file over).',
+  )
+  maintenance.add_argument('--no-check', action='store_true', help='Skip integrity checks.')
+  maintenance.add_argument('--no-analyze', action='store_true', help='Skip ANALYZE/optimize.')
+  maintenance.add_argument(
+    '--no-tag-sweep', action='store_true', help='Keep tags that no template carries.'
+  )
+  maintenance.add_argument(
+    '--report-only', action='store_true', help='Print the size report and change nothing.'
+  )
+  maintenance.set_defaults(handler=cmd_maintenance)
+
+  tags = commands.add_parser('tags', help='List, rename, merge, assign or remove metadata tags.')
+  tagActions = tags.add_subparsers(dest='action', required=True)
+  tagActions.add_parser('list', help='Print every tag and its template count, most used first.')
+  rename = tagActions.add_parser('rename', help='Rename a tag on every template carrying it.')
+  rename.add_argument('tag')
+  rename.add_argument('new_tag')
+  merge = tagActions.add_parser('merge', help='Fold tags into one tag and delete them.')
+  merge.add_argument('tags', nargs='+')
+  merge.add_argument('--into', required=True, help='Tag to keep (created if needed).')
+
+  for action, verb in (('assign', 'Add a tag to'), ('remove', 'Remove a tag from')):
+    change = tagActions.add_parser(action, help=f'{verb} the named templates.')
+    change.add_argument('tag')
+    change.add_argument(
+      '--template', action='append', default=[], help='Template title (repeatable).'
+    )
+    change.add_argument(
+      '--with-tag', action='append', default=[], help='Every template carrying this tag.'
+    )
+
+  tags.set_defaults(handler=cmd_tags)
+
+  snapshot = commands.add_parser(
+    'snapshot', help='Take, list or restore compressed snapshots of the database.'
+  )
+  snapshot.add_argument(
+    '--dir',
+    type=Path,
+    default=None,
+    help='Snapshot folder (defaults to "snapshots" next to the database).',
+  )
+  snapshotActions = snapshot.add_subparsers(dest='action', required=True)
+  create = snapshotActions.add_parser('create', help='Take a snapshot now.')
+  create.add_argument('--reason', default='manual', help='Label in the file name.')
+  create.add_argument(
+    '--keep',
+    type=int,
+    default=SNAPSHOT_RETENTION,
+    help='Snapshots to keep; older ones are deleted.',
+  )
+  snapshotActions.add_parser('list', help='Print the snapshots, newest first.')
+  restore = snapshotActions.add_parser('restore', help='Replace the database with a snapshot.')
+  restore.add_argument('snapshot', type=Path, help='Snapshot file, or its name in the folder.')
+  restore.add_argument(
+    '--no-keep-current',
+    action='store_true',
+    help='Do not snapshot the database before replacing it.',
+  )
+  snapshot.set_defaults(handler=cmd_snapshot)
+
+  serve = commands.add_parser(
+    'serve',
+    help='Serve merged template bodies over local HTTP (POST /render/{title}, /render-batch).',
+  )
+  serve.add_argument('--host', default=DEFAULT_HOST)
+  serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+  serve.set_defaults(handler=cmd_serve)
+
+  analyzeLogs = commands.add_parser(
+    'analyze-logs',
+    help='Timing percentiles per event from JSON-lines run logs (files, folders or .gz).',
+  )
+  analyzeLogs.add_argument('paths', type=Path, nargs='+')
+  analyzeLogs.add_argument('--event', default=None, help='Only events starting with this.')
+  analyzeLogs.add_argument('--by-host', action='store_true', help='One row per event and host.')
+  analyzeLogs.add_argument('--json', action='store_true', help='Print the summary as JSON.')
+  analyzeLogs.set_defaults(handler=cmd_analyze_logs)
+
+  return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+  args = build_parser().parse_args(argv)
+
+  if args.log_format is not None:
+    set_log_format(args.log_format)
+
+  return args.handler(args)
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -16,13 +16,11 @@ from __future__ import annotations
 
 import html
 import re
-
-from PySide6.QtGui import QTextDocument
+from html.parser import HTMLParser
 
 # Opening or closing tag with a letter name; avoids treating "<3" or "<!" alone as HTML.
 _TAG_RE = re.compile(r'</?[a-zA-Z][\w:-]*')
 
-_IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
 # Catches data URLs left in plain text after HTML→text conversion (e.g. from src attributes).
 _STANDALONE_DATA_URL_RE = re.compile(
   r'data:image/[\w+.-]+;base64,[A-Za-z0-9+/=]+',
@@ -61,12 +59,221 @@ def export_content_as_html(content: str) -> str:
   return f'<p>{escaped}</p>'
 
 
+# Elements that start and end their own line in plain text (Qt rich-text block elements).
+_BLOCK_TAGS: frozenset[str] = frozenset(
+  {
+    'address',
+    'article',
+    'aside',
+    'blockquote',
+    'body',
+    'caption',
+    'center',
+    'dd',
+    'div',
+    'dl',
+    'dt',
+    'figcaption',
+    'figure',
+    'footer',
+    'form',
+    'h1',
+    'h2',
+    'h3',
+    'h4',
+    'h5',
+    'h6',
+    'header',
+    'html',
+    'li',
+    'main',
+    'nav',
+    'ol',
+    'p',
+    'pre',
+    'section',
+    'ul',
+  }
+)
+# Elements whose text never reaches the plain-text output.
+_SKIPPED_TAGS: frozenset[str] = frozenset({'head', 'script', 'style', 'template', 'title'})
+_COLLAPSIBLE_WS_RE = re.compile(r'[ \t\n\r\f]+')
+# `white-space: pre` / `pre-wrap` in a style attribute or a <style> rule (Qt's toHtml() emits both).
+_PRE_WHITESPACE_RE = re.compile(r'white-space\s*:\s*pre(?:-wrap)?\b', re.IGNORECASE)
+_STYLE_RULE_RE = re.compile(r'([^{}]+)\{([^}]*)\}')
+
+
+class _PlainTextExtractor(HTMLParser):
+  """
+  Streaming HTML → text/plain converter following QTextDocument.toPlainText() block rules.
+    - Block elements, list items and table cells each become a line; <br> is a line break.
+    - Table ends and <hr> leave an empty line, like the empty block Qt keeps after a frame.
+    - Inline whitespace collapses to single spaces; <pre> and `white-space: pre(-wrap)` elements
+      (inline style or a simple tag rule in <style>) keep their text verbatim.
+    - <img> becomes [Image] so data-URL payloads never reach the clipboard text.
+  """
+
+  def __init__(self) -> None:
+    super().__init__(convert_charrefs=True)
+    self._lines: list[str] = []
+    self._current: list[str] = []
+    self._keepEmpty = False
+    self._pendingSpace = False
+    self._endsWithPreText = False
+    self._cellStarts: list[int] = []
+    self._preStack: list[str] = []
+    self._preTags: set[str] = {'pre'}
+    self._skipDepth = 0
+    self._styleText: list[str] = []
+
+  def text(self) -> str:
+    """Finish parsing and return the accumulated plain text."""
+    self.close()
+    self._endBlock()
+
+    return '\n'.join(self._lines).replace('\xa0', ' ')
+
+  def _endBlock(self) -> None:
+    if self._current or self._keepEmpty:
+      line = ''.join(self._current)
+      # Like Qt, a newline that closes preformatted text belongs to the markup, not the block.
+      if self._endsWithPreText and line.endswith('\n'):
+        line = line[:-1]
+
+      self._lines.append(line.rstrip(' '))
+
+    self._current = []
+    self._keepEmpty = False
+    self._pendingSpace = False
+    self._endsWithPreText = False
+
+  def _inline(self, text: str) -> None:
+    if self._preStack:
+      if not self._current:
+        text = text.removeprefix('\n')
+
+      if text:
+        self._current.append(text)
+        self._endsWithPreText = True
+
+      return
+
+    self._endsWithPreText = False
+
+    words = _COLLAPSIBLE_WS_RE.split(text)
+    for index, word in enumerate(words):
+      if index:
+        self._pendingSpace = bool(self._current)
+
+      if word:
+        if self._pendingSpace:
+          self._current.append(' ')
+
+        self._current.append(word)
+        self._pendingSpace = False
+
+  def _collectStyleRules(self) -> None:
+    """Record tags that a <style> block marks as whitespace-preserving."""
+    for selectors, body in _STYLE_RULE_RE.findall(''.join(self._styleText)):
+      if _PRE_WHITESPACE_RE.search(body):
+        self._preTags.update(
+          selector.strip().lower()
+          for selector in selectors.split(',')
+          if selector.strip().isalnum()
+        )
+
+    self._styleText = []
+
+  def handle_starttag(self, tag: str, attrs) -> None:
+    if tag in _SKIPPED_TAGS:
+      self._skipDepth += 1
+      return
+
+    if self._skipDepth:
+      return
+
+    self._startTag(tag)
+
+    style = dict(attrs).get('style') or ''
+    if tag in self._preTags or _PRE_WHITESPACE_RE.search(style):
+      self._preStack.append(tag)
+
+  def handle_startendtag(self, tag: str, attrs) -> None:
+    # Void/self-closed elements never hold text, so they skip the whitespace bookkeeping.
+    if not self._skipDepth:
+      self._startTag(tag)
+      self.handle_endtag(tag)
+
+  def _startTag(self, tag: str) -> None:
+    if tag == 'br':
+      self._current.append('\n')
+      self._pendingSpace = False
+      self._endsWithPreText = False
+
+    elif tag == 'img':
+      self._inline('\n[Image]\n')
+
+    elif tag == 'hr':
+      self._endBlock()
+      self._lines.append('')
+
+    elif tag in ('td', 'th'):
+      self._endBlock()
+      self._cellStarts.append(len(self._lines))
+
+    elif tag == 'table':
+      self._endBlock()
+
+    elif tag in _BLOCK_TAGS:
+      # A block opening on an empty line (e.g. <p> inside a cell) continues that line.
+      if self._current or self._keepEmpty:
+        self._endBlock()
+
+  def handle_endtag(self, tag: str) -> None:
+    if tag in _SKIPPED_TAGS:
+      self._skipDepth = max(0, self._skipDepth - 1)
+      if tag == 'style':
+        self._collectStyleRules()
+      return
+
+    if self._skipDepth:
+      return
+
+    if self._preStack and self._preStack[-1] == tag:
+      self._preStack.pop()
+
+    if tag in ('td', 'th'):
+      self._endBlock()
+      # Empty cells still occupy a line.
+      if self._cellStarts and self._cellStarts.pop() == len(self._lines):
+        self._lines.append('')
+
+    elif tag == 'table':
+      self._endBlock()
+      self._keepEmpty = True
+
+    elif tag in _BLOCK_TAGS:
+      self._endBlock()
+
+  def handle_data(self, data: str) -> None:
+    if not self._skipDepth:
+      self._inline(data)
+
+    elif self.lasttag == 'style':
+      self._styleText.append(data)
+
+
+def html_to_plain_text(html: str) -> str:
+  """Convert an HTML fragment to readable plain text without building a document (Qt-free)."""
+  extractor = _PlainTextExtractor()
+  extractor.feed(html)
+
+  return extractor.text()
+
+
 def clipboard_plain_text_from_merged_html(html: str) -> str:
   """text/plain for clipboard: keep readable text without embedding data-URL payloads."""
-  without_imgs = _IMG_TAG_RE.sub('\n[Image]\n', html)
-  doc = QTextDocument()
-  doc.setHtml(without_imgs)
-  plain = doc.toPlainText()
+  plain = html_to_plain_text(html)
   plain = _STANDALONE_DATA_URL_RE.sub('[Image]', plain)
 
   return plain.strip()
@@ -0,0 +1,229 @@
+"""
+ Program: Save-time budget for inline data:image payloads in template bodies.
+    Name: Andrew Dixon            File: embedded_images.py
+    Date: 19 Oct 2026
+   Notes: Finds base64 data URLs in template content, measures them, and re-encodes the ones that
+          exceed the pixel or byte budget. Used by the template editor on save and by the
+          `compact-images` CLI command over an existing database.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import re
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QSize
+from PySide6.QtGui import QImage, QImageReader
+
+from .images import ImageEncodePolicy, encode_image_bytes
+
+# Payload stops at the first non-base64 character (closing quote, paren, whitespace).
+_DATA_IMAGE_RE = re.compile(r'data:(image/[A-Za-z0-9.+-]+);base64,([A-Za-z0-9+/]+={0,2})')
+
+# Each pass that still misses the byte budget shrinks the pixel bounds by this factor.
+_SHRINK_STEP = 0.75
+_MAX_SHRINK_PASSES = 6
+
+
+@dataclass(frozen=True, slots=True)
+class ImageBudget:
+  """
+  Limits for one embedded image.
+    - Images wider/taller than max_width x max_height or larger than max_bytes (decoded) are
+      re-encoded; anything already within budget is left byte-for-byte unchanged.
+    - formats are tried in order and the smallest result wins; JPEG is skipped for images
+      with transparency.
+  """
+
+  max_width: int = 1600
+  max_height: int = 1600
+  max_bytes: int = 512 * 1024
+  formats: tuple[str, ...] = ('PNG', 'JPEG')
+  quality: int = 85
+
+  def __post_init__(self) -> None:
+    if self.max_width < 1 or self.max_height < 1 or self.max_bytes < 1:
+      raise ValueError('Image budget limits must be positive')
+
+    for fmt in self.formats:
+      # Validates the format name and quality the same way the paste policy does.
+      ImageEncodePolicy(self.max_width, self.max_height, fmt, self.quality)
+
+
+DEFAULT_IMAGE_BUDGET = ImageBudget()
+
+
+class ImageWeight(NamedTuple):
+  """Inline image totals for one template body (bytes are decoded payload sizes)."""
+
+  count: int = 0
+  total_bytes: int = 0
+  largest_bytes: int = 0
+
+  def __add__(self, other: ImageWeight) -> ImageWeight:  # type: ignore[override]
+    return ImageWeight(
+      self.count + other.count,
+      self.total_bytes + other.total_bytes,
+      max(self.largest_bytes, other.largest_bytes),
+    )
+
+
+class CompactionResult(NamedTuple):
+  content: str
+  before: ImageWeight
+  after: ImageWeight
+  recompressed: int
+
+  @property
+  def changed(self) -> bool:
+    return self.recompressed > 0
+
+
+def _decoded_size(payload: str) -> int:
+  """Decoded byte length from base64 text without decoding it."""
+  return len(payload) * 3 // 4 - payload.count('=', len(payload) - 2)
+
+
+def measure_embedded_images(content: str) -> ImageWeight:
+  """Count and size inline data:image payloads (no image decoding)."""
+  weight = ImageWeight()
+
+  if 'data:image/' not in content:
+    return weight
+
+  for m in _DATA_IMAGE_RE.finditer(content):
+    size = _decoded_size(m.group(2))
+    weight += ImageWeight(1, size, size)
+
+  return weight
+
+
+def _image_dimensions(raw: bytes) -> QSize:
+  """Read dimensions from the image header only."""
+  blob = QByteArray(raw)
+  buf = QBuffer(blob)
+  buf.open(QIODevice.OpenModeFlag.ReadOnly)
+
+  return QImageReader(buf).size()
+
+
+def _within_budget(raw: bytes, budget: ImageBudget) -> bool:
+  if len(raw) > budget.max_bytes:
+    return False
+
+  size = _image_dimensions(raw)
+
+  # Unknown size (unreadable header): nothing to gain by trying to re-encode it.
+  if not size.isValid():
+    return True
+
+  return size.width() <= budget.max_width and size.height() <= budget.max_height
+
+
+def recompress_image(
+  raw: bytes, budget: ImageBudget = DEFAULT_IMAGE_BUDGET
+) -> tuple[bytes, str] | None:
+  """
+  Re-encode one image to fit the budget.
+    - Returns (bytes, mime type) for the smallest candidate, or None if the image cannot be
+      decoded or no candidate is smaller than the original.
+  """
+  img = QImage.fromData(raw)
+
+  if img.isNull():
+    return None
+
+  formats = [f for f in budget.formats if not (f == 'JPEG' and img.hasAlphaChannel())] or ['PNG']
+  width, height = budget.max_width, budget.max_height
+  best: tuple[bytes, str] | None = None
+
+  for _ in range(_MAX_SHRINK_PASSES):
+    for fmt in formats:
+      encoded = encode_image_bytes(img, ImageEncodePolicy(width, height, fmt, budget.quality))
+      if encoded is not None and (best is None or len(encoded[0]) < len(best[0])):
+        best = encoded
+
+    if best is not None and len(best[0]) <= budget.max_bytes:
+      break
+
+    width, height = max(1, int(width * _SHRINK_STEP)), max(1, int(height * _SHRINK_STEP))
+
+  if best is None or len(best[0]) >= len(raw):
+    return None
+
+  return best
+
+
+def compact_embedded_images(
+  content: str, budget: ImageBudget = DEFAULT_IMAGE_BUDGET
+) -> CompactionResult:
+  """
+  Re-encode inline images that exceed the budget and rebuild the content in one pass.
+    - Identical payloads are processed once; the same image pasted twice costs one re-encode.
+    - Content without data:image URLs is returned as-is without scanning further.
+  """
+  if 'data:image/' not in content:
+    return CompactionResult(content, ImageWeight(), ImageWeight(), 0)
+
+  before = ImageWeight()
+  after = ImageWeight()
+  recompressed = 0
+  replacements: dict[str, str | None] = {}
+  chunks: list[str] = []
+  pos = 0
+
+  for m in _DATA_IMAGE_RE.finditer(content):
+    payload = m.group(2)
+    size = _decoded_size(payload)
+    before += ImageWeight(1, size, size)
+
+    if payload not in replacements:
+      replacements[payload] = None
+
+      try:
+        raw = base64.b64decode(payload, validate=True)
+
+      except (ValueError, binascii.Error):
+        raw = b''
+
+      if raw and not _within_budget(raw, budget):
+        smaller = recompress_image(raw, budget)
+        if smaller is not None:
+          replacements[payload] = (
+            f'data:{smaller[1]};base64,{base64.b64encode(smaller[0]).decode("ascii")}'
+          )
+
+    replacement = replacements[payload]
+
+    if replacement is None:
+      after += ImageWeight(1, size, size)
+      continue
+
+    newSize = _decoded_size(replacement.split(',', 1)[1])
+    after += ImageWeight(1, newSize, newSize)
+    chunks.append(content[pos : m.start()])
+    chunks.append(replacement)
+    pos = m.end()
+    recompressed += 1
+
+  if not recompressed:
+    return CompactionResult(content, before, after, 0)
+
+  chunks.append(content[pos:])
+
+  return CompactionResult(''.join(chunks), before, after, recompressed)
+
+
+def format_weight(weight: ImageWeight) -> str:
+  """Short human readable summary for logs and CLI output."""
+  return f'{weight.count} image(s), {weight.total_bytes / 1024:.1f} KiB'
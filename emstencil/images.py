@@ -0,0 +1,260 @@
+"""
+ Program: Image encoding, downscaling, and thumbnail helpers for ^{} image fields.
+    Name: Andrew Dixon            File: images.py
+    Date: 19 Oct 2026
+   Notes: Everything here works on QImage so it is safe to run from QThreadPool workers; QPixmap
+          conversion is left to the GUI thread.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import NamedTuple
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QObject, QRunnable, Qt, Signal
+from PySide6.QtGui import QColor, QImage, QImageWriter, QPainter
+
+THUMBNAIL_SIZE = 72
+
+_MIME_TYPES = {'PNG': 'image/png', 'JPEG': 'image/jpeg', 'WEBP': 'image/webp'}
+
+
+@dataclass(frozen=True, slots=True)
+class ImageEncodePolicy:
+  """
+  How pasted images are stored in the merged body.
+    - Images larger than max_width x max_height are scaled down, keeping aspect ratio.
+    - format is PNG, JPEG, or WEBP; quality (0-100) applies to the lossy formats, -1 is Qt default.
+  """
+
+  max_width: int = 1600
+  max_height: int = 1600
+  format: str = 'PNG'
+  quality: int = -1
+
+  def __post_init__(self) -> None:
+    if self.format not in _MIME_TYPES:
+      raise ValueError(
+        f'Unsupported image format {self.format!r}, expected one of {list(_MIME_TYPES)}'
+      )
+
+    if self.max_width < 1 or self.max_height < 1:
+      raise ValueError('Image policy dimensions must be positive')
+
+    if not -1 <= self.quality <= 100:
+      raise ValueError('Image policy quality must be -1 or between 0 and 100')
+
+  @property
+  def mime_type(self) -> str:
+    return _MIME_TYPES[self.format]
+
+  def prepare(self, img: QImage) -> QImage:
+    """Downscale to the policy bounds and flatten alpha for formats that cannot carry it."""
+    if img.width() > self.max_width or img.height() > self.max_height:
+      img = img.scaled(
+        self.max_width,
+        self.max_height,
+        Qt.AspectRatioMode.KeepAspectRatio,
+        Qt.TransformationMode.SmoothTransformation,
+      )
+
+    if self.format == 'JPEG' and img.hasAlphaChannel():
+      # JPEG has no alpha; composite onto white rather than letting transparent pixels go black.
+      flat = QImage(img.size(), QImage.Format.Format_RGB32)
+      flat.fill(QColor('white'))
+      painter = QPainter(flat)
+      painter.drawImage(0, 0, img)
+      painter.end()
+      img = flat
+
+    return img
+
+
+DEFAULT_IMAGE_POLICY = ImageEncodePolicy()
+LOSSLESS_IMAGE_POLICY = ImageEncodePolicy(max_width=2**15, max_height=2**15)
+
+
+def _writer_supports(fmt: str) -> bool:
+  return fmt.lower().encode('ascii') in {
+    bytes(f.data()) for f in QImageWriter.supportedImageFormats()
+  }
+
+
+class EncodedImage(NamedTuple):
+  """Result of encoding one image: data URL, its digest, and the prepared image and thumbnail."""
+
+  data_url: str
+  digest: str
+  image: QImage
+  thumbnail: QImage
+
+
+def data_url_digest(url: str) -> str:
+  """Stable cache key for a data URL (hash of the URL text, no base64 decode)."""
+  return hashlib.blake2b(url.strip().encode('ascii', 'replace'), digest_size=16).hexdigest()
+
+
+def make_thumbnail(img: QImage, size: int = THUMBNAIL_SIZE) -> QImage:
+  return img.scaled(
+    size,
+    size,
+    Qt.AspectRatioMode.KeepAspectRatio,
+    Qt.TransformationMode.SmoothTransformation,
+  )
+
+
+def encode_image_bytes(img: QImage, policy: ImageEncodePolicy) -> tuple[bytes, str] | None:
+  """Apply policy and encode; (encoded bytes, mime type) or None. Unsupported formats fall back to PNG."""
+  if img.isNull():
+    return None
+
+  if not _writer_supports(policy.format):
+    policy = ImageEncodePolicy(policy.max_width, policy.max_height, 'PNG', policy.quality)
+
+  blob = QByteArray()
+  buf = QBuffer(blob)
+  buf.open(QIODevice.OpenModeFlag.WriteOnly)
+
+  if not policy.prepare(img).save(buf, policy.format, policy.quality):
+    return None
+
+  return blob.data(), policy.mime_type
+
+
+def encode_image(
+  img: QImage, policy: ImageEncodePolicy = DEFAULT_IMAGE_POLICY
+) -> EncodedImage | None:
+  """Apply policy and encode to a data URL; None if the image is null or encoding fails."""
+  if img.isNull():
+    return None
+
+  prepared = policy.prepare(img)
+  encoded = encode_image_bytes(prepared, policy)
+
+  if encoded is None:
+    return None
+
+  payload, mime = encoded
+  url = f'data:{mime};base64,{base64.b64encode(payload).decode("ascii")}'
+  digest = data_url_digest(url)
+  thumb = make_thumbnail(prepared)
+  THUMBNAIL_CACHE.put(digest, thumb)
+
+  return EncodedImage(url, digest, prepared, thumb)
+
+
+def image_from_data_url(url: str) -> QImage | None:
+  """Decode a data:image/* URL to a QImage, or None."""
+  u = url.strip()
+
+  if not u.startswith('data:image/'):
+    return None
+
+  try:
+    comma = u.index(',')
+    raw = base64.b64decode(u[comma + 1 :])
+
+  except (ValueError, binascii.Error):
+    return None
+
+  img = QImage.fromData(raw)
+
+  return None if img.isNull() else img
+
+
+def thumbnail_for_data_url(url: str) -> QImage | None:
+  """Cached thumbnail for a data URL; decodes only on a cache miss."""
+  digest = data_url_digest(url)
+  thumb = THUMBNAIL_CACHE.get(digest)
+
+  if thumb is not None:
+    return thumb
+
+  img = image_from_data_url(url)
+
+  if img is None:
+    return None
+
+  thumb = make_thumbnail(img)
+  THUMBNAIL_CACHE.put(digest, thumb)
+
+  return thumb
+
+
+class ThumbnailCache:
+  """Small LRU of thumbnails keyed by data URL digest; shared across dialogs and worker threads."""
+
+  def __init__(self, maxsize: int = 256) -> None:
+    self.maxsize = maxsize
+    self._entries: OrderedDict[str, QImage] = OrderedDict()
+    self._lock = Lock()
+
+  def get(self, digest: str) -> QImage | None:
+    with self._lock:
+      thumb = self._entries.get(digest)
+      if thumb is not None:
+        self._entries.move_to_end(digest)
+
+      return thumb
+
+  def put(self, digest: str, thumb: QImage) -> None:
+    with self._lock:
+      self._entries[digest] = thumb
+      self._entries.move_to_end(digest)
+      while len(self._entries) > self.maxsize:
+        self._entries.popitem(last=False)
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+
+
+THUMBNAIL_CACHE = ThumbnailCache()
+
+
+class ImageTaskSignals(QObject):
+  """Queued back to the GUI thread: (request serial, EncodedImage | QImage | None)."""
+
+  finished = Signal(int, object)
+
+
+class EncodeImageTask(QRunnable):
+  """Encode a pasted image under a policy off the GUI thread."""
+
+  def __init__(self, serial: int, img: QImage, policy: ImageEncodePolicy) -> None:
+    super().__init__()
+    self.serial = serial
+    self.img = img
+    self.policy = policy
+    self.signals = ImageTaskSignals()
+
+  def run(self) -> None:
+    self.signals.finished.emit(self.serial, encode_image(self.img, self.policy))
+
+
+class ThumbnailTask(QRunnable):
+  """Decode a data URL and build (or fetch) its thumbnail off the GUI thread."""
+
+  def __init__(self, serial: int, url: str) -> None:
+    super().__init__()
+    self.serial = serial
+    self.url = url
+    self.signals = ImageTaskSignals()
+
+  def run(self) -> None:
+    self.signals.finished.emit(self.serial, thumbnail_for_data_url(self.url))
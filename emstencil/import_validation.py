@@ -0,0 +1,198 @@
+"""
+ Program: Pre-import validation for template workbooks, with a machine-readable report.
+    Name: Andrew Dixon            File: import_validation.py
+    Date: 19 Oct 2026
+   Notes: Every row is checked before anything is written. Per-row checks (titles, placeholder
+          syntax and kinds, reserved tags) fan out to worker processes for large workbooks.
+          Duplicate titles need the whole sheet, so the parent process checks those.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import NamedTuple
+
+from .Dataclasses import EmailTemplate
+from .Exceptions import TemplateFieldKindConflict
+from .import_workers import TemplateRow, worker_pool_context
+
+# Sheet row of the first template row (row 1 is the header).
+FIRST_DATA_ROW = 2
+
+# Tag the application adds itself to mean "every template".
+RESERVED_TAG = 'all'
+
+# Row counts below this validate in-process; pool start-up would cost more than it saves.
+PARALLEL_VALIDATION_MIN_ROWS = 5_000
+
+_BATCH_ROWS = 1_000
+# An opener whose next brace is another opening brace, or that runs to the end of the body.
+_UNCLOSED_PLACEHOLDER_RE = re.compile(r'[$^]\{[^{}]*(?:\{|\Z)')
+
+
+class ImportIssue(NamedTuple):
+  """One problem with one sheet row; `code` is stable for tools reading the report."""
+
+  row: int
+  title: str
+  code: str
+  message: str
+
+
+@dataclass(slots=True)
+class ImportReport:
+  """Outcome of validating a workbook; nothing is imported unless `ok`."""
+
+  workbook: str
+  rows: int
+  templates: int
+  issues: list[ImportIssue] = field(default_factory=list)
+
+  @property
+  def ok(self) -> bool:
+    return not self.issues
+
+  def as_dict(self) -> dict:
+    return {
+      'workbook': self.workbook,
+      'rows': self.rows,
+      'templates': self.templates,
+      'valid': self.ok,
+      'issues': [issue._asdict() for issue in self.issues],
+    }
+
+  def write(self, path: Path) -> None:
+    """Write the report as JSON (UTF-8, one issue object per problem)."""
+    path.write_text(json.dumps(self.as_dict(), ensure_ascii=False, indent=2), encoding='utf-8')
+
+  def summary(self, limit: int = 20) -> str:
+    """Human-readable digest; duplicate titles are grouped on one line, other issues per row."""
+    duplicates = sorted({issue.title for issue in self.issues if issue.code == 'duplicate-title'})
+    lines = [f'{len(self.issues)} problem(s) found in import file; nothing was imported.']
+
+    if duplicates:
+      lines.append(f'Duplicate template titles found in import file: {", ".join(duplicates)}')
+
+    others = [issue for issue in self.issues if issue.code != 'duplicate-title']
+    lines.extend(f'Row {issue.row}: {issue.message}' for issue in others[:limit])
+
+    if len(others) > limit:
+      lines.append(f'... and {len(others) - limit} more (see the import report).')
+
+    return '\n'.join(lines)
+
+
+def is_blank_row(row: TemplateRow) -> bool:
+  """Rows with no title, content, or tags are spacing in the sheet, not templates."""
+  title, content, tagParts = row
+  return not title and not content and not any(part.strip() for part in tagParts)
+
+
+def validate_import_rows(
+  rows: Sequence[TemplateRow], workbook: str = '', workers: int | None = None
+) -> ImportReport:
+  """
+  Check every row and collect all problems with their sheet row numbers.
+  workers=None uses one process per CPU once there are PARALLEL_VALIDATION_MIN_ROWS rows.
+  """
+  if workers is None:
+    workers = (os.cpu_count() or 1) if len(rows) >= PARALLEL_VALIDATION_MIN_ROWS else 1
+
+  numbered = [
+    (FIRST_DATA_ROW + index, row) for index, row in enumerate(rows) if not is_blank_row(row)
+  ]
+  issues = _duplicate_title_issues(numbered)
+
+  if workers <= 1:
+    issues.extend(_validate_batch(numbered))
+
+  else:
+    with ProcessPoolExecutor(workers, mp_context=worker_pool_context()) as pool:
+      for batchIssues in pool.map(_validate_batch, _batches(numbered)):
+        issues.extend(batchIssues)
+
+  issues.sort(key=lambda issue: issue.row)
+
+  return ImportReport(workbook, len(rows), len(numbered), issues)
+
+
+def _batches(numbered: list[tuple[int, TemplateRow]]) -> Iterator[list[tuple[int, TemplateRow]]]:
+  for start in range(0, len(numbered), _BATCH_ROWS):
+    yield numbered[start : start + _BATCH_ROWS]
+
+
+def _duplicate_title_issues(numbered: list[tuple[int, TemplateRow]]) -> list[ImportIssue]:
+  firstRows: dict[str, int] = {}
+  issues: list[ImportIssue] = []
+
+  for rowNumber, (title, _, _) in numbered:
+    if not title:
+      continue
+
+    if title in firstRows:
+      issues.append(
+        ImportIssue(
+          rowNumber,
+          title,
+          'duplicate-title',
+          f'Duplicate template title {title!r} (first used on row {firstRows[title]}).',
+        )
+      )
+
+    else:
+      firstRows[title] = rowNumber
+
+  return issues
+
+
+def _validate_batch(batch: list[tuple[int, TemplateRow]]) -> list[ImportIssue]:
+  issues: list[ImportIssue] = []
+
+  for rowNumber, row in batch:
+    issues.extend(_validate_row(rowNumber, row))
+
+  return issues
+
+
+def _validate_row(rowNumber: int, row: TemplateRow) -> Iterator[ImportIssue]:
+  """Per-row checks; mirrors what the import itself would trip over, plus malformed placeholders."""
+  title, content, tagParts = row
+
+  if not title:
+    yield ImportIssue(rowNumber, title, 'empty-title', 'Template title is empty.')
+
+  if RESERVED_TAG in {part.strip().lower() for part in tagParts}:
+    yield ImportIssue(
+      rowNumber, title, 'reserved-tag', f'The tag {RESERVED_TAG!r} is reserved by the application.'
+    )
+
+  if _UNCLOSED_PLACEHOLDER_RE.search(content):
+    yield ImportIssue(
+      rowNumber, title, 'unclosed-placeholder', 'Placeholder opened with ${ or ^{ is never closed.'
+    )
+
+  try:
+    template = EmailTemplate(title, content)
+
+  except TemplateFieldKindConflict as e:
+    yield ImportIssue(rowNumber, title, 'placeholder-kind-conflict', e.message)
+    return
+
+  for key in template.fields:
+    if not key.strip() or '{' in key:
+      yield ImportIssue(
+        rowNumber, title, 'invalid-placeholder', f'Placeholder name {key!r} is not valid.'
+      )
@@ -0,0 +1,93 @@
+"""
+ Program: Worker-process side of the parallel import reader and validator.
+    Name: Andrew Dixon            File: import_workers.py
+    Date: 19 Oct 2026
+   Notes: Pools start their workers as fresh interpreters (forkserver, else spawn), never by forking
+          the application: by the time an import runs the GUI process has Qt and thread pool
+          threads, and a forked child can inherit a lock one of them held and hang. Workers import
+          this module and what it needs (openpyxl, Dataclasses), not Qt.
+
+          parse_sheet_chunk uses openpyxl's worksheet parser, which is not public API. It is only
+          used with the openpyxl versions pinned in pyproject.toml; SHEET_PARSER_AVAILABLE is
+          False when the parser cannot be imported, and the import falls back to the
+          single-process reader.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from io import BytesIO
+
+from openpyxl.xml.functions import iterparse
+
+from .spreadsheet import normalize_template_row
+
+try:
+  from openpyxl.worksheet._reader import ROW_TAG, WorkSheetParser
+
+  SHEET_PARSER_AVAILABLE = True
+
+except ImportError:
+  ROW_TAG = WorkSheetParser = None
+  SHEET_PARSER_AVAILABLE = False
+
+TemplateRow = tuple[str, str, list[str]]
+
+# Parse context for worker processes, installed once per process by init_sheet_worker.
+_WORKER_CONTEXT: dict = {}
+
+
+class SerialReadRequired(Exception):
+  """The sheet cannot be split safely (implicit row numbers, CDATA); use the openpyxl reader."""
+
+
+def worker_pool_context() -> multiprocessing.context.BaseContext:
+  """Start method for import pools: forkserver where the platform has it, else spawn."""
+  method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+  return multiprocessing.get_context(method)
+
+
+def init_sheet_worker(context: dict) -> None:
+  _WORKER_CONTEXT.update(context)
+
+
+def parse_sheet_chunk(rowsXml: bytes, context: dict | None = None) -> list[tuple[int, TemplateRow]]:
+  """Parse whole <row> elements with openpyxl's own cell rules and normalize columns A–C."""
+  context = context or _WORKER_CONTEXT
+  parser = WorkSheetParser(
+    None,
+    context['sharedStrings'],
+    data_only=True,
+    epoch=context['epoch'],
+    date_formats=context['dateFormats'],
+    timedelta_formats=context['timedeltaFormats'],
+  )
+  rows: list[tuple[int, TemplateRow]] = []
+
+  for _, element in iterparse(BytesIO(context['head'] + rowsXml + context['tail'])):
+    if element.tag != ROW_TAG:
+      continue
+
+    # Rows without r= are numbered from the previous row, which lives in another chunk.
+    if 'r' not in element.attrib:
+      raise SerialReadRequired()
+
+    rowNumber, cells = parser.parse_row(element)
+    element.clear()
+    values: list[object] = [None, None, None]
+
+    for cell in cells:
+      if 1 <= cell['column'] <= 3:
+        values[cell['column'] - 1] = cell['value']
+
+    rows.append((rowNumber, normalize_template_row(values)))
+
+  return rows
@@ -23,6 +23,164 @@ from .Logging import LOGGER
 from .Exceptions import DatabaseDDLSourceMissing
 
 
+# templateChanges rows for this template uid mark a wholesale replacement of the database (a
+# snapshot restore). Readers of the log reload everything when they pass one.
+CHANGE_LOG_RESYNC_UID = 0
+
+# Schema upgrades keyed by the user_version they bring the database to. New databases are built
+# straight from templates.sql (which sets the latest version), so these only run on older files.
+SCHEMA_MIGRATIONS: dict[int, str] = {
+  1: """
+    drop view if exists vw_Templates_Tags;
+    create view vw_Templates_Tags as
+      select tm.title as title, tm.content as content,
+        ta.tag as tag, tm.uid as tmpRowID, ta.uid as tgRowID
+      from templates tm
+        left join templateTags tg
+          on tm.uid = tg.tmplt_uid
+        left join tags ta
+          on tg.tag_uid = ta.uid;
+
+    drop index if exists ix_TemplateTags_by_Tag;
+    create index ix_TemplateTags_by_Tag on templateTags (
+      tag_uid asc,
+      tmplt_uid asc
+    );
+  """,
+  2: """
+    create index if not exists ix_Templates_Title_NoCase on templates (
+      title collate nocase asc,
+      uid asc
+    );
+  """,
+  3: """
+    alter table templates add column revision integer not null default 0;
+
+    drop trigger if exists Templates_Date_Updated;
+    Create Trigger Templates_Date_Updated
+      After Update of title, content On templates
+      Begin Update templates
+        Set DateUpdated = Datetime('Now'), revision = Old.revision + 1
+        Where uid = Old.uid;
+    End;
+
+    Create Trigger TemplateTags_Revision_Insert
+      After Insert On templateTags
+      Begin Update templates
+        Set revision = revision + 1
+        Where uid = New.tmplt_uid;
+    End;
+
+    Create Trigger TemplateTags_Revision_Delete
+      After Delete On templateTags
+      Begin Update templates
+        Set revision = revision + 1
+        Where uid = Old.tmplt_uid;
+    End;
+
+    Create Trigger Tags_Revision_Renamed
+      After Update of tag On tags
+      Begin Update templates
+        Set revision = revision + 1
+        Where uid in (select tmplt_uid from templateTags where tag_uid = New.uid);
+    End;
+
+    Create Table templateChanges (
+      seq integer primary key autoincrement not null,
+      tmplt_uid integer not null,
+      revision integer
+    );
+
+    Create Trigger Templates_Changed_Insert
+      After Insert On templates
+      Begin Insert Into templateChanges (tmplt_uid, revision)
+        Values (New.uid, New.revision);
+    End;
+
+    Create Trigger Templates_Changed_Revision
+      After Update of revision On templates
+      Begin Insert Into templateChanges (tmplt_uid, revision)
+        Values (New.uid, New.revision);
+    End;
+
+    Create Trigger Templates_Changed_Delete
+      After Delete On templates
+      Begin Insert Into templateChanges (tmplt_uid, revision)
+        Values (Old.uid, null);
+    End;
+  """,
+  4: """
+    Create Table tagStats (
+      tag_uid integer primary key not null,
+      template_count integer not null default 0,
+      last_used datetime
+    );
+
+    insert into tagStats (tag_uid, template_count, last_used)
+      select ta.uid, count(tt.uid), max(tt.dateAdded)
+      from tags ta
+        left join templateTags tt on tt.tag_uid = ta.uid
+      group by ta.uid;
+
+    Create Trigger Tags_Stats_Insert
+      After Insert On tags
+      Begin Insert Into tagStats (tag_uid)
+        Values (New.uid);
+    End;
+
+    Create Trigger Tags_Stats_Delete
+      After Delete On tags
+      Begin Delete From tagStats
+        Where tag_uid = Old.uid;
+    End;
+
+    Create Trigger TemplateTags_Stats_Insert
+      After Insert On templateTags
+      Begin Update tagStats
+        Set template_count = template_count + 1, last_used = Datetime('Now')
+        Where tag_uid = New.tag_uid;
+    End;
+
+    Create Trigger TemplateTags_Stats_Delete
+      After Delete On templateTags
+      Begin Update tagStats
+        Set template_count = template_count - 1
+        Where tag_uid = Old.tag_uid;
+    End;
+
+    Create Trigger TemplateTags_Stats_Moved
+      After Update of tag_uid On templateTags
+      Begin
+        Update tagStats
+          Set template_count = template_count - 1
+          Where tag_uid = Old.tag_uid;
+        Update tagStats
+          Set template_count = template_count + 1, last_used = Datetime('Now')
+          Where tag_uid = New.tag_uid;
+    End;
+
+    create index ix_TagStats_by_Count on tagStats (
+      template_count desc,
+      tag_uid asc
+    );
+  """,
+  5: """
+    Create Table templateUsage (
+      tmplt_uid integer primary key not null,
+      select_count integer not null default 0,
+      copy_count integer not null default 0,
+      last_used datetime not null
+    );
+
+    Create Trigger Templates_Usage_Delete
+      After Delete On templates
+      Begin Delete From templateUsage
+        Where tmplt_uid = Old.uid;
+    End;
+  """,
+}
+
+
 def is_initilized() -> bool:
   initilizeData()
   databaseFile = DATA_DIR.joinpath('templates.db')
@@ -36,6 +194,8 @@ def is_initilized() -> bool:
   else:
     LOGGER.info('All objects found.')
 
+  upgradeDatabase()
+
   return True
 
 
@@ -108,6 +268,35 @@ def createDatabase() -> bool:
   return DATABASE_FILE.exists()
 
 
+def upgradeDatabase(databaseFile: Path | None = None) -> int:
+  """
+  Apply any schema migrations newer than the database's user_version. Returns the final version.
+  """
+  if databaseFile is None:
+    databaseFile = DATABASE_FILE
+
+  database = sqlite3.connect(databaseFile)
+
+  try:
+    version: int = database.execute('pragma user_version').fetchone()[0]
+
+    for targetVersion in sorted(SCHEMA_MIGRATIONS):
+      if targetVersion <= version:
+        continue
+
+      LOGGER.info(f'Upgrading database schema to version {targetVersion}...')
+      # executescript commits any pending transaction first; wrap each step so it applies atomically.
+      database.executescript(
+        f'begin; {SCHEMA_MIGRATIONS[targetVersion]} pragma user_version = {targetVersion}; commit;'
+      )
+      version = targetVersion
+
+  finally:
+    database.close()
+
+  return version
+
+
 def initilizeData() -> bool:
   """
   Function just in case we need to manually cause a rebuild by calling this script directly.
@@ -0,0 +1,199 @@
+"""
+ Program: Timing percentiles from JSON-lines run logs (`python -m emstencil.cli analyze-logs`).
+    Name: Andrew Dixon            File: log_analysis.py
+    Date: 19 Oct 2026
+   Notes: Reads logs written with EMSTENCIL_LOG_FORMAT=json, from any number of files, folders or
+          .gz copies, and summarizes the events that carry duration_ms (see Logging.timed_event).
+          Text-format lines and records without timings are counted and skipped.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import math
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO
+
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass(frozen=True, slots=True)
+class EventTiming:
+  """Durations (ms) and totals for one event name, or one event on one host."""
+
+  event: str
+  host: str | None
+  count: int
+  failures: int
+  percentiles: dict[int, float]
+  maxMs: float
+  totalMs: float
+  rows: int
+  bytes: int
+
+  def as_dict(self) -> dict:
+    return {
+      'event': self.event,
+      'host': self.host,
+      'count': self.count,
+      'failures': self.failures,
+      **{f'p{q}_ms': value for q, value in self.percentiles.items()},
+      'max_ms': self.maxMs,
+      'total_ms': self.totalMs,
+      'rows': self.rows,
+      'bytes': self.bytes,
+    }
+
+
+@dataclass(slots=True)
+class LogAnalysis:
+  files: int = 0
+  lines: int = 0
+  skipped: int = 0
+  timings: list[EventTiming] = field(default_factory=list)
+
+
+def percentile(ordered: list[float], q: float) -> float:
+  """Nearest-rank percentile of an ascending, non-empty list."""
+  return ordered[max(math.ceil(q / 100 * len(ordered)), 1) - 1]
+
+
+def log_files(paths: Iterable[Path]) -> list[Path]:
+  """Files as given, plus every *.log, *.jsonl (or .gz of either) file under given folders."""
+  files = []
+
+  for path in map(Path, paths):
+    if not path.is_dir():
+      files.append(path)
+      continue
+
+    files.extend(
+      sorted(
+        found
+        for found in path.rglob('*')
+        if found.is_file() and found.name.removesuffix('.gz').endswith(('.log', '.jsonl'))
+      )
+    )
+
+  return files
+
+
+def analyze_logs(
+  paths: Iterable[Path], eventPrefix: str | None = None, byHost: bool = False
+) -> LogAnalysis:
+  """
+  Group timed events from `paths` by event name (and host when `byHost`) and summarize them.
+    - eventPrefix keeps only events starting with it, e.g. 'db.' for the database writes.
+    - Failed operations count toward the percentiles; they are also counted as failures.
+  """
+  analysis = LogAnalysis()
+  groups: dict[tuple[str, str | None], list] = {}
+
+  for path in log_files(paths):
+    analysis.files += 1
+
+    with _open_log(path) as lines:
+      for record in _records(lines, analysis):
+        event = record.get('event')
+        duration = record.get('duration_ms')
+
+        if not isinstance(event, str) or not isinstance(duration, (int, float)):
+          analysis.skipped += 1
+          continue
+
+        if eventPrefix and not event.startswith(eventPrefix):
+          continue
+
+        # durations, failures, rows, bytes
+        group = groups.setdefault((event, record.get('host') if byHost else None), [[], 0, 0, 0])
+        group[0].append(float(duration))
+        group[1] += record.get('ok') is False
+        group[2] += _count(record.get('rows'))
+        group[3] += _count(record.get('bytes'))
+
+  for (event, host), (durations, failures, rows, byteCount) in sorted(
+    groups.items(), key=lambda item: (item[0][0], item[0][1] or '')
+  ):
+    durations.sort()
+    analysis.timings.append(
+      EventTiming(
+        event,
+        host,
+        len(durations),
+        failures,
+        {q: round(percentile(durations, q), 3) for q in PERCENTILES},
+        durations[-1],
+        round(sum(durations), 3),
+        rows,
+        byteCount,
+      )
+    )
+
+  return analysis
+
+
+def format_timings(timings: list[EventTiming]) -> str:
+  """Plain text table of timings, one event (and host) per row."""
+  byHost = any(timing.host for timing in timings)
+  hostWidth = max((len(timing.host or '') for timing in timings), default=0)
+  eventWidth = max((len(timing.event) for timing in timings), default=5)
+  header = f'{"event":<{eventWidth}} '
+  header += f'{"host":<{hostWidth}} ' if byHost else ''
+  header += f'{"count":>7} {"failed":>6} '
+  header += ' '.join(f'{f"p{q} ms":>9}' for q in PERCENTILES)
+  header += f' {"max ms":>9} {"rows":>9} {"MiB":>8}'
+  lines = [header]
+
+  for timing in timings:
+    line = f'{timing.event:<{eventWidth}} '
+    line += f'{timing.host or "":<{hostWidth}} ' if byHost else ''
+    line += f'{timing.count:>7} {timing.failures:>6} '
+    line += ' '.join(f'{timing.percentiles[q]:>9.1f}' for q in PERCENTILES)
+    line += f' {timing.maxMs:>9.1f} {timing.rows:>9} {timing.bytes / 2**20:>8.1f}'
+    lines.append(line)
+
+  return '\n'.join(lines)
+
+
+def _open_log(path: Path) -> IO[str]:
+  if path.suffix == '.gz':
+    return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+
+  return open(path, encoding='utf-8', errors='replace')
+
+
+def _records(lines: Iterable[str], analysis: LogAnalysis) -> Iterator[dict]:
+  """JSON objects from a log; anything else (text lines, tracebacks) is counted as skipped."""
+  for line in lines:
+    analysis.lines += 1
+
+    if not line.startswith('{'):
+      analysis.skipped += 1
+      continue
+
+    try:
+      record = json.loads(line)
+
+    except json.JSONDecodeError:
+      analysis.skipped += 1
+      continue
+
+    if isinstance(record, dict):
+      yield record
+
+    else:
+      analysis.skipped += 1
+
+
+def _count(value: object) -> int:
+  return value if isinstance(value, int) and not isinstance(value, bool) else 0
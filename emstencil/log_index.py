@@ -0,0 +1,188 @@
+"""
+ Program: Memory-mapped line index over the run log, with level and regex filters.
+    Name: Andrew Dixon            File: log_index.py
+    Date: 19 Oct 2026
+   Notes: The log is mapped read-only and never read into one string. scan_lines() walks the map
+          once, yielding batches of line start offsets and the level of the record each line
+          belongs to (traceback lines inherit the level of the record above them); LogViewer runs
+          it on the thread pool and fills the view as batches arrive. Lines are decoded one at a
+          time, when the view asks for them, and filters run their regex over the map itself.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import mmap
+import re
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterator
+from pathlib import Path
+
+# Lines per batch handed to the view while indexing.
+INDEX_BATCH_LINES = 50_000
+
+# Longer lines (pasted images logged at DEBUG) are cut to this many characters for display.
+MAX_DISPLAY_CHARS = 4_000
+
+# Level codes stored per line; 0 is text before the first record.
+LEVELS = {b'DEBUG': 1, b'INFO': 2, b'WARNING': 3, b'ERROR': 4, b'CRITICAL': 5}
+
+# One match per line; group 1 (text format) or 2 (JSON lines) is the level when the line starts a
+# record. Both layouts come from Logging.py.
+_LINE_RE = re.compile(
+  rb'(?:\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3} - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - '
+  rb'|\{"ts": "[^"]*", "level": "(DEBUG|INFO|WARNING|ERROR|CRITICAL)")?[^\n]*\n?'
+)
+
+
+class LogIndex:
+  """
+  Line start offsets and per-line levels for one log file, mapped read-only.
+    - The index covers the file as it was when opened; lines logged after that need a new index.
+    - extend() is only called from the thread that reads the index; scan_lines() may run anywhere.
+  """
+
+  def __init__(self, path: Path) -> None:
+    self.path = Path(path)
+    self.offsets = array('Q')
+    self.levels = bytearray()
+    self.complete = False
+
+    with open(self.path, 'rb') as f:
+      self.size = f.seek(0, 2)
+      # An empty file cannot be mapped; it simply has no lines.
+      self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+  @property
+  def lineCount(self) -> int:
+    return len(self.offsets)
+
+  def close(self) -> None:
+    self.complete = True
+
+    if self._map is None:
+      return
+
+    try:
+      self._map.close()
+
+    except BufferError:
+      # A worker is still searching it; the map is released with the worker's last reference.
+      pass
+
+    self._map = None
+
+  def scan_lines(self, batchLines: int = INDEX_BATCH_LINES) -> Iterator[tuple[array, bytearray]]:
+    """Yield (line offsets, line levels) batches for the whole file, in order."""
+    if self._map is None:
+      return
+
+    buffer = self._map
+    offsets = array('Q')
+    levels = bytearray()
+    level = 0
+
+    for match in _LINE_RE.finditer(buffer):
+      start = match.start()
+
+      # The empty match after a final newline is not a line.
+      if start == self.size:
+        break
+
+      if match.lastindex:
+        level = LEVELS[match.group(match.lastindex)]
+
+      offsets.append(start)
+      levels.append(level)
+
+      if len(offsets) == batchLines:
+        yield offsets, levels
+        offsets = array('Q')
+        levels = bytearray()
+
+        # Closed while this batch was being handed over.
+        if self._map is None:
+          return
+
+    if offsets:
+      yield offsets, levels
+
+  def extend(self, offsets: array, levels: bytearray) -> None:
+    self.offsets.extend(offsets)
+    self.levels.extend(levels)
+
+  def build(self) -> LogIndex:
+    """Index the whole file on the calling thread."""
+    for offsets, levels in self.scan_lines():
+      self.extend(offsets, levels)
+
+    self.complete = True
+
+    return self
+
+  def line(self, lineNo: int) -> str:
+    start = self.offsets[lineNo]
+    end = self.offsets[lineNo + 1] if lineNo + 1 < len(self.offsets) else self.size
+    end = min(end, start + MAX_DISPLAY_CHARS * 4)
+    text = self._map[start:end].decode('utf-8', 'replace').rstrip('\r\n')
+
+    return text[:MAX_DISPLAY_CHARS] + '…' if len(text) > MAX_DISPLAY_CHARS else text
+
+  def line_at(self, offset: int) -> int:
+    """Line number holding byte `offset`."""
+    return bisect_right(self.offsets, offset) - 1
+
+  def matching_lines(self, minLevel: int = 0, pattern: re.Pattern[bytes] | None = None) -> array:
+    """
+    Numbers of the lines at `minLevel` or above that `pattern` matches, in order.
+      - Needs a complete index. The pattern runs over the map; a match counts for the line it
+        starts on, and the search resumes at the next line, so each line is listed once.
+    """
+    rows = array('Q')
+
+    if pattern is None and not minLevel:
+      rows.extend(range(len(self.offsets)))
+      return rows
+
+    if pattern is None:
+      # Runs of qualifying levels, found in C over the level bytes.
+      for run in re.finditer(b'[%c-\xff]+' % minLevel, self.levels):
+        rows.extend(range(run.start(), run.end()))
+
+      return rows
+
+    if self._map is None:
+      return rows
+
+    buffer = self._map
+    position = 0
+
+    while (match := pattern.search(buffer, position)) is not None:
+      lineNo = self.line_at(match.start())
+
+      if self.levels[lineNo] >= minLevel:
+        rows.append(lineNo)
+
+      if lineNo + 1 == len(self.offsets):
+        break
+
+      position = self.offsets[lineNo + 1]
+
+    return rows
+
+
+def compile_search(text: str, ignoreCase: bool = True) -> re.Pattern[bytes]:
+  """
+  Compile a user's search for matching_lines(); raises re.error for an invalid regex.
+    - The pattern is matched against the raw bytes, so ignoreCase only folds ASCII letters.
+  """
+  flags = re.MULTILINE | (re.IGNORECASE if ignoreCase else 0)
+
+  return re.compile(text.encode('utf-8'), flags)
@@ -0,0 +1,235 @@
+"""
+ Program: Database maintenance: size report, integrity checks, statistics, and vacuuming.
+    Name: Andrew Dixon            File: maintenance.py
+    Date: 19 Oct 2026
+   Notes: Runs on its own connection so VACUUM never collides with TemplateDB's transactions.
+          Entry points: `python -m emstencil.cli maintenance`, File > Database Maintenance, and the
+          light pass run_exit_maintenance() when the application closes.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Literal
+
+from . import queries
+from .embedded_images import ImageWeight, format_weight, measure_embedded_images
+from .Logging import LOGGER
+
+VacuumMode = Literal['none', 'incremental', 'full']
+
+# PRAGMA auto_vacuum value that lets `pragma incremental_vacuum` hand free pages back to the OS.
+AUTO_VACUUM_INCREMENTAL = 2
+
+# The exit pass only reclaims space once the freelist is at least this share of the file.
+EXIT_VACUUM_FREE_RATIO = 0.25
+
+
+@dataclass(slots=True)
+class DatabaseSizeReport:
+  """Page-level picture of the database file plus the inline image payload it carries."""
+
+  pageSize: int
+  pageCount: int
+  freelistCount: int
+  autoVacuum: int
+  tableBytes: dict[str, int] = field(default_factory=dict)
+  images: ImageWeight = field(default_factory=ImageWeight)
+
+  @property
+  def fileBytes(self) -> int:
+    return self.pageSize * self.pageCount
+
+  @property
+  def freeBytes(self) -> int:
+    return self.pageSize * self.freelistCount
+
+  def lines(self) -> list[str]:
+    lines = [
+      f'File: {self.fileBytes / 1024:.1f} KiB ({self.pageCount} pages of {self.pageSize} bytes)',
+      f'Free: {self.freeBytes / 1024:.1f} KiB ({self.freelistCount} freelist pages)',
+      f'Inline images: {format_weight(self.images)}',
+    ]
+    lines.extend(
+      f'  {name}: {size / 1024:.1f} KiB'
+      for name, size in sorted(self.tableBytes.items(), key=lambda item: -item[1])
+    )
+
+    return lines
+
+
+@dataclass(slots=True)
+class MaintenanceResult:
+  """What a maintenance run found and did."""
+
+  before: DatabaseSizeReport
+  after: DatabaseSizeReport
+  problems: list[str]
+  actions: list[str]
+  seconds: float
+
+  @property
+  def ok(self) -> bool:
+    return not self.problems
+
+  def summary(self) -> str:
+    reclaimed = self.before.fileBytes - self.after.fileBytes
+    lines = [
+      *self.after.lines(),
+      f'Actions: {", ".join(self.actions) or "none"} in {self.seconds:.2f}s;'
+      f' reclaimed {reclaimed / 1024:.1f} KiB',
+      'Integrity: ok' if self.ok else f'Integrity: {len(self.problems)} problem(s)',
+      *(f'  {problem}' for problem in self.problems),
+    ]
+
+    return '\n'.join(lines)
+
+
+def size_report(connection: sqlite3.Connection) -> DatabaseSizeReport:
+  """Page counts, freelist, bytes per table/index (dbstat when compiled in), and image weight."""
+  report = DatabaseSizeReport(
+    pageSize=connection.execute('pragma page_size').fetchone()[0],
+    pageCount=connection.execute('pragma page_count').fetchone()[0],
+    freelistCount=connection.execute('pragma freelist_count').fetchone()[0],
+    autoVacuum=connection.execute('pragma auto_vacuum').fetchone()[0],
+  )
+
+  try:
+    report.tableBytes = dict(
+      connection.execute('select name, sum(pgsize) from dbstat group by name;')
+    )
+
+  except sqlite3.OperationalError:
+    LOGGER.info('dbstat is not available in this SQLite build; skipping per-table sizes.')
+
+  for (content,) in connection.execute('select content from templates;'):
+    report.images += measure_embedded_images(content)
+
+  return report
+
+
+def check_integrity(connection: sqlite3.Connection) -> list[str]:
+  """Problems reported by PRAGMA integrity_check and foreign_key_check (empty when healthy)."""
+  problems = [row[0] for row in connection.execute('pragma integrity_check;') if row[0] != 'ok']
+  problems.extend(
+    f'{table} row {rowID} references missing {parent} (constraint {index})'
+    for table, rowID, parent, index in connection.execute('pragma foreign_key_check;')
+  )
+
+  return problems
+
+
+def refresh_statistics(connection: sqlite3.Connection) -> None:
+  """Rebuild planner statistics and let SQLite apply any optimizations it has queued."""
+  connection.execute('analyze;')
+  connection.execute('pragma optimize;')
+
+
+def remove_unused_tags(connection: sqlite3.Connection) -> int:
+  """
+  Full sweep for tags no template carries; returns how many were deleted.
+    - Everyday writes only check the tags they unlinked, so this catches tags orphaned outside
+      the application (hand edits, older versions).
+  """
+  return connection.execute(queries.DELETE_EMPTY_TAGS.sql).rowcount
+
+
+def vacuum(connection: sqlite3.Connection, mode: VacuumMode) -> str | None:
+  """
+  Reclaim free pages; returns a description of what ran.
+    - 'incremental' frees the freelist in place. A database not yet in incremental auto_vacuum mode
+      is switched over, which needs one full VACUUM.
+    - 'full' rebuilds the file, which also defragments tables and indexes.
+  """
+  if mode == 'none':
+    return None
+
+  if mode == 'incremental':
+    if connection.execute('pragma auto_vacuum').fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+      connection.execute('pragma incremental_vacuum;').fetchall()
+      return 'incremental vacuum'
+
+    connection.execute(f'pragma auto_vacuum = {AUTO_VACUUM_INCREMENTAL};')
+    connection.execute('vacuum;')
+    return 'vacuum (switched to incremental auto_vacuum)'
+
+  connection.execute('vacuum;')
+  return 'vacuum'
+
+
+def run_maintenance(
+  databaseFile: Path,
+  vacuumMode: VacuumMode = 'incremental',
+  checkIntegrity: bool = True,
+  analyze: bool = True,
+  sweepTags: bool = True,
+) -> MaintenanceResult:
+  """
+  Report, check, sweep unused tags, analyze and vacuum `databaseFile`; safe to run while the
+  application is open.
+  """
+  started = time.perf_counter()
+  connection = sqlite3.connect(databaseFile, isolation_level=None)
+  actions: list[str] = []
+
+  try:
+    before = size_report(connection)
+    problems = check_integrity(connection) if checkIntegrity else []
+
+    if checkIntegrity:
+      actions.append('integrity check')
+
+    if sweepTags and not problems:
+      actions.append(f'tag sweep ({remove_unused_tags(connection)} removed)')
+
+    if analyze:
+      refresh_statistics(connection)
+      actions.append('analyze')
+
+    # Never rebuild a file that failed its integrity check; VACUUM could spread the damage.
+    if not problems and (action := vacuum(connection, vacuumMode)):
+      actions.append(action)
+
+    after = size_report(connection)
+
+  finally:
+    connection.close()
+
+  result = MaintenanceResult(before, after, problems, actions, time.perf_counter() - started)
+  LOGGER.info(f'Database maintenance on {databaseFile}:\n{result.summary()}')
+
+  if problems:
+    LOGGER.error(f'Database integrity check found {len(problems)} problem(s).')
+
+  return result
+
+
+def run_exit_maintenance(databaseFile: Path) -> None:
+  """
+  Cheap pass for application shutdown: PRAGMA optimize always, and an incremental vacuum only
+  when the freelist has grown past EXIT_VACUUM_FREE_RATIO and the file is already in that mode.
+  """
+  connection = sqlite3.connect(databaseFile, isolation_level=None)
+
+  try:
+    connection.execute('pragma optimize;')
+    pageCount = connection.execute('pragma page_count').fetchone()[0]
+    freePages = connection.execute('pragma freelist_count').fetchone()[0]
+    autoVacuum = connection.execute('pragma auto_vacuum').fetchone()[0]
+
+    if autoVacuum == AUTO_VACUUM_INCREMENTAL and freePages > pageCount * EXIT_VACUUM_FREE_RATIO:
+      connection.execute('pragma incremental_vacuum;').fetchall()
+      LOGGER.info(f'Exit maintenance released {freePages} free pages.')
+
+  finally:
+    connection.close()
@@ -0,0 +1,244 @@
+"""
+ Program: Streaming, multi-process reader for large template import workbooks.
+    Name: Andrew Dixon            File: parallel_import.py
+    Date: 19 Oct 2026
+   Notes: Produces exactly what spreadsheet.read_template_rows does. The first sheet's XML is inflated
+          from the zip in blocks and cut into row-aligned chunks. Worker processes parse and normalize
+          the chunks; shared strings, styles, and the sheet's dimension are read once up front.
+          The worker side lives in import_workers.py. Workbook internals this reader needs are
+          looked up defensively; when openpyxl does not have them it uses read_template_rows.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import IO
+from zipfile import ZipFile
+
+from . import import_workers
+from .import_workers import (
+  SerialReadRequired,
+  TemplateRow,
+  init_sheet_worker,
+  parse_sheet_chunk,
+  worker_pool_context,
+)
+from .Logging import LOGGER
+from .spreadsheet import normalize_template_row, open_import_workbook, read_template_rows
+
+# Below this size the single-process openpyxl reader wins; pool start-up dominates.
+PARALLEL_IMPORT_MIN_BYTES = 8 * 2**20
+
+# Uncompressed sheet XML per worker task. Rows are small because bodies live in sharedStrings.xml.
+CHUNK_BYTES = 2**20
+
+_READ_BYTES = 2**18
+_ROOT_TAG_RE = re.compile(rb'<([A-Za-z_][\w.:-]*)')
+_SHEET_DATA_RE = re.compile(rb'<(?:([A-Za-z_][\w.-]*):)?sheetData\b[^>]*?(/?)>')
+
+
+def read_import_rows(path: str, workers: int | None = None) -> list[TemplateRow]:
+  """
+  Rows for import from the reader that suits the workbook.
+    - workers=0 always uses read_template_rows.
+    - workers=None picks the parallel reader for workbooks of PARALLEL_IMPORT_MIN_BYTES or more
+      when more than one CPU is available, and read_template_rows otherwise.
+    - Any other value uses the parallel reader with that many processes.
+  """
+  if workers is None:
+    large = Path(path).is_file() and Path(path).stat().st_size >= PARALLEL_IMPORT_MIN_BYTES
+    workers = _default_workers() if large else 0
+
+    if workers < 2:
+      workers = 0
+
+  if workers == 0:
+    return read_template_rows(path)
+
+  return read_template_rows_parallel(path, workers)
+
+
+def read_template_rows_parallel(path: str, workers: int | None = None) -> list[TemplateRow]:
+  """
+  Same result as read_template_rows(path), parsed across `workers` processes (default: CPU count).
+  workers=1 parses the chunks in this process.
+  """
+  workers = workers or _default_workers()
+  wb = open_import_workbook(path)
+
+  try:
+    ws = wb.worksheets[0]
+    context, archive, sheetPath = _sheet_context(wb, ws)
+
+    with archive.open(sheetPath) as source:
+      head, tail, chunks = _split_sheet_xml(source)
+      context['head'] = head
+      context['tail'] = tail
+      rows = _pad_rows(_parse_chunks(chunks, context, workers), ws.max_row)
+
+  except SerialReadRequired:
+    LOGGER.info('Worksheet cannot be split by row; using the single-process reader.')
+    return read_template_rows(path)
+
+  finally:
+    wb.close()
+
+  LOGGER.info(f'Read {len(rows)} spreadsheet rows with {workers} worker process(es).')
+
+  return rows
+
+
+def _default_workers() -> int:
+  return os.cpu_count() or 1
+
+
+def _sheet_context(wb, ws) -> tuple[dict, ZipFile, str]:
+  """
+  Parse context for the workers, the workbook's archive and the sheet's path in it, all from
+  openpyxl internals.
+  Raises SerialReadRequired when this openpyxl does not have them (see the pin in pyproject.toml).
+  """
+  if not import_workers.SHEET_PARSER_AVAILABLE:
+    raise SerialReadRequired()
+
+  try:
+    context = {
+      'sharedStrings': list(ws._shared_strings),
+      'epoch': wb.epoch,
+      'dateFormats': set(wb._date_formats),
+      'timedeltaFormats': set(wb._timedelta_formats),
+    }
+
+    return context, wb._archive, ws._worksheet_path
+
+  except AttributeError as e:
+    LOGGER.warning(f'openpyxl {e.name or "internals"} unavailable for the parallel reader.')
+    raise SerialReadRequired() from e
+
+
+def _split_sheet_xml(source: IO[bytes]) -> tuple[bytes, bytes, Iterator[bytes]]:
+  """
+  Return (head, tail, chunks) for a worksheet stream.
+  head runs through the <sheetData> start tag, tail closes it and the root element.
+  Each chunk is a run of whole <row> elements, so head + chunk + tail is a well-formed sheet.
+  """
+  buffer = b''
+
+  while (match := _SHEET_DATA_RE.search(buffer)) is None:
+    block = source.read(_READ_BYTES)
+
+    if not block:
+      raise SerialReadRequired()
+
+    buffer += block
+
+  prefix = match.group(1) + b':' if match.group(1) else b''
+  rootTag = _ROOT_TAG_RE.search(buffer).group(1)
+  head = buffer[: match.end()]
+  tail = b'</' + prefix + b'sheetData></' + rootTag + b'>'
+
+  if match.group(2):  # <sheetData/>: no rows at all.
+    return head, tail, iter(())
+
+  return head, tail, _iter_row_chunks(source, buffer[match.end() :], prefix)
+
+
+def _iter_row_chunks(source: IO[bytes], buffer: bytes, prefix: bytes) -> Iterator[bytes]:
+  rowEnd = b'</' + prefix + b'row>'
+  dataEnd = b'</' + prefix + b'sheetData>'
+  finished = False
+
+  while not finished:
+    while len(buffer) < CHUNK_BYTES and dataEnd not in buffer:
+      block = source.read(_READ_BYTES)
+
+      if not block:
+        break
+
+      buffer += block
+
+    if (end := buffer.find(dataEnd)) != -1:
+      chunk, buffer, finished = buffer[:end], b'', True
+
+    elif (end := buffer.rfind(rowEnd)) != -1:
+      end += len(rowEnd)
+      chunk, buffer = buffer[:end], buffer[end:]
+
+    else:
+      # Truncated sheet; hand the remainder over so the parser reports it.
+      chunk, buffer, finished = buffer, b'', True
+
+    # Row-boundary cuts are only safe while no text can contain a literal </row>.
+    if b'<![CDATA[' in chunk:
+      raise SerialReadRequired()
+
+    if chunk.strip():
+      yield chunk
+
+
+def _parse_chunks(
+  chunks: Iterable[bytes], context: dict, workers: int
+) -> Iterator[tuple[int, TemplateRow]]:
+  """(row number, normalized row) in sheet order; at most 2 chunks per worker are in flight."""
+  if workers <= 1:
+    for chunk in chunks:
+      yield from parse_sheet_chunk(chunk, context)
+    return
+
+  with ProcessPoolExecutor(
+    workers,
+    mp_context=worker_pool_context(),
+    initializer=init_sheet_worker,
+    initargs=(context,),
+  ) as pool:
+    pending: deque[Future[list[tuple[int, TemplateRow]]]] = deque()
+
+    for chunk in chunks:
+      pending.append(pool.submit(parse_sheet_chunk, chunk))
+
+      if len(pending) >= workers * 2:
+        yield from pending.popleft().result()
+
+    while pending:
+      yield from pending.popleft().result()
+
+
+def _pad_rows(
+  indexedRows: Iterable[tuple[int, TemplateRow]], maxRow: int | None
+) -> list[TemplateRow]:
+  """
+  Lay rows out the way ReadOnlyWorksheet.iter_rows(min_row=2) does: the header and duplicate rows
+  are dropped, gaps become empty rows, and the sheet's dimension caps the row count.
+  """
+  out: list[TemplateRow] = []
+  counter = 2
+  rowNumber = 1
+
+  for rowNumber, row in indexedRows:
+    if maxRow is not None and rowNumber > maxRow:
+      break
+
+    for _ in range(counter, rowNumber):
+      counter += 1
+      out.append(normalize_template_row(None))
+
+    if counter <= rowNumber:
+      out.append(row)
+      counter += 1
+
+  if maxRow is not None and maxRow < rowNumber:
+    out.extend(normalize_template_row(None) for _ in range(counter, maxRow + 1))
+
+  return out
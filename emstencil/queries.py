@@ -0,0 +1,447 @@
+"""
+ Program: Registry of the SQL statements TemplateDB sends, with per-query counters.
+    Name: Andrew Dixon            File: queries.py
+    Date: 19 Oct 2026
+   Notes: Each statement is a named constant whose text never changes between calls, so sqlite3's
+          per-connection statement cache compiles it once. STATEMENT_CACHE_SIZE is sized from this
+          registry. QueryStats counts what each query costs; benchmarks/bench_import_statements.py
+          reports the counts per import row.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cache
+from typing import NamedTuple
+
+
+class Query(NamedTuple):
+  """A named SQL statement; the name keys the counters in QueryStats."""
+
+  name: str
+  sql: str
+
+
+# Columns callers may project when iterating templates; uid is always included for paging.
+TEMPLATE_COLUMNS: tuple[str, ...] = (
+  'uid',
+  'title',
+  'content',
+  'dateAdded',
+  'dateUpdated',
+  'revision',
+)
+
+# Correlated aggregate returning a template's tags as a JSON array of [tag uid, tag] pairs.
+# Driven by the (tmplt_uid, tag_uid) unique index, so it never scans or sorts the link table.
+_TEMPLATE_TAGS_JSON = """
+  (
+    select json_group_array(json_array(ta.uid, ta.tag))
+    from templateTags tt
+      inner join tags ta on ta.uid = tt.tag_uid
+    where tt.tmplt_uid = tm.uid
+  )
+"""
+
+# ---- Template reads ----
+
+FETCH_ALL_TEMPLATES = Query(
+  'fetch_all_templates',
+  """
+    select title, content, uid
+    from templates;
+  """,
+)
+
+FETCH_ALL_TEMPLATES_WITH_TAGS = Query(
+  'fetch_all_templates_with_tags',
+  f"""
+    select tm.title, tm.content, tm.uid, {_TEMPLATE_TAGS_JSON}
+    from templates tm;
+  """,
+)
+
+FETCH_TEMPLATES_FOR_TAG = Query(
+  'fetch_templates_for_tag',
+  f"""
+    select tm.title, tm.content, tm.uid, {_TEMPLATE_TAGS_JSON}
+    from tags srch
+      inner join templateTags st on st.tag_uid = srch.uid
+      inner join templates tm on tm.uid = st.tmplt_uid
+    where srch.tag = ?
+    order by st.tmplt_uid;
+  """,
+)
+
+# One statement for any number of IDs; json_each feeds the uid primary key lookups.
+FETCH_TEMPLATES_BY_ROWID = Query(
+  'fetch_templates_by_rowid',
+  f"""
+    select tm.title, tm.content, tm.uid, {_TEMPLATE_TAGS_JSON}
+    from templates tm
+    where tm.uid in (select value from json_each(?))
+    order by tm.uid;
+  """,
+)
+
+TEMPLATE_LIST_PAGE = Query(
+  'template_list_page',
+  f"""
+    select tm.uid, tm.title, {_TEMPLATE_TAGS_JSON}
+    from templates tm
+    where tm.uid > ?
+    order by tm.uid
+    limit ?;
+  """,
+)
+
+# Keyset on (title collate nocase, uid) so equal titles in different case still page cleanly.
+EXPORT_PAGE = Query(
+  'export_page',
+  """
+    select tm.uid, tm.title, tm.content,
+      (
+        select group_concat(tag, ',')
+        from (
+          select ta.tag as tag
+          from templateTags tt
+            inner join tags ta on ta.uid = tt.tag_uid
+          where tt.tmplt_uid = tm.uid
+          order by ta.tag
+        )
+      )
+    from templates tm
+    where (tm.title, tm.uid) > (? collate nocase, ?)
+    order by tm.title collate nocase, tm.uid
+    limit ?;
+  """,
+)
+
+# Most used templates first, a use today counting for more than one last month: uses are divided
+# by (1 + age in days). templateUsage holds at most one row per template, so the scan stays small.
+FETCH_RECENT_TEMPLATES = Query(
+  'fetch_recent_templates',
+  f"""
+    select tm.title, tm.content, tm.uid, {_TEMPLATE_TAGS_JSON}
+    from templateUsage tu
+      inner join templates tm on tm.uid = tu.tmplt_uid
+    order by
+      (tu.select_count + tu.copy_count) / (1.0 + julianday('now') - julianday(tu.last_used)) desc,
+      tu.last_used desc
+    limit ?;
+  """,
+)
+
+# ---- Template writes ----
+
+INSERT_TEMPLATE = Query(
+  'insert_template',
+  """
+    insert into templates (title, content)
+    values (?, ?);
+  """,
+)
+
+# Insert a new title or rewrite the existing row, returning its uid. An existing row whose content
+# is unchanged is left alone (no revision bump or change log entry) and no row is returned; look
+# the uid up with TEMPLATE_UID_BY_TITLE then.
+UPSERT_TEMPLATE = Query(
+  'upsert_template',
+  """
+    insert into templates (title, content)
+    values (?, ?)
+    on conflict (title) do update
+      set content = excluded.content
+      where content is not excluded.content
+    returning uid;
+  """,
+)
+
+TEMPLATE_UID_BY_TITLE = Query(
+  'template_uid_by_title',
+  """
+    select uid
+    from templates
+    where title = ?;
+  """,
+)
+
+# Targets the template's uid, or its current title when no uid is known (null or 0).
+UPDATE_TEMPLATE = Query(
+  'update_template',
+  """
+    update templates
+    set title = ?1, content = ?2
+    where uid = coalesce(nullif(?3, 0), (select uid from templates where title = ?1))
+    returning uid;
+  """,
+)
+
+UPDATE_TEMPLATE_CONTENT = Query(
+  'update_template_content',
+  """
+    update templates
+    set content = ?2
+    where uid = ?1;
+  """,
+)
+
+# Same targeting as UPDATE_TEMPLATE; any tag links left are removed by the foreign key cascade.
+DELETE_TEMPLATE = Query(
+  'delete_template',
+  """
+    delete from templates
+    where uid = coalesce(nullif(?1, 0), (select uid from templates where title = ?2))
+    returning uid;
+  """,
+)
+
+# Adds (uid ?1, selects ?2, copies ?3, used at ?4) to the template's running totals. Uses of a
+# template deleted since they were recorded select no row and are dropped.
+UPSERT_TEMPLATE_USAGE = Query(
+  'upsert_template_usage',
+  """
+    insert into templateUsage (tmplt_uid, select_count, copy_count, last_used)
+    select uid, ?2, ?3, ?4
+    from templates
+    where uid = ?1
+    on conflict (tmplt_uid) do update
+      set select_count = select_count + excluded.select_count,
+        copy_count = copy_count + excluded.copy_count,
+        last_used = max(last_used, excluded.last_used);
+  """,
+)
+
+# ---- Tags and tag links ----
+
+TAG_PAGE = Query(
+  'tag_page',
+  """
+    select uid, tag
+    from tags
+    where uid > ?
+    order by uid
+    limit ?;
+  """,
+)
+
+# Reads the (tmplt_uid, tag_uid) unique index directly so rows come back in tag order.
+FETCH_TAGS_FOR_TEMPLATE = Query(
+  'fetch_tags_for_template',
+  """
+    select ta.uid, ta.tag
+    from templateTags tt
+      inner join tags ta on ta.uid = tt.tag_uid
+    where tt.tmplt_uid = ?
+    order by tt.tag_uid;
+  """,
+)
+
+FETCH_TAGS_BY_NAME = Query(
+  'fetch_tags_by_name',
+  """
+    select uid, tag
+    from tags
+    where tag in (select value from json_each(?))
+    order by uid;
+  """,
+)
+
+# Popularity order for the tag filter, straight from the trigger-maintained tagStats table.
+FETCH_TAG_STATISTICS = Query(
+  'fetch_tag_statistics',
+  """
+    select ta.uid, ta.tag, ts.template_count, ts.last_used
+    from tagStats ts
+      inner join tags ta on ta.uid = ts.tag_uid
+    order by ts.template_count desc, ta.tag;
+  """,
+)
+
+FETCH_TAG_STATISTICS_BY_NAME = Query(
+  'fetch_tag_statistics_by_name',
+  """
+    select ta.uid, ta.tag, ts.template_count, ts.last_used
+    from tags ta
+      inner join tagStats ts on ts.tag_uid = ta.uid
+    where ta.tag in (select value from json_each(?))
+    order by ts.template_count desc, ta.tag;
+  """,
+)
+
+# Get-or-create in one statement. The no-op update touches dateAdded, not tag, so the tag
+# triggers (dateUpdated, template revisions) stay quiet when the tag already exists.
+UPSERT_TAG = Query(
+  'upsert_tag',
+  """
+    insert into tags (tag)
+    values (?)
+    on conflict (tag) do update
+      set dateAdded = dateAdded
+    returning uid;
+  """,
+)
+
+# Full sweep for maintenance. NOT EXISTS probes ix_TemplateTags_by_Tag once per tag instead of
+# materializing every linked tag uid the way `not in (select distinct ...)` does.
+DELETE_EMPTY_TAGS = Query(
+  'delete_empty_tags',
+  """
+    delete from tags
+    where not exists
+      (select 1 from templateTags tt where tt.tag_uid = tags.uid);
+  """,
+)
+
+# Targeted cleanup after a write: only the tag uids it unlinked (JSON array) are checked, so the
+# cost follows the size of the write, not of the library.
+DELETE_UNLINKED_TAGS = Query(
+  'delete_unlinked_tags',
+  """
+    delete from tags
+    where uid in (select value from json_each(?))
+      and not exists
+        (select 1 from templateTags tt where tt.tag_uid = tags.uid);
+  """,
+)
+
+INSERT_TEMPLATE_TAG = Query(
+  'insert_template_tag',
+  """
+    insert into templateTags (tmplt_uid, tag_uid)
+    values (?, ?);
+  """,
+)
+
+# Unlinks a template (targeted like DELETE_TEMPLATE) ahead of its delete, reporting the tags it
+# carried so they can be checked for orphans.
+DELETE_LINKS_FOR_TEMPLATE = Query(
+  'delete_links_for_template',
+  """
+    delete from templateTags
+    where tmplt_uid = coalesce(nullif(?1, 0), (select uid from templates where title = ?2))
+    returning tag_uid;
+  """,
+)
+
+DELETE_TEMPLATE_TAG = Query(
+  'delete_template_tag',
+  """
+    delete from templateTags
+    where tmplt_uid = ? and tag_uid = ?;
+  """,
+)
+
+# ---- Bulk tag operations: one statement per step however many templates are involved ----
+
+# The Tags_Revision_Renamed trigger bumps every template carrying the tag.
+RENAME_TAG = Query(
+  'rename_tag',
+  """
+    update tags
+    set tag = ?2
+    where uid = ?1;
+  """,
+)
+
+# Templates carrying any of the tag uids in the JSON array, each once.
+FETCH_TEMPLATE_UIDS_FOR_TAGS = Query(
+  'fetch_template_uids_for_tags',
+  """
+    select distinct tmplt_uid
+    from templateTags
+    where tag_uid in (select value from json_each(?))
+    order by tmplt_uid;
+  """,
+)
+
+# Links ?2 to each existing template in the JSON array ?1; templates already carrying it are skipped.
+LINK_TAG_TO_TEMPLATES = Query(
+  'link_tag_to_templates',
+  """
+    insert into templateTags (tmplt_uid, tag_uid)
+    select uid, ?2
+    from templates
+    where uid in (select value from json_each(?1))
+    on conflict (tmplt_uid, tag_uid) do nothing;
+  """,
+)
+
+UNLINK_TAG_FROM_TEMPLATES = Query(
+  'unlink_tag_from_templates',
+  """
+    delete from templateTags
+    where tag_uid = ?2
+      and tmplt_uid in (select value from json_each(?1));
+  """,
+)
+
+# Tag links go with the tags (foreign key cascade).
+DELETE_TAGS_BY_UID = Query(
+  'delete_tags_by_uid',
+  """
+    delete from tags
+    where uid in (select value from json_each(?));
+  """,
+)
+
+
+@cache
+def template_page(columns: tuple[str, ...]) -> Query:
+  """Keyset page over templates for a validated column projection (uid first)."""
+  return Query(
+    'template_page',
+    f"""
+      select {', '.join(columns)}
+      from templates
+      where uid > ?
+      order by uid
+      limit ?;
+    """,
+  )
+
+
+# Every fixed statement, by name.
+QUERIES: dict[str, Query] = {
+  query.name: query for query in tuple(globals().values()) if isinstance(query, Query)
+}
+
+# Room for every registered statement, every template_page projection (subsets of the optional
+# columns), and ad hoc SQL run through TemplateDB.getConnection(). sqlite3's default is 128.
+STATEMENT_CACHE_SIZE = max(128, len(QUERIES) + 2 ** (len(TEMPLATE_COLUMNS) - 1) + 64)
+
+
+@dataclass(slots=True)
+class QueryStats:
+  """
+  Per-query counters for one connection.
+    - calls: round trips from Python (one per execute or executemany).
+    - executions: statements SQLite ran (one per parameter set of an executemany).
+  """
+
+  calls: Counter[str] = field(default_factory=Counter)
+  executions: Counter[str] = field(default_factory=Counter)
+
+  def record(self, query: Query, executions: int = 1) -> None:
+    self.calls[query.name] += 1
+    self.executions[query.name] += executions
+
+  def reset(self) -> None:
+    self.calls.clear()
+    self.executions.clear()
+
+  @property
+  def total_calls(self) -> int:
+    return self.calls.total()
+
+  @property
+  def total_executions(self) -> int:
+    return self.executions.total()
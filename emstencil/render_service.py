@@ -0,0 +1,365 @@
+"""
+ Program: Local HTTP render service over the template database.
+    Name: Andrew Dixon            File: render_service.py
+    Date: 19 Oct 2026
+   Notes: asyncio + stdlib only. Templates are held parsed in memory; when another connection
+          commits (PRAGMA data_version), the templates it changed, as listed in templateChanges,
+          are re-read. Start with `python -m emstencil.cli serve`.
+
+          POST /render/{title}   {"fields": {...}}                      -> {"title", "content", "html"}
+          POST /render-batch     {"requests": [{"title", "fields"}, ...]} -> {"results": [...]}
+          GET  /health                                                  -> {"templates", "dataVersion"}
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+from collections.abc import Mapping
+from dataclasses import dataclass
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import unquote
+
+from .content_html import is_html_content
+from .Dataclasses import EmailTemplate
+from .Exceptions import TemplateFieldKindConflict, TemplateKeyValueMismatch, TemplateKeyValueNull
+from .initialize import CHANGE_LOG_RESYNC_UID
+from .Logging import LOGGER
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Largest request body accepted; batches of image-bearing field values stay well under this.
+MAX_BODY_BYTES = 16 * 2**20
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTemplate:
+  """Parsed template plus its HTML classification, computed once per cache load."""
+
+  template: EmailTemplate
+  as_html: bool
+
+  def render(self, values: Mapping) -> str:
+    return self.template.renderFields(values, self.as_html)
+
+
+class TemplateCache:
+  """
+  In-memory title -> CompiledTemplate map on a private read-only connection.
+    - PRAGMA data_version changes only when another connection commits, so a single cheap
+      pragma per request tells us whether the editor, an import, or the CLI changed anything.
+    - After the first load, refreshes re-read only the templates logged in templateChanges since
+      the last one, so a commit costs the event loop the rows it touched, not the library. When
+      the log has been pruned past our position, or a snapshot restore replaced the database,
+      every row is read again.
+  """
+
+  def __init__(self, databaseFile: Path) -> None:
+    self.connection = sqlite3.connect(
+      f'{Path(databaseFile).resolve().as_uri()}?mode=ro', uri=True, check_same_thread=False
+    )
+    self.templates: dict[str, CompiledTemplate] = {}
+    # Title each template uid is cached under, so renamed and deleted templates can be dropped.
+    self.titles: dict[int, str] = {}
+    self.dataVersion: int | None = None
+    self.lastSeq = 0
+    self.loads = 0
+
+  def close(self) -> None:
+    self.connection.close()
+
+  def refresh(self) -> bool:
+    """Apply commits made since the last refresh; True when anything was re-read."""
+    version: int = self.connection.execute('pragma data_version').fetchone()[0]
+
+    if version == self.dataVersion:
+      return False
+
+    minSeq, maxSeq = self.connection.execute(
+      'select min(seq), coalesce(max(seq), 0) from templateChanges;'
+    ).fetchone()
+
+    # Full read on the first load, when the log was pruned past us, and after a restore: seq went
+    # backwards, or the restore's resync marker is among the new entries.
+    if (
+      self.dataVersion is None
+      or maxSeq < self.lastSeq
+      or (minSeq is not None and minSeq > self.lastSeq + 1)
+      or self.connection.execute(
+        'select 1 from templateChanges where seq > ? and tmplt_uid = ? limit 1;',
+        [self.lastSeq, CHANGE_LOG_RESYNC_UID],
+      ).fetchone()
+    ):
+      self.templates = {}
+      self.titles = {}
+      rows = self.connection.execute('select uid, title, content from templates;')
+
+    else:
+      changed = [
+        uid
+        for (uid,) in self.connection.execute(
+          'select distinct tmplt_uid from templateChanges where seq > ? and seq <= ?;',
+          [self.lastSeq, maxSeq],
+        )
+      ]
+
+      # Drop every changed uid first: a rename can hand its old title to another changed row.
+      for uid in changed:
+        self.templates.pop(self.titles.pop(uid, None), None)
+
+      rows = self.connection.execute(
+        'select uid, title, content from templates where uid in (select value from json_each(?));',
+        [json.dumps(changed)],
+      ).fetchall()
+
+    for uid, title, content in rows:
+      try:
+        template = EmailTemplate(title, content)
+
+      except TemplateFieldKindConflict as e:
+        LOGGER.error(f'Render service skipped template {title!r}: {e}')
+        continue
+
+      self.templates[title] = CompiledTemplate(template, is_html_content(template.content))
+      self.titles[uid] = title
+
+    self.dataVersion = version
+    self.lastSeq = maxSeq
+    self.loads += 1
+    LOGGER.info(f'Render service holds {len(self.templates)} templates (data_version {version}).')
+
+    return True
+
+  def get(self, title: str) -> CompiledTemplate | None:
+    return self.templates.get(title)
+
+
+class _HttpError(Exception):
+  def __init__(self, status: HTTPStatus, message: str) -> None:
+    self.status = status
+    self.message = message
+    super().__init__(message)
+
+
+class RenderService:
+  """Minimal HTTP/1.1 (keep-alive, Content-Length bodies) front end for a TemplateCache."""
+
+  def __init__(self, cache: TemplateCache) -> None:
+    self.cache = cache
+
+  async def handle_connection(
+    self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+  ) -> None:
+    try:
+      keepAlive = True
+
+      while keepAlive:
+        try:
+          head = await reader.readuntil(b'\r\n\r\n')
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+          return
+
+        except asyncio.LimitOverrunError:
+          self._write(
+            writer,
+            HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+            {'error': 'headers too large'},
+            False,
+          )
+          return
+
+        try:
+          method, target, keepAlive, length = self._parse_head(head)
+
+        except _HttpError as e:
+          # The body (if any) was not read, so the stream is out of step; answer and hang up.
+          self._write(writer, e.status, {'error': e.message}, False)
+          await writer.drain()
+          return
+
+        body = await reader.readexactly(length) if length else b''
+
+        status, payload = self.dispatch(method, target, body)
+        self._write(writer, status, payload, keepAlive)
+        await writer.drain()
+
+    except (asyncio.IncompleteReadError, ConnectionError):
+      return
+
+    finally:
+      writer.close()
+
+  def _parse_head(self, head: bytes) -> tuple[str, str, bool, int]:
+    lines = head.decode('latin-1').split('\r\n')
+
+    try:
+      method, target, version = lines[0].split(' ', 2)
+
+    except ValueError:
+      raise _HttpError(HTTPStatus.BAD_REQUEST, 'malformed request line') from None
+
+    headers: dict[str, str] = {}
+    for line in lines[1:]:
+      name, _, value = line.partition(':')
+      if name:
+        headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get('connection', '').lower()
+    keepAlive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+    if 'transfer-encoding' in headers:
+      raise _HttpError(HTTPStatus.LENGTH_REQUIRED, 'chunked bodies are not supported')
+
+    try:
+      length = int(headers.get('content-length', '0'))
+
+    except ValueError:
+      raise _HttpError(HTTPStatus.BAD_REQUEST, 'invalid Content-Length') from None
+
+    if length > MAX_BODY_BYTES:
+      raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'request body too large')
+
+    return method, target, keepAlive, length
+
+  def _write(
+    self, writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, keepAlive: bool
+  ) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    writer.write(
+      (
+        f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+        'Content-Type: application/json; charset=utf-8\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        f'Connection: {"keep-alive" if keepAlive else "close"}\r\n\r\n'
+      ).encode('latin-1')
+      + body
+    )
+
+  def dispatch(self, method: str, target: str, body: bytes) -> tuple[HTTPStatus, dict]:
+    """Handle one request; returns (status, JSON payload), errors included."""
+    try:
+      return self._route(method, target, body)
+
+    except _HttpError as e:
+      return e.status, {'error': e.message}
+
+  def _route(self, method: str, target: str, body: bytes) -> tuple[HTTPStatus, dict]:
+    path = target.split('?', 1)[0]
+    self.cache.refresh()
+
+    if path == '/health':
+      return HTTPStatus.OK, {
+        'templates': len(self.cache.templates),
+        'dataVersion': self.cache.dataVersion,
+      }
+
+    if path == '/render-batch':
+      self._require_post(method)
+      requests = self._json_body(body).get('requests')
+
+      if not isinstance(requests, list):
+        raise _HttpError(HTTPStatus.BAD_REQUEST, 'expected {"requests": [...]}')
+
+      return HTTPStatus.OK, {'results': [self._render_batch_item(item) for item in requests]}
+
+    if path.startswith('/render/'):
+      self._require_post(method)
+      title = unquote(path.removeprefix('/render/'))
+      content, compiled = self._render(title, self._json_body(body).get('fields'))
+
+      return HTTPStatus.OK, {'title': title, 'content': content, 'html': compiled.as_html}
+
+    raise _HttpError(HTTPStatus.NOT_FOUND, f'no route for {path}')
+
+  def _render(self, title: object, fields: object) -> tuple[str, CompiledTemplate]:
+    compiled = self.cache.get(title) if isinstance(title, str) else None
+
+    if compiled is None:
+      raise _HttpError(HTTPStatus.NOT_FOUND, f'unknown template {title!r}')
+
+    if not isinstance(fields, Mapping):
+      raise _HttpError(HTTPStatus.BAD_REQUEST, 'expected {"fields": {...}}')
+
+    try:
+      return compiled.render(fields), compiled
+
+    except (TemplateKeyValueMismatch, TemplateKeyValueNull) as e:
+      raise _HttpError(HTTPStatus.UNPROCESSABLE_ENTITY, e.message) from None
+
+    except AttributeError:
+      raise _HttpError(HTTPStatus.UNPROCESSABLE_ENTITY, 'field values must be strings') from None
+
+  def _render_batch_item(self, item: object) -> dict:
+    title = item.get('title') if isinstance(item, Mapping) else None
+
+    try:
+      content, _ = self._render(title, item.get('fields') if isinstance(item, Mapping) else None)
+
+    except _HttpError as e:
+      return {'title': title, 'status': e.status.value, 'error': e.message}
+
+    return {'title': title, 'content': content}
+
+  @staticmethod
+  def _require_post(method: str) -> None:
+    if method != 'POST':
+      raise _HttpError(HTTPStatus.METHOD_NOT_ALLOWED, 'use POST')
+
+  @staticmethod
+  def _json_body(body: bytes) -> dict:
+    try:
+      payload = json.loads(body)
+
+    except (UnicodeDecodeError, json.JSONDecodeError):
+      raise _HttpError(HTTPStatus.BAD_REQUEST, 'request body is not valid JSON') from None
+
+    if not isinstance(payload, dict):
+      raise _HttpError(HTTPStatus.BAD_REQUEST, 'request body must be a JSON object')
+
+    return payload
+
+
+async def start_render_server(
+  cache: TemplateCache, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+) -> asyncio.Server:
+  """Load the cache and start listening; port 0 picks a free port (see server.sockets)."""
+  cache.refresh()
+  service = RenderService(cache)
+
+  return await asyncio.start_server(service.handle_connection, host, port)
+
+
+def run_render_service(
+  databaseFile: Path, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+) -> None:
+  """Blocking entry point; serves until interrupted."""
+
+  async def serve() -> None:
+    server = await start_render_server(cache, host, port)
+    address = server.sockets[0].getsockname()
+    LOGGER.info(f'Render service listening on http://{address[0]}:{address[1]}')
+
+    async with server:
+      await server.serve_forever()
+
+  cache = TemplateCache(databaseFile)
+
+  try:
+    asyncio.run(serve())
+
+  except KeyboardInterrupt:
+    LOGGER.info('Render service stopped.')
+
+  finally:
+    cache.close()
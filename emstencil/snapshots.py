@@ -0,0 +1,369 @@
+"""
+ Program: Compressed database snapshots through the SQLite online backup API, with restore.
+    Name: Andrew Dixon            File: snapshots.py
+    Date: 19 Oct 2026
+   Notes: The backup copies BACKUP_PAGES_PER_STEP pages at a time and releases its read lock between
+          steps, so the application keeps reading and writing while a snapshot is taken. The copy
+          is then gzip-compressed in fixed-size chunks; memory use does not grow with the file.
+          Entry points: `python -m emstencil.cli snapshot`, File > Take Snapshot / Restore
+          Snapshot, and the automatic pre-import snapshot in ImportTemplates.convertSpreadsheet.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import gzip
+import re
+import sqlite3
+import zlib
+from collections.abc import Callable
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from .Exceptions import InvalidSnapshot
+from .initialize import CHANGE_LOG_RESYNC_UID, upgradeDatabase
+from .Logging import LOGGER
+
+# Snapshots live next to the database they were taken from, in this folder.
+SNAPSHOT_DIR_NAME = 'snapshots'
+
+# Snapshots kept per folder; taking one more deletes the oldest.
+SNAPSHOT_RETENTION = 10
+
+# Pages per backup step (4 MiB at the default page size). The source is only locked during a step.
+BACKUP_PAGES_PER_STEP = 1024
+
+# Pause between backup steps, in seconds, so other connections get the lock.
+BACKUP_STEP_SLEEP = 0.005
+
+# A commit from another connection between steps restarts the backup. After this many restarts the
+# copy is finished in one step, which holds the read lock (and makes writers wait) until it is done.
+BACKUP_MAX_RESTARTS = 3
+
+# Bytes read per (de)compression chunk.
+COMPRESS_CHUNK_BYTES = 1 << 20
+
+# gzip level 1: on template text about 1.5x the size of level 6 in a quarter of the time.
+COMPRESS_LEVEL = 1
+
+# Reasons are part of the file name.
+_REASON_RE = re.compile(r'^[a-z0-9]+(?:-[a-z0-9]+)*$')
+_SNAPSHOT_NAME_RE = re.compile(r'^templates-(\d{8}-\d{6}-\d{6})-([a-z0-9-]+)\.db\.gz$')
+_TIMESTAMP_FORMAT = '%Y%m%d-%H%M%S-%f'
+
+# progress(phase, done, total): phase is 'copy', 'compress', 'decompress' or 'restore'; done and
+# total count pages for the backup phases and bytes for the others.
+ProgressCallback = Callable[[str, int, int], None]
+
+
+@dataclass(slots=True, frozen=True)
+class Snapshot:
+  """One compressed snapshot file; createdAt (UTC) and reason come from the file name."""
+
+  path: Path
+  createdAt: datetime
+  reason: str
+
+  @property
+  def fileBytes(self) -> int:
+    return self.path.stat().st_size
+
+  def __str__(self) -> str:
+    return f'{self.createdAt.astimezone():%Y-%m-%d %H:%M:%S} ({self.reason})'
+
+
+def snapshot_dir_for(databaseFile: Path) -> Path:
+  return Path(databaseFile).parent / SNAPSHOT_DIR_NAME
+
+
+def list_snapshots(snapshotDir: Path) -> list[Snapshot]:
+  """Snapshots in `snapshotDir`, newest first; other files in the folder are ignored."""
+  if not snapshotDir.is_dir():
+    return []
+
+  snapshots = []
+  for path in snapshotDir.iterdir():
+    match = _SNAPSHOT_NAME_RE.match(path.name)
+
+    if match is None:
+      continue
+
+    createdAt = datetime.strptime(match.group(1), _TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+    snapshots.append(Snapshot(path, createdAt, match.group(2)))
+
+  return sorted(snapshots, key=lambda snapshot: snapshot.path.name, reverse=True)
+
+
+def create_snapshot(
+  databaseFile: Path,
+  snapshotDir: Path | None = None,
+  reason: str = 'manual',
+  keep: int = SNAPSHOT_RETENTION,
+  progress: ProgressCallback | None = None,
+) -> Snapshot:
+  """
+  Back up `databaseFile` page by page, compress the copy, then prune to the newest `keep`.
+    - Safe while the application is writing: the backup only sees committed data, and restarts
+      by itself if another connection commits in the middle of it.
+    - The snapshot only appears under its final name once complete.
+  """
+  if not _REASON_RE.match(reason):
+    raise ValueError(f'Snapshot reason must be lower-case words joined by dashes: {reason!r}')
+
+  snapshotDir = snapshotDir or snapshot_dir_for(databaseFile)
+  snapshotDir.mkdir(parents=True, exist_ok=True)
+  createdAt = datetime.now(timezone.utc)
+  target = snapshotDir / f'templates-{createdAt:{_TIMESTAMP_FORMAT}}-{reason}.db.gz'
+  rawCopy = snapshotDir / f'.{target.name}.db'
+  partial = snapshotDir / f'.{target.name}.part'
+
+  try:
+    _backup(Path(databaseFile), rawCopy, 'copy', progress)
+    _compress(rawCopy, partial, progress)
+    partial.replace(target)
+
+  finally:
+    rawCopy.unlink(missing_ok=True)
+    partial.unlink(missing_ok=True)
+
+  snapshot = Snapshot(target, createdAt, reason)
+  LOGGER.info(f'Snapshot of {databaseFile} saved to {target} ({snapshot.fileBytes:,} bytes).')
+  prune_snapshots(snapshotDir, keep)
+
+  return snapshot
+
+
+def prune_snapshots(snapshotDir: Path, keep: int = SNAPSHOT_RETENTION) -> list[Path]:
+  """Delete all but the newest `keep` snapshots; returns the deleted paths."""
+  if keep < 1:
+    raise ValueError('keep must be at least 1.')
+
+  removed = [snapshot.path for snapshot in list_snapshots(snapshotDir)[keep:]]
+
+  for path in removed:
+    path.unlink(missing_ok=True)
+    LOGGER.info(f'Removed old snapshot {path}.')
+
+  return removed
+
+
+def restore_snapshot(
+  snapshot: Snapshot | Path,
+  databaseFile: Path,
+  snapshotDir: Path | None = None,
+  keepCurrent: bool = True,
+  keep: int = SNAPSHOT_RETENTION,
+  progress: ProgressCallback | None = None,
+) -> Snapshot | None:
+  """
+  Replace the contents of `databaseFile` with a snapshot; returns the snapshot of the replaced
+  state (saved in `snapshotDir`) when `keepCurrent`, else None.
+    - The snapshot is decompressed and checked before anything is written; InvalidSnapshot means
+      the database was not touched.
+    - The restore goes through the backup API into the live file, so open connections see the
+      restored data on their next read. The schema is then upgraded if the snapshot is older.
+    - The snapshot's older templateChanges log is replaced by one resync marker numbered past
+      everything the live log handed out, so change readers never see seq go backwards.
+  """
+  path = snapshot.path if isinstance(snapshot, Snapshot) else Path(snapshot)
+  databaseFile = Path(databaseFile)
+  rawCopy = databaseFile.with_name(f'.{databaseFile.name}.restore')
+  current = None
+
+  try:
+    _decompress(path, rawCopy, progress)
+    _check_snapshot(path, rawCopy)
+
+    # Taken after the snapshot was unpacked, so pruning cannot delete the one being restored.
+    if keepCurrent:
+      current = create_snapshot(databaseFile, snapshotDir, 'pre-restore', keep, progress)
+
+    highWater = _change_log_high_water(databaseFile)
+    _backup(rawCopy, databaseFile, 'restore', progress)
+
+  finally:
+    rawCopy.unlink(missing_ok=True)
+
+  upgradeDatabase(databaseFile)
+  _mark_change_log_resync(databaseFile, highWater)
+  LOGGER.info(f'Restored {databaseFile} from snapshot {path}.')
+
+  return current
+
+
+def _change_log_high_water(databaseFile: Path) -> int:
+  """Highest templateChanges seq the database has handed out, pruned rows included."""
+  with closing(sqlite3.connect(databaseFile)) as connection:
+    return max(
+      connection.execute('select coalesce(max(seq), 0) from templateChanges;').fetchone()[0],
+      _sequence_value(connection),
+    )
+
+
+def _mark_change_log_resync(databaseFile: Path, highWater: int) -> None:
+  """Replace the restored change log with a resync marker past both logs' high-water marks."""
+  with closing(sqlite3.connect(databaseFile)) as connection, connection:
+    seq = max(highWater, _sequence_value(connection)) + 1
+    connection.execute('delete from templateChanges;')
+    # An explicit seq also moves sqlite_sequence, so later changes are numbered after it.
+    connection.execute(
+      'insert into templateChanges (seq, tmplt_uid, revision) values (?, ?, null);',
+      [seq, CHANGE_LOG_RESYNC_UID],
+    )
+
+
+def _sequence_value(connection: sqlite3.Connection) -> int:
+  # sqlite_sequence only exists once an autoincrement table has had a row.
+  if not connection.execute(
+    "select 1 from sqlite_master where type = 'table' and name = 'sqlite_sequence';"
+  ).fetchone():
+    return 0
+
+  row = connection.execute(
+    "select seq from sqlite_sequence where name = 'templateChanges';"
+  ).fetchone()
+
+  return row[0] if row else 0
+
+
+class _BackupRestarted(Exception):
+  """Raised from the progress callback to abandon a stepped backup that keeps restarting."""
+
+
+def _backup(
+  sourceFile: Path, targetFile: Path, phase: str, progress: ProgressCallback | None
+) -> None:
+  """
+  Online backup in BACKUP_PAGES_PER_STEP steps, sleeping between them; falls back to a single
+  step after BACKUP_MAX_RESTARTS restarts so a busy database cannot keep the copy from finishing.
+  """
+  restarts = 0
+  lastDone = 0
+  pageCount = 0
+
+  def report(status: int, remaining: int, total: int) -> None:
+    nonlocal restarts, lastDone, pageCount
+    done = total - remaining
+    pageCount = total
+
+    # Copied pages only go down (or stay put) when the backup started over.
+    if done <= lastDone:
+      restarts += 1
+
+      if restarts > BACKUP_MAX_RESTARTS:
+        raise _BackupRestarted()
+
+    lastDone = done
+
+    if progress is not None:
+      progress(phase, done, total)
+
+  with (
+    closing(sqlite3.connect(sourceFile)) as source,
+    closing(sqlite3.connect(targetFile)) as target,
+  ):
+    try:
+      source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=report, sleep=BACKUP_STEP_SLEEP)
+      return
+
+    except _BackupRestarted:
+      LOGGER.info(f'Backup of {sourceFile} restarted {restarts} times; finishing in one step.')
+
+    source.backup(target)
+
+    if progress is not None:
+      progress(phase, pageCount, pageCount)
+
+
+def _compress(rawFile: Path, compressedFile: Path, progress: ProgressCallback | None) -> None:
+  total = rawFile.stat().st_size
+  done = 0
+
+  with open(rawFile, 'rb') as source, gzip.open(compressedFile, 'wb', COMPRESS_LEVEL) as target:
+    while chunk := source.read(COMPRESS_CHUNK_BYTES):
+      target.write(chunk)
+      done += len(chunk)
+
+      if progress is not None:
+        progress('compress', done, total)
+
+
+def _decompress(compressedFile: Path, rawFile: Path, progress: ProgressCallback | None) -> None:
+  """Unpack a snapshot; progress counts compressed bytes read."""
+  try:
+    total = compressedFile.stat().st_size
+
+    with (
+      open(compressedFile, 'rb') as compressed,
+      gzip.GzipFile(fileobj=compressed) as source,
+      open(rawFile, 'wb') as target,
+    ):
+      while chunk := source.read(COMPRESS_CHUNK_BYTES):
+        target.write(chunk)
+
+        if progress is not None:
+          progress('decompress', compressed.tell(), total)
+
+  except FileNotFoundError:
+    raise InvalidSnapshot(compressedFile, 'file not found') from None
+
+  except (gzip.BadGzipFile, EOFError, zlib.error) as e:
+    raise InvalidSnapshot(compressedFile, f'not a complete gzip file ({e})') from None
+
+
+def _check_snapshot(snapshotFile: Path, rawFile: Path) -> None:
+  """Refuse anything that is not a healthy template database."""
+  try:
+    with closing(sqlite3.connect(rawFile)) as connection:
+      problems = [row[0] for row in connection.execute('pragma quick_check;') if row[0] != 'ok']
+      hasTemplates = connection.execute(
+        "select 1 from sqlite_master where type = 'table' and name = 'templates';"
+      ).fetchone()
+
+  except sqlite3.DatabaseError as e:
+    raise InvalidSnapshot(snapshotFile, f'not a SQLite database ({e})') from None
+
+  if problems:
+    raise InvalidSnapshot(snapshotFile, f'integrity check failed ({problems[0]})')
+
+  if hasTemplates is None:
+    raise InvalidSnapshot(snapshotFile, 'no templates table')
+
+
+class SnapshotSignals(QObject):
+  """Queued back to the GUI thread: progress(phase, done, total) and finished(result)."""
+
+  progress = Signal(str, int, int)
+  finished = Signal(object)
+
+
+class SnapshotTask(QRunnable):
+  """
+  Run create_snapshot, restore_snapshot or another long database operation off the GUI thread.
+    - `operation` receives the progress callback; its return value, or the error it raised, is
+      emitted through finished.
+  """
+
+  def __init__(self, operation: Callable[[ProgressCallback], object]) -> None:
+    super().__init__()
+    self.operation = operation
+    self.signals = SnapshotSignals()
+
+  def run(self) -> None:
+    try:
+      result = self.operation(self.signals.progress.emit)
+
+    except (InvalidSnapshot, OSError, ValueError, sqlite3.Error) as e:
+      result = e
+
+    self.signals.finished.emit(result)
@@ -14,6 +14,7 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable, Sequence
 from zipfile import BadZipFile
 from openpyxl import Workbook
 from openpyxl import load_workbook
@@ -32,31 +33,44 @@ def _cell_str(value: object) -> str:
   return str(value).strip()
 
 
-def read_template_rows(path: str) -> list[tuple[str, str, list[str]]]:
-  """
-  Load the first worksheet in the workbook. Row 1 is skipped (header).
-  Columns A–C are title, content, and comma-separated tags (split only; normalize elsewhere).
-  """
+def normalize_template_row(row: Sequence[object] | None) -> tuple[str, str, list[str]]:
+  """Columns A–C of one sheet row as (title, content, tag parts); shared by both import readers."""
+  title = _cell_str(row[0] if row else None)
+  content = _cell_str(row[1] if row and len(row) > 1 else None)
+  raw_tags = row[2] if row and len(row) > 2 else None
+  tags_cell = _cell_str(raw_tags) if raw_tags is not None else ''
+  tag_parts = tags_cell.split(',') if tags_cell else []
+
+  return title, content, tag_parts
+
+
+def open_import_workbook(path: str) -> Workbook:
+  """Read-only, cached-values workbook; raises InvalidImportFileType for anything unreadable."""
   try:
     wb = load_workbook(path, read_only=True, data_only=True)
 
   except (BadZipFile, InvalidFileException, OSError) as e:
     raise InvalidImportFileType() from e
 
-  try:
-    if not wb.worksheets:
-      raise InvalidImportFileType()
+  if not wb.worksheets:
+    wb.close()
+    raise InvalidImportFileType()
 
-    ws = wb.worksheets[0]
-    out: list[tuple[str, str, list[str]]] = []
+  return wb
 
-    for row in ws.iter_rows(min_row=2, max_col=3, values_only=True):
-      title = _cell_str(row[0] if row else None)
-      content = _cell_str(row[1] if row and len(row) > 1 else None)
-      raw_tags = row[2] if row and len(row) > 2 else None
-      tags_cell = _cell_str(raw_tags) if raw_tags is not None else ''
-      tag_parts = tags_cell.split(',') if tags_cell else []
-      out.append((title, content, tag_parts))
+
+def read_template_rows(path: str) -> list[tuple[str, str, list[str]]]:
+  """
+  Load the first worksheet in the workbook. Row 1 is skipped (header).
+  Columns A–C are title, content, and comma-separated tags (split only; normalize elsewhere).
+  """
+  wb = open_import_workbook(path)
+
+  try:
+    ws = wb.worksheets[0]
+    out = [
+      normalize_template_row(row) for row in ws.iter_rows(min_row=2, max_col=3, values_only=True)
+    ]
 
   finally:
     wb.close()
@@ -64,13 +78,21 @@ def read_template_rows(path: str) -> list[tuple[str, str, list[str]]]:
   return out
 
 
-def write_templates_workbook(path: str, rows: list[tuple[str, str, str]]) -> None:
-  """Write a new workbook; Content column is always HTML (plain bodies wrapped on export)."""
-  wb = Workbook()
-  ws = wb.active
+def write_templates_workbook(path: str, rows: Iterable[tuple[str, str, str]]) -> int:
+  """
+  Write a new workbook; Content column is always HTML (plain bodies wrapped on export).
+  Rows are streamed through a write-only sheet, so a generator keeps memory bounded.
+  Returns the number of template rows written.
+  """
+  wb = Workbook(write_only=True)
+  ws = wb.create_sheet()
   ws.append(list(EXPORT_HEADERS))
+  count = 0
 
   for title, content, tags_csv in rows:
     ws.append([title, export_content_as_html(content), tags_csv])
+    count += 1
 
   wb.save(path)
+
+  return count
@@ -0,0 +1,108 @@
+"""
+ Program: Off-thread analysis of a template body being edited: placeholders, conflicts, and size.
+    Name: Andrew Dixon            File: template_analysis.py
+    Date: 19 Oct 2026
+   Notes: After a debounce, the editor takes one toHtml()/toPlainText() snapshot per edit and hands
+          it to TemplateAnalysisTask on the global QThreadPool. The result also carries the body
+          that would be saved, so saving an unchanged draft needs no further serialization.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from .content_html import rich_text_editor_html_should_persist_as_html
+from .Dataclasses import parse_field_spec
+from .embedded_images import ImageWeight, format_weight, measure_embedded_images
+from .Exceptions import TemplateFieldKindConflict
+
+
+class EditorSnapshot(NamedTuple):
+  """Editor text captured on the GUI thread; serial identifies the edit it was taken after."""
+
+  serial: int
+  html: str
+  plainText: str
+
+
+class TemplateAnalysis(NamedTuple):
+  """What saving the snapshot would store, plus its placeholders and weight."""
+
+  serial: int
+  content: str
+  persistAsHtml: bool
+  fields: tuple[tuple[str, str], ...]
+  conflict: str | None
+  images: ImageWeight
+  bodyBytes: int
+
+  def summary(self) -> str:
+    """One line for the editor status label."""
+    if self.conflict:
+      return f'Placeholder conflict: {self.conflict}'
+
+    fields = ', '.join(key if kind == 'text' else f'{key} ({kind})' for key, kind in self.fields)
+    parts = [f'Fields: {fields or "none"}', f'Body: {self.bodyBytes / 1024:.1f} KiB']
+
+    if self.images.count:
+      parts.append(f'Images: {format_weight(self.images)}')
+
+    return ' | '.join(parts)
+
+
+def persisted_body(snapshot: EditorSnapshot, forceHtml: bool) -> tuple[str, bool]:
+  """(body, as HTML) the editor would save: HTML when forced or when plain text loses structure."""
+  persistAsHtml = forceHtml or rich_text_editor_html_should_persist_as_html(snapshot.html)
+
+  return (snapshot.html if persistAsHtml else snapshot.plainText), persistAsHtml
+
+
+def analyze_editor_body(snapshot: EditorSnapshot, forceHtml: bool) -> TemplateAnalysis:
+  """Thread-safe; drafts are parsed without entering the shared placeholder cache."""
+  content, persistAsHtml = persisted_body(snapshot, forceHtml)
+
+  try:
+    _, spec = parse_field_spec(content)
+    fields = tuple((key, spec[key]) for key in spec.order)
+    conflict = None
+
+  except TemplateFieldKindConflict as e:
+    fields, conflict = (), e.message
+
+  return TemplateAnalysis(
+    snapshot.serial,
+    content,
+    persistAsHtml,
+    fields,
+    conflict,
+    measure_embedded_images(content),
+    len(content.encode('utf-8', 'surrogatepass')),
+  )
+
+
+class TemplateAnalysisSignals(QObject):
+  """Queued back to the GUI thread with the finished TemplateAnalysis."""
+
+  finished = Signal(object)
+
+
+class TemplateAnalysisTask(QRunnable):
+  """Analyze an editor snapshot off the GUI thread."""
+
+  def __init__(self, snapshot: EditorSnapshot, forceHtml: bool) -> None:
+    super().__init__()
+    self.snapshot = snapshot
+    self.forceHtml = forceHtml
+    self.signals = TemplateAnalysisSignals()
+
+  def run(self) -> None:
+    self.signals.finished.emit(analyze_editor_body(self.snapshot, self.forceHtml))
@@ -15,27 +15,36 @@
 --  See the LICENSE file at the project root for details.
 --........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
 
+-- Free pages can be handed back with `pragma incremental_vacuum` (see maintenance.py).
+-- Only takes effect on a new, empty database file.
+Pragma auto_vacuum = incremental;
+
 -- Drop Tables before rebuilding
 drop view if exists vw_Templates_Tags;
+drop table if exists templateUsage;
+drop table if exists tagStats;
+drop table if exists templateChanges;
 drop table if exists templatetags;
 drop table if exists templates;
 drop table if exists tags;
 
 
 -- Tabel for storing the email templates
+--   revision is bumped on every visible change (title, content, or tag links) for change detection.
 Create Table templates (
   uid integer primary key AUTOINCREMENT not null,
   title text not null unique,
   content text not null,
   dateAdded datetime,
-  dateUpdated datetime
+  dateUpdated datetime,
+  revision integer not null default 0
 );
 
--- Trigger for populating updated timestamp on templates.dateUpdated
+-- Trigger for populating updated timestamp and bumping the revision on templates.dateUpdated
 Create Trigger Templates_Date_Updated
   After Update of title, content On templates
   Begin Update templates
-    Set DateUpdated = Datetime('Now')
+    Set DateUpdated = Datetime('Now'), revision = Old.revision + 1
     Where uid = Old.uid;
 End;
 
@@ -52,6 +61,12 @@ create index ux_Templates on templates (
     title asc
 );
 
+-- Index over templates by case-insensitive title, used to page the export in title order.
+create index ix_Templates_Title_NoCase on templates (
+    title collate nocase asc,
+    uid asc
+);
+
 
 -- Table to store existing tag values
 create table tags (
@@ -114,14 +129,90 @@ Create Trigger TemplateTags_Date_Added
     Where uid = New.uid;
 End;
 
+-- Tag links are part of what a template shows, so linking/unlinking bumps the template revision.
+Create Trigger TemplateTags_Revision_Insert
+  After Insert On templateTags
+  Begin Update templates
+    Set revision = revision + 1
+    Where uid = New.tmplt_uid;
+End;
+
+Create Trigger TemplateTags_Revision_Delete
+  After Delete On templateTags
+  Begin Update templates
+    Set revision = revision + 1
+    Where uid = Old.tmplt_uid;
+End;
+
+-- Renaming a tag changes every template that carries it.
+Create Trigger Tags_Revision_Renamed
+  After Update of tag On tags
+  Begin Update templates
+    Set revision = revision + 1
+    Where uid in (select tmplt_uid from templateTags where tag_uid = New.uid);
+End;
+
+-- Materialized per-tag usage for the tag filter, kept current by the triggers below so loading
+-- the tag list never aggregates templateTags. last_used is when the tag was last linked.
+Create Table tagStats (
+  tag_uid integer primary key not null,
+  template_count integer not null default 0,
+  last_used datetime
+);
+
+Create Trigger Tags_Stats_Insert
+  After Insert On tags
+  Begin Insert Into tagStats (tag_uid)
+    Values (New.uid);
+End;
+
+Create Trigger Tags_Stats_Delete
+  After Delete On tags
+  Begin Delete From tagStats
+    Where tag_uid = Old.uid;
+End;
+
+Create Trigger TemplateTags_Stats_Insert
+  After Insert On templateTags
+  Begin Update tagStats
+    Set template_count = template_count + 1, last_used = Datetime('Now')
+    Where tag_uid = New.tag_uid;
+End;
+
+Create Trigger TemplateTags_Stats_Delete
+  After Delete On templateTags
+  Begin Update tagStats
+    Set template_count = template_count - 1
+    Where tag_uid = Old.tag_uid;
+End;
+
+Create Trigger TemplateTags_Stats_Moved
+  After Update of tag_uid On templateTags
+  Begin
+    Update tagStats
+      Set template_count = template_count - 1
+      Where tag_uid = Old.tag_uid;
+    Update tagStats
+      Set template_count = template_count + 1, last_used = Datetime('Now')
+      Where tag_uid = New.tag_uid;
+End;
+
+-- Index over tag statistics by popularity, for the tag filter order.
+create index ix_TagStats_by_Count on tagStats (
+    template_count desc,
+    tag_uid asc
+);
+
 -- Index over template tags by template RowID
 create index ix_TemplateTags_by_Template ON templateTags (
     tmplt_uid asc
 );
 
--- Index over template tags by tag RowID
+-- Index over template tags by tag RowID, covering the template RowID so tag lookups come back
+-- already in template order without a sort.
 create index ix_TemplateTags_by_Tag ON templateTags (
-    tag_uid asc
+    tag_uid asc,
+    tmplt_uid asc
 );
 
 
@@ -133,8 +224,51 @@ Create View vw_Templates_Tags as
     left join templateTags tg
       on tm.uid = tg.tmplt_uid
     left join tags ta
-      on tg.tag_uid = ta.uid
-  order by tmpRowID, tgRowID;
+      on tg.tag_uid = ta.uid;
+
+-- Append-only log of template changes read by TemplateChangeTracker (revision is null on delete).
+-- Consumers remember the last seq they applied; old rows are pruned by the tracker.
+Create Table templateChanges (
+  seq integer primary key autoincrement not null,
+  tmplt_uid integer not null,
+  revision integer
+);
+
+Create Trigger Templates_Changed_Insert
+  After Insert On templates
+  Begin Insert Into templateChanges (tmplt_uid, revision)
+    Values (New.uid, New.revision);
+End;
+
+Create Trigger Templates_Changed_Revision
+  After Update of revision On templates
+  Begin Insert Into templateChanges (tmplt_uid, revision)
+    Values (New.uid, New.revision);
+End;
+
+Create Trigger Templates_Changed_Delete
+  After Delete On templates
+  Begin Insert Into templateChanges (tmplt_uid, revision)
+    Values (Old.uid, null);
+End;
+
+-- How often each template is selected and copied, for the 'recent' filter and quick picks.
+-- usage.py buffers uses in memory and upserts them in batches, one row per template.
+Create Table templateUsage (
+  tmplt_uid integer primary key not null,
+  select_count integer not null default 0,
+  copy_count integer not null default 0,
+  last_used datetime not null
+);
+
+Create Trigger Templates_Usage_Delete
+  After Delete On templates
+  Begin Delete From templateUsage
+    Where tmplt_uid = Old.uid;
+End;
+
+-- Schema version, used by initialize.upgradeDatabase() to bring older databases forward.
+Pragma user_version = 5;
 
 -- Set databas options
 -- Foreign key enforcement is off by default, needs to be set on connect.
@@ -0,0 +1,84 @@
+"""
+ Program: Buffered template usage recording (selects and copies) for the 'recent' filter.
+    Name: Andrew Dixon            File: usage.py
+    Date: 19 Oct 2026
+   Notes: A select or copy only bumps an in-memory counter. The main window flushes the buffer on a
+          timer and EmStencil.py flushes it on exit, each flush being one executemany in one
+          transaction however many uses were recorded.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+
+from .Database import TemplateDB
+from .Logging import LOGGER
+
+# How often the main window writes buffered uses; a crash loses at most this much usage.
+USAGE_FLUSH_INTERVAL_MS = 30_000
+
+
+class UsageRecorder:
+  """
+  Per-template select/copy counts waiting to be written to templateUsage.
+    - Uses of the same template between flushes collapse into one row of the batch.
+    - A failed flush keeps the buffer, so the uses are written by the next one.
+  """
+
+  def __init__(self) -> None:
+    # Template uid -> [selects, copies, last used (UTC, SQLite datetime format)].
+    self._pending: dict[int, list] = {}
+
+  @property
+  def pending(self) -> int:
+    """Number of templates with uses not yet written."""
+    return len(self._pending)
+
+  def record_select(self, rowID: int | None) -> None:
+    self._record(rowID, 0)
+
+  def record_copy(self, rowID: int | None) -> None:
+    self._record(rowID, 1)
+
+  def reset(self) -> None:
+    """Drop buffered uses without writing them."""
+    self._pending.clear()
+
+  def flush(self, db: TemplateDB | None = None) -> int:
+    """Write the buffered uses in one batch; returns how many templates were written."""
+    if not self._pending:
+      return 0
+
+    uses = [(rowID, *counts) for rowID, counts in self._pending.items()]
+
+    try:
+      (db or TemplateDB()).RecordTemplateUsage(uses)
+
+    except sqlite3.Error as e:
+      LOGGER.warning(f'Could not save template usage, will retry: {e}')
+      return 0
+
+    self._pending.clear()
+
+    return len(uses)
+
+  def _record(self, rowID: int | None, column: int) -> None:
+    # Stand-in entries (rowID 0/None) are never stored.
+    if not rowID:
+      return
+
+    counts = self._pending.setdefault(rowID, [0, 0, None])
+    counts[column] += 1
+    counts[2] = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# Shared by the selector, the main window's flush timer and the exit hook.
+USAGE_RECORDER = UsageRecorder()
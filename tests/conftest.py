@@ -23,6 +23,7 @@ from pathlib import Path
 import emstencil.Database as databaseModule
 import pytest
 from emstencil.Database import TemplateDB
+from emstencil.usage import USAGE_RECORDER
 
 
 @pytest.fixture()
@@ -43,3 +44,5 @@ def templateDB(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Temp
 
   db.close()
   TemplateDB._instance = None
+  # Uses the selector buffered against this database must not be flushed into the next one.
+  USAGE_RECORDER.reset()
@@ -0,0 +1,261 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for template change detection and in-place selector updates.
+    Name: Andrew Dixon            File: test_change_tracker.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from emstencil.change_tracker import TemplateChangeTracker
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate, MetadataTag, State
+from emstencil.ImportTemplates import convertSpreadsheet
+from emstencil.spreadsheet import write_templates_workbook
+from emstencil.TemplateLoader import loadTemplateSelector
+
+
+@pytest.fixture(scope='module')
+def qapp() -> QApplication:
+  app = QApplication.instance()
+  if app is None:
+    app = QApplication(sys.argv)
+  return app
+
+
+@pytest.fixture()
+def tracker(templateDB: TemplateDB) -> Iterator[TemplateChangeTracker]:
+  changeTracker = TemplateChangeTracker(templateDB)
+  yield changeTracker
+  changeTracker.close()
+
+
+def _addTemplate(db: TemplateDB, title: str, content: str, *tags: str) -> EmailTemplate:
+  template = EmailTemplate(title, content, [MetadataTag(tag) for tag in tags])
+  db.AddTemplate(template)
+  return next(tmplt for tmplt in db.FetchAllTemplates(withMetadata=True) if tmplt.title == title)
+
+
+def testTrackerReportsNothingWithoutCommits(tracker: TemplateChangeTracker) -> None:
+  assert tracker.poll() == []
+  assert tracker.poll() == []
+
+
+def testTrackerReportsAddUpdateAndDelete(
+  templateDB: TemplateDB, tracker: TemplateChangeTracker
+) -> None:
+  # Arrange / Act: one poll per committed step.
+  added = _addTemplate(templateDB, 'Alpha', 'Hello ${name}', 'sales')
+  afterAdd = tracker.poll()
+
+  added.content = 'Hi ${name}'
+  templateDB.UpdateTemplate(added)
+  afterUpdate = tracker.poll()
+
+  templateDB.DeleteTemplate(added)
+  afterDelete = tracker.poll()
+
+  # Assert
+  assert [(change.state, change.rowID) for change in afterAdd] == [(State.ADDED, added.rowID)]
+  assert [str(tag) for tag in afterAdd[0].template.metadata] == ['sales']
+  assert [(change.state, change.template.content) for change in afterUpdate] == [
+    (State.UPDATED, 'Hi ${name}')
+  ]
+  assert afterDelete == [(State.DELETED, added.rowID, None)]
+
+
+def testTrackerCollapsesSeveralCommitsIntoOneEventPerTemplate(
+  templateDB: TemplateDB, tracker: TemplateChangeTracker
+) -> None:
+  # Arrange: add then edit twice before polling; an untouched template stays quiet.
+  _addTemplate(templateDB, 'Quiet', 'Body')
+  tracker.resync()
+  template = _addTemplate(templateDB, 'Busy', 'v1')
+  for content in ('v2', 'v3'):
+    template.content = content
+    templateDB.UpdateTemplate(template)
+
+  # Act
+  changes = tracker.poll()
+
+  # Assert
+  assert [(change.state, change.template.content) for change in changes] == [(State.ADDED, 'v3')]
+
+
+def testTagChangesBumpTemplateRevision(
+  templateDB: TemplateDB, tracker: TemplateChangeTracker
+) -> None:
+  # Arrange
+  template = _addTemplate(templateDB, 'Tagged', 'Body', 'old')
+  tracker.poll()
+
+  # Act: retag only; title and content are unchanged.
+  template.metadata = [MetadataTag('new')]
+  templateDB.UpdateTemplate(template)
+  changes = tracker.poll()
+
+  # Assert
+  assert [change.state for change in changes] == [State.UPDATED]
+  assert [str(tag) for tag in changes[0].template.metadata] == ['new']
+
+
+def testReimportingUnchangedTemplatesLeavesRevisionsAlone(
+  templateDB: TemplateDB, tracker: TemplateChangeTracker, tmp_path: Path
+) -> None:
+  # Arrange
+  workbook = tmp_path / 'import.xlsx'
+  rows = [('One', 'Body ${a}', 'x, y'), ('Two', 'Body', '')]
+  write_templates_workbook(str(workbook), rows)
+  convertSpreadsheet(str(workbook), templateDB, workers=0, snapshot=False)
+  tracker.poll()
+  revisions = 'select title, revision, dateUpdated from templates order by title;'
+  before = templateDB.getConnection().execute(revisions).fetchall()
+
+  # Act: the same workbook again, then with one body edited.
+  convertSpreadsheet(str(workbook), templateDB, workers=0, snapshot=False)
+  afterSame = templateDB.getConnection().execute(revisions).fetchall()
+  unchangedPoll = tracker.poll()
+  write_templates_workbook(str(workbook), [rows[0], ('Two', 'Edited', '')])
+  convertSpreadsheet(str(workbook), templateDB, workers=0, snapshot=False)
+  changes = tracker.poll()
+
+  # Assert
+  assert afterSame == before
+  assert unchangedPoll == []
+  assert [(change.state, change.template.title) for change in changes] == [(State.UPDATED, 'Two')]
+  assert [str(tag) for tag in templateDB.FetchAllTemplates(withMetadata=True)[0].metadata] == [
+    'x',
+    'y',
+  ]
+
+
+def testSelectorAppliesChangesInPlaceAndKeepsSelection(
+  qapp: QApplication, templateDB: TemplateDB, tracker: TemplateChangeTracker
+) -> None:
+  # Arrange: two templates loaded, the second selected with a field value entered.
+  _addTemplate(templateDB, 'First', 'One ${a}')
+  second = _addTemplate(templateDB, 'Second', 'Two ${name}')
+  tracker.resync()
+  selector = loadTemplateSelector()
+  selector.templateComboBox.setCurrentIndex(1)
+  selector.templateComboBox.currentData().fields['name'] = 'Ada'
+
+  # Act: edit the selected template, add a third, delete the first.
+  second.content = 'Two ${name} ${extra}'
+  templateDB.UpdateTemplate(second)
+  _addTemplate(templateDB, 'Third', 'Three')
+  templateDB.DeleteTemplate(templateDB.FetchAllTemplates()[0])
+  selector.applyTemplateChanges(tracker.poll())
+
+  # Assert
+  assert [str(tmplt) for tmplt in selector.templateList] == ['Second', 'Third']
+  assert selector.templateComboBox.count() == 2
+  selected = selector.getSelectedTemplate()
+  assert selected.content == 'Two ${name} ${extra}'
+  assert selected.fields == {'name': 'Ada', 'extra': None}
+
+
+def testSelectorShowsPlaceholderWhenLastTemplateIsDeleted(
+  qapp: QApplication, templateDB: TemplateDB, tracker: TemplateChangeTracker
+) -> None:
+  # Arrange
+  only = _addTemplate(templateDB, 'Only', 'Body')
+  tracker.resync()
+  selector = loadTemplateSelector()
+
+  # Act
+  templateDB.DeleteTemplate(only)
+  selector.applyTemplateChanges(tracker.poll())
+
+  # Assert
+  assert [tmplt.rowID for tmplt in selector.templateList] == [0]
+  assert selector.templateComboBox.count() == 1
+
+
+def testSelectorPatchUpdatesOneTemplateAndOnlyItsTags(
+  qapp: QApplication, templateDB: TemplateDB, tracker: TemplateChangeTracker
+) -> None:
+  # Arrange: the second template is selected with a value entered.
+  _addTemplate(templateDB, 'First', 'One ${a}', 'keep')
+  second = _addTemplate(templateDB, 'Second', 'Two ${name}', 'old')
+  tracker.resync()
+  selector = loadTemplateSelector()
+  selector.templateComboBox.setCurrentIndex(1)
+  selector.templateComboBox.currentData().fields['name'] = 'Ada'
+
+  # Act: save an edit the way the editor does, then patch the selector with the stored template.
+  edited = EmailTemplate('Second', 'Two ${name}!', [MetadataTag(' New ')])
+  edited.rowID = second.rowID
+  templateDB.UpdateTemplate(edited)
+  templateDB.queryStats.reset()
+  selector.patchTemplate(edited)
+  tracker.acknowledge(edited.rowID)
+
+  # Assert: one indexed tag lookup, the orphaned tag is gone, and nothing is reported twice.
+  assert dict(templateDB.queryStats.calls) == {'fetch_tag_statistics_by_name': 1}
+  assert [str(tmplt) for tmplt in selector.templateList] == ['First', 'Second']
+  assert selector.getSelectedTemplate().fields == {'name': 'Ada'}
+  tagNames = [selector.metaTagComboBox.itemText(i) for i in range(selector.metaTagComboBox.count())]
+  assert tagNames == ['all', 'recent', 'keep (1)', 'new (1)']
+  assert tracker.poll() == []
+
+
+def testSelectorPatchRemovesDeletedTemplate(
+  qapp: QApplication, templateDB: TemplateDB, tracker: TemplateChangeTracker
+) -> None:
+  # Arrange
+  first = _addTemplate(templateDB, 'First', 'One', 'gone')
+  _addTemplate(templateDB, 'Second', 'Two')
+  tracker.resync()
+  selector = loadTemplateSelector()
+
+  # Act
+  templateDB.DeleteTemplate(first)
+  selector.patchTemplate(first)
+  tracker.acknowledge(first.rowID)
+
+  # Assert
+  assert first.state == State.DELETED
+  assert [str(tmplt) for tmplt in selector.templateList] == ['Second']
+  assert selector.metaTagComboBox.count() == 2
+  assert tracker.poll() == []
+
+
+def testSelectorListsTagsByUsageWithCounts(
+  qapp: QApplication, templateDB: TemplateDB, tracker: TemplateChangeTracker
+) -> None:
+  # Arrange
+  _addTemplate(templateDB, 'First', 'One', 'rare')
+  second = _addTemplate(templateDB, 'Second', 'Two', 'common')
+  _addTemplate(templateDB, 'Third', 'Three', 'common')
+  tracker.resync()
+  selector = loadTemplateSelector()
+  loaded = [selector.metaTagComboBox.itemText(i) for i in range(selector.metaTagComboBox.count())]
+
+  # Act: moving a template between tags re-sorts the filter on the next change.
+  second.metadata = [MetadataTag('rare')]
+  templateDB.UpdateTemplate(second)
+  templateDB.queryStats.reset()
+  selector.applyTemplateChanges(tracker.poll())
+
+  # Assert
+  assert loaded == ['all', 'recent', 'common (2)', 'rare (1)']
+  tagNames = [selector.metaTagComboBox.itemText(i) for i in range(selector.metaTagComboBox.count())]
+  assert tagNames == ['all', 'recent', 'rare (2)', 'common (1)']
+  assert 'fetch_tag_statistics' in templateDB.queryStats.calls
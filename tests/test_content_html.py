@@ -16,11 +16,6 @@
 
 from __future__ import annotations
 
-import sys
-
-import pytest
-from PySide6.QtWidgets import QApplication
-
 from emstencil.content_html import (
   clipboard_plain_text_from_merged_html,
   export_content_as_html,
@@ -29,14 +24,6 @@ from emstencil.content_html import (
 )
 
 
-@pytest.fixture(scope='module')
-def qapp() -> QApplication:
-  app = QApplication.instance()
-  if app is None:
-    app = QApplication(sys.argv)
-  return app
-
-
 def testIsHtmlContentFalseForPlainAndLooseAngle() -> None:
   assert is_html_content('Hello ${name}') is False
   assert is_html_content('2 < 3 and ${x}') is False
@@ -67,7 +54,7 @@ def testRichTextEditorHtmlShouldPersistDetectsStructure() -> None:
   assert rich_text_editor_html_should_persist_as_html('<ul><li>x</li></ul>') is True
 
 
-def testClipboardPlainTextOmitsDataUrls(qapp: QApplication) -> None:
+def testClipboardPlainTextOmitsDataUrls() -> None:
   html = (
     '<p>Hello world</p>'
     '<img src="data:image/png;base64,QUJDREVGRw==" alt="x" />'
@@ -80,7 +67,7 @@ def testClipboardPlainTextOmitsDataUrls(qapp: QApplication) -> None:
   assert '[Image]' in plain
 
 
-def testClipboardPlainTextStripsBareDataUrlLine(qapp: QApplication) -> None:
+def testClipboardPlainTextStripsBareDataUrlLine() -> None:
   """If a data URL appears as its own text (leaked from conversion), scrub it."""
   html = '<p>Intro</p><p>data:image/png;base64,QUJD</p>'
   plain = clipboard_plain_text_from_merged_html(html)
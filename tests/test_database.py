@@ -16,9 +16,13 @@
 
 from __future__ import annotations
 
+import dataclasses
+
 import pytest
+from emstencil import queries
 from emstencil.Database import TemplateDB
-from emstencil.Dataclasses import EmailTemplate, MetadataTag, State
+from emstencil.Dataclasses import EmailTemplate, MetadataTag, State, TemplateListRow
+from emstencil.Exceptions import AccessNullRowID, TagAlreadyExists, TagNotFound
 
 
 def testDatabaseAddTemplatePersistsAndSetsState(templateDB: TemplateDB) -> None:
@@ -205,3 +209,384 @@ def testDatabaseUpsertTemplateByTitleInsertsThenUpdatesExistingTitle(templateDB:
     [insertedRowID],
   )
   assert [tag for (tag,) in cursor.fetchall()] == ['beta']
+
+
+def testDatabaseFetchTemplatesForTagReturnsTemplatesWithAggregatedTags(templateDB: TemplateDB) -> None:
+  """FetchTemplatesForTag returns matching templates with all of their tags in one query."""
+  # Arrange: two templates share a tag, one does not.
+  first = EmailTemplate('First', 'One ${a}')
+  first.metadata = [MetadataTag('shared'), MetadataTag('Billing, Legacy')]
+  second = EmailTemplate('Second', 'Two ${b}')
+  second.metadata = [MetadataTag('shared')]
+  other = EmailTemplate('Other', 'Three')
+  other.metadata = [MetadataTag('unrelated')]
+  for template in (first, second, other):
+    templateDB.AddTemplate(template)
+
+  # Act
+  templates = templateDB.FetchTemplatesForTag('shared')
+
+  # Assert: template order follows row IDs and tags are hydrated with row IDs and state.
+  assert [template.title for template in templates] == ['First', 'Second']
+  assert sorted(tag.tag for tag in templates[0].metadata) == ['billing, legacy', 'shared']
+  assert [tag.tag for tag in templates[1].metadata] == ['shared']
+  assert all(tag.rowID > 0 for template in templates for tag in template.metadata)
+  assert all(tag.state == State.EXISTING for template in templates for tag in template.metadata)
+
+  # Assert: the shared tag is one interned object across both templates.
+  sharedFirst = next(tag for tag in templates[0].metadata if tag.tag == 'shared')
+  assert sharedFirst is templates[1].metadata[0]
+
+
+def testDatabaseFetchAllTemplatesWithMetadataMatchesPerTemplateFetch(templateDB: TemplateDB) -> None:
+  """FetchAllTemplates(withMetadata=True) matches FetchMetadataForTemplate for every row."""
+  tagged = EmailTemplate('Tagged', 'Body ${x}')
+  tagged.metadata = [MetadataTag('zeta'), MetadataTag('alpha')]
+  templateDB.AddTemplate(tagged)
+  templateDB.AddTemplate(EmailTemplate('Untagged', 'Body'))
+
+  templates = templateDB.FetchAllTemplates(withMetadata=True)
+
+  assert {template.title for template in templates} == {'Tagged', 'Untagged'}
+  for template in templates:
+    reference = EmailTemplate(template.title, template.content)
+    reference.rowID = template.rowID
+    expected = templateDB.FetchMetadataForTemplate(reference).metadata
+    assert [(tag.rowID, tag.tag) for tag in template.metadata] == [
+      (tag.rowID, tag.tag) for tag in expected
+    ]
+
+
+def testDatabaseIterateTemplatesPagesByRowIDWithProjection(templateDB: TemplateDB) -> None:
+  """IterateTemplates walks every row in uid order across pages and honors the projection."""
+  # Arrange: more rows than one page so several keyset pages are needed.
+  for index in range(7):
+    templateDB.AddTemplate(EmailTemplate(f'Title {index}', f'Body {index}'))
+
+  # Act
+  fullRows = list(templateDB.IterateTemplates(pageSize=3))
+  titleRows = list(templateDB.IterateTemplates(columns=('title',), pageSize=3))
+
+  # Assert: all rows come back once, in uid order, and title-only rows carry no content.
+  assert [row.title for row in fullRows] == [f'Title {index}' for index in range(7)]
+  assert [row.uid for row in fullRows] == sorted(row.uid for row in fullRows)
+  assert fullRows[0].content == 'Body 0'
+  assert titleRows[0]._fields == ('uid', 'title')
+  assert [row.title for row in titleRows] == [row.title for row in fullRows]
+
+
+def testDatabaseIterateTemplatesRejectsUnknownColumns(templateDB: TemplateDB) -> None:
+  """Projection is validated against the known template columns."""
+  with pytest.raises(ValueError, match='Unknown template column'):
+    list(templateDB.IterateTemplates(columns=('title; drop table templates',)))
+
+
+def testDatabaseIterateTemplatesForExportPagesInTitleOrder(templateDB: TemplateDB) -> None:
+  """Export iteration pages across case-insensitive ties and matches the list API."""
+  for title in ('b', 'A', 'a', 'C', 'B', 'c'):
+    template = EmailTemplate(title, f'{title} body')
+    template.metadata = [MetadataTag(f'tag-{title.lower()}'), MetadataTag('common')]
+    templateDB.AddTemplate(template)
+
+  pagedRows = list(templateDB.IterateTemplatesForExport(pageSize=2))
+
+  assert [title for title, _content, _tags in pagedRows] == ['A', 'a', 'b', 'B', 'C', 'c']
+  assert pagedRows[0] == ('A', 'A body', 'common,tag-a')
+  assert pagedRows == templateDB.FetchAllTemplatesForExport()
+
+
+def testDatabaseIterateTemplateListRowsYieldsReadOnlyRowsWithInternedTags(
+  templateDB: TemplateDB,
+) -> None:
+  """List rows carry title and shared tags only, and are immutable."""
+  for title in ('One', 'Two'):
+    template = EmailTemplate(title, f'{title} ${{field}}')
+    template.metadata = [MetadataTag('common')]
+    templateDB.AddTemplate(template)
+
+  rows = list(templateDB.IterateTemplateListRows(pageSize=1))
+
+  assert all(isinstance(row, TemplateListRow) for row in rows)
+  assert [str(row) for row in rows] == ['One', 'Two']
+  assert rows[0].tags[0] is rows[1].tags[0]
+  with pytest.raises(dataclasses.FrozenInstanceError):
+    rows[0].title = 'Changed'
+
+
+def testDatabaseTransactionCommitsWritesTogetherOrNotAtAll(templateDB: TemplateDB) -> None:
+  """Writes inside Transaction() share one commit; an error discards all of them."""
+  # Act: a failing block after two adds, then a successful one.
+  with pytest.raises(RuntimeError):
+    with templateDB.Transaction():
+      templateDB.AddTemplate(EmailTemplate('One', 'Body'))
+      templateDB.AddTemplate(EmailTemplate('Two', 'Body'))
+      raise RuntimeError('abort import')
+
+  with templateDB.Transaction():
+    templateDB.AddTemplate(EmailTemplate('Three', 'Body'))
+
+  # Assert
+  assert [tmplt.title for tmplt in templateDB.FetchAllTemplates()] == ['Three']
+  assert templateDB.getConnection().in_transaction is False
+
+
+def testDatabaseNestedTransactionRollsBackOnlyInnerBlock(templateDB: TemplateDB) -> None:
+  # Act
+  with templateDB.Transaction():
+    templateDB.AddTemplate(EmailTemplate('Outer', 'Body'))
+
+    with pytest.raises(ValueError):
+      with templateDB.Transaction():
+        templateDB.AddTemplate(EmailTemplate('Inner', 'Body'))
+        raise ValueError('inner failure')
+
+  # Assert
+  assert [tmplt.title for tmplt in templateDB.FetchAllTemplates()] == ['Outer']
+
+
+def testDatabaseSyncSendsEachKindOfTagLinkChangeInOneCall(templateDB: TemplateDB) -> None:
+  # Arrange
+  template = EmailTemplate('Linked', 'Body')
+  template.metadata = [MetadataTag('a'), MetadataTag('b'), MetadataTag('c')]
+  templateDB.AddTemplate(template)
+  templateDB.queryStats.reset()
+
+  # Act
+  template.metadata = [MetadataTag('c'), MetadataTag('d'), MetadataTag('e')]
+  templateDB.UpdateTemplate(template)
+
+  # Assert: two links added and two removed, one executemany round trip each.
+  stats = templateDB.queryStats
+  assert (stats.calls['insert_template_tag'], stats.executions['insert_template_tag']) == (1, 2)
+  assert (stats.calls['delete_template_tag'], stats.executions['delete_template_tag']) == (1, 2)
+  linkedTags = templateDB.FetchMetadataForTemplate(template).metadata
+  assert [tag.tag for tag in linkedTags] == ['c', 'd', 'e']
+
+
+def testDatabaseSendsOnlyRegisteredStatements(templateDB: TemplateDB) -> None:
+  # Arrange
+  template = EmailTemplate('One', 'Body')
+  template.metadata = [MetadataTag('x')]
+
+  # Act: one pass over the read and write paths.
+  templateDB.AddTemplate(template)
+  templateDB.UpsertTemplateByTitle(EmailTemplate('One', 'Changed'))
+  templateDB.FetchAllTemplates(withMetadata=True)
+  templateDB.FetchTemplatesForTag('x')
+  list(templateDB.IterateTemplates(('title',)))
+  list(templateDB.IterateTemplatesForExport())
+  templateDB.FetchAllMetadataTags()
+  templateDB.DeleteTemplate(template)
+
+  # Assert
+  assert set(templateDB.queryStats.calls) <= set(queries.QUERIES) | {'template_page'}
+  assert templateDB.queryStats.calls['insert_template'] == 1
+  assert queries.STATEMENT_CACHE_SIZE >= len(queries.QUERIES)
+
+
+def testDatabaseWritesResolveRowsWithoutReadBeforeWrite(templateDB: TemplateDB) -> None:
+  """Each logical write is one statement; tag get-or-create is one statement per tag."""
+  stats = templateDB.queryStats
+  tagged = EmailTemplate('Tagged', 'Body')
+  tagged.metadata = [MetadataTag('a'), MetadataTag('b')]
+
+  # Act / Assert: upsert of a new title.
+  templateDB.UpsertTemplateByTitle(tagged)
+  assert dict(stats.calls) == {
+    'upsert_template': 1,
+    'fetch_tags_for_template': 1,
+    'upsert_tag': 2,
+    'insert_template_tag': 1,
+  }
+
+  # Act / Assert: upsert of an existing title reuses the row and the existing tag.
+  stats.reset()
+  again = EmailTemplate('Tagged', 'Changed')
+  again.metadata = [MetadataTag('a'), MetadataTag('b')]
+  templateDB.UpsertTemplateByTitle(again)
+  assert again.rowID == tagged.rowID
+  assert dict(stats.calls) == {
+    'upsert_template': 1,
+    'fetch_tags_for_template': 1,
+  }
+
+  # Act / Assert: update and delete without a rowID find the row by title in the same statement.
+  stats.reset()
+  byTitle = EmailTemplate('Tagged', 'By title')
+  byTitle.metadata = [MetadataTag('a'), MetadataTag('b')]
+  templateDB.UpdateTemplate(byTitle)
+  assert byTitle.rowID == tagged.rowID
+  assert stats.calls['update_template'] == 1
+
+  stats.reset()
+  templateDB.DeleteTemplate(EmailTemplate('Tagged', ''))
+  assert dict(stats.calls) == {
+    'delete_links_for_template': 1,
+    'delete_template': 1,
+    'delete_unlinked_tags': 1,
+  }
+  assert templateDB.FetchAllTemplates() == []
+  assert templateDB.FetchAllMetadataTags() == []
+
+
+def testDatabaseUpsertTagReturnsExistingRowWithoutTouchingRevisions(
+  templateDB: TemplateDB,
+) -> None:
+  # Arrange
+  template = EmailTemplate('One', 'Body')
+  template.metadata = [MetadataTag('shared')]
+  templateDB.AddTemplate(template)
+  connection = templateDB.getConnection()
+  revision = connection.execute('select revision from templates;').fetchone()[0]
+
+  # Act
+  with templateDB.Transaction():
+    tagRowID = templateDB._GetOrCreateTagRowID('shared', connection.cursor())
+
+  # Assert
+  assert tagRowID == templateDB.FetchAllMetadataTags()[0].rowID
+  assert connection.execute('select revision from templates;').fetchone()[0] == revision
+
+
+def testDatabaseUpdateOrDeleteOfUnknownTemplateRaises(templateDB: TemplateDB) -> None:
+  with pytest.raises(AccessNullRowID):
+    templateDB.UpdateTemplate(EmailTemplate('Missing', 'Body'))
+
+  with pytest.raises(AccessNullRowID):
+    templateDB.DeleteTemplate(EmailTemplate('Missing', 'Body'))
+
+
+def _tagsByTitle(templateDB: TemplateDB) -> dict[str, list[str]]:
+  return {
+    tmplt.title: sorted(str(tag) for tag in tmplt.metadata)
+    for tmplt in templateDB.FetchAllTemplates(withMetadata=True)
+  }
+
+
+def _addTagged(templateDB: TemplateDB, title: str, *tags: str) -> EmailTemplate:
+  template = EmailTemplate(title, 'Body')
+  template.metadata = [MetadataTag(tag) for tag in tags]
+  templateDB.AddTemplate(template)
+
+  return template
+
+
+def testDatabaseRenameAndMergeTagsRunAFixedNumberOfStatements(templateDB: TemplateDB) -> None:
+  # Arrange
+  for index in range(50):
+    _addTagged(templateDB, f'T{index}', 'old' if index % 2 else 'legacy')
+
+  _addTagged(templateDB, 'Both', 'old', 'legacy', 'keep')
+  stats = templateDB.queryStats
+
+  # Act
+  stats.reset()
+  renamed = templateDB.RenameTag('Old', 'new')
+  renameCalls = stats.total_calls
+  stats.reset()
+  merged = templateDB.MergeTags(['legacy'], 'new')
+  mergeCalls = stats.total_calls
+
+  # Assert
+  assert (renamed, merged) == (26, 26)
+  assert (renameCalls, mergeCalls) == (4, 5)
+  assert [str(tag) for tag in templateDB.FetchAllMetadataTags()] == ['new', 'keep']
+  assert _tagsByTitle(templateDB)['Both'] == ['keep', 'new']
+  assert all(tags == ['new'] for title, tags in _tagsByTitle(templateDB).items() if title != 'Both')
+
+
+def testDatabaseAssignAndRemoveTagAcrossTemplates(templateDB: TemplateDB) -> None:
+  # Arrange
+  first = _addTagged(templateDB, 'First')
+  second = _addTagged(templateDB, 'Second', 'promo')
+  third = _addTagged(templateDB, 'Third')
+
+  # Act: unknown template IDs are skipped; templates already carrying the tag are left alone.
+  assigned = templateDB.AssignTagToTemplates(' Promo ', [first.rowID, second.rowID, 999])
+  removed = templateDB.RemoveTagFromTemplates('promo', [second.rowID, third.rowID])
+
+  # Assert
+  assert (assigned, removed) == (1, 1)
+  assert _tagsByTitle(templateDB) == {'First': ['promo'], 'Second': [], 'Third': []}
+
+  templateDB.RemoveTagFromTemplates('promo', [first.rowID])
+  assert templateDB.FetchAllMetadataTags() == []
+
+
+def testDatabaseBulkTagOperationsRejectUnknownOrTakenNames(templateDB: TemplateDB) -> None:
+  # Arrange
+  _addTagged(templateDB, 'One', 'a', 'b')
+
+  # Act / Assert: nothing is written when an operation is refused.
+  with pytest.raises(TagAlreadyExists):
+    templateDB.RenameTag('a', 'B')
+
+  with pytest.raises(TagNotFound):
+    templateDB.MergeTags(['a', 'missing'], 'c')
+
+  with pytest.raises(ValueError):
+    templateDB.AssignTagToTemplates('all', [1])
+
+  assert [str(tag) for tag in templateDB.FetchAllMetadataTags()] == ['a', 'b']
+
+
+def testDatabaseOrphanCleanupChecksOnlyUnlinkedTagsOncePerTransaction(
+  templateDB: TemplateDB,
+) -> None:
+  # Arrange: an orphan left behind outside the DAO must survive targeted cleanup.
+  templateDB.getConnection().execute("insert into tags (tag) values ('stray');")
+  first = _addTagged(templateDB, 'First', 'a', 'shared')
+  second = _addTagged(templateDB, 'Second', 'b', 'shared')
+  stats = templateDB.queryStats
+  stats.reset()
+
+  # Act: two retags and a delete in one transaction.
+  with templateDB.Transaction():
+    first.metadata = [MetadataTag('shared')]
+    templateDB.UpdateTemplate(first)
+    second.metadata = [MetadataTag('c')]
+    templateDB.UpdateTemplate(second)
+    templateDB.DeleteTemplate(first)
+
+  # Assert
+  assert stats.calls['delete_unlinked_tags'] == 1
+  assert 'delete_empty_tags' not in stats.calls
+  assert [str(tag) for tag in templateDB.FetchAllMetadataTags()] == ['stray', 'c']
+  assert templateDB.RemoveEmptyTags() == 1
+  assert [str(tag) for tag in templateDB.FetchAllMetadataTags()] == ['c']
+
+
+def testDatabaseInnerRollbackForgetsTheTagsItUnlinked(templateDB: TemplateDB) -> None:
+  # Arrange
+  template = _addTagged(templateDB, 'Tagged', 'kept')
+  stats = templateDB.queryStats
+  stats.reset()
+
+  # Act: the retag that unlinked 'kept' is rolled back with its savepoint.
+  with templateDB.Transaction():
+    with pytest.raises(RuntimeError), templateDB.Transaction():
+      template.metadata = [MetadataTag('other')]
+      templateDB.UpdateTemplate(template)
+      raise RuntimeError('abort')
+
+  # Assert: nothing is left to check for orphans when the outer block commits.
+  assert 'delete_unlinked_tags' not in stats.calls
+  assert _tagsByTitle(templateDB) == {'Tagged': ['kept']}
+
+
+def testDatabaseTagStatisticsFollowLinksWithoutAggregating(templateDB: TemplateDB) -> None:
+  # Arrange
+  first = _addTagged(templateDB, 'First', 'a', 'b')
+  _addTagged(templateDB, 'Second', 'b')
+
+  # Act
+  before = templateDB.FetchTagStatistics()
+  templateDB.MergeTags(['a'], 'b')
+  templateDB.DeleteTemplate(first)
+  after = templateDB.FetchTagStatistics()
+
+  # Assert
+  assert [(str(stat), stat.templateCount) for stat in before] == [('b', 2), ('a', 1)]
+  assert all(stat.lastUsed for stat in before)
+  assert [(str(stat), stat.templateCount) for stat in after] == [('b', 1)]
+  assert [str(stat) for stat in templateDB.FetchTagStatistics(['a', 'b'])] == ['b']
@@ -18,9 +18,11 @@ from __future__ import annotations
 
 import pytest
 import sqlite3
+from pathlib import Path
 from emstencil.Database import TemplateDB
 from emstencil.Dataclasses import EmailTemplate, MetadataTag
 from emstencil.Exceptions import AccessNullRowID
+from emstencil.initialize import SCHEMA_MIGRATIONS, upgradeDatabase
 
 
 def testDatabaseTagNormalizationDedupesLowercasesAndTrimsTags(templateDB: TemplateDB) -> None:
@@ -157,3 +159,178 @@ def testDatabaseTransactionRollbackPreventsPartialWritesOnTagFailure(
   assert cursor.fetchone() == (0,)
   cursor.execute("select count(*) from tags where tag = 'boom';")
   assert cursor.fetchone() == (0,)
+
+
+def testUpgradeDatabaseRebuildsUnversionedSchemaWithoutViewOrdering(tmp_path: Path) -> None:
+  """upgradeDatabase brings a pre-versioning database forward and drops the view's ORDER BY."""
+  # Arrange: build the current schema, then roll the view/index/version back to the old layout.
+  dbPath = tmp_path / 'legacy.db'
+  schemaPath = Path(__file__).resolve().parents[1] / 'emstencil' / 'templates.sql'
+  with sqlite3.connect(dbPath) as legacyDB:
+    legacyDB.executescript(schemaPath.read_text(encoding='utf-8'))
+    legacyDB.executescript(
+      """
+        drop view vw_Templates_Tags;
+        create view vw_Templates_Tags as
+          select tm.uid as tmpRowID from templates tm order by tmpRowID;
+        drop index ix_TemplateTags_by_Tag;
+        create index ix_TemplateTags_by_Tag on templateTags (tag_uid asc);
+      """
+    )
+    _rollBackTemplateUsage(legacyDB)
+    _rollBackTagStats(legacyDB)
+    _rollBackChangeLog(legacyDB)
+    legacyDB.execute('pragma user_version = 0;')
+
+  # Act
+  version = upgradeDatabase(dbPath)
+
+  # Assert: schema is at the latest version and the view no longer sorts.
+  assert version == max(SCHEMA_MIGRATIONS)
+  with sqlite3.connect(dbPath) as upgradedDB:
+    assert upgradedDB.execute('pragma user_version').fetchone() == (version,)
+    viewSQL = upgradedDB.execute(
+      "select sql from sqlite_master where name = 'vw_Templates_Tags';"
+    ).fetchone()[0]
+    assert 'order by' not in viewSQL.lower()
+    indexColumns = [
+      row[2] for row in upgradedDB.execute("pragma index_info('ix_TemplateTags_by_Tag')")
+    ]
+    assert indexColumns == ['tag_uid', 'tmplt_uid']
+
+
+def _rollBackTemplateUsage(connection: sqlite3.Connection) -> None:
+  """Strip the schema v5 template usage table and its trigger to mimic a v4 database."""
+  connection.executescript(
+    """
+      drop trigger Templates_Usage_Delete;
+      drop table templateUsage;
+    """
+  )
+
+
+def _rollBackTagStats(connection: sqlite3.Connection) -> None:
+  """Strip the schema v4 tag statistics table and its triggers to mimic a v3 database."""
+  connection.executescript(
+    """
+      drop trigger Tags_Stats_Insert;
+      drop trigger Tags_Stats_Delete;
+      drop trigger TemplateTags_Stats_Insert;
+      drop trigger TemplateTags_Stats_Delete;
+      drop trigger TemplateTags_Stats_Moved;
+      drop table tagStats;
+    """
+  )
+
+
+def _rollBackChangeLog(connection: sqlite3.Connection) -> None:
+  """Strip the schema v3 revision column, change log and triggers to mimic a v2 database."""
+  connection.executescript(
+    """
+      drop trigger Templates_Changed_Insert;
+      drop trigger Templates_Changed_Revision;
+      drop trigger Templates_Changed_Delete;
+      drop trigger TemplateTags_Revision_Insert;
+      drop trigger TemplateTags_Revision_Delete;
+      drop trigger Tags_Revision_Renamed;
+      drop table templateChanges;
+      drop trigger Templates_Date_Updated;
+      create trigger Templates_Date_Updated
+        after update of title, content on templates
+        begin update templates
+          set DateUpdated = datetime('Now')
+          where uid = Old.uid;
+      end;
+      alter table templates drop column revision;
+    """
+  )
+
+
+def testUpgradeDatabaseAddsRevisionsAndChangeLogToVersionTwo(tmp_path: Path) -> None:
+  """Migration 3 keeps existing rows and starts logging revisions for later edits."""
+  # Arrange: a v2 database holding one template.
+  dbPath = tmp_path / 'v2.db'
+  schemaPath = Path(__file__).resolve().parents[1] / 'emstencil' / 'templates.sql'
+  with sqlite3.connect(dbPath) as legacyDB:
+    legacyDB.executescript(schemaPath.read_text(encoding='utf-8'))
+    _rollBackTemplateUsage(legacyDB)
+    _rollBackTagStats(legacyDB)
+    _rollBackChangeLog(legacyDB)
+    legacyDB.execute("insert into templates (title, content) values ('Kept', 'Body');")
+    legacyDB.execute('pragma user_version = 2;')
+
+  # Act
+  version = upgradeDatabase(dbPath)
+  with sqlite3.connect(dbPath) as upgradedDB:
+    upgradedDB.execute("update templates set content = 'Edited' where title = 'Kept';")
+    revision = upgradedDB.execute("select revision from templates where title = 'Kept';").fetchone()
+    changes = upgradedDB.execute('select revision from templateChanges;').fetchall()
+
+  # Assert
+  assert version == max(SCHEMA_MIGRATIONS)
+  assert revision == (1,)
+  assert changes == [(1,)]
+
+
+def testUpgradeDatabaseBackfillsTagStatisticsForVersionThree(tmp_path: Path) -> None:
+  """Migration 4 counts existing links, then the triggers keep the counts current."""
+  # Arrange: a v3 database with one tag on two templates and an unused tag.
+  dbPath = tmp_path / 'v3.db'
+  schemaPath = Path(__file__).resolve().parents[1] / 'emstencil' / 'templates.sql'
+  with sqlite3.connect(dbPath) as legacyDB:
+    legacyDB.executescript(schemaPath.read_text(encoding='utf-8'))
+    _rollBackTemplateUsage(legacyDB)
+    _rollBackTagStats(legacyDB)
+    legacyDB.executescript(
+      """
+        insert into templates (title, content) values ('One', 'Body'), ('Two', 'Body');
+        insert into tags (tag) values ('shared'), ('unused');
+        insert into templateTags (tmplt_uid, tag_uid) values (1, 1), (2, 1);
+        pragma user_version = 3;
+      """
+    )
+
+  # Act
+  version = upgradeDatabase(dbPath)
+  with sqlite3.connect(dbPath) as upgradedDB:
+    backfilled = upgradedDB.execute(
+      'select tag_uid, template_count from tagStats order by tag_uid;'
+    ).fetchall()
+    upgradedDB.execute('delete from templateTags where tmplt_uid = 2;')
+    afterUnlink = upgradedDB.execute(
+      'select template_count from tagStats where tag_uid = 1;'
+    ).fetchone()
+
+  # Assert
+  assert version == max(SCHEMA_MIGRATIONS)
+  assert backfilled == [(1, 2), (2, 0)]
+  assert afterUnlink == (1,)
+
+
+def testUpgradeDatabaseAddsTemplateUsageForVersionFour(tmp_path: Path) -> None:
+  """Migration 5 adds an empty usage table whose rows go with their template."""
+  # Arrange: a v4 database holding one template.
+  dbPath = tmp_path / 'v4.db'
+  schemaPath = Path(__file__).resolve().parents[1] / 'emstencil' / 'templates.sql'
+  with sqlite3.connect(dbPath) as legacyDB:
+    legacyDB.executescript(schemaPath.read_text(encoding='utf-8'))
+    _rollBackTemplateUsage(legacyDB)
+    legacyDB.executescript(
+      """
+        insert into templates (title, content) values ('One', 'Body');
+        pragma user_version = 4;
+      """
+    )
+
+  # Act
+  version = upgradeDatabase(dbPath)
+  with sqlite3.connect(dbPath) as upgradedDB:
+    upgradedDB.execute(
+      "insert into templateUsage (tmplt_uid, select_count, last_used) values (1, 1, datetime('now'));"
+    )
+    upgradedDB.execute('delete from templates where uid = 1;')
+    remaining = upgradedDB.execute('select count(*) from templateUsage;').fetchone()
+
+  # Assert
+  assert version == max(SCHEMA_MIGRATIONS) == 5
+  assert remaining == (0,)
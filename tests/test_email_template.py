@@ -209,3 +209,121 @@ def testEmailTemplateCaretInsideImgSrcIsUrlOnly() -> None:
   out = template.replacedText
   assert out == '<p><img src="data:image/png;base64,QUJD" alt="a" /></p>'
   assert out.count('<img') == 1
+
+
+def testEmailTemplateSharesFieldSpecForIdenticalPlaceholders() -> None:
+  """Templates with the same placeholder layout share one read-only field spec."""
+  first = EmailTemplate('A', 'Hi ${name}, see ^{Shot}')
+  second = EmailTemplate('B', '<p>${name}</p><p>^{Shot}</p>')
+  different = EmailTemplate('C', 'Hi ${name}')
+
+  assert first.field_kinds is second.field_kinds
+  assert first.field_kinds is not different.field_kinds
+  assert first.fields is not second.fields
+  with pytest.raises(TypeError):
+    first.field_kinds['name'] = 'image'
+
+
+def testPlaceholderCacheSkipsReparseForUnchangedBodies(monkeypatch: pytest.MonkeyPatch) -> None:
+  """Rebuilding templates with the same bodies hits the cache instead of the regex parser."""
+  from emstencil import Dataclasses
+
+  cache = Dataclasses.PlaceholderSpecCache(maxsize=8)
+  monkeypatch.setattr(Dataclasses, 'PLACEHOLDER_CACHE', cache)
+  parseCalls: list[str] = []
+  originalParse = Dataclasses._parse_placeholder_specs
+
+  def countingParse(content: str):
+    parseCalls.append(content)
+    return originalParse(content)
+
+  monkeypatch.setattr(Dataclasses, '_parse_placeholder_specs', countingParse)
+  bodies = ['Hi ${name}', 'Hello ^{Logo}', '<p>${a} ${b}</p>']
+
+  # Act: first load parses, a "reload" of the same library only hits the cache.
+  first = [EmailTemplate(f'T{index}', body) for index, body in enumerate(bodies)]
+  second = [EmailTemplate(f'T{index}', body) for index, body in enumerate(bodies)]
+
+  # Assert
+  assert len(parseCalls) == 3
+  assert cache.info() == Dataclasses.PlaceholderCacheInfo(hits=3, misses=3, maxsize=8, currsize=3)
+  assert [t.content for t in second] == [t.content for t in first]
+  assert second[1].content == '<p>Hello ^{Logo}</p>'
+  assert second[1].content is first[1].content
+  assert second[2].field_kinds is first[2].field_kinds
+
+
+def testPlaceholderCacheEvictsLeastRecentlyUsed() -> None:
+  from emstencil.Dataclasses import PlaceholderSpecCache
+
+  cache = PlaceholderSpecCache(maxsize=2)
+  cache.lookup('${a}')
+  cache.lookup('${b}')
+  cache.lookup('${a}')
+  cache.lookup('${c}')
+
+  cache.lookup('${a}')
+  cache.lookup('${b}')
+
+  info = cache.info()
+  assert info.currsize == 2
+  assert (info.hits, info.misses) == (2, 4)
+
+
+def testPlaceholderCacheKeepsOnlyRewrittenBodiesWithinItsByteBudget() -> None:
+  from emstencil.Dataclasses import PlaceholderSpecCache
+
+  # Arrange: plain bodies with an image placeholder are rewritten as HTML; the others are not.
+  cache = PlaceholderSpecCache(maxbytes=3000)
+  large = '${a} ' + 'x' * 100_000
+
+  # Act
+  normalized, _ = cache.lookup(large)
+  cached, _ = cache.lookup(large)
+  bytesForUnchanged = cache.bytes
+  rewritten = [cache.lookup(f'^{{Logo}} {index} ' + 'y' * 1000)[0] for index in range(4)]
+
+  # Assert: the unchanged body is served from the caller's string, not a stored copy.
+  assert normalized is large and cached is large
+  assert bytesForUnchanged == 0
+  assert all(body.startswith('<p>') for body in rewritten)
+  # Oldest first until the kept bodies fit: the unchanged entry and the first two rewrites.
+  assert 0 < cache.bytes <= 3000
+  assert cache.info().currsize == 2
+  assert (cache.info().hits, cache.info().misses) == (1, 5)
+
+
+def testPlaceholderCacheDoesNotCacheConflicts() -> None:
+  from emstencil.Dataclasses import PlaceholderSpecCache
+
+  cache = PlaceholderSpecCache()
+  for _ in range(2):
+    with pytest.raises(TemplateFieldKindConflict):
+      cache.lookup('${x} ^{x}')
+  assert cache.info().currsize == 0
+
+
+def testEmailTemplateMergesManyImageFieldsInOnePass() -> None:
+  """Several image fields, bare and inside src attributes, are substituted together."""
+  template = EmailTemplate(
+    'Many',
+    "<p>^{A}</p><p><img src='^{B}' alt='b' /></p><p>${note}</p><p>^{A}</p>",
+  )
+  template.setFields(
+    {'A': 'data:image/png;base64,QUE=', 'B': 'https://example.com/b.png', 'note': 'ok'}
+  )
+
+  assert template.replacedText == (
+    '<p><img src="data:image/png;base64,QUE=" alt="A" /></p>'
+    "<p><img src='https://example.com/b.png' alt='b' /></p>"
+    '<p>ok</p>'
+    '<p><img src="data:image/png;base64,QUE=" alt="A" /></p>'
+  )
+
+
+def testEmailTemplateDoesNotRescanMergedValues() -> None:
+  """A value that looks like another placeholder is inserted literally."""
+  template = EmailTemplate('Literal', 'first ${a} second ${b}')
+  template.fields = {'a': '${b}', 'b': 'B'}
+
+  assert template.replacedText == 'first ${b} second B'
@@ -0,0 +1,138 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for the embedded image budget and the compact-images command.
+    Name: Andrew Dixon            File: test_embedded_images.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import base64
+import random
+import re
+
+import emstencil.Database as databaseModule
+import pytest
+from PySide6.QtGui import QImage
+
+from emstencil.cli import main as cliMain
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate
+from emstencil.FieldEntryDialog import qimage_to_png_data_url
+from emstencil.embedded_images import (
+  ImageBudget,
+  compact_embedded_images,
+  measure_embedded_images,
+)
+
+SMALL_BUDGET = ImageBudget(max_width=200, max_height=200, max_bytes=32 * 1024)
+
+
+def _noise_data_url(width: int, height: int, seed: int = 7) -> str:
+  """Incompressible PNG so the byte budget is actually exceeded."""
+  rng = random.Random(seed)
+  img = QImage(width, height, QImage.Format.Format_RGB32)
+  for y in range(height):
+    for x in range(width):
+      img.setPixel(x, y, rng.getrandbits(24))
+
+  return qimage_to_png_data_url(img)
+
+
+def _image_size(url: str) -> tuple[int, int]:
+  img = QImage.fromData(base64.b64decode(url.split(',', 1)[1]))
+  return img.width(), img.height()
+
+
+@pytest.fixture(scope='module')
+def largeImageURL() -> str:
+  return _noise_data_url(400, 300)
+
+
+def testCompactLeavesContentWithoutImagesUntouched() -> None:
+  content = '<p>Hello ${name}</p>'
+
+  result = compact_embedded_images(content, SMALL_BUDGET)
+
+  assert result.content is content
+  assert not result.changed
+  assert result.before.count == 0
+
+
+def testCompactKeepsImagesWithinBudget() -> None:
+  # Arrange: a tiny image is well under every limit.
+  small = QImage(10, 10, QImage.Format.Format_RGB32)
+  small.fill(0x336699)
+  content = f'<img src="{qimage_to_png_data_url(small)}" />'
+
+  # Act
+  result = compact_embedded_images(content, SMALL_BUDGET)
+
+  # Assert: byte-for-byte unchanged, but still measured.
+  assert result.content == content
+  assert result.before.count == 1
+  assert result.after == result.before
+
+
+def testCompactRecompressesOversizedImagesOnce(largeImageURL: str) -> None:
+  # Arrange: the same oversized image twice, plus surrounding HTML and placeholders.
+  content = f'<p>${{name}}</p><img src="{largeImageURL}" /><p>x</p><img src=\'{largeImageURL}\' />'
+
+  # Act
+  result = compact_embedded_images(content, SMALL_BUDGET)
+
+  # Assert: both copies replaced by the same smaller payload that fits the pixel bounds.
+  assert result.recompressed == 2
+  assert result.after.total_bytes < result.before.total_bytes
+  assert result.after.largest_bytes <= SMALL_BUDGET.max_bytes
+  assert result.content.startswith('<p>${name}</p><img src="data:image/')
+  assert '<p>x</p>' in result.content
+  assert measure_embedded_images(result.content) == result.after
+
+  newURLs = set(re.findall(r'data:image/[^"\']+', result.content))
+  assert len(newURLs) == 1
+  width, height = _image_size(newURLs.pop())
+  assert width <= 200 and height <= 200
+
+
+def testCompactImagesCommandRewritesDatabase(
+  templateDB: TemplateDB, largeImageURL: str, capsys: pytest.CaptureFixture[str]
+) -> None:
+  # Arrange: one template with a heavy image and one without images.
+  heavy = EmailTemplate('Heavy', f'<p>^{{Shot}}</p><img src="{largeImageURL}" />')
+  plain = EmailTemplate('Plain', 'Hello ${name}')
+  templateDB.AddTemplate(heavy)
+  templateDB.AddTemplate(plain)
+  dbPath = databaseModule.DATABASE_FILE
+
+  budgetArgs = ['--max-width', '200', '--max-height', '200', '--max-kib', '32']
+
+  # Act: dry run first, then the real pass.
+  assert cliMain(['-d', str(dbPath), 'compact-images', *budgetArgs, '--dry-run']) == 0
+  dryRun = capsys.readouterr().out
+  connection = TemplateDB().getConnection()
+  unchanged = connection.execute('select content from templates where title = ?', ['Heavy'])
+  unchanged = unchanged.fetchone()[0]
+
+  assert cliMain(['-d', str(dbPath), 'compact-images', *budgetArgs]) == 0
+  output = capsys.readouterr().out
+  rows = dict(TemplateDB().getConnection().execute('select title, content from templates'))
+
+  # Assert: dry run reports but does not write; real run rewrites only the heavy template.
+  assert 'would change 1 template(s)' in dryRun
+  assert unchanged == heavy.content
+  assert 'Heavy: 1 image(s)' in output
+  assert 'Plain' not in output
+  assert 'changed 1 template(s)' in output
+  assert rows['Plain'] == plain.content
+  assert rows['Heavy'].startswith('<p>^{Shot}</p><img src="data:image/')
+  assert len(rows['Heavy']) < len(heavy.content)
@@ -20,10 +20,25 @@ import base64
 import sys
 
 import pytest
+from PySide6.QtCore import QThreadPool
 from PySide6.QtGui import QImage
 from PySide6.QtWidgets import QApplication
 
-from emstencil.FieldEntryDialog import ImageFieldRow, qimage_to_png_data_url
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate
+from emstencil.FieldEntryDialog import (
+  FIELD_BATCH_SIZE,
+  FieldEntryDialog,
+  ImageFieldRow,
+  qimage_to_png_data_url,
+)
+from emstencil.TemplateLoader import loadTemplateSelector
+from emstencil.images import (
+  THUMBNAIL_CACHE,
+  ImageEncodePolicy,
+  data_url_digest,
+  encode_image,
+)
 
 
 @pytest.fixture(scope='module')
@@ -59,3 +74,152 @@ def test_image_field_row_keeps_paste_off_line_edit(qapp: QApplication) -> None:
   row._store_pasted_image(url)
   assert row._line.text() == ''
   assert row.field_text() == url
+
+
+def _drain_workers(app: QApplication) -> None:
+  """Wait for pool tasks, then deliver their queued results on this thread."""
+  QThreadPool.globalInstance().waitForDone()
+  app.processEvents()
+
+
+def test_image_policy_downscales_and_recompresses(qapp: QApplication) -> None:
+  img = QImage(400, 200, QImage.Format.Format_ARGB32)
+  img.fill(0x8000AAFF)
+  policy = ImageEncodePolicy(max_width=100, max_height=100, format='JPEG', quality=70)
+
+  encoded = encode_image(img, policy)
+
+  assert encoded is not None
+  assert encoded.data_url.startswith('data:image/jpeg;base64,')
+  assert (encoded.image.width(), encoded.image.height()) == (100, 50)
+  assert not encoded.image.hasAlphaChannel()
+  assert max(encoded.thumbnail.width(), encoded.thumbnail.height()) == 72
+
+
+def test_image_policy_rejects_unknown_format() -> None:
+  with pytest.raises(ValueError):
+    ImageEncodePolicy(format='GIF')
+
+
+def test_image_field_row_encodes_paste_off_thread(qapp: QApplication) -> None:
+  """Pasted QImage is encoded by a pool worker and the thumbnail comes from the same image."""
+  img = QImage(3000, 1500, QImage.Format.Format_RGB32)
+  img.fill(0x123456)
+  row = ImageFieldRow(180, '', policy=ImageEncodePolicy(max_width=300, max_height=300))
+
+  row._store_pasted_qimage(img)
+  assert row.is_busy()
+  _drain_workers(qapp)
+
+  assert not row.is_busy()
+  url = row.field_text()
+  assert url.startswith('data:image/png;base64,')
+  assert QImage.fromData(base64.b64decode(url.split(',', 1)[1])).width() == 300
+  assert THUMBNAIL_CACHE.get(data_url_digest(url)) is not None
+  assert not row._thumb.pixmap().isNull()
+
+
+def test_image_field_row_submit_before_worker_finishes(qapp: QApplication) -> None:
+  """field_text() encodes inline when the worker has not reported yet; the late result is ignored."""
+  img = QImage(8, 8, QImage.Format.Format_RGB32)
+  img.fill(0x00FF00)
+  row = ImageFieldRow(180, '')
+
+  row._store_pasted_qimage(img)
+  url = row.field_text()
+  _drain_workers(qapp)
+
+  assert url.startswith('data:image/png;base64,')
+  assert row.field_text() == url
+
+
+def test_image_field_row_thumbnail_cached_by_digest(qapp: QApplication) -> None:
+  img = QImage(20, 20, QImage.Format.Format_RGB32)
+  img.fill(0xFF0000)
+  url = qimage_to_png_data_url(img)
+  THUMBNAIL_CACHE.clear()
+
+  first = ImageFieldRow(180, url)
+  _drain_workers(qapp)
+  assert len(THUMBNAIL_CACHE) == 1
+  assert not first._thumb.pixmap().isNull()
+
+  second = ImageFieldRow(180, url)
+  assert not second._thumb.pixmap().isNull()
+  assert len(THUMBNAIL_CACHE) == 1
+
+
+class _Preview:
+  """Stands in for the selector: records the template submit() hands back."""
+
+  def __init__(self) -> None:
+    self.updated: EmailTemplate | None = None
+
+  def updateTextArea(self, tmplt: EmailTemplate) -> None:
+    self.updated = tmplt
+
+
+def _wideTemplate(count: int) -> EmailTemplate:
+  return EmailTemplate('Wide', ' '.join(f'${{field{index:03d}}}' for index in range(count)))
+
+
+def test_field_dialog_builds_rows_in_batches(qapp: QApplication) -> None:
+  dialog = FieldEntryDialog(_wideTemplate(200), parent=_Preview())
+  assert dialog.builtFieldCount == FIELD_BATCH_SIZE
+
+  dialog.loadMoreFields()
+  assert dialog.builtFieldCount == 2 * FIELD_BATCH_SIZE
+
+
+def test_field_dialog_builds_next_batch_when_scrolled_to_end(qapp: QApplication) -> None:
+  dialog = FieldEntryDialog(_wideTemplate(200), parent=_Preview())
+  dialog.show()
+  qapp.processEvents()
+  built = dialog.builtFieldCount
+
+  scrollBar = dialog.scrollArea.verticalScrollBar()
+  scrollBar.setValue(scrollBar.maximum())
+  qapp.processEvents()
+
+  assert dialog.builtFieldCount > built
+  dialog.close()
+
+
+def test_field_dialog_submits_fields_never_scrolled_into_view(qapp: QApplication) -> None:
+  template = _wideTemplate(100)
+  template.fields['field099'] = 'kept'
+  preview = _Preview()
+  dialog = FieldEntryDialog(template, parent=preview)
+  dialog._value_widgets_by_key['field000'].setText('first')
+
+  dialog.submit()
+
+  assert preview.updated is template
+  assert template.fields['field000'] == 'first'
+  assert template.fields['field050'] == ''
+  assert template.fields['field099'] == 'kept'
+
+
+def test_selector_reuses_field_dialog_for_same_template(
+  qapp: QApplication, templateDB: TemplateDB
+) -> None:
+  templateDB.AddTemplate(EmailTemplate('Greeting', 'Hello ${name}'))
+  templateDB.AddTemplate(EmailTemplate('Farewell', 'Bye ${name} ${when}'))
+  selector = loadTemplateSelector()
+
+  selector.selectClicked()
+  first = selector.editScreen
+  first._value_widgets_by_key['name'].setText('Ada')
+  first.submit()
+  selector.resetTemplates()
+  selector.selectClicked()
+
+  assert selector.editScreen is first
+  assert first._value_widgets_by_key['name'].text() == ''
+
+  selector.templateComboBox.setCurrentIndex(1)
+  selector.selectClicked()
+
+  assert selector.editScreen is not first
+  assert list(selector.editScreen._value_widgets_by_key) == ['name', 'when']
+  selector.editScreen.close()
@@ -0,0 +1,149 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for pre-import validation and all-or-nothing spreadsheet import.
+    Name: Andrew Dixon            File: test_import_validation.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+import emstencil
+import emstencil.ImportTemplates as importTemplatesModule
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate
+from emstencil.Exceptions import ImportValidationFailed
+from emstencil.ImportTemplates import convertSpreadsheet, importTemplates, prepareImport
+from emstencil.import_validation import validate_import_rows
+from emstencil.snapshots import snapshot_dir_for
+from emstencil.spreadsheet import EXPORT_HEADERS
+
+ROWS = [
+  ('Good', 'Hello ${name}', ['team']),
+  ('', 'Orphan body', []),
+  ('Clash', '${shot} and ^{shot}', []),
+  ('Good', 'Again', []),
+  ('', '', []),
+  ('Reserved', 'Body', [' ALL ', 'x']),
+  ('Unclosed', 'Dear ${name', []),
+  ('Empty', 'Value ${} here', []),
+  ('Midway', 'Hi ${name, see ${other}', []),
+]
+
+
+def _workbook(path: Path, rows: list[tuple[str, str, str]]) -> Path:
+  wb = Workbook()
+  ws = wb.active
+  ws.append(list(EXPORT_HEADERS))
+  for row in rows:
+    ws.append(list(row))
+  wb.save(path)
+  return path
+
+
+def testValidationCollectsEveryProblemWithSheetRows() -> None:
+  # Act
+  report = validate_import_rows(ROWS, 'book.xlsx', workers=1)
+
+  # Assert: the blank row (sheet row 6) is spacing, not an error.
+  assert [(issue.row, issue.code) for issue in report.issues] == [
+    (3, 'empty-title'),
+    (4, 'placeholder-kind-conflict'),
+    (5, 'duplicate-title'),
+    (7, 'reserved-tag'),
+    (8, 'unclosed-placeholder'),
+    (9, 'invalid-placeholder'),
+    (10, 'unclosed-placeholder'),
+    (10, 'invalid-placeholder'),
+  ]
+  assert (report.rows, report.templates, report.ok) == (9, 8, False)
+  assert 'Duplicate template titles found in import file: Good' in report.summary()
+
+
+def testValidationInWorkerProcessesMatchesInProcess() -> None:
+  rows = ROWS * 50
+
+  assert validate_import_rows(rows, workers=2) == validate_import_rows(rows, workers=1)
+
+
+def testInvalidWorkbookImportsNothingAndWritesReport(
+  templateDB: TemplateDB, tmp_path: Path
+) -> None:
+  # Arrange: one existing template the import would otherwise update.
+  templateDB.AddTemplate(EmailTemplate('Keep', 'Original'))
+  path = _workbook(
+    tmp_path / 'bad.xlsx',
+    [('Keep', 'Replaced', ''), ('New', 'Fine ${x}', 'a'), ('Broken', '${k} ^{k}', '')],
+  )
+  reportPath = tmp_path / 'report.json'
+
+  # Act
+  with pytest.raises(ImportValidationFailed) as caught:
+    convertSpreadsheet(str(path), templateDB, reportPath=reportPath)
+
+  # Assert
+  assert [(tmplt.title, tmplt.content) for tmplt in templateDB.FetchAllTemplates()] == [
+    ('Keep', 'Original')
+  ]
+  report = json.loads(reportPath.read_text(encoding='utf-8'))
+  assert report['valid'] is False
+  assert [(issue['row'], issue['code']) for issue in report['issues']] == [
+    (4, 'placeholder-kind-conflict')
+  ]
+  assert caught.value.report.issues[0].title == 'Broken'
+
+
+def testValidWorkbookImportsEveryRowAndSkipsBlankRows(
+  templateDB: TemplateDB, tmp_path: Path
+) -> None:
+  # Arrange
+  path = _workbook(tmp_path / 'ok.xlsx', [('One', 'A ${x}', 't'), ('', '', ''), ('Two', 'B', '')])
+
+  # Act
+  imported = convertSpreadsheet(str(path), templateDB, reportPath=tmp_path / 'report.json')
+
+  # Assert
+  assert imported is True
+  assert sorted(tmplt.title for tmplt in templateDB.FetchAllTemplates()) == ['One', 'Two']
+  assert json.loads((tmp_path / 'report.json').read_text(encoding='utf-8'))['valid'] is True
+
+
+def testApplicationImportValidatesBeforeAnySnapshotOrWrite(
+  templateDB: TemplateDB, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+  # Arrange: the application's report goes to the data folder; warnings are recorded, not shown.
+  monkeypatch.setattr(emstencil, 'DATA_DIR', tmp_path)
+  warnings: list[str] = []
+  monkeypatch.setattr(
+    importTemplatesModule.QMessageBox, 'warning', lambda *args: warnings.append(args[1])
+  )
+  bad = _workbook(tmp_path / 'bad.xlsx', [('', 'No title', '')])
+  good = _workbook(tmp_path / 'good.xlsx', [('One', 'A ${x}', 't')])
+
+  # Act
+  rejected = prepareImport(None, str(bad))
+  prepared = prepareImport(None, str(good))
+  writtenBeforeImport = templateDB.FetchAllTemplates()
+  imported = importTemplates(prepared)
+
+  # Assert: reading and validating writes nothing and takes no snapshot.
+  assert rejected is None and warnings == ['Import failed']
+  assert [row.title for row in prepared] == ['One']
+  assert writtenBeforeImport == []
+  assert not snapshot_dir_for(templateDB.databaseFile).exists()
+  assert imported is True
+  assert [tmplt.title for tmplt in templateDB.FetchAllTemplates()] == ['One']
@@ -0,0 +1,120 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for the memory-mapped log index and the log viewer built on it.
+    Name: Andrew Dixon            File: test_log_viewer.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+from PySide6.QtCore import QThreadPool
+from PySide6.QtWidgets import QApplication
+
+from emstencil.log_index import LEVELS, LogIndex, compile_search
+from emstencil.LogViewer import LogViewer
+
+LOG_TEXT = (
+  'leftover line\n'
+  '2026-10-19 09:00:00,001 - INFO - Loaded 3 templates.\n'
+  '2026-10-19 09:00:01,002 - DEBUG - Selected Template Refund\n'
+  '2026-10-19 09:00:02,003 - ERROR - Import failed\n'
+  'Traceback (most recent call last):\n'
+  '  ValueError: bad row\n'
+  '2026-10-19 09:00:03,004 - WARNING - Tag café unused\n'
+  '2026-10-19 09:00:04,005 - INFO - import finished'
+)
+
+
+@pytest.fixture
+def qapp() -> QApplication:
+  app = QApplication.instance()
+  if app is None:
+    app = QApplication(sys.argv)
+  return app
+
+
+@pytest.fixture
+def logFile(tmp_path: Path) -> Path:
+  path = tmp_path / 'runlog.log'
+  path.write_text(LOG_TEXT, encoding='utf-8')
+  return path
+
+
+def _drain(app: QApplication) -> None:
+  QThreadPool.globalInstance().waitForDone()
+  app.processEvents()
+
+
+def testLogIndexFindsLinesAndRecordLevels(logFile: Path) -> None:
+  # Arrange
+  logIndex = LogIndex(logFile)
+
+  # Act: batches smaller than the file.
+  batches = list(logIndex.scan_lines(3))
+  for batch in batches:
+    logIndex.extend(*batch)
+
+  # Assert: traceback lines carry their record's level; the last line has no newline.
+  assert len(batches) == 3
+  assert logIndex.lineCount == 8
+  assert list(logIndex.levels) == [0, 2, 1, 4, 4, 4, 3, 2]
+  assert logIndex.line(5) == '  ValueError: bad row'
+  assert logIndex.line(6).endswith('Tag café unused')
+  assert logIndex.line(7).endswith('import finished')
+  assert logIndex.line_at(logIndex.offsets[4] + 3) == 4
+  logIndex.close()
+
+
+def testLogIndexFiltersByLevelAndSearchOverTheMap(logFile: Path, tmp_path: Path) -> None:
+  # Arrange
+  logIndex = LogIndex(logFile).build()
+
+  # Act / Assert
+  assert list(logIndex.matching_lines()) == list(range(8))
+  assert list(logIndex.matching_lines(LEVELS[b'WARNING'])) == [3, 4, 5, 6]
+  assert list(logIndex.matching_lines(pattern=compile_search('import'))) == [3, 7]
+  assert list(logIndex.matching_lines(pattern=compile_search('import', False))) == [7]
+  assert list(logIndex.matching_lines(LEVELS[b'ERROR'], compile_search('error|^\\s'))) == [3, 5]
+  assert list(logIndex.matching_lines(pattern=compile_search('café'))) == [6]
+  logIndex.close()
+
+  empty = tmp_path / 'empty.log'
+  empty.touch()
+  assert LogIndex(empty).build().matching_lines(pattern=compile_search('x')).tolist() == []
+
+
+def testLogViewerShowsIndexedLinesAndAppliesFilters(qapp: QApplication, logFile: Path) -> None:
+  # Arrange
+  viewer = LogViewer(logFile)
+  _drain(qapp)
+
+  # Act
+  viewer.levelComboBox.setCurrentIndex(2)
+  _drain(qapp)
+  warnings = [viewer.model.index(row).data() for row in range(viewer.model.rowCount())]
+  viewer.searchEdit.setText('[unclosed')
+  viewer.applyFilter()
+
+  # Assert
+  assert warnings[0].endswith('ERROR - Import failed') and len(warnings) == 4
+  assert viewer.statusLabel.text().startswith('Invalid search')
+  viewer.searchEdit.setText('tag')
+  viewer.applyFilter()
+  _drain(qapp)
+  assert viewer.model.rowCount() == 1
+  assert viewer.statusLabel.text() == '1 of 8 lines'
+  viewer.reject()
+  assert viewer.logIndex is None and viewer.model.rowCount() == 0
@@ -0,0 +1,133 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for database maintenance (size report, integrity checks, vacuum).
+    Name: Andrew Dixon            File: test_maintenance.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import base64
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import emstencil.Database as databaseModule
+from emstencil.cli import main as cliMain
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate
+from emstencil.maintenance import AUTO_VACUUM_INCREMENTAL, run_maintenance, size_report
+
+IMAGE_URL = 'data:image/png;base64,' + base64.b64encode(b'\x89PNG' + bytes(2000)).decode('ascii')
+
+
+def _fillAndDelete(templateDB: TemplateDB, count: int) -> None:
+  """Leave a freelist behind, the way a delete/re-import cycle does."""
+  with templateDB.Transaction():
+    for index in range(count):
+      templateDB.AddTemplate(EmailTemplate(f'Bulk {index}', 'x' * 4000))
+
+  templateDB.getConnection().execute("delete from templates where title like 'Bulk %';")
+  templateDB.getConnection().commit()
+
+
+def testSizeReportCountsPagesTablesAndInlineImages(templateDB: TemplateDB) -> None:
+  # Arrange
+  templateDB.AddTemplate(EmailTemplate('Shot', f'<p><img src="{IMAGE_URL}" /></p>'))
+
+  # Act
+  report = size_report(templateDB.getConnection())
+
+  # Assert
+  assert report.fileBytes == report.pageSize * report.pageCount
+  assert report.tableBytes['templates'] > 0
+  assert (report.images.count, report.images.total_bytes) == (1, 2004)
+
+
+def testMaintenanceReclaimsFreePagesIncrementally(templateDB: TemplateDB) -> None:
+  # Arrange: the schema script creates new databases in incremental auto_vacuum mode.
+  _fillAndDelete(templateDB, 200)
+  dbPath = databaseModule.DATABASE_FILE
+
+  # Act
+  result = run_maintenance(dbPath)
+
+  # Assert
+  assert result.ok
+  assert result.before.autoVacuum == AUTO_VACUUM_INCREMENTAL
+  assert result.before.freelistCount > 100
+  assert result.after.freelistCount == 0
+  assert result.after.fileBytes < result.before.fileBytes
+  assert 'incremental vacuum' in result.actions
+
+
+def testMaintenanceSwitchesLegacyDatabaseToIncrementalVacuum(tmp_path: Path) -> None:
+  # Arrange: a database created before auto_vacuum was set in the schema.
+  dbPath = tmp_path / 'legacy.db'
+  schema = (Path(__file__).resolve().parents[1] / 'emstencil' / 'templates.sql').read_text()
+  with sqlite3.connect(dbPath) as legacyDB:
+    legacyDB.executescript(schema.replace('Pragma auto_vacuum = incremental;', ''))
+
+  # Act
+  result = run_maintenance(dbPath)
+
+  # Assert
+  assert result.before.autoVacuum == 0
+  assert result.after.autoVacuum == AUTO_VACUUM_INCREMENTAL
+
+
+def testMaintenanceReportsForeignKeyProblemsAndSkipsVacuum(templateDB: TemplateDB) -> None:
+  # Arrange: a tag link to a template that does not exist.
+  connection = templateDB.getConnection()
+  connection.execute('pragma foreign_keys = OFF')
+  connection.execute("insert into tags (tag) values ('orphan');")
+  connection.execute('insert into templateTags (tmplt_uid, tag_uid) values (999, 1);')
+  connection.commit()
+
+  # Act
+  result = run_maintenance(databaseModule.DATABASE_FILE, vacuumMode='full')
+
+  # Assert
+  assert not result.ok
+  assert 'templateTags row 1 references missing templates' in result.problems[0]
+  assert 'vacuum' not in result.actions
+
+
+def testMaintenanceCommandPrintsReportOnly(
+  templateDB: TemplateDB, capsys: pytest.CaptureFixture[str]
+) -> None:
+  # Act
+  status = cliMain(
+    ['--database', str(databaseModule.DATABASE_FILE), 'maintenance', '--report-only']
+  )
+
+  # Assert
+  assert status == 0
+  assert 'freelist pages' in capsys.readouterr().out
+
+
+def testMaintenanceSweepsTagsNoTemplateCarries(templateDB: TemplateDB) -> None:
+  # Arrange: a tag orphaned outside the application.
+  connection = templateDB.getConnection()
+  connection.execute("insert into tags (tag) values ('stray');")
+  connection.commit()
+  tagged = EmailTemplate('Tagged', 'Body')
+  tagged.metadata = ['kept']
+  templateDB.AddTemplate(tagged)
+
+  # Act
+  result = run_maintenance(databaseModule.DATABASE_FILE, vacuumMode='none')
+
+  # Assert
+  assert 'tag sweep (1 removed)' in result.actions
+  assert [str(tag) for tag in templateDB.FetchAllMetadataTags()] == ['kept']
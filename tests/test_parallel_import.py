@@ -0,0 +1,183 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for the streaming, multi-process workbook reader.
+    Name: Andrew Dixon            File: test_parallel_import.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import datetime
+import re
+import zipfile
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+import emstencil.import_workers as importWorkers
+import emstencil.parallel_import as parallelImport
+from emstencil.Database import TemplateDB
+from emstencil.Exceptions import InvalidImportFileType
+from emstencil.ImportTemplates import convertSpreadsheet
+from emstencil.parallel_import import read_template_rows_parallel
+from emstencil.spreadsheet import EXPORT_HEADERS, read_template_rows
+
+SHEET_PATH = 'xl/worksheets/sheet1.xml'
+
+
+@pytest.fixture()
+def smallChunks(monkeypatch: pytest.MonkeyPatch) -> None:
+  """Force many chunks so row-boundary splitting is exercised on small workbooks."""
+  monkeypatch.setattr(parallelImport, 'CHUNK_BYTES', 256)
+
+
+def _mixedWorkbook(path: Path) -> Path:
+  wb = Workbook()
+  ws = wb.active
+  ws.append(list(EXPORT_HEADERS))
+  for index in range(120):
+    ws.append(
+      [
+        f' Title {index} ',
+        f'<p>Hello ${{name}} #{index}</p>',
+        'Alpha, beta ,' if index % 2 else None,
+      ]
+    )
+  ws.append([])
+  ws.append([42, 2.5, True])
+  ws.append([datetime.datetime(2024, 1, 2, 3, 4), datetime.date(2020, 5, 1), 'x'])
+  ws.cell(row=140, column=2, value='after a gap')
+  ws.cell(row=141, column=6, value='outside A-C')
+  wb.save(path)
+  return path
+
+
+def _rewriteSheet(source: Path, target: Path, rewrite) -> Path:
+  with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target, 'w') as zout:
+    for item in zin.infolist():
+      data = zin.read(item.filename)
+      zout.writestr(item, rewrite(data) if item.filename == SHEET_PATH else data)
+  return target
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def testParallelReaderMatchesOpenpyxlReader(
+  tmp_path: Path, smallChunks: None, workers: int
+) -> None:
+  # Arrange
+  path = _mixedWorkbook(tmp_path / 'mixed.xlsx')
+
+  # Act / Assert: gaps, numbers, dates, booleans and ignored columns come out identically.
+  assert read_template_rows_parallel(str(path), workers) == read_template_rows(str(path))
+
+
+def testParallelReaderHonoursSheetDimensionAndMissingDimension(
+  tmp_path: Path, smallChunks: None
+) -> None:
+  # Arrange: one sheet that claims fewer rows than it holds, one without a dimension at all.
+  path = _mixedWorkbook(tmp_path / 'mixed.xlsx')
+  capped = _rewriteSheet(
+    path,
+    tmp_path / 'capped.xlsx',
+    lambda d: re.sub(rb'<dimension ref="[^"]*"', b'<dimension ref="A1:C50"', d),
+  )
+  undimensioned = _rewriteSheet(
+    path, tmp_path / 'nodim.xlsx', lambda d: re.sub(rb'<dimension[^>]*/>', b'', d)
+  )
+
+  # Act / Assert
+  for workbook in (capped, undimensioned):
+    assert read_template_rows_parallel(str(workbook), 2) == read_template_rows(str(workbook))
+  assert len(read_template_rows_parallel(str(capped), 2)) == 49
+
+
+def testParallelReaderFallsBackWhenRowsAreUnnumbered(tmp_path: Path, smallChunks: None) -> None:
+  # Arrange: a row without r= takes its number from the previous row, which may be in another chunk.
+  path = _rewriteSheet(
+    _mixedWorkbook(tmp_path / 'mixed.xlsx'),
+    tmp_path / 'implicit.xlsx',
+    lambda d: d.replace(b'<row r="60"', b'<row'),
+  )
+
+  # Act / Assert
+  assert read_template_rows_parallel(str(path), 2) == read_template_rows(str(path))
+
+
+@pytest.mark.parametrize('missing', ['parser', 'attribute'])
+def testParallelReaderFallsBackWithoutOpenpyxlInternals(
+  tmp_path: Path, smallChunks: None, monkeypatch: pytest.MonkeyPatch, missing: str
+) -> None:
+  # Arrange: an openpyxl without the worksheet parser, or whose worksheets lack shared strings.
+  path = _mixedWorkbook(tmp_path / 'mixed.xlsx')
+
+  if missing == 'parser':
+    monkeypatch.setattr(importWorkers, 'SHEET_PARSER_AVAILABLE', False)
+
+  else:
+    openWorkbook = parallelImport.open_import_workbook
+
+    def openStripped(path: str):
+      wb = openWorkbook(path)
+      del wb.worksheets[0]._shared_strings
+      return wb
+
+    monkeypatch.setattr(parallelImport, 'open_import_workbook', openStripped)
+
+  monkeypatch.setattr(parallelImport, '_parse_chunks', _unreachable)
+
+  # Act / Assert
+  assert read_template_rows_parallel(str(path), 2) == read_template_rows(str(path))
+
+
+def testImportReaderStaysSerialOnOneCpu(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+  # Arrange: a workbook over the size threshold on a single-CPU machine.
+  path = _mixedWorkbook(tmp_path / 'mixed.xlsx')
+  monkeypatch.setattr(parallelImport, 'PARALLEL_IMPORT_MIN_BYTES', 0)
+  monkeypatch.setattr(parallelImport.os, 'cpu_count', lambda: 1)
+  monkeypatch.setattr(parallelImport, 'read_template_rows_parallel', _unreachable)
+
+  # Act / Assert
+  assert parallelImport.read_import_rows(str(path)) == read_template_rows(str(path))
+
+
+def _unreachable(*args) -> None:
+  raise AssertionError('the single-process reader should have been used')
+
+
+def testParallelReaderRejectsInvalidWorkbook(tmp_path: Path) -> None:
+  path = tmp_path / 'bad.xlsx'
+  path.write_bytes(b'not a zip file')
+
+  with pytest.raises(InvalidImportFileType):
+    read_template_rows_parallel(str(path), 2)
+
+
+def testConvertSpreadsheetWithWorkersStoresSameTemplates(
+  templateDB: TemplateDB, tmp_path: Path, smallChunks: None
+) -> None:
+  # Arrange
+  path = tmp_path / 'import.xlsx'
+  wb = Workbook()
+  ws = wb.active
+  ws.append(list(EXPORT_HEADERS))
+  for index in range(30):
+    ws.append([f'Template {index}', f'Body ${{field}} {index}', 'One, Two'])
+  wb.save(path)
+
+  # Act
+  convertSpreadsheet(str(path), templateDB, workers=2)
+
+  # Assert
+  templates = templateDB.FetchAllTemplates(withMetadata=True)
+  assert len(templates) == 30
+  assert sorted(str(tag) for tag in templates[0].metadata) == ['one', 'two']
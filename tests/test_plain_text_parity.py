@@ -0,0 +1,126 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Parity of the Qt-free clipboard plain-text converter with QTextDocument output.
+    Name: Andrew Dixon            File: test_plain_text_parity.py
+    Date: 19 Oct 2026
+   Notes: Parity is compared after trimming trailing spaces per line and collapsing runs of blank
+          lines, which is where Qt's block model leaves incidental whitespace. [Image] markers are
+          compared as their own line: the old path injected them as "\n[Image]\n" text, which Qt
+          kept or collapsed depending on the surrounding white-space mode.
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+
+import pytest
+from PySide6.QtGui import QTextDocument
+from PySide6.QtWidgets import QApplication
+
+from emstencil.content_html import clipboard_plain_text_from_merged_html, html_to_plain_text
+
+_IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_STANDALONE_DATA_URL_RE = re.compile(r'data:image/[\w+.-]+;base64,[A-Za-z0-9+/=]+', re.IGNORECASE)
+
+PARITY_CASES: list[str] = [
+  '<p>Hello world</p><p>Bye</p>',
+  'a<br>b<br/>c',
+  '<p>a  b\n c</p>',
+  '<ul><li>one</li><li>two</li></ul>',
+  '<ol><li>one</li><li>two</li></ol>',
+  '<ul><li><p>a</p></li><li>b<ul><li>c</li></ul></li></ul>',
+  '<table><tr><td>a</td><td>b</td></tr><tr><td>c</td><td>d</td></tr></table>',
+  '<p>x</p><table><tr><td>a</td><td>b</td></tr></table><p>y</p>',
+  '<p>x</p>\n<table>\n<tr>\n<th>h</th>\n</tr>\n<tr><td></td></tr>\n</table>\n<p>y</p>',
+  '<table><tr><td><p>a</p><p>b</p></td></tr></table><table><tr><td>c</td></tr></table>',
+  'x<table><tr><td>a</td></tr></table>y',
+  '<div><div>a</div></div><div>b</div>',
+  '<h1>Title</h1><p>Body <b>bold</b> and <i>italic</i></p>',
+  'a&nbsp;b &amp; &lt;c&gt; &copy; &#8364;',
+  '<p>x</p>\n\n<p>y</p>',
+  '<p></p><p>y</p>',
+  '<p>a<br/></p><p>b</p>',
+  '<p>a</p><p><br></p><p>b</p>',
+  '<p>x</p><hr/><p>y</p>',
+  'text<p>para</p>tail',
+  '<p>a</p><pre>  x\n\n  y</pre><p>b</p>',
+  '<html><head><style>p { color: red; }</style><title>T</title></head><body><p>x</p></body></html>',
+  '<script>var x = 1;</script>ok',
+  '<blockquote>quoted</blockquote>after',
+  '<dl><dt>term</dt><dd>definition</dd></dl>',
+  '<!-- comment --><p>x</p>',
+  '<p>Hello world</p><img src="data:image/png;base64,QUJDREVGRw==" alt="x" /><p>Bye</p>',
+  '<p>Inline <img src="https://example.com/x.png"> image</p>',
+  '<p>Intro</p><p>data:image/png;base64,QUJD</p>',
+  '<td>a</td><td>b</td>',
+  '<p style="white-space: pre-wrap;">  two  spaces\nkept</p><p>  collapsed   here</p>',
+  '<p style="white-space: pre-wrap;">before <img src="data:image/png;base64,QUJD" /> after</p>',
+]
+
+
+@pytest.fixture(scope='module')
+def qapp() -> QApplication:
+  app = QApplication.instance()
+  if app is None:
+    app = QApplication(sys.argv)
+  return app
+
+
+def _qtClipboardPlainText(html: str) -> str:
+  """The previous QTextDocument-based implementation, kept here as the parity reference."""
+  doc = QTextDocument()
+  doc.setHtml(_IMG_TAG_RE.sub('\n[Image]\n', html))
+  plain = _STANDALONE_DATA_URL_RE.sub('[Image]', doc.toPlainText())
+
+  return plain.strip()
+
+
+def _normalize(text: str) -> str:
+  text = re.sub(r'\s*\[Image\]\s*', '\n[Image]\n', text)
+  lines = [line.rstrip() for line in text.replace(' ', '\n').splitlines()]
+  return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+@pytest.mark.parametrize('html', PARITY_CASES)
+def testPlainTextConverterMatchesQtOutput(qapp: QApplication, html: str) -> None:
+  assert _normalize(clipboard_plain_text_from_merged_html(html)) == _normalize(
+    _qtClipboardPlainText(html)
+  )
+
+
+@pytest.mark.parametrize(
+  'sourceHtml',
+  [
+    None,
+    '<p>Intro ${name}</p><table border="1"><tr><td>a</td><td>${cell}</td></tr></table>'
+    '<ul><li>one</li><li>two</li></ul><p><img src="data:image/png;base64,QUJD" /> tail</p>',
+  ],
+)
+def testPlainTextConverterMatchesQtForEditorGeneratedHtml(
+  qapp: QApplication, sourceHtml: str | None
+) -> None:
+  """Bodies saved by the template editor are QTextEdit.toHtml() documents."""
+  source = QTextDocument()
+  if sourceHtml is None:
+    source.setPlainText('Hi ${name},\n\n  indented line\nlast line & done')
+  else:
+    source.setHtml(sourceHtml)
+  editorHtml = source.toHtml()
+
+  assert _normalize(clipboard_plain_text_from_merged_html(editorHtml)) == _normalize(
+    _qtClipboardPlainText(editorHtml)
+  )
+
+
+def testPlainTextConverterNeedsNoQApplication() -> None:
+  """The converter is pure Python; it works in headless paths with no Qt application."""
+  assert html_to_plain_text('<p>a</p><ul><li>b</li></ul><img src="x">') == 'a\nb\n[Image]'
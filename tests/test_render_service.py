@@ -0,0 +1,190 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for the local HTTP render service and its template cache.
+    Name: Andrew Dixon            File: test_render_service.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+from collections.abc import Iterator
+from http import HTTPStatus
+
+import emstencil.Database as databaseModule
+import emstencil.render_service as renderServiceModule
+import pytest
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate
+from emstencil.render_service import RenderService, TemplateCache, start_render_server
+
+
+@pytest.fixture()
+def renderService(templateDB: TemplateDB) -> Iterator[RenderService]:
+  templateDB.AddTemplate(EmailTemplate('Greeting', 'Hello ${Name}, ticket ${ticket}.'))
+  cache = TemplateCache(databaseModule.DATABASE_FILE)
+  yield RenderService(cache)
+  cache.close()
+
+
+def _post(service: RenderService, path: str, payload: object) -> tuple[HTTPStatus, dict]:
+  return service.dispatch('POST', path, json.dumps(payload).encode('utf-8'))
+
+
+def testRenderServiceRendersWithFieldCasing(renderService: RenderService) -> None:
+  # Act
+  status, payload = _post(
+    renderService, '/render/Greeting', {'fields': {'Name': 'ada lovelace', 'ticket': 'AB-1'}}
+  )
+
+  # Assert: same case matching as the field entry dialog; cached template is not mutated.
+  assert status == HTTPStatus.OK
+  assert payload == {
+    'title': 'Greeting',
+    'content': 'Hello Ada Lovelace, ticket ab-1.',
+    'html': False,
+  }
+  assert renderService.cache.get('Greeting').template.fields == {'Name': None, 'ticket': None}
+
+
+def testRenderServiceReportsErrors(renderService: RenderService) -> None:
+  assert _post(renderService, '/render/Missing', {'fields': {}})[0] == HTTPStatus.NOT_FOUND
+  assert (
+    _post(renderService, '/render/Greeting', {'fields': {'Name': 'x'}})[0]
+    == HTTPStatus.UNPROCESSABLE_ENTITY
+  )
+  assert renderService.dispatch('POST', '/render/Greeting', b'{nope')[0] == HTTPStatus.BAD_REQUEST
+  assert renderService.dispatch('GET', '/render/Greeting', b'')[0] == HTTPStatus.METHOD_NOT_ALLOWED
+
+
+def testRenderServiceBatchKeepsOrderAndPerItemErrors(renderService: RenderService) -> None:
+  # Arrange
+  requests = [
+    {'title': 'Greeting', 'fields': {'Name': 'bob', 'ticket': 'T1'}},
+    {'title': 'Nope', 'fields': {}},
+    {'title': 'Greeting', 'fields': {'Name': 'eve', 'ticket': 'T2'}},
+  ]
+
+  # Act
+  status, payload = _post(renderService, '/render-batch', {'requests': requests})
+
+  # Assert
+  assert status == HTTPStatus.OK
+  results = payload['results']
+  assert [result.get('content') for result in results] == [
+    'Hello Bob, ticket t1.',
+    None,
+    'Hello Eve, ticket t2.',
+  ]
+  assert results[1]['status'] == HTTPStatus.NOT_FOUND
+
+
+def testTemplateCacheReloadsOnlyWhenDataVersionChanges(
+  templateDB: TemplateDB, renderService: RenderService
+) -> None:
+  # Arrange: first request loads the cache.
+  renderService.dispatch('GET', '/health', b'')
+  loads = renderService.cache.loads
+
+  # Act: reads alone do not reload; a commit on another connection does.
+  renderService.dispatch('GET', '/health', b'')
+  unchangedLoads = renderService.cache.loads
+  templateDB.AddTemplate(EmailTemplate('Later', 'Bye ${name}'))
+  status, payload = _post(renderService, '/render/Later', {'fields': {'name': 'ZED'}})
+
+  # Assert
+  assert unchangedLoads == loads
+  assert renderService.cache.loads == loads + 1
+  assert (status, payload['content']) == (HTTPStatus.OK, 'Bye zed')
+
+
+def testTemplateCacheRereadsOnlyChangedTemplates(
+  templateDB: TemplateDB, renderService: RenderService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+  # Arrange: a loaded cache, with template construction counted from here on.
+  for index in range(20):
+    templateDB.AddTemplate(EmailTemplate(f'Bulk {index}', 'Body ${x}'))
+  cache = renderService.cache
+  cache.refresh()
+  built: list[str] = []
+
+  def countingTemplate(title: str, content: str) -> EmailTemplate:
+    built.append(title)
+    return EmailTemplate(title, content)
+
+  monkeypatch.setattr(renderServiceModule, 'EmailTemplate', countingTemplate)
+
+  # Act: rename one template, edit another and delete a third in separate commits.
+  byTitle = {tmplt.title: tmplt for tmplt in templateDB.FetchAllTemplates()}
+  renamed, edited = byTitle['Bulk 1'], byTitle['Bulk 2']
+  renamed.title = 'Renamed'
+  templateDB.UpdateTemplate(renamed)
+  edited.content = 'Edited ${y}'
+  templateDB.UpdateTemplate(edited)
+  templateDB.DeleteTemplate(byTitle['Bulk 3'])
+  cache.refresh()
+  incremental = sorted(built)
+
+  # A change log pruned past the cache's position forces a full read.
+  templateDB.AddTemplate(EmailTemplate('Pruned', 'Body'))
+  templateDB.AddTemplate(EmailTemplate('Kept', 'Body'))
+  with sqlite3.connect(databaseModule.DATABASE_FILE) as connection:
+    connection.execute('delete from templateChanges where seq <= ?;', [cache.lastSeq + 1])
+  built.clear()
+  cache.refresh()
+
+  # Assert
+  assert incremental == ['Bulk 2', 'Renamed']
+  assert 'Bulk 1' not in cache.templates and 'Bulk 3' not in cache.templates
+  assert set(cache.templates) == {tmplt.title for tmplt in templateDB.FetchAllTemplates()}
+  assert cache.get(edited.title).template.content == 'Edited ${y}'
+  assert len(built) == len(cache.templates)
+
+
+def testRenderServiceServesKeepAliveHttp(templateDB: TemplateDB) -> None:
+  """Two requests on one connection through the real asyncio server."""
+  templateDB.AddTemplate(EmailTemplate('Greeting', 'Hello ${Name}'))
+  cache = TemplateCache(databaseModule.DATABASE_FILE)
+
+  async def exchange() -> list[tuple[bytes, dict]]:
+    server = await start_render_server(cache, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    responses = []
+
+    for name in ('amy', 'ben'):
+      body = json.dumps({'fields': {'Name': name}}).encode()
+      writer.write(
+        b'POST /render/Greeting HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s'
+        % (len(body), body)
+      )
+      await writer.drain()
+      head = await reader.readuntil(b'\r\n\r\n')
+      length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+      responses.append((head.split(b'\r\n')[0], json.loads(await reader.readexactly(length))))
+
+    writer.close()
+    server.close()
+    await server.wait_closed()
+
+    return responses
+
+  try:
+    responses = asyncio.run(exchange())
+
+  finally:
+    cache.close()
+
+  assert [status for status, _ in responses] == [b'HTTP/1.1 200 OK'] * 2
+  assert [payload['content'] for _, payload in responses] == ['Hello Amy', 'Hello Ben']
@@ -0,0 +1,229 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for compressed database snapshots, retention, restore and the pre-import snapshot.
+    Name: Andrew Dixon            File: test_snapshots.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+import emstencil.Database as databaseModule
+import emstencil.snapshots as snapshotsModule
+from emstencil.change_tracker import TemplateChangeTracker
+from emstencil.cli import main as cliMain
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate, State
+from emstencil.Exceptions import InvalidSnapshot
+from emstencil.ImportTemplates import convertSpreadsheet
+from emstencil.render_service import TemplateCache
+from emstencil.snapshots import (
+  create_snapshot,
+  list_snapshots,
+  restore_snapshot,
+  snapshot_dir_for,
+)
+from emstencil.spreadsheet import write_templates_workbook
+
+
+def _titles(templateDB: TemplateDB) -> list[str]:
+  return [str(tmplt) for tmplt in templateDB.FetchAllTemplates()]
+
+
+def testSnapshotIsTakenInStepsWhileTheDatabaseIsWritten(
+  templateDB: TemplateDB, monkeypatch: pytest.MonkeyPatch
+) -> None:
+  # Arrange: enough pages for several four-page steps; one write lands mid-backup.
+  with templateDB.Transaction():
+    for index in range(20):
+      templateDB.AddTemplate(EmailTemplate(f'Bulk {index}', 'x' * 4000))
+  monkeypatch.setattr(snapshotsModule, 'BACKUP_PAGES_PER_STEP', 4)
+  phases: list[str] = []
+
+  def progress(phase: str, done: int, total: int) -> None:
+    if phase == 'copy' and 'copy' not in phases:
+      templateDB.AddTemplate(EmailTemplate('Written during backup', 'Body'))
+    phases.append(phase)
+
+  # Act
+  snapshot = create_snapshot(databaseModule.DATABASE_FILE, progress=progress)
+
+  # Assert: the write was not blocked, and the snapshot holds it (the backup restarted).
+  assert phases.count('copy') > 2 and 'compress' in phases
+  assert snapshot.path.parent == snapshot_dir_for(databaseModule.DATABASE_FILE)
+  assert snapshot.fileBytes < databaseModule.DATABASE_FILE.stat().st_size
+  assert gzip.decompress(snapshot.path.read_bytes())[:16] == b'SQLite format 3\x00'
+  restore_snapshot(snapshot, databaseModule.DATABASE_FILE, keepCurrent=False)
+  assert 'Written during backup' in _titles(TemplateDB())
+
+
+def testSnapshotFinishesInOneStepWhenWritesKeepRestartingIt(
+  templateDB: TemplateDB, monkeypatch: pytest.MonkeyPatch
+) -> None:
+  # Arrange: a commit from another connection after every step.
+  with templateDB.Transaction():
+    for index in range(20):
+      templateDB.AddTemplate(EmailTemplate(f'Bulk {index}', 'x' * 4000))
+  monkeypatch.setattr(snapshotsModule, 'BACKUP_PAGES_PER_STEP', 4)
+  writes = iter(range(1000))
+
+  def progress(phase: str, done: int, total: int) -> None:
+    if phase == 'copy':
+      templateDB.AddTemplate(EmailTemplate(f'Busy {next(writes)}', 'Body'))
+
+  # Act
+  snapshot = create_snapshot(databaseModule.DATABASE_FILE, progress=progress)
+  written = next(writes)
+  restore_snapshot(snapshot, databaseModule.DATABASE_FILE, keepCurrent=False)
+
+  # Assert: a few restarts, then one step holding every write but the one made after it finished.
+  assert written == snapshotsModule.BACKUP_MAX_RESTARTS + 2
+  assert sum(title.startswith('Busy') for title in _titles(TemplateDB())) == written - 1
+
+
+def testSnapshotRetentionKeepsTheNewest(templateDB: TemplateDB, tmp_path: Path) -> None:
+  # Arrange
+  snapshotDir = tmp_path / 'kept'
+
+  # Act
+  taken = [
+    create_snapshot(databaseModule.DATABASE_FILE, snapshotDir, reason, keep=2)
+    for reason in ('first', 'second', 'third')
+  ]
+
+  # Assert
+  assert [snapshot.reason for snapshot in list_snapshots(snapshotDir)] == ['third', 'second']
+  assert not taken[0].path.exists()
+  with pytest.raises(ValueError):
+    create_snapshot(databaseModule.DATABASE_FILE, snapshotDir, 'Not A Slug')
+
+
+def testRestoreReplacesDatabaseAndKeepsThePreviousState(templateDB: TemplateDB) -> None:
+  # Arrange
+  templateDB.AddTemplate(EmailTemplate('Kept', 'Body'))
+  snapshot = create_snapshot(databaseModule.DATABASE_FILE)
+  templateDB.AddTemplate(EmailTemplate('Added later', 'Body'))
+
+  # Act
+  previous = restore_snapshot(snapshot, databaseModule.DATABASE_FILE)
+
+  # Assert: the open connection sees the restored data; the replaced state is a snapshot too.
+  assert _titles(templateDB) == ['Kept']
+  assert previous is not None and previous.reason == 'pre-restore'
+  restore_snapshot(previous, databaseModule.DATABASE_FILE, keepCurrent=False)
+  assert _titles(templateDB) == ['Kept', 'Added later']
+
+
+def testRestoreUnderLiveTrackerAndRenderCacheReloadsThem(templateDB: TemplateDB) -> None:
+  # Arrange: a tracker and a render cache that have seen every change up to the restore.
+  templateDB.AddTemplate(EmailTemplate('A', 'Old ${x}'))
+  snapshot = create_snapshot(databaseModule.DATABASE_FILE)
+  original = templateDB.FetchAllTemplates()[0]
+  original.content = 'New ${x}'
+  templateDB.UpdateTemplate(original)
+  templateDB.AddTemplate(EmailTemplate('B', 'Body'))
+  tracker = TemplateChangeTracker(templateDB)
+  cache = TemplateCache(databaseModule.DATABASE_FILE)
+  cache.refresh()
+  seqQuery = 'select max(seq) from templateChanges;'
+  seqBefore = templateDB.getConnection().execute(seqQuery).fetchone()[0]
+
+  try:
+    # Act: restore as another process (the CLI) would, then edit the restored template.
+    restore_snapshot(snapshot, databaseModule.DATABASE_FILE, keepCurrent=False)
+    restored = {(change.state, change.rowID) for change in tracker.poll()}
+    cache.refresh()
+    cachedAfterRestore = {title: cache.get(title).template.content for title in cache.templates}
+    edited = templateDB.FetchAllTemplates()[0]
+    edited.content = 'Edited ${x}'
+    templateDB.UpdateTemplate(edited)
+    afterEdit = tracker.poll()
+    cache.refresh()
+
+  finally:
+    tracker.close()
+    cache.close()
+
+  # Assert: seq kept climbing, so both readers noticed the restore and the edit after it.
+  assert templateDB.getConnection().execute(seqQuery).fetchone()[0] > seqBefore
+  assert restored == {(State.UPDATED, original.rowID), (State.DELETED, original.rowID + 1)}
+  assert cachedAfterRestore == {'A': 'Old ${x}'}
+  assert [change.template.content for change in afterEdit] == ['Edited ${x}']
+  assert cache.get('A').template.content == 'Edited ${x}'
+
+
+def testRestoreRejectsDamagedSnapshotWithoutTouchingTheDatabase(
+  templateDB: TemplateDB, tmp_path: Path
+) -> None:
+  # Arrange
+  templateDB.AddTemplate(EmailTemplate('Live', 'Body'))
+  notSQLite = tmp_path / 'templates-20260101-000000-000000-manual.db.gz'
+  notSQLite.write_bytes(gzip.compress(b'not a database' * 100))
+  truncated = tmp_path / 'truncated.db.gz'
+  truncated.write_bytes(create_snapshot(databaseModule.DATABASE_FILE).path.read_bytes()[:200])
+
+  # Act / Assert
+  for damaged in (notSQLite, truncated):
+    with pytest.raises(InvalidSnapshot):
+      restore_snapshot(damaged, databaseModule.DATABASE_FILE)
+
+  assert _titles(templateDB) == ['Live']
+  snapshots = list_snapshots(snapshot_dir_for(databaseModule.DATABASE_FILE))
+  assert [snapshot.reason for snapshot in snapshots] == ['manual']
+
+
+def testImportTakesPreImportSnapshotAndCliRestoresIt(
+  templateDB: TemplateDB, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+  # Arrange
+  templateDB.AddTemplate(EmailTemplate('Original', 'Before import'))
+  workbook = tmp_path / 'import.xlsx'
+  write_templates_workbook(str(workbook), [('Original', 'After import', ''), ('New', 'Body', '')])
+  convertSpreadsheet(str(workbook), templateDB)
+  preImport = list_snapshots(snapshot_dir_for(databaseModule.DATABASE_FILE))
+  database = ['--database', str(databaseModule.DATABASE_FILE)]
+
+  # Act
+  listed = cliMain([*database, 'snapshot', 'list'])
+  restored = cliMain([*database, 'snapshot', 'restore', preImport[0].path.name])
+
+  # Assert
+  assert [snapshot.reason for snapshot in preImport] == ['pre-import']
+  assert (listed, restored) == (0, 0)
+  out = capsys.readouterr().out
+  assert preImport[0].path.name in out
+  assert 'previous state saved as' in out
+  db = TemplateDB()
+  assert _titles(db) == ['Original']
+  assert db.FetchAllTemplates()[0].content == 'Before import'
+
+
+def testPreImportSnapshotCopiesTheDatabaseBeingWritten(
+  templateDB: TemplateDB, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+  # Arrange: the module-level path now names another file than the one templateDB writes.
+  workbook = tmp_path / 'import.xlsx'
+  write_templates_workbook(str(workbook), [('New', 'Body', '')])
+  other = tmp_path / 'other' / 'templates.db'
+  monkeypatch.setattr(databaseModule, 'DATABASE_FILE', other)
+
+  # Act
+  convertSpreadsheet(str(workbook), templateDB, workers=0)
+
+  # Assert
+  (snapshot,) = list_snapshots(snapshot_dir_for(templateDB.databaseFile))
+  assert snapshot.reason == 'pre-import'
+  assert not snapshot_dir_for(other).exists()
@@ -0,0 +1,167 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for structured log events, the JSON-lines formatter and the log analyzer.
+    Name: Andrew Dixon            File: test_structured_logging.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from emstencil.cli import main as cliMain
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate
+from emstencil.ImportTemplates import convertSpreadsheet
+from emstencil.log_analysis import analyze_logs
+from emstencil.log_index import LogIndex
+from emstencil.Logging import LOGGER, JsonLinesFormatter, timed_event
+from emstencil.spreadsheet import write_templates_workbook
+
+
+@pytest.fixture
+def jsonLog() -> Iterator[io.StringIO]:
+  """Records logged during the test, as the JSON-lines run log would hold them."""
+  stream = io.StringIO()
+  handler = logging.StreamHandler(stream)
+  handler.setFormatter(JsonLinesFormatter())
+  LOGGER.addHandler(handler)
+  yield stream
+  LOGGER.removeHandler(handler)
+
+
+def _events(stream: io.StringIO) -> list[dict]:
+  records = [json.loads(line) for line in stream.getvalue().splitlines()]
+  return [record for record in records if 'event' in record]
+
+
+def testTimedEventWritesJsonLinesWithDurationAndOutcome(
+  jsonLog: io.StringIO, tmp_path: Path
+) -> None:
+  # Act
+  with timed_event('export', path='out.xlsx') as event:
+    event['rows'] = 3
+
+  with pytest.raises(OSError), timed_event('export'):
+    raise OSError('disk full')
+
+  # Assert: ts and level lead each line; failures are logged at ERROR.
+  ok, failed = _events(jsonLog)
+  assert list(ok)[:2] == ['ts', 'level']
+  assert (ok['level'], ok['event'], ok['ok'], ok['rows'], ok['path']) == (
+    'INFO',
+    'export',
+    True,
+    3,
+    'out.xlsx',
+  )
+  assert ok['duration_ms'] >= 0 and ok['message'].startswith('export duration_ms=')
+  assert (failed['level'], failed['ok'], failed['error']) == ('ERROR', False, 'OSError')
+  logFile = tmp_path / 'runlog.log'
+  logFile.write_text(jsonLog.getvalue(), encoding='utf-8')
+  assert list(LogIndex(logFile).build().levels) == [2, 4]
+
+
+def testDatabaseWritesLogOneEventPerMethodPerTransaction(
+  templateDB: TemplateDB, caplog: pytest.LogCaptureFixture
+) -> None:
+  # Arrange
+  caplog.set_level(logging.DEBUG)
+
+  # Act: three upserts and a tag assignment in one transaction, then a write of its own.
+  with templateDB.Transaction():
+    for title in ('One', 'Two', 'Three'):
+      templateDB.UpsertTemplateByTitle(EmailTemplate(title, 'é' * 10))
+    templateDB.AssignTagToTemplates('billing', [1, 2])
+  templateDB.DeleteTemplate(EmailTemplate('Two', ''))
+
+  with pytest.raises(Exception), templateDB.Transaction():
+    templateDB.AddTemplate(EmailTemplate('Rolled back', 'Body'))
+    raise RuntimeError('abort')
+
+  # Assert: rolled back writes are not reported.
+  events = {record.event: record.fields for record in caplog.records if hasattr(record, 'event')}
+  assert list(events) == ['db.upsert_template', 'db.assign_tag', 'db.delete_template']
+  upserts = events['db.upsert_template']
+  assert (upserts['calls'], upserts['rows'], upserts['bytes']) == (3, 3, 60)
+  assert upserts['transaction_ms'] >= upserts['duration_ms']
+  assert events['db.assign_tag']['rows'] == 2
+  assert events['db.delete_template']['calls'] == 1
+
+
+def testDatabaseInnerRollbackDropsOnlyItsOwnWrites(
+  templateDB: TemplateDB, caplog: pytest.LogCaptureFixture
+) -> None:
+  # Arrange
+  caplog.set_level(logging.DEBUG)
+
+  # Act: an inner block rolls back to its savepoint; the outer block commits.
+  with templateDB.Transaction():
+    templateDB.AddTemplate(EmailTemplate('Kept', 'Body'))
+
+    with pytest.raises(RuntimeError), templateDB.Transaction():
+      templateDB.AddTemplate(EmailTemplate('Rolled back', 'Body'))
+      templateDB.UpsertTemplateByTitle(EmailTemplate('Also rolled back', 'Body'))
+      raise RuntimeError('abort')
+
+  # Assert: the tally is the outer block's alone.
+  events = {record.event: record.fields for record in caplog.records if hasattr(record, 'event')}
+  assert list(events) == ['db.add_template']
+  assert (events['db.add_template']['calls'], events['db.add_template']['rows']) == (1, 1)
+
+
+def testImportEventsAreSummarizedAcrossLogFiles(
+  templateDB: TemplateDB,
+  jsonLog: io.StringIO,
+  tmp_path: Path,
+  capsys: pytest.CaptureFixture[str],
+) -> None:
+  # Arrange: two imports on one desktop, one on another (its log gzipped).
+  workbook = tmp_path / 'import.xlsx'
+  write_templates_workbook(str(workbook), [('A', 'Body', 'x'), ('B', 'Body', '')])
+  convertSpreadsheet(str(workbook), templateDB, workers=0, snapshot=False)
+  convertSpreadsheet(str(workbook), templateDB, workers=0, snapshot=False)
+  logs = tmp_path / 'logs'
+  logs.mkdir()
+  (logs / 'desk1.log').write_text(
+    '2026-10-19 09:00:00,000 - INFO - old text line\n' + jsonLog.getvalue()
+  )
+  imports = [record for record in _events(jsonLog) if record['event'] == 'import']
+  other = dict(imports[0], host='desk2', duration_ms=1000.0, ok=False)
+  (logs / 'desk2.log.gz').write_bytes(gzip.compress(json.dumps(other).encode() + b'\n'))
+
+  # Act
+  analysis = analyze_logs([logs], eventPrefix='import')
+  byHost = analyze_logs([logs], eventPrefix='import', byHost=True)
+  exitCode = cliMain(['analyze-logs', str(logs), '--event', 'db.', '--json'])
+
+  # Assert
+  assert imports[0]['rows'] == 2 and imports[0]['bytes'] == workbook.stat().st_size
+  assert {'read_ms', 'validate_ms', 'write_ms'} <= set(imports[0])
+  assert analysis.files == 2 and analysis.skipped >= 1
+  (timing,) = analysis.timings
+  assert (timing.event, timing.count, timing.failures, timing.rows) == ('import', 3, 1, 6)
+  assert timing.percentiles[99] == timing.maxMs == 1000.0
+  assert timing.percentiles[50] < 1000.0
+  hostCounts = {timing.host: timing.count for timing in byHost.timings}
+  assert len(hostCounts) == 2 and hostCounts['desk2'] == 1
+  assert exitCode == 0
+  summary = json.loads(capsys.readouterr().out)
+  assert [row['event'] for row in summary] == ['db.upsert_template']
+  assert summary[0]['count'] == 2 and summary[0]['rows'] == 4
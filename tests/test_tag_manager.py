@@ -0,0 +1,116 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for the bulk tag operations from the tag manager dialog and the tags command.
+    Name: Andrew Dixon            File: test_tag_manager.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import sys
+
+import pytest
+from PySide6.QtWidgets import QApplication, QMessageBox
+
+import emstencil.Database as databaseModule
+from emstencil.cli import main as cliMain
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate, MetadataTag
+from emstencil.TagManagerDialog import TagManagerDialog
+
+
+@pytest.fixture
+def qapp() -> QApplication:
+  app = QApplication.instance()
+  if app is None:
+    app = QApplication(sys.argv)
+  return app
+
+
+def _addTagged(templateDB: TemplateDB, title: str, *tags: str) -> EmailTemplate:
+  template = EmailTemplate(title, 'Body')
+  template.metadata = [MetadataTag(tag) for tag in tags]
+  templateDB.AddTemplate(template)
+
+  return template
+
+
+def _select(listWidget, texts: set[str]) -> None:
+  for index in range(listWidget.count()):
+    item = listWidget.item(index)
+    item.setSelected(item.text().split('  [')[0] in texts)
+
+
+def testTagManagerMergesSelectedTagsAndTagsSelectedTemplates(
+  qapp: QApplication, templateDB: TemplateDB
+) -> None:
+  # Arrange
+  _addTagged(templateDB, 'One', 'sales')
+  _addTagged(templateDB, 'Two', 'revenue')
+  _addTagged(templateDB, 'Three')
+  dialog = TagManagerDialog()
+
+  # Act
+  _select(dialog.tagList, {'sales', 'revenue'})
+  merged = dialog.MergeSelectedTags('income')
+  _select(dialog.templateList, {'Three'})
+  assigned = dialog.AssignTag('income')
+
+  # Assert
+  assert (merged, assigned) == (2, 1)
+  assert dialog.changed
+  assert [dialog.tagList.item(index).text() for index in range(dialog.tagList.count())] == [
+    'income'
+  ]
+  assert len(templateDB.FetchTemplatesForTag('income')) == 3
+
+
+def testTagManagerWarnsInsteadOfRenamingOntoAnExistingTag(
+  qapp: QApplication, templateDB: TemplateDB, monkeypatch: pytest.MonkeyPatch
+) -> None:
+  # Arrange
+  _addTagged(templateDB, 'One', 'a', 'b')
+  warnings: list[str] = []
+  monkeypatch.setattr(QMessageBox, 'warning', lambda parent, title, text: warnings.append(text))
+  dialog = TagManagerDialog()
+  _select(dialog.tagList, {'a'})
+
+  # Act
+  result = dialog.RenameSelectedTag('b')
+
+  # Assert
+  assert result is None
+  assert not dialog.changed
+  assert 'merge the tags' in warnings[0]
+
+
+def testTagsCommandRenamesAndAssignsByTag(
+  templateDB: TemplateDB, capsys: pytest.CaptureFixture[str]
+) -> None:
+  # Arrange
+  _addTagged(templateDB, 'One', 'draft')
+  _addTagged(templateDB, 'Two', 'draft')
+  _addTagged(templateDB, 'Three')
+  database = ['--database', str(databaseModule.DATABASE_FILE)]
+
+  # Act
+  renamed = cliMain([*database, 'tags', 'rename', 'draft', 'review'])
+  assigned = cliMain(
+    [*database, 'tags', 'assign', 'q4', '--with-tag', 'review', '--template', 'Three']
+  )
+
+  # Assert
+  assert (renamed, assigned) == (0, 0)
+  out = capsys.readouterr().out
+  assert 'renamed draft to review on 2 template(s)' in out
+  assert 'added q4 to 3 of 3 template(s)' in out
+  assert [str(tag) for tag in TemplateDB().FetchAllMetadataTags()] == ['review', 'q4']
@@ -20,6 +20,7 @@ import sys
 from unittest.mock import MagicMock
 
 import pytest
+from PySide6.QtCore import QThreadPool
 from PySide6.QtWidgets import QApplication
 
 from emstencil.Dataclasses import EmailTemplate
@@ -86,3 +87,85 @@ def testEditorNewTemplateWithTableSavesAsHtml(qapp: QApplication, mock_db: None)
   out = dlg.BuildTemplateFromFields().content
   assert '<table' in out.lower()
   assert '${cell}' in out
+
+
+def testEditorSaveReturnsTheStoredTemplate(qapp: QApplication, mock_db: None) -> None:
+  from emstencil.TemplateEditorDialog import TemplateEditorDialog
+
+  original = EmailTemplate('T', 'Hello ${name}')
+  original.rowID = 7
+  dlg = TemplateEditorDialog(original)
+  dlg.templateField.setPlainText('Changed ${name}')
+
+  saved = dlg.SaveClicked()
+
+  dlg.db.UpdateTemplate.assert_called_once_with(saved)
+  assert dlg.affectedTemplate is saved
+  assert (saved.rowID, saved.content) == (7, 'Changed ${name}')
+
+
+def _drainAnalysis(app: QApplication) -> None:
+  """Wait for the analysis task, then deliver its queued result on this thread."""
+  QThreadPool.globalInstance().waitForDone()
+  app.processEvents()
+
+
+def testEditorAnalysisReportsFieldsAndSizeOffThread(qapp: QApplication, mock_db: None) -> None:
+  from emstencil.TemplateEditorDialog import TemplateEditorDialog
+
+  dlg = TemplateEditorDialog(None)
+  dlg.templateField.setPlainText('Hi ${name}, see ^{shot}')
+
+  dlg.StartAnalysis()
+  _drainAnalysis(qapp)
+
+  assert dlg.analysis.fields == (('name', 'text'), ('shot', 'image'))
+  assert dlg.analysis.conflict is None
+  assert 'Fields: name, shot (image)' in dlg.analysisLabel.text()
+
+
+def testEditorKeystrokesDoNotSerializeTheDocument(qapp: QApplication, mock_db: None) -> None:
+  from emstencil.TemplateEditorDialog import TemplateEditorDialog
+
+  dlg = TemplateEditorDialog(EmailTemplate('T', '<p>Hello ${name}</p>'))
+  _drainAnalysis(qapp)
+  calls: list[int] = []
+  toHtml = dlg.templateField.toHtml
+  dlg.templateField.toHtml = lambda: calls.append(1) or toHtml()
+
+  # Act: type, then let the debounce fire once and save.
+  for char in 'typing':
+    dlg.templateField.insertPlainText(char)
+  typedCalls, debouncing = len(calls), dlg.analysisTimer.isActive()
+  dlg.StartAnalysis()
+  _drainAnalysis(qapp)
+  content = dlg.BuildTemplateFromFields().content
+
+  # Assert: no serialization per keystroke, one for the analysis, none again at save.
+  assert (typedCalls, debouncing) == (0, True)
+  assert len(calls) == 1
+  assert 'typing' in content
+
+
+def testEditorIgnoresStaleAnalysisAndBlocksConflictingSave(
+  qapp: QApplication, mock_db: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+  from emstencil.TemplateEditorDialog import TemplateEditorDialog
+
+  warnings: list[str] = []
+  monkeypatch.setattr(
+    'emstencil.TemplateEditorDialog.QMessageBox.warning',
+    lambda parent, title, text: warnings.append(text),
+  )
+  dlg = TemplateEditorDialog(None)
+  dlg.titleField.setText('Clash')
+  dlg.templateField.setPlainText('${shot}')
+  dlg.StartAnalysis()
+  dlg.templateField.setPlainText('${shot} and ^{shot}')
+  _drainAnalysis(qapp)
+
+  # Assert: the result for the older body is dropped; saving the new one is refused.
+  assert dlg.analysis is None
+  assert dlg.SaveClicked() is None
+  assert "'shot'" in warnings[0]
+  dlg.db.AddTemplate.assert_not_called()
@@ -0,0 +1,106 @@
+#! /usr/bin/env python3
+
+"""
+ Program: Tests for buffered template usage recording and the 'recent' template filter.
+    Name: Andrew Dixon            File: test_usage.py
+    Date: 19 Oct 2026
+   Notes:
+
+  Copyright (c) 2023-2026 Andrew Dixon
+
+  This file is part of EmStencil.
+  Licensed under the GNU Lesser General Public License v2.1.
+  See the LICENSE file at the project root for details.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from __future__ import annotations
+
+import sys
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from emstencil.Database import TemplateDB
+from emstencil.Dataclasses import EmailTemplate
+from emstencil.TemplateLoader import loadTemplateSelector
+from emstencil.usage import USAGE_RECORDER, UsageRecorder
+
+
+@pytest.fixture
+def qapp() -> QApplication:
+  app = QApplication.instance()
+  if app is None:
+    app = QApplication(sys.argv)
+  return app
+
+
+def _addTemplates(templateDB: TemplateDB, *titles: str) -> list[EmailTemplate]:
+  templates = [EmailTemplate(title, f'{title} body') for title in titles]
+  for template in templates:
+    templateDB.AddTemplate(template)
+
+  return templates
+
+
+def testUsageRecorderWritesBufferedUsesInOneBatch(templateDB: TemplateDB) -> None:
+  # Arrange
+  first, second, deleted = _addTemplates(templateDB, 'First', 'Second', 'Deleted')
+  recorder = UsageRecorder()
+  for _ in range(3):
+    recorder.record_select(second.rowID)
+  recorder.record_copy(second.rowID)
+  recorder.record_select(first.rowID)
+  recorder.record_select(deleted.rowID)
+  recorder.record_select(0)
+  templateDB.DeleteTemplate(deleted)
+  templateDB.queryStats.reset()
+
+  # Act
+  written = recorder.flush(templateDB)
+
+  # Assert: one round trip for three templates; the deleted template's uses are dropped.
+  assert (written, recorder.pending) == (3, 0)
+  assert templateDB.queryStats.calls['upsert_template_usage'] == 1
+  assert templateDB.queryStats.executions['upsert_template_usage'] == 3
+  rows = templateDB.getConnection().execute(
+    'select tmplt_uid, select_count, copy_count from templateUsage order by tmplt_uid;'
+  )
+  assert rows.fetchall() == [(first.rowID, 1, 0), (second.rowID, 3, 1)]
+  assert [str(tmplt) for tmplt in templateDB.FetchRecentTemplates()] == ['Second', 'First']
+
+
+def testRecentTemplatesFavourRecentUseOverOldVolume(templateDB: TemplateDB) -> None:
+  # Arrange: ten uses a month ago against one use today.
+  old, fresh, _ = _addTemplates(templateDB, 'Old', 'Fresh', 'Unused')
+  monthAgo = templateDB.getConnection().execute("select datetime('now', '-30 days');").fetchone()[0]
+  today = templateDB.getConnection().execute("select datetime('now');").fetchone()[0]
+
+  # Act
+  templateDB.RecordTemplateUsage([(old.rowID, 10, 0, monthAgo), (fresh.rowID, 0, 1, today)])
+  templateDB.RecordTemplateUsage([(old.rowID, 0, 0, monthAgo)])
+
+  # Assert
+  assert [str(tmplt) for tmplt in templateDB.FetchRecentTemplates()] == ['Fresh', 'Old']
+  assert [str(tmplt) for tmplt in templateDB.FetchRecentTemplates(limit=1)] == ['Fresh']
+
+
+def testQuickPickShowsRecentFilterIncludingUnflushedUses(
+  qapp: QApplication, templateDB: TemplateDB
+) -> None:
+  # Arrange: uses recorded by the selector are still only buffered.
+  _addTemplates(templateDB, 'Rare', 'Common', 'Unused')
+  selector = loadTemplateSelector()
+  for index, uses in ((0, 1), (1, 2)):
+    selector.templateComboBox.setCurrentIndex(index)
+    for _ in range(uses):
+      selector.copyCLicked()
+
+  # Act
+  selector.pickRecentTemplate(2)
+
+  # Assert
+  assert USAGE_RECORDER.pending == 0
+  assert str(selector.metaTagComboBox.currentData()) == 'recent'
+  assert [str(tmplt) for tmplt in selector.templateList] == ['Common', 'Rare']
+  assert str(selector.getSelectedTemplate()) == 'Rare'